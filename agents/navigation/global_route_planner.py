@@ -8,7 +8,15 @@
 This module provides GlobalRoutePlanner implementation.
 """
 
+import hashlib
 import math
+import os
+import pickle
+import re
+from heapq import heappop, heappush
+from itertools import count
+from typing import NamedTuple
+
 import numpy as np
 import networkx as nx
 
@@ -16,6 +24,21 @@ import carla
 from agents.navigation.local_planner import RoadOption
 from agents.tools.misc import vector
 
+GRAPH_CACHE_VERSION = 1
+
+
+class WaypointRef(NamedTuple):
+    """
+    Serializable reference to a carla.Waypoint (OpenDRIVE road/lane/s plus
+    the world location as a fallback), resolved back on first use.
+    """
+    road_id: int
+    lane_id: int
+    s: float
+    x: float
+    y: float
+    z: float
+
 
 class GlobalRoutePlanner(object):
     """
@@ -35,6 +58,20 @@ class GlobalRoutePlanner(object):
         self._road_id_to_edge = None
         self._intersection_end_node = -1
         self._previous_decision = RoadOption.VOID
+        # CSR adjacency for A* (dense node index -> graph node id in _node_ids)
+        self._node_ids = None
+        self._node_index = None
+        self._vertices = None
+        self._csr_indptr = None
+        self._csr_indices = None
+        self._csr_weights = None
+        self._csr_lists = None
+        # Lane samples for nearest-edge localization
+        self._sample_edges = None
+        self._sample_xyz = None
+        self._sample_edge = None
+        self._sample_cells = None
+        self._localize_cell_size = 4.0
 
     def setup(self):
         """
@@ -45,6 +82,91 @@ class GlobalRoutePlanner(object):
         self._graph, self._id_map, self._road_id_to_edge = self._build_graph()
         self._find_loose_ends()
         self._lane_change_link()
+        self._build_search_arrays()
+
+    @staticmethod
+    def graph_cache_path(cache_dir, map_name, sampling_resolution):
+        """
+        Path of the on-disk graph cache for a map and sampling resolution
+        """
+        key = repr((GRAPH_CACHE_VERSION, map_name, round(float(sampling_resolution), 3)))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        safe_name = re.sub(r'[^A-Za-z0-9_]+', '_', map_name).strip('_')
+        return os.path.join(cache_dir, "route_graph_{}_{}.pkl".format(safe_name, digest))
+
+    def save_graph(self, path):
+        """
+        Serializes the graph, id_map and road_id_to_edge built by setup().
+        Waypoints stored on the edges are written as WaypointRef tuples.
+        """
+        graph = self._graph.copy()
+        for _, _, data in graph.edges(data=True):
+            for key in ('entry_waypoint', 'exit_waypoint', 'change_waypoint'):
+                if key in data:
+                    data[key] = self._waypoint_ref(data[key])
+            data['path'] = [self._waypoint_ref(waypoint) for waypoint in data['path']]
+            data['unresolved'] = True
+
+        payload = {
+            'version': GRAPH_CACHE_VERSION,
+            'resolution': self._dao.get_resolution(),
+            'graph': graph,
+            'id_map': self._id_map,
+            'road_id_to_edge': self._road_id_to_edge,
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load_graph(self, path):
+        """
+        Replaces setup() with a graph saved by save_graph(). Edge waypoints
+        are resolved against the map lazily, when trace_route first uses the edge.
+        """
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+        if payload.get('version') != GRAPH_CACHE_VERSION:
+            raise ValueError("graph cache version {} != {}".format(payload.get('version'), GRAPH_CACHE_VERSION))
+        if payload['resolution'] != self._dao.get_resolution():
+            raise ValueError("graph cache resolution {} != {}".format(
+                payload['resolution'], self._dao.get_resolution()))
+        self._topology = None
+        self._graph = payload['graph']
+        self._id_map = payload['id_map']
+        self._road_id_to_edge = payload['road_id_to_edge']
+        self._build_search_arrays()
+
+    @staticmethod
+    def _waypoint_ref(waypoint):
+        if waypoint is None or isinstance(waypoint, WaypointRef):
+            return waypoint
+        location = waypoint.transform.location
+        return WaypointRef(waypoint.road_id, waypoint.lane_id, waypoint.s,
+                           location.x, location.y, location.z)
+
+    def _resolve_waypoint(self, ref):
+        if not isinstance(ref, WaypointRef):
+            return ref
+        waypoint = self._dao.get_waypoint_xodr(ref.road_id, ref.lane_id, ref.s)
+        if waypoint is None:
+            waypoint = self._dao.get_waypoint(carla.Location(x=ref.x, y=ref.y, z=ref.z))
+        return waypoint
+
+    def _edge(self, n1, n2):
+        """
+        Edge attributes with waypoints resolved (edges loaded from the
+        graph cache hold WaypointRef tuples until first use)
+        """
+        edge = self._graph.edges[n1, n2]
+        if edge.get('unresolved'):
+            for key in ('entry_waypoint', 'exit_waypoint', 'change_waypoint'):
+                if key in edge:
+                    edge[key] = self._resolve_waypoint(edge[key])
+            edge['path'] = [self._resolve_waypoint(ref) for ref in edge['path']]
+            edge['unresolved'] = False
+        return edge
 
     def _build_graph(self):
         """
@@ -144,13 +266,100 @@ class GlobalRoutePlanner(object):
                         entry_vector=None, exit_vector=None, net_vector=None,
                         intersection=end_wp.is_junction, type=RoadOption.LANEFOLLOW)
 
+    def _build_search_arrays(self):
+        """
+        Compiles the finished graph into flat arrays:
+            - CSR adjacency (indptr, indices, edge lengths) and node vertices
+              over dense integer node ids, used by the A* search
+            - lane sample points of every LANEFOLLOW edge, bucketed on a 2D
+              grid, used by the nearest-edge localization
+        """
+        self._node_ids = list(self._graph.nodes)
+        self._node_index = {node: i for i, node in enumerate(self._node_ids)}
+        self._vertices = np.array([self._graph.nodes[node]['vertex'] for node in self._node_ids],
+                                  dtype=np.float64).reshape(-1, 3)
+
+        indptr, indices, weights = [0], [], []
+        for node in self._node_ids:
+            # Same neighbor order as the networkx adjacency
+            for neighbor, data in self._graph.adj[node].items():
+                indices.append(self._node_index[neighbor])
+                weights.append(data['length'])
+            indptr.append(len(indices))
+        self._csr_indptr = np.array(indptr, dtype=np.int64)
+        self._csr_indices = np.array(indices, dtype=np.int64)
+        self._csr_weights = np.array(weights, dtype=np.float64)
+        self._csr_lists = (indptr, indices, self._csr_weights.tolist())  # list mirrors for the search loop
+
+        edges, points, sample_edge = [], [], []
+        for n1, n2, data in self._graph.edges(data=True):
+            if data['type'] != RoadOption.LANEFOLLOW:
+                continue
+            edge_id = len(edges)
+            edges.append((n1, n2))
+            for waypoint in [data['entry_waypoint']] + data['path'] + [data['exit_waypoint']]:
+                points.append(self._waypoint_xyz(waypoint))
+                sample_edge.append(edge_id)
+        self._sample_edges = edges
+        self._sample_xyz = np.array(points, dtype=np.float64).reshape(-1, 3)
+        self._sample_edge = np.array(sample_edge, dtype=np.int64)
+
+        cells = np.floor(self._sample_xyz[:, :2] / self._localize_cell_size).astype(np.int64)
+        self._sample_cells = {}
+        for i, cell in enumerate(map(tuple, cells.tolist())):
+            self._sample_cells.setdefault(cell, []).append(i)
+        self._sample_cells = {cell: np.array(rows) for cell, rows in self._sample_cells.items()}
+
+    @staticmethod
+    def _waypoint_xyz(waypoint):
+        if isinstance(waypoint, WaypointRef):
+            return (waypoint.x, waypoint.y, waypoint.z)
+        location = waypoint.transform.location
+        return (location.x, location.y, location.z)
+
     def _localize(self, location):
         """
         This function finds the road segment closest to given location
         location        :   carla.Location to be localized in the graph
         return          :   pair node ids representing an edge in the graph
         """
-        waypoint = self._dao.get_waypoint(location)
+        return self._localize_many([location])[0]
+
+    def _localize_many(self, locations):
+        """
+        Vectorized nearest-edge lookup: every location is matched to the
+        closest lane sample among the 3x3 grid cells around it (all samples
+        when none of those is within one cell size).
+        locations       :   list of carla.Location
+        return          :   list of edges (pair of node ids), None if the graph is empty
+        """
+        if not len(self._sample_xyz):
+            return [None] * len(locations)
+        query = np.array([(loc.x, loc.y, loc.z) for loc in locations], dtype=np.float64).reshape(-1, 3)
+        cells = np.floor(query[:, :2] / self._localize_cell_size).astype(np.int64).tolist()
+
+        edges = []
+        for point, (cx, cy) in zip(query, cells):
+            candidates = [self._sample_cells[cell] for cell in
+                          ((cx + dx, cy + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+                          if cell in self._sample_cells]
+            best, best_dist = None, float('inf')
+            if candidates:
+                rows = np.concatenate(candidates)
+                d2 = ((self._sample_xyz[rows] - point) ** 2).sum(axis=1)
+                k = int(np.argmin(d2))
+                best, best_dist = rows[k], math.sqrt(d2[k])
+            if best_dist > self._localize_cell_size:
+                # 邻域内没有足够近的采样点：退化为全量最近点
+                d2 = ((self._sample_xyz - point) ** 2).sum(axis=1)
+                best = int(np.argmin(d2))
+            edges.append(self._sample_edges[self._sample_edge[best]])
+        return edges
+
+    def _edge_of_waypoint(self, waypoint):
+        """
+        Graph edge of the road/section/lane a waypoint lies on
+        """
         edge = None
         try:
             edge = self._road_id_to_edge[waypoint.road_id][waypoint.section_id][waypoint.lane_id]
@@ -181,7 +390,7 @@ class GlobalRoutePlanner(object):
                         next_waypoint = waypoint.get_right_lane()
                         if next_waypoint is not None and next_waypoint.lane_type == carla.LaneType.Driving and waypoint.road_id == next_waypoint.road_id:
                             next_road_option = RoadOption.CHANGELANERIGHT
-                            next_segment = self._localize(next_waypoint.transform.location)
+                            next_segment = self._edge_of_waypoint(next_waypoint)
                             if next_segment is not None:
                                 self._graph.add_edge(
                                     self._id_map[segment['entryxyz']], next_segment[0], entry_waypoint=waypoint,
@@ -192,7 +401,7 @@ class GlobalRoutePlanner(object):
                         next_waypoint = waypoint.get_left_lane()
                         if next_waypoint is not None and next_waypoint.lane_type == carla.LaneType.Driving and waypoint.road_id == next_waypoint.road_id:
                             next_road_option = RoadOption.CHANGELANELEFT
-                            next_segment = self._localize(next_waypoint.transform.location)
+                            next_segment = self._edge_of_waypoint(next_waypoint)
                             if next_segment is not None:
                                 self._graph.add_edge(
                                     self._id_map[segment['entryxyz']], next_segment[0], entry_waypoint=waypoint,
@@ -202,14 +411,52 @@ class GlobalRoutePlanner(object):
                 if left_found and right_found:
                     break
 
-    def _distance_heuristic(self, n1, n2):
+    def _astar(self, source, target):
         """
-        Distance heuristic calculator for path searching
-        in self._graph
+        A* over the CSR arrays with the straight-line distance heuristic.
+        Mirrors networkx.astar_path (same queue order and tie-breaking), so
+        routes match the networkx search on the same graph.
+        source, target  :   graph node ids
+        return          :   path as list of graph node ids
         """
-        l1 = np.array(self._graph.nodes[n1]['vertex'])
-        l2 = np.array(self._graph.nodes[n2]['vertex'])
-        return np.linalg.norm(l1-l2)
+        s, t = self._node_index[source], self._node_index[target]
+        delta = self._vertices - self._vertices[t]
+        heuristic = np.sqrt((delta * delta).sum(axis=1)).tolist()
+        indptr, indices, weights = self._csr_lists
+
+        unexplored, no_parent = -2, -1
+        explored = [unexplored] * len(self._node_ids)  # parent closest to the source
+        enqueued = [math.inf] * len(self._node_ids)    # cost of the best enqueued path
+        c = count()
+        queue = [(0, next(c), s, 0, no_parent)]
+
+        while queue:
+            _, __, node, dist, parent = heappop(queue)
+
+            if node == t:
+                path = [node]
+                while parent != no_parent:
+                    path.append(parent)
+                    parent = explored[parent]
+                path.reverse()
+                return [self._node_ids[i] for i in path]
+
+            if explored[node] != unexplored:
+                # Do not override the parent of the starting node, skip stale entries
+                if explored[node] == no_parent or enqueued[node] < dist:
+                    continue
+
+            explored[node] = parent
+
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[k]
+                ncost = dist + weights[k]
+                if enqueued[neighbor] <= ncost:
+                    continue
+                enqueued[neighbor] = ncost
+                heappush(queue, (ncost + heuristic[neighbor], next(c), neighbor, ncost, node))
+
+        raise nx.NetworkXNoPath("Node {} not reachable from {}".format(target, source))
 
     def _path_search(self, origin, destination):
         """
@@ -221,11 +468,9 @@ class GlobalRoutePlanner(object):
         connecting origin and destination
         """
 
-        start, end = self._localize(origin), self._localize(destination)
+        start, end = self._localize_many([origin, destination])
 
-        route = nx.astar_path(
-            self._graph, source=start[0], target=end[0],
-            heuristic=self._distance_heuristic, weight='length')
+        route = self._astar(start[0], end[0])
         route.append(end[1])
         return route
 
@@ -355,14 +600,14 @@ class GlobalRoutePlanner(object):
 
         for i in range(len(route) - 1):
             road_option = self._turn_decision(i, route)
-            edge = self._graph.edges[route[i], route[i+1]]
+            edge = self._edge(route[i], route[i+1])
             path = []
 
             if edge['type'] != RoadOption.LANEFOLLOW and edge['type'] != RoadOption.VOID:
                 route_trace.append((current_waypoint, road_option))
                 exit_wp = edge['exit_waypoint']
                 n1, n2 = self._road_id_to_edge[exit_wp.road_id][exit_wp.section_id][exit_wp.lane_id]
-                next_edge = self._graph.edges[n1, n2]
+                next_edge = self._edge(n1, n2)
                 if next_edge['path']:
                     closest_index = self._find_closest_in_list(current_waypoint, next_edge['path'])
                     closest_index = min(len(next_edge['path'])-1, closest_index+5)
@@ -74,6 +74,17 @@ class GlobalRoutePlannerDAO(object):
         waypoint = self._wmap.get_waypoint(location)
         return waypoint
 
+    def get_waypoint_xodr(self, road_id, lane_id, s):
+        """
+        The method returns the waypoint at OpenDRIVE coordinates
+
+            :param road_id: OpenDRIVE road id
+            :param lane_id: OpenDRIVE lane id
+            :param s: distance along the road
+            :return waypoint: waypoint or None if the coordinates are invalid
+        """
+        return self._wmap.get_waypoint_xodr(road_id, lane_id, s)
+
     def get_resolution(self):
         """ Accessor for self._sampling_resolution """
         return self._sampling_resolution
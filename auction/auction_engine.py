@@ -5,8 +5,13 @@ from dataclasses import dataclass
 from enum import Enum
 
 from env.simulation_config import SimulationConfig
+from env.frame_clock import clock_from
+from env.frame_context import FrameContext
+from env.event_log import get_logger
 from .bid_policy import AgentBidPolicy
 
+log = get_logger('auction')
+
 class AuctionStatus(Enum):
     WAITING = "waiting"
     BIDDING = "bidding" 
@@ -50,10 +55,10 @@ class Auction:
     """Manages a single auction round"""
     
     def __init__(self, auction_id: str, agents: List[AuctionAgent], 
-                 bidding_duration: float = 1.0):
+                 bidding_duration: float = 1.0, start_time: float = None):
         self.id = auction_id
         self.agents = agents
-        self.start_time = time.time()
+        self.start_time = time.time() if start_time is None else start_time
         self.deadline = self.start_time + bidding_duration
         self.status = AuctionStatus.BIDDING
         self.bids: Dict[str, Bid] = {}
@@ -67,9 +72,11 @@ class Auction:
         self.bids[bid.participant_id] = bid
         return True
     
-    def is_expired(self) -> bool:
-        """Check if auction has expired"""
-        return time.time() >= self.deadline
+    def is_expired(self, current_time: float = None) -> bool:
+        """Check if auction has expired (pass simulation time when the auction was started with it)"""
+        if current_time is None:
+            current_time = time.time()
+        return current_time >= self.deadline
     
     def get_participation_rate(self) -> float:
         """Get percentage of agents who have bid"""
@@ -120,7 +127,7 @@ class LaneGrouper:
                     lanes[lane_key].append(vehicle)
                     
             except Exception as e:
-                print(f"[LaneGrouper] Error getting lane info for vehicle {vehicle['id']}: {e}")
+                log.warning("[LaneGrouper] Error getting lane info for vehicle {}: {}", vehicle['id'], e)
         
         return lanes
 
@@ -200,8 +207,8 @@ class ParticipantIdentifier:
         should_participate = distance_ok and ready_for_intersection
         
         if should_participate:
-            print(f"🚛 Platoon {platoon.platoon_id} eligible for auction: "
-                  f"distance={distance_to_intersection:.1f}m, size={platoon.get_size()}")
+            log.info("🚛 Platoon {} eligible for auction: distance={:.1f}m, size={}",
+                     platoon.platoon_id, distance_to_intersection, platoon.get_size())
         
         return should_participate
     
@@ -243,14 +250,16 @@ class ParticipantIdentifier:
             return True
             
         except Exception as e:
-            print(f"[Warning] 检查车辆目的地失败 {vehicle.get('id', 'unknown')}: {e}")
+            log.warning("[Warning] 检查车辆目的地失败 {}: {}", vehicle.get('id', 'unknown'), e)
             return True  # Default to True to include vehicle in auction
 
 class AuctionEvaluator:
     """Handles auction evaluation and winner determination"""
     
-    def __init__(self, intersection_center: Tuple[float, float, float], max_go_agents: int = 8):
+    def __init__(self, intersection_center: Tuple[float, float, float], max_go_agents: int = 8,
+                 now=time.time):
         self.intersection_center = intersection_center
+        self._now = now  # simulation-time clock of the owning engine
         self.protected_agents: set = set()
         self.agents_in_transit: Dict[str, Dict] = {}
         self.max_go_agents = max_go_agents  # Keep for compatibility but don't use internally
@@ -274,7 +283,7 @@ class AuctionEvaluator:
                     conflict_action='go'  # Always go
                 )
                 protected_winners.append(protected_winner)
-                print(f"🔒 Protected agent {agent_id}: ALWAYS GO (in transit)")
+                log.info("🔒 Protected agent {}: ALWAYS GO (in transit)", agent_id)
         
         # Second: Process remaining bids normally
         regular_winners = self._evaluate_regular_bids(regular_bids)
@@ -285,7 +294,8 @@ class AuctionEvaluator:
             winner.rank = i + 1
         
         auction.winners = all_winners
-        print(f"📊 Auction evaluator: {len(protected_winners)} protected + {len(regular_winners)} regular = {len(all_winners)} total winners")
+        log.info("📊 Auction evaluator: {} protected + {} regular = {} total winners",
+                 len(protected_winners), len(regular_winners), len(all_winners))
         return all_winners
 
     def _evaluate_regular_bids(self, bids: Dict[str, Bid]) -> List[AuctionWinner]:
@@ -322,9 +332,11 @@ class AuctionEvaluator:
                     return True
         return False
     
-    def cleanup_completed_agents(self, vehicle_states: List[Dict], platoon_manager=None):
-        """Clean up agents that have completed transit"""
-        current_time = time.time()
+    def cleanup_completed_agents(self, vehicle_states: List[Dict], platoon_manager=None,
+                                 current_time: float = None):
+        """Clean up agents that have completed transit (current_time defaults to the engine's frame clock)"""
+        if current_time is None:
+            current_time = self._now()
         completed_agents = []
         
         for agent_id in list(self.protected_agents):
@@ -382,10 +394,13 @@ class DecentralizedAuctionEngine:
         self.max_go_agents = max_go_agents  # Can be None for no limit
         self.max_participants_per_auction = max_participants_per_auction  # Configurable max participants
         
+        # Simulation-time clock shared with the state extractor (wall clock without one)
+        self._now = clock_from(state_extractor)
+        
         # Core components
         self.lane_grouper = LaneGrouper(state_extractor)
         self.participant_identifier = ParticipantIdentifier(self.lane_grouper)
-        self.evaluator = AuctionEvaluator(intersection_center, max_go_agents)
+        self.evaluator = AuctionEvaluator(intersection_center, max_go_agents, now=self._now)
         
         # Auction management
         self.current_auction: Optional[Auction] = None
@@ -406,7 +421,8 @@ class DecentralizedAuctionEngine:
         self.bid_policy = None
         
         limit_text = "unlimited" if max_go_agents is None else str(max_go_agents)
-        print(f"🎯 增强拍卖引擎已初始化 - 支持车队、单车和Nash deadlock解决 (max go agents: {limit_text}, max participants per auction: {self.max_participants_per_auction})")
+        log.info("🎯 增强拍卖引擎已初始化 - 支持车队、单车和Nash deadlock解决 (max go agents: {}, max participants per auction: {})",
+                 limit_text, self.max_participants_per_auction)
 
     # Add method to update configuration
     def update_max_go_agents(self, max_go_agents: int = None):
@@ -444,16 +460,17 @@ class DecentralizedAuctionEngine:
         """Set trainable DRL bid policy"""
         self.bid_policy = bid_policy
 
-    def update(self, vehicle_states: List[Dict], platoon_manager=None) -> List[AuctionWinner]:
-        """Main update loop with Nash deadlock support"""
-        current_time = time.time()
+    def update(self, vehicle_states: List[Dict], platoon_manager=None,
+               frame: FrameContext = None) -> List[AuctionWinner]:
+        """Main update loop with Nash deadlock support (frame: per-frame context shared with the controller)"""
+        current_time = self._now()
         
         # 1. Identify potential agents
         agents = self.participant_identifier.identify_agents(
             vehicle_states, platoon_manager
         )
         
-        print(f"\n🎯 Auction Update: Found {len(agents)} potential agents")
+        log.info("🎯 Auction Update: Found {} potential agents", len(agents))
         
         # 2. Start new auction if needed (with participant limiting to prevent mass movement)
         if agents and not self.current_auction:
@@ -462,7 +479,7 @@ class DecentralizedAuctionEngine:
             if len(agents) > max_participants:
                 # Sort by urgency/priority and take top participants
                 agents = self._select_priority_agents(agents, max_participants)
-                print(f"🔒 Limited auction to {len(agents)} priority agents (preventing mass movement)")
+                log.info("🔒 Limited auction to {} priority agents (preventing mass movement)", len(agents))
             self._start_new_auction(agents, current_time)
         
         # 3. Process current auction
@@ -472,21 +489,26 @@ class DecentralizedAuctionEngine:
         
         # 4. Apply Nash conflict resolution if needed
         if winners and self.nash_controller:
-            print(f"🧠 Applying Nash conflict resolution to {len(winners)} winners")
-            vehicle_states_dict = {str(v['id']): v for v in vehicle_states}
+            log.info("🧠 Applying Nash conflict resolution to {} winners", len(winners))
+            if frame is not None:
+                vehicle_states_dict = frame.by_id
+            else:
+                vehicle_states_dict = {str(v['id']): v for v in vehicle_states}
             
             try:
-                nash_winners = self.nash_controller.resolve(winners, vehicle_states_dict, platoon_manager)
+                nash_winners = self.nash_controller.resolve(
+                    winners, vehicle_states_dict, platoon_manager, current_time=current_time
+                )
                 if nash_winners:
-                    print(f"✅ Nash solver returned {len(nash_winners)} resolved winners")
+                    log.info("✅ Nash solver returned {} resolved winners", len(nash_winners))
                     winners = nash_winners
                     # IMPORTANT: Update the current auction winners
                     if self.current_auction:
                         self.current_auction.winners = nash_winners
                 else:
-                    print("⚠️ Nash solver returned no winners")
+                    log.warning("⚠️ Nash solver returned no winners")
             except Exception as e:
-                print(f"❌ Nash solver error: {e}")
+                log.error("❌ Nash solver error: {}", e)
                 # Set default conflict_action for fallback
                 for winner in winners:
                     if not hasattr(winner, 'conflict_action'):
@@ -497,7 +519,7 @@ class DecentralizedAuctionEngine:
     def _start_new_auction(self, agents: List[AuctionAgent], start_time: float):
         """Start a new auction round"""
         auction_id = f"junction_auction_{int(start_time)}"
-        self.current_auction = Auction(auction_id, agents)
+        self.current_auction = Auction(auction_id, agents, start_time=start_time)
         
         # Collect bids immediately
         self._collect_bids()
@@ -510,7 +532,7 @@ class DecentralizedAuctionEngine:
             'timestamp': start_time
         })
         
-        print(f"🎯 Started auction {auction_id} with {len(agents)} agents")
+        log.info("🎯 Started auction {} with {} agents", auction_id, len(agents))
     
     def _select_priority_agents(self, agents: List[AuctionAgent], max_count: int) -> List[AuctionAgent]:
         """Select priority agents to prevent mass simultaneous movement"""
@@ -542,7 +564,7 @@ class DecentralizedAuctionEngine:
             return selected
             
         except Exception as e:
-            print(f"[Warning] Priority agent selection failed: {e}")
+            log.warning("[Warning] Priority agent selection failed: {}", e)
             # Fallback: return first max_count agents
             return agents[:max_count]
     
@@ -592,19 +614,19 @@ class DecentralizedAuctionEngine:
         auction = self.current_auction
         
         if auction.status == AuctionStatus.BIDDING:
-            if auction.is_expired():
+            if auction.is_expired(current_time):
                 auction.status = AuctionStatus.EVALUATING
-                print(f"⏰ Auction {auction.id} bidding phase completed")
+                log.info("⏰ Auction {} bidding phase completed", auction.id)
         
         elif auction.status == AuctionStatus.EVALUATING:
-            print(f"🔍 Evaluating auction {auction.id} with {len(auction.bids)} bids")
+            log.info("🔍 Evaluating auction {} with {} bids", auction.id, len(auction.bids))
             winners = self.evaluator.evaluate_auction(auction)
             auction.status = AuctionStatus.COMPLETED
             
             # Broadcast results
             self._broadcast_auction_results(auction.id, winners)
             
-            print(f"🏁 Auction {auction.id} completed with {len(winners)} winners")
+            log.info("🏁 Auction {} completed with {} winners", auction.id, len(winners))
             return winners
         
         elif auction.status == AuctionStatus.COMPLETED:
@@ -612,7 +634,7 @@ class DecentralizedAuctionEngine:
             self.auction_history[auction.id] = auction
             self.current_auction = None
             self.last_auction_time = current_time
-            print(f"🗄️ Auction {auction.id} archived")
+            log.info("🗄️ Auction {} archived", auction.id)
         
         return auction.winners if auction.winners else []
     
@@ -621,7 +643,7 @@ class DecentralizedAuctionEngine:
         if not self.current_auction:
             return
         
-        print(f"💰 Collecting bids from {len(self.current_auction.agents)} agents:")
+        log.info("💰 Collecting bids from {} agents:", len(self.current_auction.agents))
         
         for agent in self.current_auction.agents:
             bid_value = 0.0
@@ -661,13 +683,13 @@ class DecentralizedAuctionEngine:
             bid = Bid(
                 participant_id=agent.id,
                 value=bid_value,
-                timestamp=time.time(),
+                timestamp=self._now(),
                 participant=agent
             )
             
             self.current_auction.add_bid(bid)
             policy_type = "DRL" if self.bid_policy else "static"
-            print(f"   - {agent.type} {agent.id}: bid = {bid_value:.2f}")
+            log.info("   - {} {}: bid = {:.2f}", agent.type, agent.id, bid_value)
 
     def _agent_to_dict(self, agent: AuctionAgent) -> Dict:
         """Convert AuctionAgent to dict format for BidPolicy"""
@@ -686,7 +708,7 @@ class DecentralizedAuctionEngine:
             vehicles = agent.data.get('vehicles', [])
             agent_dict['platoon_size'] = len(vehicles)
             agent_dict['vehicles'] = vehicles
-            print(f"🎯 Platoon {agent.id} prepared for bidding: {len(vehicles)} vehicles")
+            log.debug("🎯 Platoon {} prepared for bidding: {} vehicles", agent.id, len(vehicles))
         
         return agent_dict
 
@@ -696,7 +718,7 @@ class DecentralizedAuctionEngine:
             'type': 'auction_results',
             'auction_id': auction_id,
             'winners': [(w.participant.id, w.bid.value, w.rank) for w in winners[:8]],
-            'timestamp': time.time()
+            'timestamp': self._now()
         })
     
     def _broadcast_message(self, message: Dict):
@@ -705,7 +727,7 @@ class DecentralizedAuctionEngine:
     
     def _simulate_v2v_communication(self):
         """Simulate V2V communication with delays and packet loss"""
-        current_time = time.time()
+        current_time = self._now()
         valid_messages = []
         
         for message in self.message_queue:
@@ -730,7 +752,7 @@ class DecentralizedAuctionEngine:
     
     def reset_episode_state(self):
         """CRITICAL: Reset auction engine state for fresh episode start"""
-        print(f"🔄 Resetting AuctionEngine state (prev auctions: {len(self.auction_history)})")
+        log.info("🔄 Resetting AuctionEngine state (prev auctions: {})", len(self.auction_history))
         
         # Clear auction history and current state
         self.current_auction = None
@@ -744,7 +766,7 @@ class DecentralizedAuctionEngine:
         self.evaluator.protected_agents = set()
         self.evaluator.agents_in_transit = {}
         
-        print("✅ AuctionEngine state reset complete")
+        log.info("✅ AuctionEngine state reset complete")
 
     def get_auction_stats(self) -> Dict[str, Any]:
         """Get comprehensive auction statistics - 支持车队统计"""
@@ -813,7 +835,7 @@ class DecentralizedAuctionEngine:
                 excess_winner.conflict_action = 'wait'
                 waiting_winners.append(excess_winner)
             
-            print(f"🚦 Conflict resolution: enforced go limit, {len(excess_winners)} agents moved to wait")
+            log.info("🚦 Conflict resolution: enforced go limit, {} agents moved to wait", len(excess_winners))
         
         # Reassign rankings
         all_winners = resolved_winners + waiting_winners
@@ -824,7 +846,7 @@ class DecentralizedAuctionEngine:
             go_count = len(resolved_winners)
             wait_count = len(waiting_winners)
             limit_text = "unlimited" if self.max_go_agents is None else str(self.max_go_agents)
-            print(f"🎮 Final allocation: {go_count} go, {wait_count} wait (limit: {limit_text})")
+            log.info("🎮 Final allocation: {} go, {} wait (limit: {})", go_count, wait_count, limit_text)
         
         return all_winners
 
@@ -867,7 +889,7 @@ class DecentralizedAuctionEngine:
             return self.nash_controller.handle_deadlock(nash_agents, current_time)
             
         except Exception as e:
-            print(f"[Warning] Nash resolution in auction engine failed: {e}")
+            log.warning("[Warning] Nash resolution in auction engine failed: {}", e)
             return {}
 
     def _convert_winners_to_nash_agents(self, winners: List[AuctionWinner]) -> List:
@@ -899,7 +921,7 @@ class DecentralizedAuctionEngine:
             return nash_agents
             
         except Exception as e:
-            print(f"[Warning] Converting winners to Nash agents failed: {e}")
+            log.warning("[Warning] Converting winners to Nash agents failed: {}", e)
             return []
 
     def _create_nash_agent_from_participant(self, participant: AuctionAgent, bid_value: float):
@@ -934,7 +956,7 @@ class DecentralizedAuctionEngine:
             )
             
         except Exception as e:
-            print(f"[Warning] Creating Nash agent from participant failed: {e}")
+            log.warning("[Warning] Creating Nash agent from participant failed: {}", e)
             return None
 
     def _create_nash_agent_from_vehicle_data(self, vehicle_data: Dict, bid_value: float, agent_id: str = None):
@@ -968,7 +990,7 @@ class DecentralizedAuctionEngine:
             )
             
         except Exception as e:
-            print(f"[Warning] Creating Nash agent from vehicle data failed: {e}")
+            log.warning("[Warning] Creating Nash agent from vehicle data failed: {}", e)
             return None
 
     def _calculate_vehicle_bid(self, vehicle_state: Dict, context: Dict = None) -> float:
@@ -0,0 +1,128 @@
+"""
+闭环基准共用管线 (Shared closed-loop pipeline for the benchmarks)
+
+Builds the main.py control loop (state extraction → platoons → auction →
+conflict resolver → traffic control) on the headless kinematic backend and
+steps it one simulation frame at a time, so every closed-loop benchmark runs
+the same pipeline with the same seeding.
+
+    config = kinematic_config()
+    pipeline = build_pipeline(config, seed)
+    for _ in range(frames):
+        frame = pipeline.step()
+
+Module output is suppressed while the pipeline is built; wrap the step loop
+in ``contextlib.redirect_stdout`` to silence it while stepping. Importing
+this module also puts the repository root on ``sys.path``.
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.unified_config import UnifiedConfig
+from env import event_log
+
+
+def kinematic_config() -> UnifiedConfig:
+    """Default config on the kinematic backend in training mode"""
+    config = UnifiedConfig()
+    config.system.backend = 'kinematic'
+    config.system.training_mode = True
+    return config
+
+
+def default_resolver(config, state_extractor):
+    """Conflict resolver selected by ``SystemConfig.conflict_resolver`` (as in main.py)"""
+    if config.system.conflict_resolver == 'reservation':
+        from nash.reservation_resolver import ReservationResolver
+        return ReservationResolver(unified_config=config)
+    from nash.deadlock_nash_solver import DeadlockNashSolver
+    return DeadlockNashSolver(unified_config=config)
+
+
+def is_close_call(vehicle_states, config) -> bool:
+    """Two vehicles in the junction core closer than ``collision_threshold`` in this frame"""
+    if not vehicle_states:
+        return False
+    center = np.array(config.system.intersection_center[:2])
+    xy = np.array([v['location'][:2] for v in vehicle_states])
+    in_core = xy[np.all(np.abs(xy - center) <= config.deadlock.deadlock_core_half_size, axis=1)]
+    if len(in_core) < 2:
+        return False
+    delta = in_core[:, None, :] - in_core[None, :, :]
+    dist = np.hypot(delta[..., 0], delta[..., 1]) + np.eye(len(in_core)) * 1e9
+    return bool((dist < config.conflict.collision_threshold).any())
+
+
+class Pipeline:
+    """main.py control loop on the kinematic backend, advanced with ``step()``"""
+
+    def __init__(self, config, scenario, state_extractor, platoon_manager,
+                 auction_engine, resolver, traffic_controller):
+        self.config = config
+        self.scenario = scenario
+        self.world = scenario.carla.world
+        self.state_extractor = state_extractor
+        self.platoon_manager = platoon_manager
+        self.auction_engine = auction_engine
+        self.resolver = resolver
+        self.traffic_controller = traffic_controller
+
+        logic_seconds = config.system.logic_update_interval_seconds
+        self.update_interval = max(1, int(round(logic_seconds / config.system.fixed_delta_seconds)))
+        self.frames = 0
+        self.logic_steps = 0
+
+    def step(self):
+        """Tick one frame; run platoons / auction / control on logic frames. Returns the FrameContext"""
+        self.world.tick()
+        frame = self.state_extractor.get_frame_context()
+        if self.frames % self.update_interval == 0:
+            vehicle_states = frame.states
+            self.platoon_manager.update(vehicle_states)
+            winners = self.auction_engine.update(vehicle_states, self.platoon_manager, frame=frame)
+            self.traffic_controller.update_control(self.platoon_manager, self.auction_engine,
+                                                   winners, frame=frame)
+            self.logic_steps += 1
+        self.frames += 1
+        return frame
+
+
+def build_pipeline(config, seed, make_resolver=default_resolver) -> Pipeline:
+    """
+    Seed the RNGs and the traffic manager, reset the scenario and wire the
+    control loop. ``make_resolver(config, state_extractor)`` builds the
+    conflict resolver handed to the auction engine.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    event_log.configure_from(config)
+
+    # 屏蔽各模块初始化时的控制台输出
+    with contextlib.redirect_stdout(io.StringIO()):
+        from env.scenario_manager import ScenarioManager
+        from env.state_extractor import StateExtractor
+        from platooning.platoon_manager import PlatoonManager
+        from auction.auction_engine import DecentralizedAuctionEngine
+        from control import TrafficController
+
+        scenario = ScenarioManager(unified_config=config)
+        scenario.carla.client.get_trafficmanager().set_random_device_seed(seed)
+        scenario.reset_scenario()
+
+        state_extractor = StateExtractor(scenario.carla, training_mode=True)
+        platoon_manager = PlatoonManager(state_extractor)
+        auction_engine = DecentralizedAuctionEngine(state_extractor=state_extractor)
+        resolver = make_resolver(config, state_extractor)
+        auction_engine.set_nash_controller(resolver)
+        traffic_controller = TrafficController(scenario.carla, state_extractor)
+        traffic_controller.set_platoon_manager(platoon_manager)
+
+    return Pipeline(config, scenario, state_extractor, platoon_manager,
+                    auction_engine, resolver, traffic_controller)
@@ -0,0 +1,56 @@
+"""
+加速度统计开销基准 (Acceleration statistics cost vs episode length)
+
+Runs the main.py control loop on the headless kinematic backend and, at
+checkpoints, reports how many acceleration samples the TrafficController
+has aggregated, how many sample values it still stores (the per-vehicle
+median-filter windows) and the time of ``get_final_statistics()``, which
+the DRL reward calls every step. With running aggregates both the stored
+values and the call time stay flat as the episode grows.
+
+Usage:
+    python benchmarks/bench_acceleration_stats.py [--frames 3000] [--checkpoints 5] [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from _pipeline import build_pipeline, kinematic_config
+
+
+def time_final_statistics(traffic_controller, repeats=200):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        stats = traffic_controller.get_final_statistics()
+    return (time.perf_counter() - start) * 1e6 / repeats, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Acceleration statistics cost vs episode length (kinematic backend)')
+    parser.add_argument('--frames', type=int, default=3000)
+    parser.add_argument('--checkpoints', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"🏁 Acceleration statistics benchmark: {args.frames} frames, seed {args.seed}")
+    pipeline = build_pipeline(kinematic_config(), args.seed)
+    traffic_controller = pipeline.traffic_controller
+    checkpoint_every = max(1, args.frames // args.checkpoints)
+
+    for step in range(args.frames):
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.step()
+
+        if (step + 1) % checkpoint_every == 0:
+            micros, stats = time_final_statistics(traffic_controller)
+            stored = sum(len(window) for windows in traffic_controller.acceleration_data.values()
+                         for window in windows.values())
+            print(f"   frame {step + 1:>6}: {stats['absolute_acceleration_samples']:>6} samples aggregated, "
+                  f"{stored:>4} values stored, get_final_statistics {micros:.1f} µs "
+                  f"(avg |a| {stats['average_absolute_acceleration']:.2f} ± {stats['absolute_acceleration_std']:.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+冲突路径预测基准 (Conflict path prediction benchmark)
+
+Compares the conflict graph built from 3-point ``position -> center -> exit``
+movement paths with the one built from lane-following space-time
+trajectories (``DeadlockNashSolver.set_world_map``) on the headless
+kinematic backend:
+
+- replay: the auction winners and vehicle states passed to the Nash solver
+  in one closed-loop run are recorded and fed to both variants, reporting
+  conflict edges per round, GO rate, and conflict-graph build / resolve
+  time per round (median over ``--repeat`` replays, each with a fresh
+  solver; the variants alternate so both see the same host load)
+- closed loop: the main.py control loop runs with each variant and reports
+  throughput (vehicles exited per simulated hour) and close calls (frames
+  with two vehicles in the junction core closer than ``collision_threshold``)
+- equivalence: during the closed loop every incremental conflict graph is
+  compared with a full rebuild (``incremental_conflict_graph=False``) on
+  the same candidates; rounds with missing or extra edges are counted
+
+Usage:
+    python benchmarks/bench_conflict_paths.py [--frames 1200] [--seed 0] [--repeat 15]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from _pipeline import build_pipeline, is_close_call, kinematic_config
+from config.unified_config import UnifiedConfig
+
+
+def make_solver(variant, config, world_map):
+    from nash.deadlock_nash_solver import DeadlockNashSolver
+    # lane_following_paths 默认关闭，此处按变体显式设置
+    config.conflict.lane_following_paths = variant == 'lane'
+    solver = DeadlockNashSolver(unified_config=config)
+    if variant == 'lane':
+        solver.set_world_map(world_map)
+    return solver
+
+
+def run_closed_loop(variant, frames, seed, record=None):
+    def make_variant(config, state_extractor):
+        return make_solver(variant, config, state_extractor.world_map)
+
+    config = kinematic_config()
+    pipeline = build_pipeline(config, seed, make_variant)
+
+    solver = pipeline.resolver
+    analyzer = solver.conflict_analyzer
+    if record is not None:
+        resolve = solver.resolve
+
+        def recording_resolve(winners, vehicle_states, platoon_manager=None, current_time=None):
+            record.append((list(winners), dict(vehicle_states), current_time))
+            return resolve(winners, vehicle_states, platoon_manager, current_time=current_time)
+
+        solver.resolve = recording_resolve
+
+    # 增量冲突图与全量重建逐轮对比（同一候选集）
+    from nash.conflict_analyzer import ConflictAnalyzer
+    full = ConflictAnalyzer(dict(solver.solver_config, incremental_conflict_graph=False))
+    if variant == 'lane':
+        full.set_world_map(pipeline.state_extractor.world_map)
+    equivalence = {'builds': 0, 'mismatched': 0, 'missing_edges': 0, 'extra_edges': 0}
+    build = analyzer.build_enhanced_conflict_graph
+
+    def checked_build(candidates, vehicle_states, platoon_manager=None):
+        adj, conflict_analysis = build(candidates, vehicle_states, platoon_manager)
+        full_adj, _ = full.build_enhanced_conflict_graph(candidates, vehicle_states, platoon_manager)
+        edges = {(i, j) for i, neighbors in enumerate(adj) for j in neighbors if i < j}
+        full_edges = {(i, j) for i, neighbors in enumerate(full_adj) for j in neighbors if i < j}
+        equivalence['builds'] += 1
+        equivalence['mismatched'] += edges != full_edges
+        equivalence['missing_edges'] += len(full_edges - edges)
+        equivalence['extra_edges'] += len(edges - full_edges)
+        return adj, conflict_analysis
+
+    analyzer.build_enhanced_conflict_graph = checked_build
+
+    close_calls = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(frames):
+            frame = pipeline.step()
+            close_calls += is_close_call(frame.states, config)
+
+    sim_seconds = pipeline.state_extractor.frame_clock.sim_time
+    exited = pipeline.traffic_controller.get_control_stats()['vehicles_exited_intersection']
+    return {
+        'exited': exited,
+        'throughput_vph': exited / sim_seconds * 3600 if sim_seconds else 0.0,
+        'close_calls': close_calls,
+        'equivalence': equivalence,
+        'world_map': pipeline.world.get_map(),
+    }
+
+
+def replay_once(variant, recorded, world_map, config):
+    """One replay of the recorded rounds with a fresh solver: per-round edges / GO and build / resolve time"""
+    # 车道路径在set_world_map时预建，不计入时间
+    solver = make_solver(variant, config, world_map)
+    analyzer = solver.conflict_analyzer
+    build = analyzer.build_enhanced_conflict_graph
+    result = {'edges': [], 'go': 0, 'total': 0, 'build_s': 0.0, 'resolve_s': 0.0}
+
+    def timed_build(candidates, vehicle_states, platoon_manager=None):
+        start = time.perf_counter()
+        adj, conflict_analysis = build(candidates, vehicle_states, platoon_manager)
+        result['build_s'] += time.perf_counter() - start
+        result['edges'].append(sum(len(neighbors) for neighbors in adj) // 2)
+        return adj, conflict_analysis
+
+    analyzer.build_enhanced_conflict_graph = timed_build
+    for winners, vehicle_states, current_time in recorded:
+        start = time.perf_counter()
+        resolved = solver.resolve(winners, vehicle_states, None, current_time=current_time)
+        result['resolve_s'] += time.perf_counter() - start
+        result['go'] += sum(1 for w in resolved if w.conflict_action == 'go')
+        result['total'] += len(resolved)
+    result['trajectory_agents'] = analyzer.stats['trajectory_agents']
+    return result
+
+
+def replay(recorded, world_map, repeat=15):
+    """Per-variant replay results; timings are medians over ``repeat`` interleaved replays"""
+    config = UnifiedConfig()
+    config.system.training_mode = True
+    variants = ['3-point', 'lane']
+    runs = {variant: [] for variant in variants}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for attempt in range(repeat):
+            # 交替顺序，避免先跑的变体承担预热和主机负载波动
+            for variant in (variants if attempt % 2 == 0 else variants[::-1]):
+                runs[variant].append(replay_once(variant, recorded, world_map, config))
+
+    rounds = max(1, len(recorded))
+    results = {}
+    for variant, variant_runs in runs.items():
+        first = variant_runs[0]
+        results[variant] = {
+            'edges': float(np.mean(first['edges'])) if first['edges'] else 0.0,
+            'go': first['go'],
+            'total': first['total'],
+            'build_ms': float(np.median([r['build_s'] for r in variant_runs])) * 1000 / rounds,
+            'resolve_ms': float(np.median([r['resolve_s'] for r in variant_runs])) * 1000 / rounds,
+            'trajectory_agents': first['trajectory_agents'],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='3-point vs lane-following conflict path benchmark')
+    parser.add_argument('--frames', type=int, default=1200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=15, help='interleaved replays timed per variant (median)')
+    args = parser.parse_args()
+
+    recorded = []
+    closed_loop = {'3-point': run_closed_loop('3-point', args.frames, args.seed, record=recorded)}
+    closed_loop['lane'] = run_closed_loop('lane', args.frames, args.seed)
+    world_map = closed_loop['lane']['world_map']
+
+    print(f"🏁 Conflict path prediction on the kinematic backend ({args.frames} frames, seed {args.seed})")
+    print(f"   Replay of {len(recorded)} recorded Nash rounds (same auction winners):")
+    print(f"   {'paths':>10} {'edges/round':>12} {'GO':>12} {'build [ms]':>11} {'resolve [ms]':>13} "
+          f"{'trajectories':>13}")
+    for variant, result in replay(recorded, world_map, args.repeat).items():
+        go_text = f"{result['go']}/{result['total']}"
+        print(f"   {variant:>10} {result['edges']:>12.2f} {go_text:>12} {result['build_ms']:>11.3f} "
+              f"{result['resolve_ms']:>13.3f} {result['trajectory_agents']:>13}")
+    print(f"   Closed loop (incremental graph vs full rebuild in every round):")
+    print(f"   {'paths':>10} {'exited':>7} {'veh/h':>7} {'close calls':>12} {'equal graphs':>13} "
+          f"{'missing/extra edges':>20}")
+    for variant, result in closed_loop.items():
+        eq = result['equivalence']
+        equal_text = f"{eq['builds'] - eq['mismatched']}/{eq['builds']}"
+        edges_text = f"{eq['missing_edges']}/{eq['extra_edges']}"
+        print(f"   {variant:>10} {result['exited']:>7} {result['throughput_vph']:>7.0f} {result['close_calls']:>12} "
+              f"{equal_text:>13} {edges_text:>20}")
+    mismatched = sum(r['equivalence']['mismatched'] for r in closed_loop.values())
+    if mismatched:
+        print(f"   ⚠️ {mismatched} incremental conflict graphs differ from the full rebuild")
+    else:
+        print(f"   ✅ incremental conflict graphs match the full rebuild in every round")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+MWIS求解器基准 (MWIS solver benchmark)
+
+Compares the original 2^n brute-force exact solver with the bitset
+branch-and-bound solver in nash.mwis_exact on
+
+- random conflict graphs (G(n, p), uniform bid weights)
+- conflict graphs recorded from the Nash pipeline running on the headless
+  kinematic backend (every graph passed to ``solve_mwis_adaptive``)
+
+and checks that both find the same optimal weight.
+
+Usage:
+    python benchmarks/bench_mwis.py [--sizes 10 15 20 30 40] [--densities 0.1 0.3 0.6]
+                                    [--max-legacy 18] [--frames 600]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+
+from _pipeline import build_pipeline, kinematic_config
+from nash.mwis_exact import ExactMWISSolver
+
+
+def legacy_brute_force(weights, adj):
+    """Reference implementation of the original MWISSolver._solve_mwis_brute_force"""
+    n = len(weights)
+    best_weight = -1
+    best_set = []
+    for mask in range(1 << n):
+        subset = [i for i in range(n) if mask & (1 << i)]
+        independent = all(subset[j] not in adj[subset[i]]
+                          for i in range(len(subset)) for j in range(i + 1, len(subset)))
+        if independent:
+            weight = sum(weights[i] for i in subset)
+            if weight > best_weight:
+                best_weight = weight
+                best_set = subset
+    return best_set
+
+
+def random_graph(n, density, rng):
+    adj = [set() for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if rng.random() < density:
+                adj[i].add(j)
+                adj[j].add(i)
+    weights = [rng.uniform(1.0, 100.0) for _ in range(n)]
+    return weights, adj
+
+
+def record_pipeline_graphs(frames, seed):
+    """Run the control loop on the kinematic backend and capture every MWIS input"""
+    pipeline = build_pipeline(kinematic_config(), seed)
+    recorded = []
+
+    mwis_solver = pipeline.resolver.mwis_solver
+    solve = mwis_solver.solve_mwis_adaptive
+
+    def recording_solve(weights, adj, conflict_analysis):
+        recorded.append((list(weights), [set(neighbors) for neighbors in adj]))
+        return solve(weights, adj, conflict_analysis)
+
+    mwis_solver.solve_mwis_adaptive = recording_solve
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(frames):
+            pipeline.step()
+
+    return recorded
+
+
+def time_solver(fn, graphs):
+    """Mean/max time per graph in ms and the solution weights"""
+    times, totals = [], []
+    for weights, adj in graphs:
+        start = time.perf_counter()
+        selected = fn(weights, adj)
+        times.append((time.perf_counter() - start) * 1000)
+        totals.append(sum(weights[i] for i in selected))
+    return float(np.mean(times)), float(np.max(times)), totals
+
+
+def report(label, graphs, max_legacy):
+    bnb = ExactMWISSolver(memo_size=0)  # 不使用缓存，测量纯求解时间
+    bnb_mean, bnb_max, bnb_totals = time_solver(bnb.solve, graphs)
+    n = max(len(w) for w, _ in graphs)
+    if n <= max_legacy:
+        legacy_mean, legacy_max, legacy_totals = time_solver(legacy_brute_force, graphs)
+        agree = sum(abs(a - b) < 1e-9 for a, b in zip(legacy_totals, bnb_totals))
+        legacy_text = f"{legacy_mean:>12.2f} {legacy_max:>12.2f} {legacy_mean / max(bnb_mean, 1e-9):>8.0f}x"
+        agree_text = f"{agree}/{len(graphs)}"
+    else:
+        legacy_text = f"{'-':>12} {'-':>12} {'-':>9}"
+        agree_text = '-'
+    print(f"{label:>22} {len(graphs):>6} {legacy_text} {bnb_mean:>10.3f} {bnb_max:>10.3f} {agree_text:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MWIS exact solver benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 15, 20, 30, 40])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.3, 0.6])
+    parser.add_argument('--graphs', type=int, default=5, help='random graphs per (size, density)')
+    parser.add_argument('--max-legacy', type=int, default=18, help='largest n run through brute force')
+    parser.add_argument('--frames', type=int, default=600, help='pipeline frames to record (0 = skip)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print("🏁 MWIS benchmark: brute force vs bitset branch-and-bound")
+    print(f"{'graphs':>22} {'count':>6} {'legacy [ms]':>12} {'legacy max':>12} {'speedup':>9} "
+          f"{'b&b [ms]':>10} {'b&b max':>10} {'same opt':>9}")
+
+    rng = random.Random(args.seed)
+    for n in args.sizes:
+        for density in args.densities:
+            graphs = [random_graph(n, density, rng) for _ in range(args.graphs)]
+            report(f"random n={n} p={density}", graphs, args.max_legacy)
+
+    if args.frames:
+        recorded = record_pipeline_graphs(args.frames, args.seed)
+        if recorded:
+            sizes = [len(w) for w, _ in recorded]
+            report(f"pipeline ({min(sizes)}-{max(sizes)} nodes)", recorded, args.max_legacy)
+        else:
+            print("   (no conflict graphs recorded)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+路线规划器启动耗时基准 (Route-planner startup benchmark)
+
+Times StateExtractor construction and GlobalRoutePlanner graph setup with an
+empty map cache directory (cold: topology sampled and graph built, then
+saved) and with the cache left by the previous run (warm: graph unpickled,
+edge waypoints resolved lazily). One trace_route over a spawn-point pair is
+included so the warm numbers pay for resolving the edges they touch.
+
+Usage:
+    python benchmarks/bench_route_planner_startup.py [--backend kinematic] [--warm-runs 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.unified_config import UnifiedConfig
+from env.simulation_config import SimulationConfig
+
+
+def construct(scenario):
+    """StateExtractor init + first route query; returns (init_s, planner_s, first_route_s, planner source)"""
+    from env.state_extractor import StateExtractor
+
+    start = time.perf_counter()
+    state_extractor = StateExtractor(scenario.carla, training_mode=True)
+    init_s = time.perf_counter() - start
+
+    # 未触发转向表构建时，路线规划器在此处首次加载
+    start = time.perf_counter()
+    planner = state_extractor.global_route_planner
+    planner_s = time.perf_counter() - start
+
+    spawn_points = state_extractor.world_map.get_spawn_points()
+    rng = random.Random(0)
+    origin, destination = rng.choice(spawn_points).location, rng.choice(spawn_points).location
+    start = time.perf_counter()
+    planner.trace_route(origin, destination)
+    first_route_s = time.perf_counter() - start
+
+    return init_s, planner_s, first_route_s, state_extractor.route_planner_startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Route-planner cold vs warm startup benchmark')
+    parser.add_argument('--backend', default='kinematic', choices=['kinematic', 'carla'])
+    parser.add_argument('--warm-runs', type=int, default=3)
+    args = parser.parse_args()
+
+    config = UnifiedConfig()
+    config.system.backend = args.backend
+    cache_dir = tempfile.mkdtemp(prefix='map_cache_')
+    SimulationConfig.MAP_CACHE_DIR = cache_dir
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            from env.scenario_manager import ScenarioManager
+            scenario = ScenarioManager(unified_config=config)
+
+        print(f"🏁 Route-planner startup ({args.backend} backend, cache dir {cache_dir})")
+        print(f"{'run':>6} {'planner src':>11} {'extractor init [s]':>19} {'route graph [s]':>16} {'first route [ms]':>17}")
+
+        for label in ['cold'] + [f'warm{i + 1}' for i in range(args.warm_runs)]:
+            with contextlib.redirect_stdout(io.StringIO()):
+                init_s, planner_s, first_route_s, startup = construct(scenario)
+            # 转向表冷启动时会在构造函数内触发路线规划器构建
+            graph_s = startup['seconds'] if startup else planner_s
+            print(f"{label:>6} {startup['source'] if startup else '-':>11} {init_s:>19.3f} "
+                  f"{graph_s:>16.3f} {first_route_s * 1000:>17.2f}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
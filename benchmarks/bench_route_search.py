@@ -0,0 +1,128 @@
+"""
+路线搜索延迟基准 (Route-search latency benchmark)
+
+Compares GlobalRoutePlanner route search before and after the CSR/heapq
+rewrite on random spawn-point pairs of the loaded map. With the default
+kinematic backend this is the synthetic stand-in intersection
+(``Kinematic/Town05``, a few dozen graph nodes), not the real Town05; run
+with ``--backend carla`` for numbers on the CARLA map:
+
+- legacy: ``map.get_waypoint`` + ``_road_id_to_edge`` localization and
+  ``networkx.astar_path`` with the per-call heuristic callback
+- csr:    vectorized nearest-edge localization and heapq A* over CSR arrays
+
+Both ``_path_search`` alone and the full ``trace_route`` are timed (best of
+``--repeats`` alternating rounds), and the node paths of the two searches
+are checked for equality. On the small stand-in graph the search itself is
+a minor part of ``trace_route`` (waypoint tracing dominates), so the
+end-to-end speedup is about 1.0x there even though the A* step is ~2x faster.
+
+Usage:
+    python benchmarks/bench_route_search.py [--backend carla] [--pairs 200] [--seed 0] [--repeats 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.unified_config import UnifiedConfig
+
+
+def legacy_path_search(planner, origin, destination):
+    """Reference implementation of the networkx-based _path_search"""
+    start = planner._edge_of_waypoint(planner._dao.get_waypoint(origin))
+    end = planner._edge_of_waypoint(planner._dao.get_waypoint(destination))
+
+    def heuristic(n1, n2):
+        l1 = np.array(planner._graph.nodes[n1]['vertex'])
+        l2 = np.array(planner._graph.nodes[n2]['vertex'])
+        return np.linalg.norm(l1 - l2)
+
+    route = nx.astar_path(planner._graph, source=start[0], target=end[0],
+                          heuristic=heuristic, weight='length')
+    route.append(end[1])
+    return route
+
+
+def latency_ms(fn, pairs):
+    for origin, destination in pairs[:20]:  # 预热（惰性解析的waypoint、缓存等）
+        fn(origin, destination)
+    samples = []
+    for origin, destination in pairs:
+        start = time.perf_counter()
+        fn(origin, destination)
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.array(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GlobalRoutePlanner route-search latency benchmark')
+    parser.add_argument('--backend', default='kinematic', choices=['kinematic', 'carla'])
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    config = UnifiedConfig()
+    config.system.backend = args.backend
+    with contextlib.redirect_stdout(io.StringIO()):
+        from env.scenario_manager import ScenarioManager
+        from env.simulation_config import SimulationConfig
+        from agents.navigation.global_route_planner import GlobalRoutePlanner
+        from agents.navigation.global_route_planner_dao import GlobalRoutePlannerDAO
+        scenario = ScenarioManager(unified_config=config)
+
+    world_map = scenario.carla.world.get_map()
+    planner = GlobalRoutePlanner(GlobalRoutePlannerDAO(world_map, SimulationConfig.ROUTE_PLANNER_RESOLUTION))
+    planner.setup()
+
+    rng = random.Random(args.seed)
+    spawn_points = world_map.get_spawn_points()
+    pairs = [(rng.choice(spawn_points).location, rng.choice(spawn_points).location) for _ in range(args.pairs)]
+
+    mismatches = sum(legacy_path_search(planner, o, d) != planner._path_search(o, d) for o, d in pairs)
+
+    csr_path_search = planner._path_search
+    legacy = lambda o, d: legacy_path_search(planner, o, d)
+
+    def best(run):
+        return min((run() for _ in range(args.repeats)), key=lambda samples: samples.mean())
+
+    def trace_with(search):
+        planner._path_search = search
+        try:
+            return latency_ms(planner.trace_route, pairs)
+        finally:
+            planner._path_search = csr_path_search
+
+    # 两种实现交替测量，减小主机负载漂移的影响
+    csr_search = best(lambda: latency_ms(csr_path_search, pairs))
+    legacy_search = best(lambda: latency_ms(legacy, pairs))
+    csr_trace = best(lambda: trace_with(csr_path_search))
+    legacy_trace = best(lambda: trace_with(legacy))
+
+    map_label = world_map.name
+    if args.backend == 'kinematic':
+        map_label += " (synthetic kinematic stand-in, not the CARLA map)"
+    print(f"🏁 Route search on {map_label}: "
+          f"{len(planner._node_ids)} nodes, {len(planner._csr_indices)} edges, {args.pairs} spawn-point pairs")
+    print(f"{'':>20} {'mean [ms]':>10} {'p50 [ms]':>9} {'p95 [ms]':>9}")
+    for label, samples in (('legacy _path_search', legacy_search), ('csr _path_search', csr_search),
+                           ('legacy trace_route', legacy_trace), ('csr trace_route', csr_trace)):
+        print(f"{label:>20} {samples.mean():>10.3f} {np.percentile(samples, 50):>9.3f} "
+              f"{np.percentile(samples, 95):>9.3f}")
+    print(f"   end-to-end trace_route speedup {legacy_trace.mean() / max(csr_trace.mean(), 1e-9):.1f}x "
+          f"(A* _path_search alone {legacy_search.mean() / max(csr_search.mean(), 1e-9):.1f}x), "
+          f"path mismatches {mismatches}/{args.pairs}")
+
+
+if __name__ == '__main__':
+    main()
@@ -70,7 +70,11 @@ class SystemConfig:
     severe_deadlock_reset_enabled: bool = True
     severe_deadlock_punishment: float = -800.0
     
+    # Conflict resolution of auction winners
+    conflict_resolver: str = 'nash'  # 'nash' = DeadlockNashSolver (conflict graph + MWIS), 'reservation' = space-time ReservationResolver
+    
     # Map and CARLA settings
+    backend: str = 'carla'  # 'carla' = CARLA server, 'kinematic' = headless env.kinematic_backend
     map_name: str = 'Town05'
     carla_host: str = 'localhost'
     carla_port: int = 2000
@@ -97,16 +101,35 @@ class ConflictConfig:
     # TRAINABLE NASH PARAMETERS - optimizable via DRL
     path_intersection_threshold: float = 2.5   # path intersection sensitivity (meters)
     platoon_conflict_distance: float = 15.0   # platoon interaction distance (meters)
+    
+    # Incremental conflict graph across auction rounds
+    incremental_conflict_graph: bool = True   # reuse agent metadata / pair results for unchanged agents
+    conflict_position_bucket: float = 1.0     # position quantization (meters) for agent change detection
+    vectorized_conflict_min_candidates: int = 24  # candidate count from which pair tests run as NumPy n x n masks
+    
+    # Lane-following space-time trajectories (map waypoint chains through the junction)
+    lane_following_paths: bool = False        # use lane geometry instead of 3-point center paths when the map is set (off: lower closed-loop throughput so far)
+    lane_path_step: float = 1.0               # arc-length sampling step of junction paths (meters)
+    trajectory_min_speed: float = 3.0         # speed assumed for slow/waiting agents when timing trajectories (m/s)
 
 
 @dataclass
 class MWISConfig:
     """Maximum Weight Independent Set solver parameters"""
     max_go_agents: Optional[int] = None  # None = unlimited, int = max agents that can go
-    max_exact: int = 15                  # threshold for exact vs heuristic algorithm
+    max_exact: int = 40                  # threshold for exact (branch-and-bound) vs heuristic algorithm, per conflict-graph component
+    parallel_component_size: int = 30    # components this large are solved in worker processes when there are several
+    parallel_components: bool = False    # worker processes for large components (spawn: entry script must be import-safe; main.py is not)
     weight_factor: float = 1.0           # weight factor for vehicle priorities
-    timeout_seconds: float = 5.0         # maximum solving time
+    timeout_seconds: float = 5.0         # maximum solving time per call (enforced as a deadline)
     prefer_exact: bool = True            # prefer exact solution when possible
+    anytime: bool = True                 # improve/prove within a budget tied to the logic update interval, return best-so-far
+    logic_budget_fraction: float = 0.2   # anytime budget = min(timeout_seconds, fraction * logic_update_interval_seconds)
+    
+    # Nash resolution cache: reuse the last result while candidates, bids, quantized states and entry block are unchanged
+    resolution_cache: bool = True
+    resolution_cache_max_age: float = 2.0        # simulation seconds a cached resolution may be reused
+    resolution_cache_position_bucket: float = 1.0  # position quantization (meters) of candidate states in the cache key
 
 
 @dataclass
@@ -143,10 +166,40 @@ class DeadlockConfig:
     deadlock_timeout_duration: float = 90.0    # seconds before timeout reset
     deadlock_core_half_size: float = 5.0       # core region half size for deadlock detection
     
+    # Wait-for graph: circular waits from controller decisions + lane leaders (False = quadrant heuristic)
+    wait_for_graph: bool = True
+    wait_for_follow_gap: float = 12.0          # m - a stalled vehicle waits for its same-lane leader within this gap
+    circular_wait_min_duration: float = 10.0   # seconds a cycle must persist before it is reported
+    max_cycle_releases: int = 2                # release attempts per cycle before it counts as a hard deadlock
+    
     # Timeout and reset settings
     max_deadlock_resets: int = 3               # maximum auto-resets per episode
 
 
+@dataclass
+class ReservationConfig:
+    """Space-time reservation resolver parameters (alternative to Nash/MWIS)"""
+    cell_size: float = 1.0              # junction-core cell size (meters)
+    slot_seconds: float = 0.25          # reservation time slot length
+    min_speed: float = 3.0              # speed assumed for timing stopped/slow vehicles (m/s)
+    vehicle_length: float = 5.0         # occupied length per vehicle (meters)
+    vehicle_radius: float = 1.0         # lateral footprint radius around the path (meters)
+    platoon_gap: float = 3.0            # gap between platoon members (meters)
+    safety_margin: float = 0.5          # seconds added before and after each occupancy interval
+    decel: float = 4.0                  # comfortable deceleration used to decide if a vehicle can still stop (m/s^2)
+    commit_buffer: float = 2.0          # extra distance before the core within which a GO is final (meters)
+
+
+@dataclass
+class LoggingConfig:
+    """Event log levels and sinks (env.event_log)"""
+    level: str = 'info'                  # default level: 'debug', 'info', 'warning', 'error', 'off'
+    training_level: str = 'warning'      # default level in training mode (near-zero logging overhead)
+    module_levels: Dict[str, str] = field(default_factory=dict)  # e.g. {'nash.mwis': 'warning', 'auction': 'debug'}
+    sink: str = 'console'                # 'console', 'ring' (in-memory ring buffer, binary dump), 'both', 'none'
+    ring_capacity: int = 10000           # records kept by the ring-buffer sink
+
+
 @dataclass
 class DRLConfig:
     """Deep Reinforcement Learning training parameters"""
@@ -199,6 +252,8 @@ class UnifiedConfig:
     mwis: MWISConfig = field(default_factory=MWISConfig)
     auction: AuctionConfig = field(default_factory=AuctionConfig)
     deadlock: DeadlockConfig = field(default_factory=DeadlockConfig)
+    reservation: ReservationConfig = field(default_factory=ReservationConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
     drl: DRLConfig = field(default_factory=DRLConfig)
     
     def update_from_drl_params(self, **kwargs):
@@ -245,13 +300,26 @@ class UnifiedConfig:
             'velocity_threshold': self.conflict.velocity_threshold,
             'path_intersection_threshold': self.conflict.path_intersection_threshold,
             'platoon_conflict_distance': self.conflict.platoon_conflict_distance,
+            'incremental_conflict_graph': self.conflict.incremental_conflict_graph,
+            'conflict_position_bucket': self.conflict.conflict_position_bucket,
+            'vectorized_conflict_min_candidates': self.conflict.vectorized_conflict_min_candidates,
+            'lane_following_paths': self.conflict.lane_following_paths,
+            'lane_path_step': self.conflict.lane_path_step,
+            'trajectory_min_speed': self.conflict.trajectory_min_speed,
             
             # MWIS parameters
             'max_go_agents': self.mwis.max_go_agents,
             'max_exact': self.mwis.max_exact,
+            'parallel_component_size': self.mwis.parallel_component_size,
+            'parallel_components': self.mwis.parallel_components,
             'weight_factor': self.mwis.weight_factor,
             'timeout_seconds': self.mwis.timeout_seconds,
             'prefer_exact': self.mwis.prefer_exact,
+            'anytime': self.mwis.anytime,
+            'logic_budget_fraction': self.mwis.logic_budget_fraction,
+            'resolution_cache': self.mwis.resolution_cache,
+            'resolution_cache_max_age': self.mwis.resolution_cache_max_age,
+            'resolution_cache_position_bucket': self.mwis.resolution_cache_position_bucket,
             
             # Auction parameters
             'max_participants_per_auction': self.auction.max_participants_per_auction,
@@ -268,12 +336,28 @@ class UnifiedConfig:
             'deadlock_severity_threshold': self.deadlock.deadlock_severity_threshold,
             'deadlock_duration_threshold': self.deadlock.deadlock_duration_threshold,
             'deadlock_core_half_size': self.deadlock.deadlock_core_half_size,
+            'wait_for_graph': self.deadlock.wait_for_graph,
+            'wait_for_follow_gap': self.deadlock.wait_for_follow_gap,
+            'circular_wait_min_duration': self.deadlock.circular_wait_min_duration,
+            'max_cycle_releases': self.deadlock.max_cycle_releases,
+            
+            # Reservation resolver parameters
+            'reservation_cell_size': self.reservation.cell_size,
+            'reservation_slot_seconds': self.reservation.slot_seconds,
+            'reservation_min_speed': self.reservation.min_speed,
+            'reservation_vehicle_length': self.reservation.vehicle_length,
+            'reservation_vehicle_radius': self.reservation.vehicle_radius,
+            'reservation_platoon_gap': self.reservation.platoon_gap,
+            'reservation_safety_margin': self.reservation.safety_margin,
+            'reservation_decel': self.reservation.decel,
+            'reservation_commit_buffer': self.reservation.commit_buffer,
         }
     
     def to_sim_config(self) -> Dict[str, Any]:
         """Convert to simulation configuration dictionary"""
         return {
             # Map and CARLA
+            'backend': self.system.backend,
             'map': self.system.map_name,
             'carla_host': self.system.carla_host,
             'carla_port': self.system.carla_port,
@@ -358,6 +442,7 @@ class UnifiedConfig:
             "=" * 60,
             "",
             "SYSTEM CONFIGURATION:",
+            f"  Backend: {self.system.backend}",
             f"  Map: {self.system.map_name}",
             f"  CARLA Host: {self.system.carla_host}:{self.system.carla_port}",
             f"  Max Vehicles: {self.system.max_vehicles}",
@@ -379,6 +464,8 @@ class UnifiedConfig:
             f"  Weight Factor: {self.mwis.weight_factor}",
             f"  Timeout: {self.mwis.timeout_seconds}s",
             f"  Prefer Exact: {self.mwis.prefer_exact}",
+            f"  Anytime: {self.mwis.anytime} (budget {self.mwis.logic_budget_fraction:.0%} of logic interval)",
+            f"  Conflict Resolver: {self.system.conflict_resolver}",
             "",
             "AUCTION SYSTEM:",
             f"  Max Participants: {self.auction.max_participants_per_auction}",
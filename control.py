@@ -1,13 +1,31 @@
 import time
-import math
+from collections import deque
 from typing import Dict, List, Set, Any, Tuple
 from env.simulation_config import SimulationConfig
+from env.event_log import DEBUG, get_logger
+from env.running_stats import P2Quantile, RunningStats
+from env.frame_context import FrameContext
+
+log = get_logger('control')
 
 class TrafficController:
     """
     基于拍卖结果的统一交通控制器 - 支持车队和单车
     核心思想：所有控制都基于拍卖获胜者的优先级排序
+
+    Traffic-manager settings are diffed against the last values applied to
+    each vehicle; only changed settings are queued and the queue is flushed
+    once per update_control() call.
     """
+
+    # 控制参数名 → TrafficManager 设置方法（按原调用顺序）
+    TM_SETTERS = (
+        ('speed_diff', 'vehicle_percentage_speed_difference'),
+        ('follow_distance', 'distance_to_leading_vehicle'),
+        ('ignore_lights', 'ignore_lights_percentage'),
+        ('ignore_signs', 'ignore_signs_percentage'),
+        ('ignore_vehicles', 'ignore_vehicles_percentage'),
+    )
     
     def __init__(self, carla_wrapper, state_extractor, max_go_agents: int = None):
         self.carla = carla_wrapper
@@ -26,6 +44,12 @@ class TrafficController:
         # 控制状态跟踪
         self.controlled_vehicles: Dict[str, Dict] = {}
         self.current_controlled_vehicles: Set[str] = set()
+
+        # TrafficManager 命令差分：每车最近一次下发的设置 + 本周期待下发的变更
+        self._applied_tm_settings: Dict[str, Dict[str, float]] = {}
+        self._pending_tm_commands: Dict[str, Tuple[Any, Dict[str, float]]] = {}
+        self._queued_tm_settings = 0  # 本周期请求的设置数（含被差分抑制的）
+        self.tm_command_stats = {'sent': 0, 'suppressed': 0, 'flushes': 0, 'failed': 0}
         self.platoon_manager = None
         
         # Add configurable max go agents limit (can be None)
@@ -36,65 +60,76 @@ class TrafficController:
         self.vehicles_exited_intersection = 0  # Number of vehicles that exited intersection
         self.control_history = {}  # Track when vehicles entered/exited control
         
+        # Acceleration filtering parameters
+        self.accel_filter_config = {
+            'min_time_delta': 0.01,  # Skip samples with very small time differences
+            'max_acceleration': 15.0,  # Truncate extreme acceleration values (m/s²)
+            'use_median_filter': True,  # Apply median filtering
+            'median_window_size': 5,   # Window size for median filter
+            'quantiles': ()            # Optional P² quantile estimates per type, e.g. (0.5, 0.95)
+        }
+
         # Enhanced: Separate positive/negative acceleration tracking with simulation time
+        # 每车只保留中值滤波窗口内的最近样本（环形缓冲），统计量按样本O(1)累积
         self.acceleration_data = {
-            'positive': {},  # {vehicle_id: [positive_acceleration_values]}
-            'negative': {},  # {vehicle_id: [negative_acceleration_values]}
-            'absolute': {}   # {vehicle_id: [absolute_acceleration_values]} for backward compatibility
+            'positive': {},  # {vehicle_id: deque of recent positive accelerations}
+            'negative': {},  # {vehicle_id: deque of recent negative accelerations}
+            'absolute': {}   # {vehicle_id: deque of recent absolute accelerations} for backward compatibility
         }
-        # Archive completed vehicles' acceleration history so final stats keep samples
-        self.archived_acceleration_data = {
-            'positive': {},
+        self.acceleration_stats = {
+            'positive': {},  # {vehicle_id: RunningStats}
             'negative': {},
             'absolute': {}
         }
-        self.previous_velocities = {}  # {vehicle_id: previous_velocity_vector}
-        self.previous_sim_timestamps = {}  # {vehicle_id: previous_simulation_timestamp}
-        
-        # Acceleration filtering parameters
-        self.accel_filter_config = {
-            'min_time_delta': 0.01,  # Skip samples with very small time differences
-            'max_acceleration': 15.0,  # Truncate extreme acceleration values (m/s²)
-            'use_median_filter': True,  # Apply median filtering
-            'median_window_size': 5    # Window size for median filter
+        # Archive completed vehicles' aggregates so final stats keep their samples
+        self.archived_acceleration_stats = {
+            'positive': RunningStats(),
+            'negative': RunningStats(),
+            'absolute': RunningStats()
         }
+        self.acceleration_quantiles = self._new_acceleration_quantiles()
+        self.previous_velocities = {}  # {vehicle_id: previous_speed}
+        self.previous_sim_timestamps = {}  # {vehicle_id: previous_simulation_timestamp}
         
         # CRITICAL: Initialize reset tracking flags
         self._just_reset = False
         self._reset_update_count = 0
         
         limit_text = "unlimited" if max_go_agents is None else str(max_go_agents)
-        print(f"🎮 增强交通控制器初始化完成 - 支持车队、单车 (max go agents: {limit_text})")
+        log.info("🎮 增强交通控制器初始化完成 - 支持车队、单车 (max go agents: {})", limit_text)
 
     def set_platoon_manager(self, platoon_manager):
         """Set platoon manager reference"""
         self.platoon_manager = platoon_manager
-        print("🔗 车队管理器已连接到交通控制器")
+        log.info("🔗 车队管理器已连接到交通控制器")
 
     # Add method to update configuration
     def update_max_go_agents(self, max_go_agents: int = None):
         """Update the maximum go agents limit"""
         self.max_go_agents = max_go_agents
         limit_text = "unlimited" if max_go_agents is None else str(max_go_agents)
-        print(f"🔄 Traffic controller: Updated MAX_GO_AGENTS to {limit_text}")
+        log.info("🔄 Traffic controller: Updated MAX_GO_AGENTS to {}", limit_text)
 
-    def update_control(self, platoon_manager=None, auction_engine=None, direct_winners=None):
-        """主控制更新函数"""
+    def update_control(self, platoon_manager=None, auction_engine=None, direct_winners=None,
+                       frame: FrameContext = None):
+        """主控制更新函数（frame: 本决策帧的上下文，缺省时从state_extractor获取）"""
         if platoon_manager:
             self.platoon_manager = platoon_manager
+        if frame is None:
+            frame = self.state_extractor.get_frame_context()
         
         # CRITICAL: Track update calls after reset to prevent false exit rewards
         if hasattr(self, '_just_reset'):
             self._reset_update_count += 1
         
         # 1. Maintain intersection vehicle control
-        current_controlled = self._maintain_intersection_vehicle_control()
+        current_controlled = self._maintain_intersection_vehicle_control(frame)
         
         # 2. Apply auction-based control - use direct winners if provided
         auction_winners = direct_winners or (auction_engine.get_current_priority_order() if auction_engine else [])
         if auction_winners:
             auction_controlled = self._apply_auction_based_control(
-                auction_winners, platoon_manager
+                auction_winners, platoon_manager, frame
             )
         else:
             auction_controlled = set()
@@ -102,179 +137,237 @@ class TrafficController:
         current_controlled.update(auction_controlled)
         
         # 3. Update acceleration data for currently controlled vehicles
-        self._update_acceleration_data(current_controlled)
+        self._update_acceleration_data(current_controlled, frame)
         
         # 4. 恢复不再被控制的车辆 (using expanded vehicle state detection)
         # CRITICAL: Skip exit tracking for first few updates after reset
-        self._restore_uncontrolled_vehicles(current_controlled)
+        released = self._restore_uncontrolled_vehicles(current_controlled, frame)
         
         # 5. 更新当前控制状态
         self.current_controlled_vehicles = current_controlled
 
-    def _update_acceleration_data(self, controlled_vehicles: Set[str]):
+        # 6. 一次性下发本周期变更的TrafficManager设置
+        self._flush_tm_commands()
+
+        # 7. 清理已应用设置记录：本周期释放控制的车辆（恢复设置已下发）和已不在仿真中的车辆
+        self._prune_applied_tm_settings(released, frame)
+
+    def _queue_tm_settings(self, vehicle_id: str, carla_vehicle, settings: Dict[str, float]):
+        """Queue the settings that differ from the last applied values (later calls in a cycle win)"""
+        applied = self._applied_tm_settings.get(vehicle_id, {})
+        entry = self._pending_tm_commands.get(vehicle_id)
+        pending = entry[1] if entry is not None else {}
+        for name, value in settings.items():
+            if applied.get(name) == value:
+                pending.pop(name, None)
+            else:
+                pending[name] = value
+        self._queued_tm_settings += len(settings)
+        if pending:
+            self._pending_tm_commands[vehicle_id] = (carla_vehicle, pending)
+        else:
+            self._pending_tm_commands.pop(vehicle_id, None)
+
+    def _flush_tm_commands(self):
+        """Send the queued TrafficManager settings; unchanged settings count as suppressed"""
+        if not self._pending_tm_commands and not self._queued_tm_settings:
+            return
+        stats = self.tm_command_stats
+        stats['flushes'] += 1
+        sent = 0
+        for vehicle_id, (carla_vehicle, pending) in self._pending_tm_commands.items():
+            applied = self._applied_tm_settings.setdefault(vehicle_id, {})
+            try:
+                for name, method in self.TM_SETTERS:
+                    if name in pending:
+                        getattr(self.traffic_manager, method)(carla_vehicle, pending[name])
+                        applied[name] = pending[name]
+                        sent += 1
+            except Exception as e:
+                # 下次重新全量下发
+                self._applied_tm_settings.pop(vehicle_id, None)
+                stats['failed'] += 1
+                log.warning("[Warning] TrafficManager设置下发失败 {}: {}", vehicle_id, e)
+        stats['sent'] += sent
+        stats['suppressed'] += self._queued_tm_settings - sent
+        self._pending_tm_commands = {}
+        self._queued_tm_settings = 0
+
+    def _prune_applied_tm_settings(self, released: Set[str], frame: FrameContext):
+        """Forget the applied settings of released and departed vehicles (sent in full if controlled again)"""
+        for vehicle_id in released:
+            self._applied_tm_settings.pop(vehicle_id, None)
+        vehicle_lookup = frame.by_id
+        stale = [vehicle_id for vehicle_id in self._applied_tm_settings if vehicle_id not in vehicle_lookup]
+        for vehicle_id in stale:
+            del self._applied_tm_settings[vehicle_id]
+
+    def _sim_time(self, frame: FrameContext = None) -> float:
+        """Simulation time of the decision frame (current snapshot outside update_control)"""
+        if frame is not None:
+            return frame.sim_time
+        return self.world.get_snapshot().timestamp.elapsed_seconds
+
+    def get_tm_command_stats(self) -> Dict[str, Any]:
+        """TrafficManager settings sent vs suppressed by the per-vehicle diff"""
+        stats = dict(self.tm_command_stats)
+        requested = stats['sent'] + stats['suppressed']
+        stats['suppressed_rate'] = stats['suppressed'] / requested if requested else 0.0
+        return stats
+
+    def _update_acceleration_data(self, controlled_vehicles: Set[str], frame: FrameContext):
         """Update acceleration data for controlled vehicles using simulation time and separate positive/negative tracking"""
-        # Get current simulation timestamp
-        current_sim_time = self.world.get_snapshot().timestamp.elapsed_seconds
-        vehicle_states = self.state_extractor.get_vehicle_states()
-        vehicle_lookup = {str(v['id']): v for v in vehicle_states}
+        # Simulation timestamp of the frame the states were extracted from
+        current_sim_time = frame.sim_time
         
         for vehicle_id in controlled_vehicles:
-            if vehicle_id in vehicle_lookup:
-                vehicle_state = vehicle_lookup[vehicle_id]
+            # Speed is precomputed once per tick by the vehicle state table
+            current_speed = frame.speed(vehicle_id)
+            if current_speed is None:
+                continue
+            
+            try:
                 
-                try:
-                    # Get current velocity - handle both dict and tuple formats
-                    velocity_data = vehicle_state.get('velocity', (0, 0, 0))
+                # Calculate acceleration if we have previous data
+                if vehicle_id in self.previous_velocities and vehicle_id in self.previous_sim_timestamps:
+                    prev_speed = self.previous_velocities[vehicle_id]
+                    prev_sim_timestamp = self.previous_sim_timestamps[vehicle_id]
                     
-                    if isinstance(velocity_data, dict):
-                        # Dictionary format: {'x': val, 'y': val, 'z': val}
-                        current_velocity_x = velocity_data.get('x', 0)
-                        current_velocity_y = velocity_data.get('y', 0) 
-                        current_velocity_z = velocity_data.get('z', 0)
-                    elif isinstance(velocity_data, (tuple, list)) and len(velocity_data) >= 3:
-                        # Tuple/list format: (x, y, z)
-                        current_velocity_x = velocity_data[0]
-                        current_velocity_y = velocity_data[1]
-                        current_velocity_z = velocity_data[2]
-                    else:
-                        # Fallback for unexpected format
-                        current_velocity_x = current_velocity_y = current_velocity_z = 0
+                    time_delta = current_sim_time - prev_sim_timestamp
                     
-                    current_speed = math.sqrt(current_velocity_x**2 + current_velocity_y**2 + current_velocity_z**2)
-                    
-                    # Calculate acceleration if we have previous data
-                    if vehicle_id in self.previous_velocities and vehicle_id in self.previous_sim_timestamps:
-                        prev_velocity = self.previous_velocities[vehicle_id]
-                        prev_sim_timestamp = self.previous_sim_timestamps[vehicle_id]
+                    # Filter: Skip if time delta is too small
+                    if time_delta >= self.accel_filter_config['min_time_delta']:
+                        # Calculate raw acceleration (can be positive or negative)
+                        raw_acceleration = (current_speed - prev_speed) / time_delta
                         
-                        # Handle previous velocity format consistently
-                        if isinstance(prev_velocity, dict):
-                            prev_speed = math.sqrt(prev_velocity['x']**2 + prev_velocity['y']**2 + prev_velocity['z']**2)
-                        else:
-                            prev_speed = math.sqrt(prev_velocity[0]**2 + prev_velocity[1]**2 + prev_velocity[2]**2)
+                        # Truncate extreme values
+                        max_accel = self.accel_filter_config['max_acceleration']
+                        truncated_acceleration = max(-max_accel, min(max_accel, raw_acceleration))
                         
-                        time_delta = current_sim_time - prev_sim_timestamp
+                        # Store acceleration data separately by sign
+                        if vehicle_id not in self.acceleration_data['absolute']:
+                            self._start_acceleration_tracking(vehicle_id)
+                        if truncated_acceleration > 0:
+                            self._record_acceleration_sample('positive', vehicle_id, truncated_acceleration)
+                        elif truncated_acceleration < 0:
+                            # store negative accelerations as negative values so sign is preserved
+                            self._record_acceleration_sample('negative', vehicle_id, truncated_acceleration)
                         
-                        # Filter: Skip if time delta is too small
-                        if time_delta >= self.accel_filter_config['min_time_delta']:
-                            # Calculate raw acceleration (can be positive or negative)
-                            raw_acceleration = (current_speed - prev_speed) / time_delta
-                            
-                            # Truncate extreme values
-                            max_accel = self.accel_filter_config['max_acceleration']
-                            truncated_acceleration = max(-max_accel, min(max_accel, raw_acceleration))
-                            
-                            # Initialize acceleration lists if needed
-                            for accel_type in ['positive', 'negative', 'absolute']:
-                                if vehicle_id not in self.acceleration_data[accel_type]:
-                                    self.acceleration_data[accel_type][vehicle_id] = []
-                            
-                            # Store acceleration data separately by sign
-                            if truncated_acceleration > 0:
-                                self.acceleration_data['positive'][vehicle_id].append(truncated_acceleration)
-                            elif truncated_acceleration < 0:
-                                # store negative accelerations as negative values so sign is preserved
-                                self.acceleration_data['negative'][vehicle_id].append(truncated_acceleration)
-                            
-                            # Also store absolute value for backward compatibility
-                            self.acceleration_data['absolute'][vehicle_id].append(abs(truncated_acceleration))
-                            
-                            # Apply median filtering if enabled
-                            if self.accel_filter_config['use_median_filter']:
-                                self._apply_median_filter(vehicle_id)
-                    
-                    # Update previous data - store as tuple for consistency
-                    self.previous_velocities[vehicle_id] = (current_velocity_x, current_velocity_y, current_velocity_z)
-                    self.previous_sim_timestamps[vehicle_id] = current_sim_time
-                    
-                except Exception as e:
-                    print(f"[Warning] 计算车辆 {vehicle_id} 加速度失败: {e}")
-                    # Debug: Print velocity data format for troubleshooting
-                    try:
-                        velocity_debug = vehicle_state.get('velocity', 'NOT_FOUND')
-                        print(f"[Debug] 车辆 {vehicle_id} 速度数据格式: {type(velocity_debug)} = {velocity_debug}")
-                    except:
-                        pass
+                        # Also store absolute value for backward compatibility
+                        self._record_acceleration_sample('absolute', vehicle_id, abs(truncated_acceleration))
+                        
+                        # Apply median filtering if enabled
+                        if self.accel_filter_config['use_median_filter']:
+                            self._apply_median_filter(vehicle_id)
+                
+                # Update previous data
+                self.previous_velocities[vehicle_id] = current_speed
+                self.previous_sim_timestamps[vehicle_id] = current_sim_time
+                
+            except Exception as e:
+                log.warning("[Warning] 计算车辆 {} 加速度失败: {}", vehicle_id, e)
+
+    def _new_acceleration_quantiles(self) -> Dict[str, List[P2Quantile]]:
+        quantiles = self.accel_filter_config['quantiles']
+        return {accel_type: [P2Quantile(q) for q in quantiles]
+                for accel_type in ['positive', 'negative', 'absolute']}
+
+    def _start_acceleration_tracking(self, vehicle_id: str):
+        """Create the per-vehicle sample window and aggregate for every type"""
+        window_size = max(1, self.accel_filter_config['median_window_size'])
+        for accel_type in ['positive', 'negative', 'absolute']:
+            self.acceleration_data[accel_type][vehicle_id] = deque(maxlen=window_size)
+            self.acceleration_stats[accel_type][vehicle_id] = RunningStats()
+
+    def _record_acceleration_sample(self, accel_type: str, vehicle_id: str, value: float):
+        """Append a sample to the vehicle's window and running aggregate"""
+        window = self.acceleration_data[accel_type][vehicle_id]
+        if window:
+            # 上一个样本不会再被中值滤波改写，可以计入分位数估计
+            self._finalize_acceleration_sample(accel_type, window[-1])
+        window.append(value)
+        self.acceleration_stats[accel_type][vehicle_id].add(value)
+
+    def _finalize_acceleration_sample(self, accel_type: str, value: float):
+        for estimator in self.acceleration_quantiles[accel_type]:
+            estimator.add(value)
+
+    def _archive_acceleration_data(self, vehicle_id: str):
+        """Fold a vehicle's aggregates into the archive and drop its sample window"""
+        for accel_type in ['positive', 'negative', 'absolute']:
+            window = self.acceleration_data[accel_type].pop(vehicle_id, None)
+            if window:
+                self._finalize_acceleration_sample(accel_type, window[-1])
+            stats = self.acceleration_stats[accel_type].pop(vehicle_id, None)
+            if stats is not None:
+                self.archived_acceleration_stats[accel_type].merge(stats)
 
     def _apply_median_filter(self, vehicle_id: str):
         """Apply median filtering to the most recent acceleration samples"""
         window_size = self.accel_filter_config['median_window_size']
         
         for accel_type in ['positive', 'negative', 'absolute']:
-            if vehicle_id in self.acceleration_data[accel_type]:
-                accel_list = self.acceleration_data[accel_type][vehicle_id]
+            window = self.acceleration_data[accel_type].get(vehicle_id)
+            
+            # Apply median filter only if we have enough samples (the ring buffer holds the most recent window)
+            if window is not None and len(window) >= window_size:
+                # Calculate median of the window
+                sorted_window = sorted(window)
+                n = len(sorted_window)
+                if n % 2 == 0:
+                    median_value = (sorted_window[n//2 - 1] + sorted_window[n//2]) / 2
+                else:
+                    median_value = sorted_window[n//2]
                 
-                # Apply median filter only if we have enough samples
-                if len(accel_list) >= window_size:
-                    # Get the most recent window
-                    recent_window = accel_list[-window_size:]
-                    
-                    # Calculate median of the window
-                    sorted_window = sorted(recent_window)
-                    n = len(sorted_window)
-                    if n % 2 == 0:
-                        median_value = (sorted_window[n//2 - 1] + sorted_window[n//2]) / 2
-                    else:
-                        median_value = sorted_window[n//2]
-                    
-                    # Replace the most recent value with the median
-                    accel_list[-1] = median_value
+                # Replace the most recent value with the median
+                if window[-1] != median_value:
+                    self.acceleration_stats[accel_type][vehicle_id].replace(window[-1], median_value)
+                    window[-1] = median_value
 
     def _calculate_average_acceleration(self) -> Dict[str, float]:
         """Calculate average acceleration for positive, negative, and absolute values with separate absolute averages"""
         results = {}
         
         for accel_type in ['positive', 'negative', 'absolute']:
-            all_accelerations = []
-            
-            # include both currently tracked and archived samples
-            for vehicle_id, accelerations in self.acceleration_data[accel_type].items():
-                all_accelerations.extend(accelerations)
-            for vehicle_id, accelerations in self.archived_acceleration_data[accel_type].items():
-                all_accelerations.extend(accelerations)
+            # include both currently tracked and archived samples (O(vehicles), not O(samples))
+            stats = RunningStats.combined(
+                [self.archived_acceleration_stats[accel_type]] + list(self.acceleration_stats[accel_type].values())
+            )
             
-            if all_accelerations:
-                # Calculate average of absolute values for positive and negative separately
-                if accel_type in ['positive', 'negative']:
-                    # For positive/negative, calculate average of absolute values
-                    results[f'average_absolute_{accel_type}_acceleration'] = sum(abs(a) for a in all_accelerations) / len(all_accelerations)
-                    results[f'average_{accel_type}_acceleration'] = sum(all_accelerations) / len(all_accelerations)
-                else:
-                    # For absolute, keep original behavior
-                    results[f'average_{accel_type}_acceleration'] = sum(all_accelerations) / len(all_accelerations)
-                
-                results[f'{accel_type}_acceleration_samples'] = len(all_accelerations)
-                results[f'{accel_type}_acceleration_vehicles'] = len(self.acceleration_data[accel_type])
+            if accel_type in ['positive', 'negative']:
+                # For positive/negative, calculate average of absolute values
+                results[f'average_absolute_{accel_type}_acceleration'] = stats.average_abs
+                results[f'average_{accel_type}_acceleration'] = stats.average
             else:
-                if accel_type in ['positive', 'negative']:
-                    results[f'average_absolute_{accel_type}_acceleration'] = 0.0
-                    results[f'average_{accel_type}_acceleration'] = 0.0
-                else:
-                    results[f'average_{accel_type}_acceleration'] = 0.0
-                
-                results[f'{accel_type}_acceleration_samples'] = 0
-                results[f'{accel_type}_acceleration_vehicles'] = 0
+                # For absolute, keep original behavior
+                results[f'average_{accel_type}_acceleration'] = stats.average
+            results[f'{accel_type}_acceleration_std'] = stats.std
+            
+            results[f'{accel_type}_acceleration_samples'] = stats.count
+            results[f'{accel_type}_acceleration_vehicles'] = len(self.acceleration_data[accel_type]) if stats.count else 0
+            
+            # P² estimates over samples no longer subject to the median filter
+            for estimator in self.acceleration_quantiles[accel_type]:
+                results[f'{accel_type}_acceleration_p{estimator.p * 100:g}'] = estimator.value
         
         return results
 
-    def _maintain_intersection_vehicle_control(self) -> Set[str]:
+    def _maintain_intersection_vehicle_control(self, frame: FrameContext) -> Set[str]:
         """维持路口内车辆的控制"""
         maintained_vehicles = set()
-        vehicle_states = self.state_extractor.get_vehicle_states()
         
-        for vehicle_state in vehicle_states:
-            vehicle_id = str(vehicle_state['id'])
-            
+        # 只需检查之前被控制的车辆
+        for vehicle_id in list(self.controlled_vehicles):
             # 如果车辆在路口内且之前被控制，继续维持控制
-            if (vehicle_state.get('is_junction', False) and 
-                vehicle_id in self.controlled_vehicles):
+            if frame.is_junction(vehicle_id):
                 
                 # 确保控制仍然有效
                 if self._apply_single_vehicle_control(
                     vehicle_id, 
                     self.controlled_vehicles[vehicle_id]['rank'],
                     0.0,  # bid_value
-                    'go'  # 路口内车辆应该继续通行
+                    'go',  # 路口内车辆应该继续通行
+                    frame
                 ):
                     maintained_vehicles.add(vehicle_id)
         
@@ -289,22 +382,23 @@ class TrafficController:
         else:
             return 'wait'  # Beyond limit, must wait
 
-    def _apply_auction_based_control(self, auction_winners: List, platoon_manager=None) -> Set[str]:
+    def _apply_auction_based_control(self, auction_winners: List, platoon_manager=None,
+                                     frame: FrameContext = None) -> Set[str]:
         """Apply control based on auction results with traffic flow control awareness"""
         controlled_vehicles = set()
         
         if not auction_winners:
             return controlled_vehicles
         
-        print(f"🚦 Applying auction control to {len(auction_winners)} winners:")
+        log.info("🚦 Applying auction control to {} winners:", len(auction_winners))
         
         # First pass: Identify and protect vehicles already in transit
         in_transit_vehicles = set()
-        vehicle_states = self.state_extractor.get_vehicle_states()
-        vehicle_lookup = {str(v['id']): v for v in vehicle_states}
+        if frame is None:
+            frame = self.state_extractor.get_frame_context()
         
-        for vehicle_id, vehicle_state in vehicle_lookup.items():
-            if vehicle_state.get('is_junction', False) and vehicle_id in self.controlled_vehicles:
+        for vehicle_id in list(self.controlled_vehicles):
+            if frame.is_junction(vehicle_id):
                 # Vehicle is in intersection and was previously controlled - protect it
                 if self.controlled_vehicles[vehicle_id].get('action') == 'go':
                     in_transit_vehicles.add(vehicle_id)
@@ -312,9 +406,9 @@ class TrafficController:
                     if self._apply_single_vehicle_control(vehicle_id, 
                                                         self.controlled_vehicles[vehicle_id]['rank'],
                                                         self.controlled_vehicles[vehicle_id]['bid_value'], 
-                                                        'go'):
+                                                        'go', frame):
                         controlled_vehicles.add(vehicle_id)
-                        print(f"   🔒 Vehicle {vehicle_id}: PROTECTED (in transit)")
+                        log.info("   🔒 Vehicle {}: PROTECTED (in transit)", vehicle_id)
         
         # Second pass: Apply new auction controls
         for i, winner in enumerate(auction_winners):
@@ -325,7 +419,8 @@ class TrafficController:
             
             # Validate action
             if control_action not in ['go', 'wait']:
-                print(f"⚠️ Invalid conflict_action '{control_action}' for {participant.id}, defaulting to 'go'")
+                log.warning("⚠️ Invalid conflict_action '{}' for {}, defaulting to 'go'",
+                            control_action, participant.id)
                 control_action = 'go'
             
             # Apply control
@@ -337,16 +432,16 @@ class TrafficController:
                     continue
                     
                 action_emoji = "🟢" if control_action == 'go' else "🔴"
-                reason = f"rank #{winner.rank}"
-                print(f"   🚗 Vehicle {vehicle_id}: {control_action} {action_emoji} ({reason})")
+                log.info("   🚗 Vehicle {}: {} {} (rank #{})", vehicle_id, control_action, action_emoji, winner.rank)
                 
                 # DEBUG: Show control parameters for waiting vehicles
-                if control_action == 'wait' and i < 3:  # Show first 3 waiting vehicles
+                if control_action == 'wait' and i < 3 and log.enabled(DEBUG):  # Show first 3 waiting vehicles
                     control_params = self._get_control_params_by_rank_and_action(
                         winner.rank, control_action, False, False
                     )
+                    log.debug("      wait control params: {}", control_params)
                 if self._apply_single_vehicle_control(vehicle_id, winner.rank, 
-                                                    winner.bid.value, control_action):
+                                                    winner.bid.value, control_action, frame):
                     controlled_vehicles.add(vehicle_id)
                     
             elif participant.type == 'platoon':
@@ -359,14 +454,14 @@ class TrafficController:
                     if platoon_in_transit:
                         # Force 'go' for entire platoon if any member is in transit
                         control_action = 'go'
-                        print(f"   🔒 Platoon {participant.id}: PROTECTED (member in transit)")
+                        log.info("   🔒 Platoon {}: PROTECTED (member in transit)", participant.id)
                     
                     action_emoji = "🟢" if control_action == 'go' else "🔴"
-                    reason = f"rank #{winner.rank}"
-                    print(f"   🚛 Platoon {participant.id} (leader {leader_id}): {control_action} {action_emoji} ({reason})")
+                    log.info("   🚛 Platoon {} (leader {}): {} {} (rank #{})",
+                             participant.id, leader_id, control_action, action_emoji, winner.rank)
                     
                     platoon_vehicles = self._apply_platoon_control(
-                        participant, winner.rank, winner.bid.value, control_action
+                        participant, winner.rank, winner.bid.value, control_action, frame
                     )
                     controlled_vehicles.update(platoon_vehicles)
         
@@ -426,29 +521,30 @@ class TrafficController:
     def set_bid_policy(self, bid_policy):
         """设置bid_policy引用以使用其控制参数"""
         self.bid_policy = bid_policy
-        print("🔗 Bid policy connected to traffic controller")
+        log.info("🔗 Bid policy connected to traffic controller")
 
-    def _restore_uncontrolled_vehicles(self, current_controlled: Set[str]):
-        """恢复不再被控制的车辆，包括已离开路口的车辆"""
+    def _restore_uncontrolled_vehicles(self, current_controlled: Set[str], frame: FrameContext = None) -> Set[str]:
+        """恢复不再被控制的车辆，包括已离开路口的车辆；返回本周期释放控制的车辆id"""
         # CRITICAL: Skip exit tracking immediately after reset to prevent false rewards
         skip_exit_tracking = (hasattr(self, '_just_reset') and 
                              self._just_reset and 
                              self._reset_update_count <= 3)
         
         if skip_exit_tracking:
-            print(f"🔄 Skipping exit tracking (reset update #{self._reset_update_count})")
+            log.info("🔄 Skipping exit tracking (reset update #{})", self._reset_update_count)
             # Clear the reset flag after a few updates
             if self._reset_update_count >= 3:
                 self._just_reset = False
-                print("✅ Reset grace period completed, normal exit tracking resumed")
-            return
+                log.info("✅ Reset grace period completed, normal exit tracking resumed")
+            return set()
         
         previously_controlled = set(self.controlled_vehicles.keys())
         vehicles_to_restore = previously_controlled - current_controlled
         
         # 检查是否有车辆已完全离开路口区域
-        vehicle_states = self.state_extractor.get_vehicle_states()
-        vehicle_lookup = {str(v['id']): v for v in vehicle_states}
+        if frame is None:
+            frame = self.state_extractor.get_frame_context()
+        vehicle_lookup = frame.by_id
         
         for vehicle_id in list(self.controlled_vehicles.keys()):
             if vehicle_id in vehicle_lookup:
@@ -459,7 +555,7 @@ class TrafficController:
                     vehicle_id not in current_controlled and
                     self._vehicle_has_exited_intersection(vehicle_state)):
                     vehicles_to_restore.add(vehicle_id)
-                    print(f"✅ 车辆 {vehicle_id} 已离开路口，移除控制")
+                    log.info("✅ 车辆 {} 已离开路口，移除控制", vehicle_id)
             else:
                 # Vehicle no longer exists in simulation
                 vehicles_to_restore.add(vehicle_id)
@@ -469,19 +565,17 @@ class TrafficController:
                 carla_vehicle = self.world.get_actor(int(vehicle_id))
                 if carla_vehicle and carla_vehicle.is_alive:
                     # 恢复默认控制参数
-                    self.traffic_manager.vehicle_percentage_speed_difference(
-                        carla_vehicle, self.default_speed_diff
-                    )
-                    self.traffic_manager.distance_to_leading_vehicle(
-                        carla_vehicle, self.default_follow_distance
-                    )
-                    self.traffic_manager.ignore_lights_percentage(carla_vehicle, 0.0)
-                    self.traffic_manager.ignore_vehicles_percentage(carla_vehicle, 0.0)
+                    self._queue_tm_settings(vehicle_id, carla_vehicle, {
+                        'speed_diff': self.default_speed_diff,
+                        'follow_distance': self.default_follow_distance,
+                        'ignore_lights': 0.0,
+                        'ignore_vehicles': 0.0,
+                    })
                 
                 # Track exit statistics
                 if vehicle_id in self.controlled_vehicles:
                     # Mark exit time for statistics - USE SIMULATION TIME
-                    current_sim_time = self.world.get_snapshot().timestamp.elapsed_seconds
+                    current_sim_time = frame.sim_time
                     self.control_history[vehicle_id] = {
                         'enter_time': self.controlled_vehicles[vehicle_id].get('sim_timestamp', current_sim_time),
                         'exit_time': current_sim_time,  # Use simulation time instead of wall-clock time
@@ -494,19 +588,16 @@ class TrafficController:
                 self.previous_sim_timestamps.pop(vehicle_id, None)  # Updated to use sim timestamps
                 
                 # Clean up acceleration data
-                # move the samples to archive so final stats include them
-                for accel_type in ['positive', 'negative', 'absolute']:
-                    if vehicle_id in self.acceleration_data[accel_type]:
-                        self.archived_acceleration_data[accel_type].setdefault(vehicle_id, []).extend(
-                            self.acceleration_data[accel_type][vehicle_id]
-                        )
-                        del self.acceleration_data[accel_type][vehicle_id]
+                # fold the aggregates into the archive so final stats include them
+                self._archive_acceleration_data(vehicle_id)
                 
                 # 移除控制记录
                 self.controlled_vehicles.pop(vehicle_id, None)
                 
             except Exception as e:
-                print(f"[Warning] 恢复车辆控制失败 {vehicle_id}: {e}")
+                log.warning("[Warning] 恢复车辆控制失败 {}: {}", vehicle_id, e)
+        
+        return vehicles_to_restore
 
     def _vehicle_has_exited_intersection(self, vehicle_state: Dict) -> bool:
         """检查车辆是否已完全离开路口区域"""
@@ -549,7 +640,8 @@ class TrafficController:
 
     def reset_episode_state(self):
         """Reset ONLY episode-specific state, PRESERVE cumulative statistics"""
-        print(f"🔄 Resetting episode state (preserving cumulative stats: {self.total_vehicles_controlled} controlled, {self.vehicles_exited_intersection} exits)")
+        log.info("🔄 Resetting episode state (preserving cumulative stats: {} controlled, {} exits)",
+                 self.total_vehicles_controlled, self.vehicles_exited_intersection)
         
         # PRESERVE cumulative statistics across episodes:
         # - self.total_vehicles_controlled (keep for training analysis)
@@ -566,17 +658,27 @@ class TrafficController:
             'negative': {},
             'absolute': {}
         }
-        # PRESERVE acceleration_archive for historical analysis
+        self.acceleration_stats = {
+            'positive': {},
+            'negative': {},
+            'absolute': {}
+        }
+        # PRESERVE archived_acceleration_stats (and quantile estimators) for historical analysis
         
         # Clear current velocity tracking
         self.previous_velocities = {}
         self.previous_sim_timestamps = {}
+
+        # 场景重置会重新生成车辆，已下发设置的记录不再有效
+        self._applied_tm_settings = {}
+        self._pending_tm_commands = {}
+        self._queued_tm_settings = 0
         
         # CRITICAL: Set flag to prevent false exit detection after reset
         self._just_reset = True
         self._reset_update_count = 0
         
-        print("✅ Episode state reset - cumulative statistics preserved")
+        log.info("✅ Episode state reset - cumulative statistics preserved")
 
     def get_final_statistics(self) -> Dict[str, Any]:
         """Get final simulation statistics with enhanced acceleration metrics"""
@@ -605,7 +707,7 @@ class TrafficController:
         return base_stats
 
     def _apply_single_vehicle_control(self, vehicle_id: str, rank: int, bid_value: float, 
-                                    action: str) -> bool:
+                                    action: str, frame: FrameContext = None) -> bool:
         """Apply control to a single vehicle"""
         try:
             carla_vehicle = self.world.get_actor(int(vehicle_id))
@@ -615,28 +717,16 @@ class TrafficController:
             # Get control parameters based on action
             params = self._get_control_params_by_rank_and_action(rank, action)
             
-            # Apply traffic manager settings
-            self.traffic_manager.vehicle_percentage_speed_difference(
-                carla_vehicle, params['speed_diff']
-            )
-            self.traffic_manager.distance_to_leading_vehicle(
-                carla_vehicle, params['follow_distance']
-            )
-            self.traffic_manager.ignore_lights_percentage(
-                carla_vehicle, params['ignore_lights']
-            )
-            self.traffic_manager.ignore_signs_percentage(
-                carla_vehicle, params['ignore_signs']
-            )
-            self.traffic_manager.ignore_vehicles_percentage(
-                carla_vehicle, params['ignore_vehicles']
-            )
+            # Queue traffic manager settings (only changed values are sent at flush)
+            self._queue_tm_settings(vehicle_id, carla_vehicle, {
+                name: params[name] for name, _ in self.TM_SETTERS
+            })
             
             # If first time controlling this vehicle, increment total counter
             if vehicle_id not in self.controlled_vehicles:
                 self.total_vehicles_controlled += 1
             # Record control state - USE SIMULATION TIME
-            current_sim_time = self.world.get_snapshot().timestamp.elapsed_seconds
+            current_sim_time = self._sim_time(frame)
             self.controlled_vehicles[vehicle_id] = {
                  'rank': rank,
                  'bid_value': bid_value,
@@ -651,11 +741,11 @@ class TrafficController:
             return True
             
         except Exception as e:
-            print(f"[Warning] 应用车辆控制失败 {vehicle_id}: {e}")
+            log.warning("[Warning] 应用车辆控制失败 {}: {}", vehicle_id, e)
             return False
 
     def _apply_platoon_control(self, participant, rank: int, bid_value: float, 
-                             action: str) -> Set[str]:
+                             action: str, frame: FrameContext = None) -> Set[str]:
         """Apply control to all vehicles in a platoon"""
         controlled_vehicles = set()
         
@@ -670,19 +760,19 @@ class TrafficController:
                 
                 # Apply control to each vehicle in platoon
                 if self._apply_single_platoon_vehicle_control(
-                    vehicle_id, rank, bid_value, action, is_leader
+                    vehicle_id, rank, bid_value, action, is_leader, frame
                 ):
                     controlled_vehicles.add(vehicle_id)
             
             return controlled_vehicles
             
         except Exception as e:
-            print(f"[Warning] 应用车队控制失败 {participant.id}: {e}")
+            log.warning("[Warning] 应用车队控制失败 {}: {}", participant.id, e)
             return controlled_vehicles
 
     def _apply_single_platoon_vehicle_control(self, vehicle_id: str, rank: int, 
                                             bid_value: float, action: str, 
-                                            is_leader: bool) -> bool:
+                                            is_leader: bool, frame: FrameContext = None) -> bool:
         """Apply control to a single vehicle within a platoon with enhanced follower aggression"""
         try:
             carla_vehicle = self.world.get_actor(int(vehicle_id))
@@ -694,29 +784,17 @@ class TrafficController:
                 rank, action, is_platoon_member=True, is_leader=is_leader
             )
             
-            # Apply traffic manager settings
-            self.traffic_manager.vehicle_percentage_speed_difference(
-                carla_vehicle, params['speed_diff']
-            )
-            self.traffic_manager.distance_to_leading_vehicle(
-                carla_vehicle, params['follow_distance']
-            )
-            self.traffic_manager.ignore_lights_percentage(
-                carla_vehicle, params['ignore_lights']
-            )
-            self.traffic_manager.ignore_signs_percentage(
-                carla_vehicle, params['ignore_signs']
-            )
-            self.traffic_manager.ignore_vehicles_percentage(
-                carla_vehicle, params['ignore_vehicles']
-            )
+            # Queue traffic manager settings (only changed values are sent at flush)
+            self._queue_tm_settings(vehicle_id, carla_vehicle, {
+                name: params[name] for name, _ in self.TM_SETTERS
+            })
         
             
             # If first time controlling this vehicle, increment total counter
             if vehicle_id not in self.controlled_vehicles:
                 self.total_vehicles_controlled += 1
             # Record control state - USE SIMULATION TIME
-            current_sim_time = self.world.get_snapshot().timestamp.elapsed_seconds
+            current_sim_time = self._sim_time(frame)
             self.controlled_vehicles[vehicle_id] = {
                  'rank': rank,
                  'bid_value': bid_value,
@@ -731,5 +809,5 @@ class TrafficController:
             return True
             
         except Exception as e:
-            print(f"[Warning] 应用车队车辆控制失败 {vehicle_id}: {e}")
+            log.warning("[Warning] 应用车队车辆控制失败 {}: {}", vehicle_id, e)
             return False
\ No newline at end of file
@@ -5,6 +5,10 @@ from collections import deque
 import os
 import atexit
 
+from env.event_log import get_logger
+
+log = get_logger('drl.reward')
+
 class SimulationMetricsManager:
     """Dedicated manager for simulation metrics tracking and validation"""
     
@@ -224,7 +228,7 @@ class SimulationMetricsManager:
                 # Simple +10 per vehicle exit - clear positive reward
                 exit_reward = new_exits * 10.0
                 reward += exit_reward
-                print(f"✅ +{exit_reward:.1f} for {new_exits} vehicle exits")
+                log.info("✅ +{:.1f} for {} vehicle exits", exit_reward, new_exits)
             
             # Update baseline
             self.metrics['prev_vehicles_exited'] = current_exited
@@ -237,38 +241,41 @@ class SimulationMetricsManager:
                 
                 # DEBUG: Log collision count details
                 if current_collisions > 0 or prev_collisions > 0:
-                    print(f"🔍 Collision Debug: current={current_collisions}, prev={prev_collisions}, new={new_collisions}")
+                    log.debug("🔍 Collision Debug: current={}, prev={}, new={}",
+                              current_collisions, prev_collisions, new_collisions)
                 
                 # ENHANCED VALIDATION: Check for proper episode reset
                 if current_collisions > 0 and prev_collisions == 0 and new_collisions == current_collisions:
                     # This suggests the collision count wasn't properly reset between episodes
-                    print(f"🚨 CRITICAL: Collision count synchronization issue detected!")
-                    print(f"   Current: {current_collisions}, Previous: {prev_collisions}, New: {new_collisions}")
-                    print(f"   This episode may have incorrect collision penalties")
+                    log.warning("🚨 CRITICAL: Collision count synchronization issue detected!")
+                    log.warning("   Current: {}, Previous: {}, New: {}",
+                                current_collisions, prev_collisions, new_collisions)
+                    log.warning("   This episode may have incorrect collision penalties")
                     
                     # Don't auto-reset here - let the episode continue but log the issue
                     # The next episode reset should fix this
-                    print(f"   ⚠️ Episode will continue with potential incorrect rewards")
-                    print(f"   🔧 This will be fixed on next episode reset")
+                    log.warning("   ⚠️ Episode will continue with potential incorrect rewards")
+                    log.warning("   🔧 This will be fixed on next episode reset")
                 
                 # ENHANCED SAFETY CHECK: Detect and handle suspicious collision counts
                 if current_collisions > 100:  # Suspiciously high collision count
-                    print(f"🚨 SAFETY CHECK: Suspiciously high collision count detected: {current_collisions}")
-                    print(f"   This suggests collision counter was not properly reset between episodes")
+                    log.warning("🚨 SAFETY CHECK: Suspiciously high collision count detected: {}", current_collisions)
+                    log.warning("   This suggests collision counter was not properly reset between episodes")
                     
                     # Don't auto-reset - just cap the penalty for this episode
                     if new_collisions > 0:
                         # Cap new collisions to prevent massive negative rewards
                         capped_new_collisions = min(new_collisions, 10)  # Cap at 10 for this episode
                         if capped_new_collisions < new_collisions:
-                            print(f"   🔧 Capping new collisions from {new_collisions} to {capped_new_collisions} for this episode")
+                            log.warning("   🔧 Capping new collisions from {} to {} for this episode",
+                                        new_collisions, capped_new_collisions)
                             new_collisions = capped_new_collisions
                 
                 # VALIDATION: Check for suspicious collision counts
                 if current_collisions > 1000:
-                    print(f"⚠️ WARNING: Suspiciously high collision count: {current_collisions}")
+                    log.warning("⚠️ WARNING: Suspiciously high collision count: {}", current_collisions)
                 if new_collisions > 100:
-                    print(f"⚠️ WARNING: Suspiciously high new collisions: {new_collisions}")
+                    log.warning("⚠️ WARNING: Suspiciously high new collisions: {}", new_collisions)
                 
                 if new_collisions > 0:
                     # Use unified config collision penalty value for consistency
@@ -276,7 +283,8 @@ class SimulationMetricsManager:
                     collision_penalty = new_collisions * collision_penalty_value
                     reward -= collision_penalty
                     self.metrics['prev_collision_count'] = current_collisions
-                    print(f"💥 -{collision_penalty:.1f} for {new_collisions} collisions (penalty per collision: {collision_penalty_value})")
+                    log.info("💥 -{:.1f} for {} collisions (penalty per collision: {})",
+                             collision_penalty, new_collisions, collision_penalty_value)
             
             # 3. SIMPLE efficiency reward - smooth traffic
             avg_accel = final_stats.get('average_absolute_acceleration', 0.0)
@@ -308,7 +316,7 @@ class SimulationMetricsManager:
             return reward
             
         except Exception as e:
-            print(f"❌ Reward calculation failed: {str(e)}")
+            log.error("❌ Reward calculation failed: {}", str(e))
             return -1.0
 
     def calculate_throughput(self, scenario, current_step: int, 
@@ -443,7 +451,7 @@ class SimulationMetricsManager:
             }
             
         except Exception as e:
-            print(f"❌ Failed to get info: {str(e)}")
+            log.error("❌ Failed to get info: {}", str(e))
             return {
                 'using_real_data': False,
                 'data_source': 'error_fallback',
@@ -473,7 +481,7 @@ class SimulationMetricsManager:
                 if self.metrics.get('episode_deadlock_baseline') is None:
                     self.metrics['episode_deadlock_baseline'] = current_deadlocks
                     self.metrics['prev_deadlock_count'] = 0  # Episode starts at 0
-                    print(f"🔄 Established deadlock baseline for episode: {current_deadlocks}")
+                    log.info("🔄 Established deadlock baseline for episode: {}", current_deadlocks)
                     return 0.0  # No penalty on baseline establishment
                 
                 # FIXED: Calculate deadlocks WITHIN THIS EPISODE only
@@ -484,9 +492,9 @@ class SimulationMetricsManager:
                 
                 # ENHANCED VALIDATION: Check for episode boundary issues
                 if new_deadlocks < 0:
-                    print(f"⚠️ WARNING: Negative new deadlocks detected: {new_deadlocks}")
-                    print(f"   Episode baseline: {episode_baseline}, Current: {current_deadlocks}")
-                    print(f"   This suggests episode boundary issue - resetting baseline")
+                    log.warning("⚠️ WARNING: Negative new deadlocks detected: {}", new_deadlocks)
+                    log.warning("   Episode baseline: {}, Current: {}", episode_baseline, current_deadlocks)
+                    log.warning("   This suggests episode boundary issue - resetting baseline")
                     # Reset baseline to current value to prevent negative penalties
                     self.metrics['episode_deadlock_baseline'] = current_deadlocks
                     self.metrics['prev_deadlock_count'] = 0
@@ -494,9 +502,9 @@ class SimulationMetricsManager:
                 
                 # ENHANCED SAFETY CHECK: Detect suspiciously high deadlock counts
                 if current_deadlocks > 100:  # Suspiciously high deadlock count
-                    print(f"🚨 SAFETY CHECK: Suspiciously high deadlock count detected: {current_deadlocks}")
-                    print(f"   This suggests deadlock counter was not properly reset between episodes")
-                    print(f"   Resetting baseline to prevent massive negative rewards")
+                    log.warning("🚨 SAFETY CHECK: Suspiciously high deadlock count detected: {}", current_deadlocks)
+                    log.warning("   This suggests deadlock counter was not properly reset between episodes")
+                    log.warning("   Resetting baseline to prevent massive negative rewards")
                     
                     # Reset baseline to current value for this episode
                     self.metrics['episode_deadlock_baseline'] = current_deadlocks
@@ -509,12 +517,13 @@ class SimulationMetricsManager:
                     
                     # FIXED: Update EPISODE deadlock count (not absolute count)
                     self.metrics['prev_deadlock_count'] = episode_deadlocks
-                    print(f"🚨 Simple deadlock penalty: {penalty:.1f} for {new_deadlocks} deadlocks")
-                    print(f"   ✅ Applied to current episode (baseline: {episode_baseline}, current: {current_deadlocks})")
-                    print(f"   ✅ Episode deadlocks: {episode_deadlocks}, New this step: {new_deadlocks}")
+                    log.info("🚨 Simple deadlock penalty: {:.1f} for {} deadlocks", penalty, new_deadlocks)
+                    log.debug("   ✅ Applied to current episode (baseline: {}, current: {})",
+                              episode_baseline, current_deadlocks)
+                    log.debug("   ✅ Episode deadlocks: {}, New this step: {}", episode_deadlocks, new_deadlocks)
                     
         except Exception as e:
-            print(f"⚠️ Deadlock penalty calculation error: {str(e)}")
+            log.warning("⚠️ Deadlock penalty calculation error: {}", str(e))
             
         return penalty
 
@@ -559,13 +568,14 @@ class SimulationMetricsManager:
                     # Count severity warnings
                     if penalty < -1.0:
                         self.metrics['severity_warnings'] = self.metrics.get('severity_warnings', 0) + 1
-                        print(f"⚠️ Near-deadlock penalty: {penalty:.1f} (severity: {current_severity:.2f}, level: {self.metrics['deadlock_threat_level']})")
+                        log.info("⚠️ Near-deadlock penalty: {:.1f} (severity: {:.2f}, level: {})",
+                                 penalty, current_severity, self.metrics['deadlock_threat_level'])
                 else:
                     self.metrics['deadlock_threat_level'] = 'none'
                     self.metrics['current_deadlock_severity'] = 0.0
                     
         except Exception as e:
-            print(f"⚠️ Severity penalty calculation error: {str(e)}")
+            log.warning("⚠️ Severity penalty calculation error: {}", str(e))
             
         return penalty
     
@@ -28,6 +28,7 @@ from nash.deadlock_nash_solver import DeadlockNashSolver
 from nash.deadlock_detector import DeadlockException
 from drl.policies.bid_policy import TrainableBidPolicy
 from drl.envs.metrics_manager import SimulationMetricsManager
+from env import event_log
 
 class SimulationEnv:
     """Streamlined simulation environment wrapper"""
@@ -43,6 +44,8 @@ class SimulationEnv:
         # Update unified config with sim_cfg if provided
         if 'training_mode' in self.sim_cfg:
             self.unified_config.system.training_mode = self.sim_cfg['training_mode']
+        # 训练模式默认只输出警告 (LoggingConfig.training_level)
+        event_log.configure_from(self.unified_config)
         
         # FIXED: Prioritize sim_cfg max_steps over unified config for training
         # This ensures training scripts can override the default episode length
@@ -192,6 +195,7 @@ class SimulationEnv:
                 intersection_center=self.unified_config.system.intersection_center,
                 max_go_agents=self.unified_config.mwis.max_go_agents
             )
+            self.nash_solver.set_world_map(self.state_extractor.world_map)
             
             self.traffic_controller = TrafficController(
                 self.scenario.carla, 
@@ -307,16 +311,19 @@ class SimulationEnv:
                 
                 # Update system components ONLY on final frame (exactly like main.py)
                 if i == self.steps_per_action - 1:  # Only on final frame
-                    vehicle_states = self.state_extractor.get_vehicle_states()
+                    frame = self.state_extractor.get_frame_context()
+                    vehicle_states = frame.states
                     
                     if vehicle_states:
                         try:
                             if self.current_action % 3 == 0:  # Only every 3rd action
-                                self.platoon_manager.update()
+                                self.platoon_manager.update(vehicle_states)
                             
-                            auction_winners = self.auction_engine.update(vehicle_states, self.platoon_manager)
+                            auction_winners = self.auction_engine.update(
+                                vehicle_states, self.platoon_manager, frame=frame
+                            )
                             self.traffic_controller.update_control(
-                                self.platoon_manager, self.auction_engine, auction_winners
+                                self.platoon_manager, self.auction_engine, auction_winners, frame=frame
                             )
                         except Exception as update_error:
                             print(f"⚠️ Update error: {update_error}")
@@ -637,7 +644,8 @@ class SimulationEnv:
             self._obs_array = np.zeros(50, dtype=np.float32)
             
             # Get current state
-            vehicle_states = self.state_extractor.get_vehicle_states()
+            vehicle_table = self.state_extractor.get_vehicle_table()
+            vehicle_states = vehicle_table.rows()
             control_stats = self.traffic_controller.get_control_stats()
             auction_stats = self.auction_engine.get_auction_stats()
             
@@ -672,22 +680,17 @@ class SimulationEnv:
             self._obs_array[7] = np.clip((current_urgency_position_ratio - 0.1) / 2.9, 0.0, 1.0)  # Urgency position ratio
             
             # Average waiting time - meaningful for efficiency
-            total_waiting_time = 0
-            waiting_vehicles_count = 0
-            for v in vehicle_states:
-                if v.get('is_junction', False) and self._get_vehicle_speed(v) < 0.5:
-                    waiting_vehicles_count += 1
-                    if waiting_vehicles_count > 0:
-                        total_waiting_time += 1
+            waiting_vehicles_count = int(np.count_nonzero(vehicle_table.is_junction & (vehicle_table.speed < 0.5)))
+            total_waiting_time = waiting_vehicles_count
             
             avg_waiting_time = total_waiting_time / max(waiting_vehicles_count, 1)
             self._obs_array[8] = np.clip(avg_waiting_time / 20.0, 0.0, 1.0)  # Waiting time
             
             # Traffic congestion level - meaningful for decision making
-            total_vehicles = len(vehicle_states)
-            vehicles_in_junction = sum(1 for v in vehicle_states if v.get('is_junction', False))
+            total_vehicles = len(vehicle_table)
+            vehicles_in_junction = int(np.count_nonzero(vehicle_table.is_junction))
             if total_vehicles > 0:
-                avg_speed = sum(self._get_vehicle_speed(v) for v in vehicle_states) / total_vehicles
+                avg_speed = float(vehicle_table.speed.mean())
                 congestion_level = (1.0 - avg_speed / 20.0) * (vehicles_in_junction / max(total_vehicles, 1))
                 self._obs_array[9] = np.clip(congestion_level, 0.0, 1.0)  # Congestion
             else:
@@ -698,47 +701,27 @@ class SimulationEnv:
                 active_controls = control_stats.get('active_controls', [])
                 active_controls_set = set(str(control_id) for control_id in active_controls)
                 
-                for i, vehicle_state in enumerate(vehicle_states[:8]):  # Top 8 vehicles by priority (FIXED: was 5)
-                    try:
-                        base_idx = 10 + i * 5
-                        
-                        # Feature 1: Distance to intersection center (normalized)
-                        loc = vehicle_state.get('location', {})
-                        if isinstance(loc, dict):
-                            x, y = loc.get('x', 0.0), loc.get('y', 0.0)
-                        elif isinstance(loc, (list, tuple)) and len(loc) >= 2:
-                            x, y = np.asarray(loc[0], dtype=np.float32), np.asarray(loc[1], dtype=np.float32)
-                        else:
-                            x, y = 0.0, 0.0
-                        
-                        distance_to_center = np.sqrt((x + 188.9)**2 + (y + 89.7)**2)
-                        self._obs_array[base_idx] = np.clip(distance_to_center / 100.0, 0.0, 1.0)
-                        
-                        # Feature 2: Speed (normalized)
-                        vel = vehicle_state.get('velocity', {})
-                        if isinstance(vel, dict):
-                            speed = np.sqrt(vel.get('x', 0)**2 + vel.get('y', 0)**2 + vel.get('z', 0)**2)
-                        elif isinstance(vel, (list, tuple)) and len(vel) >= 3:
-                            speed = np.sqrt(vel[0]**2 + vel[1]**2 + vel[2]**2)
-                        else:
-                            speed = 0.0
-                        self._obs_array[base_idx + 1] = np.clip(speed / 20.0, 0.0, 1.0)
-                        
-                        # Feature 3: ETA to intersection (normalized)
-                        eta = vehicle_state.get('eta_to_intersection', 0)
-                        self._obs_array[base_idx + 2] = np.clip(eta / 60.0, 0.0, 1.0)
-                        
-                        # Feature 4: Junction status (binary)
-                        self._obs_array[base_idx + 3] = np.asarray(vehicle_state.get('is_junction', False), dtype=np.float32)
-                        
-                        # Feature 5: Control status (binary)
-                        vehicle_id = vehicle_state.get('id', 0)
-                        self._obs_array[base_idx + 4] = np.asarray(str(vehicle_id) in active_controls_set, dtype=np.float32)
-                        
-                    except Exception as vehicle_error:
-                        print(f"⚠️ Vehicle {i} observation error: {str(vehicle_error)}")
-                        base_idx = 10 + i * 5
-                        self._obs_array[base_idx:base_idx + 5] = 0.0
+                # Top 8 vehicles by priority (FIXED: was 5), features taken from the state table columns
+                n_obs = min(len(vehicle_table), 8)
+                if n_obs > 0:
+                    features = np.zeros((n_obs, 5), dtype=np.float32)
+                    
+                    # Feature 1: Distance to intersection center (normalized)
+                    features[:, 0] = np.clip(vehicle_table.distance_to_center[:n_obs] / 100.0, 0.0, 1.0)
+                    
+                    # Feature 2: Speed (normalized)
+                    features[:, 1] = np.clip(vehicle_table.speed[:n_obs] / 20.0, 0.0, 1.0)
+                    
+                    # Feature 3: ETA to intersection (normalized)
+                    features[:, 2] = np.clip([v.get('eta_to_intersection', 0) for v in vehicle_states[:n_obs]], 0.0, 60.0) / 60.0
+                    
+                    # Feature 4: Junction status (binary)
+                    features[:, 3] = vehicle_table.is_junction[:n_obs]
+                    
+                    # Feature 5: Control status (binary)
+                    features[:, 4] = [str(vid) in active_controls_set for vid in vehicle_table.id_list[:n_obs]]
+                    
+                    self._obs_array[10:10 + 5 * n_obs] = features.ravel()
                         
             except Exception as vehicles_error:
                 print(f"⚠️ Vehicle states observation error: {str(vehicles_error)}")
@@ -754,19 +737,6 @@ class SimulationEnv:
             print(f"❌ Observation generation failed: {str(e)}")
             return np.zeros(50, dtype=np.float32)  # FIXED: Return 50 dimensions to match expected size
     
-    def _get_vehicle_speed(self, vehicle_state):
-        """Helper method to extract vehicle speed"""
-        try:
-            vel = vehicle_state.get('velocity', {})
-            if isinstance(vel, dict):
-                return np.sqrt(vel.get('x', 0)**2 + vel.get('y', 0)**2 + vel.get('z', 0)**2)
-            elif isinstance(vel, (list, tuple)) and len(vel) >= 3:
-                return np.sqrt(vel[0]**2 + vel[1]**2 + vel[2]**2)
-            else:
-                return 0.0
-        except:
-            return 0.0
-
     def _cleanup_existing_vehicles(self):
         """Clean up existing vehicles - COMPLETELY REWRITTEN with robust error handling"""
         try:
@@ -957,6 +927,7 @@ class SimulationEnv:
                 intersection_center=self.unified_config.system.intersection_center,
                 max_go_agents=self.unified_config.mwis.max_go_agents
             )
+            self.nash_solver.set_world_map(self.state_extractor.world_map)
         
         # Reconnect all components
         self.traffic_controller.set_platoon_manager(self.platoon_manager)
@@ -1295,6 +1266,12 @@ class SimulationEnv:
 
     def _handle_deadlock_detection(self, deadlock_exception: DeadlockException) -> bool:
         """SIMPLIFIED: Handle deadlock detection - just track and terminate episode"""
+        # Breakable wait-for cycle: the Nash solver releases one vehicle on its next round
+        cycle = getattr(deadlock_exception, 'vehicles', None)
+        if cycle:
+            print(f"🔁 Circular wait among {len(cycle)} vehicles - releasing one vehicle instead of terminating")
+            return False
+        
         current_time = self.scenario.carla.world.get_snapshot().timestamp.elapsed_seconds
         
         # Track deadlock duration for metrics only
@@ -1399,6 +1376,8 @@ class SimulationEnv:
             
             if hasattr(self.scenario, 'stop_time_counters'):
                 self.scenario.stop_time_counters()
+            if hasattr(self, 'nash_solver') and hasattr(self.nash_solver, 'close'):
+                self.nash_solver.close()
             print("🏁 Environment closed")
         except Exception as e:
             print(f"❌ Close error: {str(e)}")
@@ -1,14 +1,21 @@
-import carla
+try:
+    import carla
+except ImportError:
+    # 无CARLA egg时使用运动学后端提供的API子集
+    from .kinematic_backend import install_carla_fallback
+    carla = install_carla_fallback()
 import random
 from .simulation_config import SimulationConfig
+from .kinematic_backend import KinematicClient
 
 class CarlaWrapper:
-    def __init__(self, host=None, port=None, timeout=None, town=None, unified_config=None):
+    def __init__(self, host=None, port=None, timeout=None, town=None, unified_config=None, backend=None):
         """
         Initialize CarlaWrapper with optional unified configuration
         
         Args:
             unified_config: UnifiedConfig object containing dynamic simulation parameters
+            backend: 'carla' or 'kinematic' override (defaults to config value)
         """
         self.unified_config = unified_config
         
@@ -20,6 +27,8 @@ class CarlaWrapper:
             map_name = town or unified_config.system.map_name
             synchronous_mode = unified_config.system.synchronous_mode
             fixed_delta_seconds = unified_config.system.fixed_delta_seconds
+            backend = backend or unified_config.system.backend
+            intersection_center = unified_config.system.intersection_center
         else:
             # Legacy fallback
             carla_host = host or SimulationConfig.CARLA_HOST
@@ -28,9 +37,25 @@ class CarlaWrapper:
             map_name = town or SimulationConfig.MAP_NAME
             synchronous_mode = SimulationConfig.SYNCHRONOUS_MODE
             fixed_delta_seconds = SimulationConfig.FIXED_DELTA_SECONDS
+            backend = backend or SimulationConfig.BACKEND
+            intersection_center = SimulationConfig.TARGET_INTERSECTION_CENTER
         
-        # Initialize CARLA client
-        self.client = carla.Client(carla_host, carla_port)
+        self.backend = backend
+        
+        # Initialize simulator client (CARLA server or headless kinematic backend)
+        if backend == 'kinematic':
+            self.client = KinematicClient(carla_host, carla_port, intersection_center=intersection_center)
+            print("🧮 Using headless kinematic backend (no CARLA server required)")
+        elif backend == 'carla':
+            # 无CARLA egg时 ``carla`` 是运动学替身，不能静默地在合成地图上运行
+            if getattr(carla, 'KINEMATIC_FALLBACK', False):
+                raise ImportError(
+                    "CARLA Python API not found (backend='carla'); install the CARLA egg "
+                    "or set SystemConfig.backend = 'kinematic'"
+                )
+            self.client = carla.Client(carla_host, carla_port)
+        else:
+            raise ValueError(f"Unknown simulator backend: {backend}")
         self.client.set_timeout(carla_timeout)
         
         # Load world
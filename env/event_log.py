@@ -0,0 +1,217 @@
+"""
+事件日志 (Leveled event log)
+
+Replacement for the per-agent ``print`` calls on the auction / Nash /
+control / reward hot paths:
+
+- ``get_logger('nash.mwis')`` returns a module logger; ``log.info(fmt, *args)``
+  checks the module level first (one integer compare when disabled) and
+  only then hands the record to the sinks. Messages use ``str.format``
+  placeholders and are formatted lazily: the console sink formats when
+  printing, the ring buffer keeps the raw (fmt, args) tuple until read
+- module levels are hierarchical: a level set for ``'nash'`` applies to
+  ``'nash.mwis'`` unless that module has its own level
+- sinks: ``ConsoleSink`` (print, so ``contextlib.redirect_stdout`` still
+  captures it) and ``RingBufferSink`` (last N raw records, dumped to /
+  loaded from a binary file with ``dump`` / ``load``)
+- ``configure_from(unified_config)`` applies ``LoggingConfig``; training
+  mode uses ``training_level`` (warnings only by default), so disabled
+  events cost a method call and a compare
+
+Guard loops that only build log output with ``log.enabled(INFO)``.
+"""
+
+import pickle
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEBUG, INFO, WARNING, ERROR, OFF = 10, 20, 30, 40, 100
+
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR, 'off': OFF}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+# (wall time, module, level, fmt, args)
+Record = Tuple[float, str, int, str, tuple]
+
+
+def parse_level(level) -> int:
+    """Level constant from a name ('info') or an int"""
+    if isinstance(level, str):
+        return LEVELS[level.lower()]
+    return int(level)
+
+
+def format_record(record: Record) -> str:
+    fmt, args = record[3], record[4]
+    if not args:
+        return fmt
+    try:
+        return fmt.format(*args)
+    except Exception:
+        return f"{fmt} {args!r}"
+
+
+class ConsoleSink:
+    """Formats and prints each record (the previous print() behaviour)"""
+
+    def write(self, record: Record):
+        print(format_record(record))
+
+
+class RingBufferSink:
+    """Keeps the last ``capacity`` records unformatted"""
+
+    def __init__(self, capacity: int = 10000):
+        self.records: deque = deque(maxlen=capacity)
+
+    def write(self, record: Record):
+        self.records.append(record)
+
+    def lines(self, min_level: int = DEBUG) -> List[str]:
+        return [f"[{LEVEL_NAMES.get(r[2], r[2])}] {r[1]}: {format_record(r)}"
+                for r in self.records if r[2] >= min_level]
+
+    def dump(self, path: str) -> int:
+        """Write the buffered records to a binary file; returns the record count"""
+        records = [(t, module, level, fmt, tuple(_portable(a) for a in args))
+                   for t, module, level, fmt, args in self.records]
+        with open(path, 'wb') as f:
+            pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return len(records)
+
+    @staticmethod
+    def load(path: str) -> List[Record]:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def clear(self):
+        self.records.clear()
+
+
+def _portable(value):
+    """Argument as stored in a dump: builtin scalars as-is, anything else as str"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class EventLogger:
+    """Per-module logger; the effective level is cached and updated by ``configure``"""
+
+    __slots__ = ('name', 'level', '_hub')
+
+    def __init__(self, name: str, level: int, hub: 'EventLog'):
+        self.name = name
+        self.level = level
+        self._hub = hub
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def debug(self, fmt: str, *args):
+        if DEBUG >= self.level:
+            self._hub.emit(self.name, DEBUG, fmt, args)
+
+    def info(self, fmt: str, *args):
+        if INFO >= self.level:
+            self._hub.emit(self.name, INFO, fmt, args)
+
+    def warning(self, fmt: str, *args):
+        if WARNING >= self.level:
+            self._hub.emit(self.name, WARNING, fmt, args)
+
+    def error(self, fmt: str, *args):
+        if ERROR >= self.level:
+            self._hub.emit(self.name, ERROR, fmt, args)
+
+
+class EventLog:
+    """Logger registry, module levels and sinks"""
+
+    def __init__(self):
+        self.default_level = INFO
+        self.module_levels: Dict[str, int] = {}
+        self.sinks: list = [ConsoleSink()]
+        self._loggers: Dict[str, EventLogger] = {}
+        self.stats = {'emitted': 0}
+
+    def get_logger(self, name: str) -> EventLogger:
+        logger = self._loggers.get(name)
+        if logger is None:
+            logger = EventLogger(name, self._level_for(name), self)
+            self._loggers[name] = logger
+        return logger
+
+    def configure(self, level=None, module_levels: Optional[Dict[str, object]] = None,
+                  sinks: Optional[Sequence] = None):
+        """Set the default level, per-module levels and/or sinks (None keeps the current value)"""
+        if level is not None:
+            self.default_level = parse_level(level)
+        if module_levels is not None:
+            self.module_levels = {name: parse_level(value) for name, value in module_levels.items()}
+        if sinks is not None:
+            self.sinks = list(sinks)
+        for name, logger in self._loggers.items():
+            logger.level = self._level_for(name)
+
+    def emit(self, name: str, level: int, fmt: str, args: tuple):
+        if not self.sinks:
+            return
+        self.stats['emitted'] += 1
+        record = (time.time(), name, level, fmt, args)
+        for sink in self.sinks:
+            sink.write(record)
+
+    def ring_buffer(self) -> Optional[RingBufferSink]:
+        """The configured ring-buffer sink, if any"""
+        for sink in self.sinks:
+            if isinstance(sink, RingBufferSink):
+                return sink
+        return None
+
+    def _level_for(self, name: str) -> int:
+        if not self.sinks:
+            return OFF  # 无输出端时所有事件都无需产生
+        parts = name.split('.')
+        for end in range(len(parts), 0, -1):
+            level = self.module_levels.get('.'.join(parts[:end]))
+            if level is not None:
+                return level
+        return self.default_level
+
+
+_event_log = EventLog()
+
+
+def get_logger(name: str) -> EventLogger:
+    return _event_log.get_logger(name)
+
+
+def get_event_log() -> EventLog:
+    return _event_log
+
+
+def configure(level=None, module_levels: Optional[Dict[str, object]] = None,
+              sinks: Optional[Sequence] = None):
+    _event_log.configure(level=level, module_levels=module_levels, sinks=sinks)
+
+
+def configure_from(unified_config):
+    """Apply ``unified_config.logging`` (training_level in training mode)"""
+    logging_config = unified_config.logging
+    training = unified_config.system.training_mode
+    sinks = []
+    if logging_config.sink in ('console', 'both'):
+        sinks.append(ConsoleSink())
+    if logging_config.sink in ('ring', 'both'):
+        existing = _event_log.ring_buffer()
+        if existing is not None and existing.records.maxlen == logging_config.ring_capacity:
+            sinks.append(existing)
+        else:
+            sinks.append(RingBufferSink(logging_config.ring_capacity))
+    _event_log.configure(
+        level=logging_config.training_level if training else logging_config.level,
+        module_levels=logging_config.module_levels,
+        sinks=sinks,
+    )
@@ -0,0 +1,63 @@
+"""
+仿真帧时钟 (Simulation frame clock)
+
+Shared clock fed from world snapshots (frame id + elapsed_seconds) so that
+caches and decision cadences are expressed in simulation time rather than
+wall-clock time. With a synchronous world this makes work-per-frame
+independent of how fast the host runs the simulator.
+"""
+
+import time
+
+
+class FrameClock:
+    """Simulation-time clock backed by ``world.get_snapshot()``"""
+
+    def __init__(self, get_snapshot=None):
+        """
+        Args:
+            get_snapshot: callable returning the current world snapshot,
+                e.g. ``lambda: carla_wrapper.world.get_snapshot()`` so the
+                clock follows world reloads
+        """
+        self._get_snapshot = get_snapshot
+        self._frame = -1
+        self._sim_time = 0.0
+
+    def sync(self, snapshot=None):
+        """Update from a world snapshot (or read the current one from the world)"""
+        if snapshot is None and self._get_snapshot is not None:
+            snapshot = self._get_snapshot()
+        if snapshot is not None:
+            self._frame = snapshot.frame
+            self._sim_time = snapshot.timestamp.elapsed_seconds
+        return self
+
+    @property
+    def frame(self) -> int:
+        """Frame id of the last synced snapshot"""
+        return self._frame
+
+    @property
+    def sim_time(self) -> float:
+        """Simulation time (s) of the last synced snapshot"""
+        return self._sim_time
+
+    def now(self) -> float:
+        """Current simulation time in seconds"""
+        return self.sync().sim_time
+
+    def elapsed_since(self, sim_time: float) -> float:
+        """Simulation seconds elapsed since ``sim_time``"""
+        return self.now() - sim_time
+
+    @staticmethod
+    def expired(timestamp, duration: float, now: float) -> bool:
+        """TTL check in simulation time; unset timestamps and world resets (time going back) count as expired"""
+        return timestamp is None or not (0.0 <= now - timestamp <= duration)
+
+
+def clock_from(state_extractor):
+    """Return a time function: the extractor's frame clock if available, else wall clock"""
+    clock = getattr(state_extractor, 'frame_clock', None)
+    return clock.now if clock is not None else time.time
@@ -0,0 +1,50 @@
+"""
+决策帧上下文 (Per-frame decision context)
+
+Built once at the top of a decision step by
+``StateExtractor.get_frame_context()`` and handed to every stage (platoons,
+auction, Nash, traffic control), so the string-id index, speeds and
+junction flags are derived once per frame instead of once per consumer.
+
+- ``states``: the legacy list of read-only row views
+- ``by_id``: ``{str(id): row}``; also what the Nash resolvers receive
+- ``speed(id)`` / ``is_junction(id)``: reads from the precomputed table columns
+- ``frame`` / ``sim_time``: snapshot the states were extracted from
+"""
+
+from typing import Dict, List, Optional
+
+from .vehicle_state_table import VehicleStateRow, VehicleStateTable
+
+
+class FrameContext:
+    """Vehicle states and derived lookups for one simulation frame"""
+
+    __slots__ = ('frame', 'sim_time', 'table', 'states', 'by_id')
+
+    def __init__(self, table: VehicleStateTable, frame: int = -1, sim_time: float = 0.0):
+        self.frame = frame
+        self.sim_time = sim_time
+        self.table = table
+        self.states: List[VehicleStateRow] = table.rows()
+        self.by_id: Dict[str, VehicleStateRow] = {
+            str(vehicle_id): row for vehicle_id, row in zip(table.id_list, self.states)
+        }
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __contains__(self, vehicle_id) -> bool:
+        return vehicle_id in self.by_id
+
+    def get(self, vehicle_id: str) -> Optional[VehicleStateRow]:
+        """Row view for a string vehicle id"""
+        return self.by_id.get(vehicle_id)
+
+    def speed(self, vehicle_id: str) -> Optional[float]:
+        row = self.by_id.get(vehicle_id)
+        return None if row is None else self.table.speed_list[row.row]
+
+    def is_junction(self, vehicle_id: str) -> bool:
+        row = self.by_id.get(vehicle_id)
+        return row is not None and self.table.is_junction_list[row.row]
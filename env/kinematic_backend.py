@@ -0,0 +1,1183 @@
+"""
+Headless kinematic simulator backend.
+
+Implements the slice of the CARLA 0.9.x Python API that this project uses
+(``world.tick``, ``get_actors().filter``, ``get_transform``/``get_velocity``,
+``map.get_waypoint``, spawn points, snapshots, collision sensors and a
+traffic-manager stand-in) on top of a synthetic four-way unsignalized
+intersection centred on the configured target intersection.
+
+Vehicles follow lane polylines with a simple car-following model and keep
+circulating through U-turn loops at the arm ends, so the state-extraction / auction / Nash pipeline can run thousands of ticks per
+second on a CPU-only node without a CARLA server.  Select it with
+``SystemConfig.backend = 'kinematic'``.
+"""
+
+import bisect
+import fnmatch
+import math
+import random
+import sys
+import time
+import types
+from enum import IntFlag
+
+import numpy as np
+
+
+# ===== CARLA API value types =====
+
+class Vector3D:
+    """carla.Vector3D stand-in"""
+
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, k):
+        return type(self)(self.x * k, self.y * k, self.z * k)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        return (hasattr(other, 'x') and self.x == other.x and
+                self.y == other.y and self.z == other.z)
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def distance(self, other):
+        return math.sqrt((self.x - other.x) ** 2 + (self.y - other.y) ** 2 + (self.z - other.z) ** 2)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(x={self.x:.6f}, y={self.y:.6f}, z={self.z:.6f})"
+
+
+class Location(Vector3D):
+    """carla.Location stand-in"""
+    __slots__ = ()
+
+
+class Rotation:
+    """carla.Rotation stand-in (degrees, CARLA argument order pitch/yaw/roll)"""
+
+    __slots__ = ('pitch', 'yaw', 'roll')
+
+    def __init__(self, pitch=0.0, yaw=0.0, roll=0.0):
+        self.pitch = float(pitch)
+        self.yaw = float(yaw)
+        self.roll = float(roll)
+
+    def get_forward_vector(self):
+        cp = math.cos(math.radians(self.pitch))
+        yaw = math.radians(self.yaw)
+        return Vector3D(cp * math.cos(yaw), cp * math.sin(yaw), math.sin(math.radians(self.pitch)))
+
+    def get_right_vector(self):
+        yaw = math.radians(self.yaw)
+        return Vector3D(-math.sin(yaw), math.cos(yaw), 0.0)
+
+    def __repr__(self):
+        return f"Rotation(pitch={self.pitch:.6f}, yaw={self.yaw:.6f}, roll={self.roll:.6f})"
+
+
+class Transform:
+    """carla.Transform stand-in"""
+
+    __slots__ = ('location', 'rotation')
+
+    def __init__(self, location=None, rotation=None):
+        self.location = location if location is not None else Location()
+        self.rotation = rotation if rotation is not None else Rotation()
+
+    def get_forward_vector(self):
+        return self.rotation.get_forward_vector()
+
+    def get_right_vector(self):
+        return self.rotation.get_right_vector()
+
+    def __repr__(self):
+        return f"Transform({self.location}, {self.rotation})"
+
+
+class Color:
+    """carla.Color stand-in"""
+
+    def __init__(self, r=0, g=0, b=0, a=255):
+        self.r, self.g, self.b, self.a = r, g, b, a
+
+
+class LaneType(IntFlag):
+    """carla.LaneType values used by the stack"""
+    NONE = 1
+    Driving = 2
+    Stop = 4
+    Shoulder = 8
+    Biking = 16
+    Sidewalk = 32
+    Any = 0xFFFFFFFE
+
+
+class LaneChange(IntFlag):
+    """carla.LaneChange values"""
+    NONE = 0
+    Right = 1
+    Left = 2
+    Both = 3
+
+
+class LaneMarking:
+    """carla.LaneMarking stand-in (only lane_change is meaningful)"""
+
+    def __init__(self, lane_change=LaneChange.NONE):
+        self.lane_change = lane_change
+        self.type = None
+
+
+class VehicleControl:
+    """carla.VehicleControl stand-in (stored but not simulated)"""
+
+    def __init__(self, throttle=0.0, steer=0.0, brake=0.0, hand_brake=False,
+                 reverse=False, manual_gear_shift=False, gear=0):
+        self.throttle = throttle
+        self.steer = steer
+        self.brake = brake
+        self.hand_brake = hand_brake
+        self.reverse = reverse
+        self.manual_gear_shift = manual_gear_shift
+        self.gear = gear
+
+
+class Timestamp:
+    """carla.Timestamp stand-in"""
+
+    def __init__(self, frame, elapsed_seconds, delta_seconds, platform_timestamp):
+        self.frame = frame
+        self.frame_count = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+        self.platform_timestamp = platform_timestamp
+
+
+class WorldSettings:
+    """carla.WorldSettings stand-in"""
+
+    def __init__(self, synchronous_mode=True, fixed_delta_seconds=0.05,
+                 max_substep_delta_time=0.01, max_substeps=10, no_rendering_mode=True):
+        self.synchronous_mode = synchronous_mode
+        self.fixed_delta_seconds = fixed_delta_seconds
+        self.max_substep_delta_time = max_substep_delta_time
+        self.max_substeps = max_substeps
+        self.no_rendering_mode = no_rendering_mode
+
+    def copy(self):
+        return WorldSettings(self.synchronous_mode, self.fixed_delta_seconds,
+                             self.max_substep_delta_time, self.max_substeps,
+                             self.no_rendering_mode)
+
+
+# ===== 道路网络：合成的四路无信号交叉口 =====
+
+class _Lane:
+    """One directed lane (arm lane or junction connector) sampled at fixed arc length"""
+
+    def __init__(self, index, road_id, lane_id, points, is_junction, lane_width, turn=None):
+        self.index = index
+        self.road_id = road_id
+        self.section_id = 0
+        self.lane_id = lane_id
+        self.is_junction = is_junction
+        self.lane_width = lane_width
+        self.turn = turn
+        self.successors = []
+        self.predecessors = []
+        self.left_lane = None
+        self.right_lane = None
+        self.lane_change = LaneChange.NONE
+
+        self.points = np.asarray(points, dtype=float)
+        seg = np.diff(self.points, axis=0)
+        seg_len = np.hypot(seg[:, 0], seg[:, 1])
+        self.s = np.concatenate(([0.0], np.cumsum(seg_len)))
+        self.length = float(self.s[-1])
+        self.yaw = np.degrees(np.arctan2(seg[:, 1], seg[:, 0]))
+        self.yaw = np.append(self.yaw, self.yaw[-1])
+
+        # 纯Python列表副本：逐车插值时避免numpy标量开销
+        self._xs = self.points[:, 0].tolist()
+        self._ys = self.points[:, 1].tolist()
+        self._ss = self.s.tolist()
+        self._yaws = self.yaw.tolist()
+        self._inv_step = (len(self._ss) - 1) / self.length if self.length > 0 else 0.0
+
+    def pose_at(self, s):
+        """Interpolate (x, y, yaw_deg) at arc length s"""
+        ss = self._ss
+        last = len(ss) - 2
+        s = min(max(s, 0.0), self.length)
+        i = min(int(s * self._inv_step), last)
+        # 重采样后点距近似均匀，只需局部修正索引
+        while i > 0 and ss[i] > s:
+            i -= 1
+        while i < last and ss[i + 1] < s:
+            i += 1
+        s0, s1 = ss[i], ss[i + 1]
+        t = (s - s0) / (s1 - s0) if s1 > s0 else 0.0
+        xs, ys = self._xs, self._ys
+        return (xs[i] + t * (xs[i + 1] - xs[i]), ys[i] + t * (ys[i + 1] - ys[i]), self._yaws[i])
+
+
+def _sample_polyline(points, resolution):
+    """Resample a dense polyline at (approximately) fixed arc length"""
+    points = np.asarray(points, dtype=float)
+    seg = np.diff(points, axis=0)
+    s = np.concatenate(([0.0], np.cumsum(np.hypot(seg[:, 0], seg[:, 1]))))
+    n = max(2, int(math.ceil(s[-1] / resolution)) + 1)
+    s_new = np.linspace(0.0, s[-1], n)
+    return np.column_stack((np.interp(s_new, s, points[:, 0]), np.interp(s_new, s, points[:, 1])))
+
+
+def _rot90(v):
+    """Rotate by +90° in CARLA's left-handed frame (heading -> right-hand side)"""
+    return np.array([-v[1], v[0]])
+
+
+def build_intersection_network(center, lanes_per_direction=2, lane_width=3.5,
+                               arm_length=150.0, resolution=0.5):
+    """
+    Build lanes for a four-arm unsignalized intersection (right-hand traffic).
+
+    Arm roads have ids 1-4 with inbound lanes ``-1..-n`` (1 = next to the
+    centre line) and outbound lanes ``1..n``.  Junction connectors have road
+    ids from 100 upwards: the innermost lane may turn left, the outermost may
+    turn right, every lane may go straight.
+    """
+    c = np.array(center[:2], dtype=float)
+    n = lanes_per_direction
+    junction_half = n * lane_width + 2.0
+    arms = [np.array(u, dtype=float) for u in ((1, 0), (0, 1), (-1, 0), (0, -1))]
+    lanes = []
+    inbound = {}
+    outbound = {}
+
+    def add_lane(road_id, lane_id, pts, is_junction, turn=None):
+        lane = _Lane(len(lanes), road_id, lane_id, _sample_polyline(pts, resolution),
+                     is_junction, lane_width, turn)
+        lanes.append(lane)
+        return lane
+
+    for a, u in enumerate(arms):
+        d_in = -u
+        for k in range(1, n + 1):
+            offset_in = _rot90(d_in) * (k - 0.5) * lane_width
+            start = c + u * arm_length + offset_in
+            end = c + u * junction_half + offset_in
+            inbound[(a, k)] = add_lane(a + 1, -k, [start, end], False)
+
+            offset_out = _rot90(u) * (k - 0.5) * lane_width
+            start = c + u * junction_half + offset_out
+            end = c + u * arm_length + offset_out
+            outbound[(a, k)] = add_lane(a + 1, k, [start, end], False)
+
+    def exit_arm(a, turn):
+        d_in = -arms[a]
+        target = {'straight': d_in, 'right': _rot90(d_in), 'left': -_rot90(d_in)}[turn]
+        return next(i for i, u in enumerate(arms) if np.allclose(u, target))
+
+    connector_road = 100
+    for a in range(4):
+        d_in = -arms[a]
+        for k in range(1, n + 1):
+            turns = ['straight']
+            if k == 1:
+                turns.append('left')
+            if k == n:
+                turns.append('right')
+            for turn in turns:
+                b = exit_arm(a, turn)
+                src, dst = inbound[(a, k)], outbound[(b, k)]
+                p0, p2 = src.points[-1], dst.points[0]
+                if turn == 'straight':
+                    pts = [p0, p2]
+                else:
+                    # 二次Bezier：控制点为入口/出口切线交点（两切线互相垂直）
+                    ctrl = p0 + d_in * np.dot(p2 - p0, d_in)
+                    ts = np.linspace(0.0, 1.0, 40)[:, None]
+                    pts = (1 - ts) ** 2 * p0 + 2 * (1 - ts) * ts * ctrl + ts ** 2 * p2
+                conn = add_lane(connector_road, -1, pts, True, turn)
+                connector_road += 1
+                src.successors.append(conn.index)
+                conn.predecessors.append(src.index)
+                conn.successors.append(dst.index)
+                dst.predecessors.append(conn.index)
+
+    # 路段末端的掉头环道：出口车道k -> 同一路段入口车道k，使路网强连通（车辆持续循环）
+    loop_road = 200
+    for a, u in enumerate(arms):
+        for k in range(1, n + 1):
+            src, dst = outbound[(a, k)], inbound[(a, k)]
+            p0, p2 = src.points[-1], dst.points[0]
+            mid = 0.5 * (p0 + p2)
+            radius = 0.5 * np.linalg.norm(p2 - p0)
+            start_angle = math.atan2(p0[1] - mid[1], p0[0] - mid[0])
+            sweep = math.pi if np.cross(u, p2 - p0) > 0 else -math.pi
+            angles = start_angle + np.linspace(0.0, 1.0, 24) * sweep
+            pts = np.column_stack((mid[0] + radius * np.cos(angles), mid[1] + radius * np.sin(angles)))
+            loop = add_lane(loop_road, -k, pts, False, 'uturn')
+            loop_road += 1
+            src.successors.append(loop.index)
+            loop.predecessors.append(src.index)
+            loop.successors.append(dst.index)
+            dst.predecessors.append(loop.index)
+
+    # Lane-change links on multi-lane arms
+    for (a, k), lane in inbound.items():
+        if k > 1:
+            lane.left_lane = inbound[(a, k - 1)].index
+            lane.lane_change |= LaneChange.Left
+        else:
+            lane.left_lane = outbound[(a, 1)].index
+        if k < n:
+            lane.right_lane = inbound[(a, k + 1)].index
+            lane.lane_change |= LaneChange.Right
+    for (a, k), lane in outbound.items():
+        if k > 1:
+            lane.left_lane = outbound[(a, k - 1)].index
+            lane.lane_change |= LaneChange.Left
+        else:
+            lane.left_lane = inbound[(a, 1)].index
+        if k < n:
+            lane.right_lane = outbound[(a, k + 1)].index
+            lane.lane_change |= LaneChange.Right
+
+    return lanes, junction_half
+
+
+class Waypoint:
+    """carla.Waypoint stand-in: a (lane, s) pair on the synthetic network"""
+
+    def __init__(self, carla_map, lane, s):
+        self._map = carla_map
+        self._lane = lane
+        self.s = float(min(max(s, 0.0), lane.length))
+        self.road_id = lane.road_id
+        self.section_id = lane.section_id
+        self.lane_id = lane.lane_id
+        self.is_junction = lane.is_junction
+        self.is_intersection = lane.is_junction
+        self.junction_id = 1 if lane.is_junction else -1
+        self.lane_width = lane.lane_width
+        self.lane_type = LaneType.Driving
+        self.id = hash((lane.index, round(self.s, 3)))
+        marking_change = LaneChange.NONE if lane.is_junction else lane.lane_change
+        self.left_lane_marking = LaneMarking(marking_change & LaneChange.Left)
+        self.right_lane_marking = LaneMarking(marking_change & LaneChange.Right)
+        self.lane_change = marking_change
+        self._transform = None
+
+    @property
+    def transform(self):
+        if self._transform is None:
+            x, y, yaw = self._lane.pose_at(self.s)
+            self._transform = Transform(Location(x, y, 0.0), Rotation(0.0, yaw, 0.0))
+        return self._transform
+
+    def next(self, distance):
+        target = self.s + distance
+        if target <= self._lane.length:
+            return [Waypoint(self._map, self._lane, target)]
+        remaining = target - self._lane.length
+        result = []
+        for idx in self._lane.successors:
+            start = Waypoint(self._map, self._map._lanes[idx], 0.0)
+            result.extend(start.next(remaining) if remaining > 1e-6 else [start])
+        return result
+
+    def previous(self, distance):
+        target = self.s - distance
+        if target >= 0.0:
+            return [Waypoint(self._map, self._lane, target)]
+        result = []
+        for idx in self._lane.predecessors:
+            lane = self._map._lanes[idx]
+            result.extend(Waypoint(self._map, lane, lane.length).previous(-target))
+        return result
+
+    def next_until_lane_end(self, distance):
+        result = []
+        s = self.s + distance
+        while s < self._lane.length:
+            result.append(Waypoint(self._map, self._lane, s))
+            s += distance
+        result.append(Waypoint(self._map, self._lane, self._lane.length))
+        return result
+
+    def _neighbour(self, idx):
+        if idx is None:
+            return None
+        lane = self._map._lanes[idx]
+        # 反向车道的s坐标方向相反
+        same_direction = (lane.lane_id > 0) == (self.lane_id > 0)
+        s = self.s if same_direction else lane.length - self.s
+        return Waypoint(self._map, lane, s)
+
+    def get_left_lane(self):
+        return self._neighbour(self._lane.left_lane)
+
+    def get_right_lane(self):
+        return self._neighbour(self._lane.right_lane)
+
+    def __repr__(self):
+        return f"Waypoint(road={self.road_id}, lane={self.lane_id}, s={self.s:.2f})"
+
+
+# 运动学地图名前缀：地图名进入磁盘缓存键（车道索引、路线图、转向表），
+# 避免合成地图的缓存被同名的真实CARLA地图加载
+KINEMATIC_MAP_PREFIX = 'Kinematic/'
+
+
+class KinematicMap:
+    """carla.Map stand-in backed by the synthetic intersection network"""
+
+    def __init__(self, name, center, lanes_per_direction=2, lane_width=3.5, arm_length=150.0,
+                 spawn_spacing=25.0):
+        self.name = name if name.startswith(KINEMATIC_MAP_PREFIX) else KINEMATIC_MAP_PREFIX + name
+        self.center = tuple(center)
+        self._lanes, self.junction_half_size = build_intersection_network(
+            center, lanes_per_direction, lane_width, arm_length)
+        self._lane_width = lane_width
+
+        # 所有车道采样点堆叠，用于向量化最近点查询
+        self._pts = np.concatenate([lane.points for lane in self._lanes])
+        self._pt_lane = np.concatenate([np.full(len(lane.points), lane.index) for lane in self._lanes])
+        self._pt_s = np.concatenate([lane.s for lane in self._lanes])
+
+        # 路口内连接道之间的几何冲突表（用于交通管理器的让行规则）
+        connectors = [lane for lane in self._lanes if lane.is_junction]
+        self._junction_conflicts = {lane.index: set() for lane in connectors}
+        for i, a in enumerate(connectors):
+            for b in connectors[i + 1:]:
+                d2 = ((a.points[:, None, :] - b.points[None, :, :]) ** 2).sum(axis=2)
+                if d2.min() < (lane_width * 0.75) ** 2:
+                    self._junction_conflicts[a.index].add(b.index)
+                    self._junction_conflicts[b.index].add(a.index)
+
+        self._spawn_points = []
+        for lane in self._lanes:
+            if lane.is_junction or lane.turn is not None:
+                continue
+            s = 5.0
+            while s < lane.length - 10.0:
+                x, y, yaw = lane.pose_at(s)
+                self._spawn_points.append(Transform(Location(x, y, 0.5), Rotation(0.0, yaw, 0.0)))
+                s += spawn_spacing
+
+    def _locate(self, x, y):
+        d2 = (self._pts[:, 0] - x) ** 2 + (self._pts[:, 1] - y) ** 2
+        i = int(np.argmin(d2))
+        return self._lanes[self._pt_lane[i]], float(self._pt_s[i]), math.sqrt(float(d2[i]))
+
+    def get_waypoint(self, location, project_to_road=True, lane_type=LaneType.Driving):
+        if not (int(lane_type) & int(LaneType.Driving)):
+            return None
+        lane, s, dist = self._locate(location.x, location.y)
+        if not project_to_road and dist > self._lane_width / 2.0:
+            return None
+        return Waypoint(self, lane, s)
+
+    def get_waypoint_xodr(self, road_id, lane_id, s):
+        for lane in self._lanes:
+            if lane.road_id == road_id and lane.lane_id == lane_id:
+                return Waypoint(self, lane, s)
+        return None
+
+    def get_spawn_points(self):
+        return [Transform(Location(t.location.x, t.location.y, t.location.z),
+                          Rotation(t.rotation.pitch, t.rotation.yaw, t.rotation.roll))
+                for t in self._spawn_points]
+
+    def get_topology(self):
+        return [(Waypoint(self, lane, 0.0), Waypoint(self, lane, lane.length)) for lane in self._lanes]
+
+    def generate_waypoints(self, distance):
+        result = []
+        for lane in self._lanes:
+            s = 0.0
+            while s <= lane.length:
+                result.append(Waypoint(self, lane, s))
+                s += distance
+        return result
+
+
+# ===== Actors =====
+
+class ActorBlueprint:
+    """carla.ActorBlueprint stand-in"""
+
+    def __init__(self, blueprint_id, attributes=None):
+        self.id = blueprint_id
+        self.tags = blueprint_id.split('.')
+        self._attributes = dict(attributes or {})
+
+    def has_attribute(self, name):
+        return name in self._attributes
+
+    def get_attribute(self, name):
+        return self._attributes.get(name)
+
+    def set_attribute(self, name, value):
+        self._attributes[name] = value
+
+    def has_tag(self, tag):
+        return tag in self.tags
+
+
+class BlueprintLibrary:
+    """carla.BlueprintLibrary stand-in"""
+
+    VEHICLE_IDS = ('vehicle.tesla.model3', 'vehicle.audi.a2', 'vehicle.lincoln.mkz2017',
+                   'vehicle.toyota.prius', 'vehicle.nissan.micra', 'vehicle.mercedes-benz.coupe')
+
+    def __init__(self):
+        self._blueprints = [ActorBlueprint(bp_id, {'number_of_wheels': 4}) for bp_id in self.VEHICLE_IDS]
+        self._blueprints.append(ActorBlueprint('sensor.other.collision'))
+
+    def filter(self, pattern):
+        return [bp for bp in self._blueprints if fnmatch.fnmatch(bp.id, pattern)]
+
+    def find(self, blueprint_id):
+        for bp in self._blueprints:
+            if bp.id == blueprint_id:
+                return bp
+        raise IndexError(f"blueprint '{blueprint_id}' not found")
+
+    def __iter__(self):
+        return iter(self._blueprints)
+
+    def __len__(self):
+        return len(self._blueprints)
+
+
+class ActorList(list):
+    """carla.ActorList stand-in"""
+
+    def filter(self, pattern):
+        return ActorList(a for a in self if fnmatch.fnmatch(a.type_id, pattern))
+
+    def find(self, actor_id):
+        for actor in self:
+            if actor.id == actor_id:
+                return actor
+        return None
+
+
+class Actor:
+    """carla.Actor stand-in"""
+
+    def __init__(self, world, actor_id, type_id, transform, parent=None):
+        self._world = world
+        self.id = actor_id
+        self.type_id = type_id
+        self.parent = parent
+        self.attributes = {}
+        self.is_alive = True
+        self._x = transform.location.x
+        self._y = transform.location.y
+        self._z = transform.location.z
+        self._yaw = transform.rotation.yaw
+        self._pitch = transform.rotation.pitch
+        self._speed = 0.0
+        self._accel = 0.0
+
+    def get_world(self):
+        return self._world
+
+    def get_location(self):
+        if self.parent is not None:
+            return self.parent.get_location()
+        return Location(self._x, self._y, self._z)
+
+    def get_transform(self):
+        if self.parent is not None:
+            return self.parent.get_transform()
+        return Transform(Location(self._x, self._y, self._z), Rotation(self._pitch, self._yaw, 0.0))
+
+    def get_velocity(self):
+        yaw = math.radians(self._yaw)
+        return Vector3D(self._speed * math.cos(yaw), self._speed * math.sin(yaw), 0.0)
+
+    def get_acceleration(self):
+        yaw = math.radians(self._yaw)
+        return Vector3D(self._accel * math.cos(yaw), self._accel * math.sin(yaw), 0.0)
+
+    def get_angular_velocity(self):
+        return Vector3D()
+
+    def set_transform(self, transform):
+        self._x, self._y, self._z = transform.location.x, transform.location.y, transform.location.z
+        self._yaw, self._pitch = transform.rotation.yaw, transform.rotation.pitch
+
+    def destroy(self):
+        if not self.is_alive:
+            return False
+        self.is_alive = False
+        self._world._remove_actor(self)
+        return True
+
+
+class Vehicle(Actor):
+    """carla.Vehicle stand-in moved along lanes by the traffic manager"""
+
+    def __init__(self, world, actor_id, type_id, transform, lane, s):
+        super().__init__(world, actor_id, type_id, transform)
+        self.attributes = {'number_of_wheels': '4', 'role_name': 'autopilot'}
+        self._lane = lane
+        self._s = s
+        self._next_lane = None
+        self._autopilot = False
+        self._control = VehicleControl()
+        self._speed_limit = 30.0  # km/h, CARLA town default
+
+    def set_autopilot(self, enabled=True, tm_port=8000):
+        self._autopilot = bool(enabled)
+        if enabled:
+            self._world._traffic_manager._register(self)
+
+    def apply_control(self, control):
+        self._control = control
+
+    def get_control(self):
+        return self._control
+
+    def get_speed_limit(self):
+        return self._speed_limit
+
+    def set_target_velocity(self, velocity):
+        self._speed = math.hypot(velocity.x, velocity.y)
+
+    def is_at_traffic_light(self):
+        return False
+
+    def get_traffic_light(self):
+        return None
+
+
+class Sensor(Actor):
+    """carla.Sensor stand-in; only collision sensors produce events"""
+
+    def __init__(self, world, actor_id, type_id, transform, parent=None):
+        super().__init__(world, actor_id, type_id, transform, parent)
+        self._callback = None
+
+    @property
+    def is_listening(self):
+        return self._callback is not None
+
+    def listen(self, callback):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+
+class CollisionEvent:
+    """carla.CollisionEvent stand-in"""
+
+    def __init__(self, frame, timestamp, actor, other_actor, transform, normal_impulse):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.actor = actor
+        self.other_actor = other_actor
+        self.transform = transform
+        self.normal_impulse = normal_impulse
+
+
+class DebugHelper:
+    """carla.DebugHelper stand-in: headless, every draw is a no-op"""
+
+    def _noop(self, *args, **kwargs):
+        return None
+
+    draw_point = draw_line = draw_arrow = draw_string = draw_box = _noop
+
+
+# ===== Snapshots =====
+
+class ActorSnapshot:
+    """carla.ActorSnapshot stand-in"""
+
+    def __init__(self, actor):
+        self.id = actor.id
+        self._transform = actor.get_transform()
+        self._velocity = actor.get_velocity()
+        self._acceleration = actor.get_acceleration()
+
+    def get_transform(self):
+        return self._transform
+
+    def get_velocity(self):
+        return self._velocity
+
+    def get_acceleration(self):
+        return self._acceleration
+
+    def get_angular_velocity(self):
+        return Vector3D()
+
+
+class WorldSnapshot:
+    """carla.WorldSnapshot stand-in"""
+
+    def __init__(self, frame, timestamp, actors):
+        self.id = frame
+        self.frame = frame
+        self.timestamp = timestamp
+        self._actors = {a.id: ActorSnapshot(a) for a in actors}
+
+    def find(self, actor_id):
+        return self._actors.get(actor_id)
+
+    def has_actor(self, actor_id):
+        return actor_id in self._actors
+
+    def __iter__(self):
+        return iter(self._actors.values())
+
+    def __len__(self):
+        return len(self._actors)
+
+
+# ===== Traffic manager stand-in =====
+
+class KinematicTrafficManager:
+    """
+    Traffic-manager stand-in driving autopilot vehicles along the network.
+
+    Honours the per-vehicle and global speed difference (CARLA semantics:
+    target = limit * (1 - pct/100)), distance to leading vehicle and
+    ignore_vehicles_percentage (rolled per vehicle per tick, like CARLA's TM
+    collision stage).  Vehicles yield at the stop line while a conflicting
+    junction connector is occupied and pick a random movement at the junction.  Lights/signs percentages are stored only since the
+    synthetic intersection is unsignalized.
+    """
+
+    VEHICLE_LENGTH = 4.5
+    LATERAL_HALF_WIDTH = 1.6
+    MAX_ACCEL = 3.0
+    MAX_DECEL = 8.0
+    COMFORT_DECEL = 4.5
+
+    def __init__(self, world, port=8000, rng=None):
+        self._world = world
+        self._port = port
+        self._rng = rng or np.random.default_rng()
+        self._vehicles = {}
+        self._params = {}
+        self._global_speed_diff = 30.0
+        self._global_lead_distance = 2.0
+        self._synchronous = True
+
+    def get_port(self):
+        return self._port
+
+    def _register(self, vehicle):
+        self._vehicles[vehicle.id] = vehicle
+        self._params.setdefault(vehicle.id, {})
+
+    def _unregister(self, vehicle):
+        self._vehicles.pop(vehicle.id, None)
+        self._params.pop(vehicle.id, None)
+
+    def _set(self, actor, key, value):
+        self._params.setdefault(actor.id, {})[key] = float(value)
+
+    # --- CARLA TrafficManager API ---
+    def set_synchronous_mode(self, mode=True):
+        self._synchronous = bool(mode)
+
+    def set_random_device_seed(self, seed):
+        # Junction routing is a TM decision here as well, so reseed it too
+        self._rng = np.random.default_rng(seed)
+        self._world._rng.seed(seed)
+
+    def global_percentage_speed_difference(self, percentage):
+        self._global_speed_diff = float(percentage)
+
+    def set_global_distance_to_leading_vehicle(self, distance):
+        self._global_lead_distance = float(distance)
+
+    def vehicle_percentage_speed_difference(self, actor, percentage):
+        self._set(actor, 'speed_diff', percentage)
+
+    def distance_to_leading_vehicle(self, actor, distance):
+        self._set(actor, 'follow_distance', distance)
+
+    def ignore_vehicles_percentage(self, actor, percentage):
+        self._set(actor, 'ignore_vehicles', percentage)
+
+    def ignore_lights_percentage(self, actor, percentage):
+        self._set(actor, 'ignore_lights', percentage)
+
+    def ignore_signs_percentage(self, actor, percentage):
+        self._set(actor, 'ignore_signs', percentage)
+
+    def ignore_walkers_percentage(self, actor, percentage):
+        self._set(actor, 'ignore_walkers', percentage)
+
+    def auto_lane_change(self, actor, enable):
+        pass
+
+    def set_hybrid_physics_mode(self, enabled=False):
+        pass
+
+    # --- Simulation step ---
+    def _step(self, dt):
+        vehicles = [v for v in self._vehicles.values() if v.is_alive and v._autopilot]
+        n = len(vehicles)
+        if n == 0:
+            return
+
+        params = [self._params[v.id] for v in vehicles]
+        x = np.fromiter((v._x for v in vehicles), float, n)
+        y = np.fromiter((v._y for v in vehicles), float, n)
+        yaw = np.radians(np.fromiter((v._yaw for v in vehicles), float, n))
+        speed = np.fromiter((v._speed for v in vehicles), float, n)
+        limit = np.fromiter((v._speed_limit for v in vehicles), float, n) / 3.6
+        speed_diff = np.fromiter((p.get('speed_diff', self._global_speed_diff) for p in params), float, n)
+        lead_dist = np.fromiter((p.get('follow_distance', self._global_lead_distance) for p in params), float, n)
+        ignore_pct = np.fromiter((p.get('ignore_vehicles', 0.0) for p in params), float, n)
+
+        desired = np.maximum(limit * (1.0 - speed_diff / 100.0), 0.0)
+        lookahead = np.maximum(15.0, speed * 3.0 + lead_dist + self.VEHICLE_LENGTH)
+
+        # 向量化前车检测：每辆车前方矩形区域内最近的车辆
+        fx, fy = np.cos(yaw), np.sin(yaw)
+        dx = x[None, :] - x[:, None]
+        dy = y[None, :] - y[:, None]
+        lon = dx * fx[:, None] + dy * fy[:, None]
+        lat = dy * fx[:, None] - dx * fy[:, None]
+        ahead = (lon > 0.1) & (np.abs(lat) < self.LATERAL_HALF_WIDTH) & (lon < lookahead[:, None])
+        gap = (np.where(ahead, lon, np.inf).min(axis=1) - self.VEHICLE_LENGTH).tolist()
+        lookahead = lookahead.tolist()
+        speed_list = speed.tolist()
+
+        # 沿车道的前车（弯道/环道上矩形区域看不到的前车）
+        lanes = self._world._map._lanes
+        by_lane = {}
+        for i, v in enumerate(vehicles):
+            by_lane.setdefault(v._lane.index, []).append((v._s, i))
+        for entries in by_lane.values():
+            entries.sort()
+        for i, v in enumerate(vehicles):
+            entries = by_lane[v._lane.index]
+            k = bisect.bisect_right(entries, (v._s, i))
+            if k < len(entries):
+                gap[i] = min(gap[i], entries[k][0] - v._s - self.VEHICLE_LENGTH)
+                continue
+            travelled = v._lane.length - v._s
+            lane = v._next_lane
+            while lane is not None and travelled < lookahead[i]:
+                if lane.index in by_lane:
+                    gap[i] = min(gap[i], travelled + by_lane[lane.index][0][0] - self.VEHICLE_LENGTH)
+                    break
+                travelled += lane.length
+                # 只沿唯一后继继续查找（路口分叉处由矩形检测兜底）
+                lane = lanes[lane.successors[0]] if len(lane.successors) == 1 else None
+
+        # 路口让行：连接道与路口内车辆冲突时在停车线前等待；
+        # 同时接近的冲突车辆按到达时间先到先行（已无法停车的车辆优先）
+        conflicts = self._world._map._junction_conflicts
+        occupied = {v._lane.index for v in vehicles if v._lane.is_junction}
+        approaching = []
+        for i, v in enumerate(vehicles):
+            nxt = v._next_lane
+            if v._lane.is_junction or nxt is None or not nxt.is_junction:
+                continue
+            to_stop_line = v._lane.length - v._s
+            if to_stop_line < lookahead[i]:
+                committed = to_stop_line < speed_list[i] ** 2 / (2.0 * self.MAX_DECEL)
+                approaching.append((not committed, to_stop_line / max(speed_list[i], 0.5), v.id,
+                                    i, nxt.index, to_stop_line))
+        approaching.sort()
+        claimed = set()
+        for _, _, _, i, conn, to_stop_line in approaching:
+            blockers = conflicts[conn]
+            if not occupied.isdisjoint(blockers) or not claimed.isdisjoint(blockers):
+                gap[i] = min(gap[i], to_stop_line)
+            claimed.add(conn)
+
+        gap = np.array(gap)
+        gap[self._rng.random(n) * 100.0 < ignore_pct] = np.inf
+
+        safe = np.sqrt(2.0 * self.COMFORT_DECEL * np.maximum(gap - lead_dist, 0.0))
+        target = np.minimum(desired, safe)
+        new_speed = np.clip(target, speed - self.MAX_DECEL * dt, speed + self.MAX_ACCEL * dt)
+        new_speed = np.maximum(new_speed, 0.0)
+        advance = (0.5 * (speed + new_speed) * dt).tolist()
+        accel = ((new_speed - speed) / dt).tolist() if dt > 0 else [0.0] * n
+        new_speed = new_speed.tolist()
+
+        advance_vehicle = self._world._advance_vehicle
+        for i, vehicle in enumerate(vehicles):
+            vehicle._accel = accel[i]
+            vehicle._speed = new_speed[i]
+            advance_vehicle(vehicle, advance[i])
+
+
+# ===== World / Client =====
+
+class KinematicWorld:
+    """carla.World stand-in"""
+
+    COLLISION_DISTANCE = 2.5
+
+    def __init__(self, client, map_name, center, lanes_per_direction=2, seed=None):
+        self._client = client
+        self._map = KinematicMap(map_name, center, lanes_per_direction)
+        self._rng = random.Random(seed)
+        self._traffic_manager = KinematicTrafficManager(self, rng=np.random.default_rng(seed))
+        self._settings = WorldSettings()
+        self._blueprints = BlueprintLibrary()
+        self._actors = {}
+        self._snapshot = None
+        self._collision_sensors = {}
+        self._contacts = set()
+        self._next_id = 1
+        self._frame = 0
+        self._elapsed = 0.0
+        self._delta = 0.0
+        self.id = self._rng.getrandbits(32)
+        self.debug = DebugHelper()
+        self._spectator = Actor(self, self._new_id(), 'spectator', Transform())
+
+    def _new_id(self):
+        actor_id = self._next_id
+        self._next_id += 1
+        return actor_id
+
+    # --- Accessors ---
+    def get_map(self):
+        return self._map
+
+    def get_blueprint_library(self):
+        return self._blueprints
+
+    def get_spectator(self):
+        return self._spectator
+
+    def get_settings(self):
+        return self._settings.copy()
+
+    def apply_settings(self, settings):
+        self._settings = settings.copy()
+        return self._frame
+
+    def get_actors(self, actor_ids=None):
+        actors = self._actors.values()
+        if actor_ids is not None:
+            wanted = set(actor_ids)
+            actors = [a for a in actors if a.id in wanted]
+        return ActorList(actors)
+
+    def get_actor(self, actor_id):
+        return self._actors.get(actor_id)
+
+    def get_snapshot(self):
+        # Like the CARLA client, one snapshot per frame (rebuilt when actors change)
+        if self._snapshot is None or self._snapshot.frame != self._frame:
+            timestamp = Timestamp(self._frame, self._elapsed, self._delta, time.time())
+            self._snapshot = WorldSnapshot(self._frame, timestamp, self._actors.values())
+        return self._snapshot
+
+    def get_weather(self):
+        return None
+
+    def set_weather(self, weather):
+        pass
+
+    # --- Spawning ---
+    def spawn_actor(self, blueprint, transform, attach_to=None):
+        actor = self.try_spawn_actor(blueprint, transform, attach_to)
+        if actor is None:
+            raise RuntimeError("Spawn failed because of collision at spawn position")
+        return actor
+
+    def try_spawn_actor(self, blueprint, transform, attach_to=None):
+        type_id = blueprint.id
+        if type_id.startswith('sensor.'):
+            sensor = Sensor(self, self._new_id(), type_id, transform, parent=attach_to)
+            self._actors[sensor.id] = sensor
+            self._snapshot = None
+            if type_id == 'sensor.other.collision' and attach_to is not None:
+                self._collision_sensors.setdefault(attach_to.id, []).append(sensor)
+            return sensor
+
+        loc = transform.location
+        for other in self._actors.values():
+            if isinstance(other, Vehicle) and math.hypot(other._x - loc.x, other._y - loc.y) < 3.0:
+                return None
+        lane, s, _ = self._map._locate(loc.x, loc.y)
+        x, y, yaw = lane.pose_at(s)
+        vehicle = Vehicle(self, self._new_id(), type_id,
+                          Transform(Location(x, y, 0.0), Rotation(0.0, yaw, 0.0)), lane, s)
+        self._actors[vehicle.id] = vehicle
+        self._snapshot = None
+        self._choose_next_lane(vehicle)
+        return vehicle
+
+    def _remove_actor(self, actor):
+        self._actors.pop(actor.id, None)
+        self._snapshot = None
+        if isinstance(actor, Vehicle):
+            self._traffic_manager._unregister(actor)
+            for sensor in self._collision_sensors.pop(actor.id, []):
+                sensor.destroy()
+        elif isinstance(actor, Sensor) and actor.parent is not None:
+            sensors = self._collision_sensors.get(actor.parent.id, [])
+            if actor in sensors:
+                sensors.remove(actor)
+
+    # --- Simulation ---
+    def tick(self, seconds=10.0):
+        dt = self._settings.fixed_delta_seconds or 0.05
+        self._traffic_manager._step(dt)
+        self._frame += 1
+        self._elapsed += dt
+        self._delta = dt
+        self._detect_collisions()
+        return self._frame
+
+    def wait_for_tick(self, seconds=10.0):
+        self.tick(seconds)
+        return self.get_snapshot()
+
+    def _choose_next_lane(self, vehicle):
+        successors = vehicle._lane.successors
+        vehicle._next_lane = self._map._lanes[self._rng.choice(successors)] if successors else None
+
+    def _advance_vehicle(self, vehicle, distance):
+        """Move a vehicle along its lane sequence (the U-turn loops keep it circulating)"""
+        vehicle._s += distance
+        while vehicle._s > vehicle._lane.length:
+            if vehicle._next_lane is None:
+                vehicle._s = vehicle._lane.length
+                vehicle._speed = 0.0
+                break
+            vehicle._s -= vehicle._lane.length
+            vehicle._lane = vehicle._next_lane
+            self._choose_next_lane(vehicle)
+        x, y, yaw = vehicle._lane.pose_at(vehicle._s)
+        vehicle._x, vehicle._y, vehicle._yaw = x, y, yaw
+
+    def _detect_collisions(self):
+        if not self._collision_sensors:
+            self._contacts = set()
+            return
+        vehicles = [a for a in self._actors.values() if isinstance(a, Vehicle)]
+        if len(vehicles) < 2:
+            self._contacts = set()
+            return
+        n = len(vehicles)
+        x = np.fromiter((v._x for v in vehicles), float, n)
+        y = np.fromiter((v._y for v in vehicles), float, n)
+        d2 = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2
+        ii, jj = np.nonzero(np.triu(d2 < self.COLLISION_DISTANCE ** 2, k=1))
+        contacts = set()
+        timestamp = Timestamp(self._frame, self._elapsed, self._delta, time.time())
+        for i, j in zip(ii.tolist(), jj.tolist()):
+            a, b = vehicles[i], vehicles[j]
+            key = (min(a.id, b.id), max(a.id, b.id))
+            contacts.add(key)
+            if key in self._contacts:
+                continue
+            rel = a.get_velocity() - b.get_velocity()
+            impulse = rel * 1500.0
+            for actor, other in ((a, b), (b, a)):
+                for sensor in self._collision_sensors.get(actor.id, []):
+                    if sensor._callback is not None:
+                        sensor._callback(CollisionEvent(self._frame, timestamp, actor, other,
+                                                        actor.get_transform(), impulse))
+        self._contacts = contacts
+
+
+class KinematicClient:
+    """
+    carla.Client stand-in for the headless kinematic backend.
+
+    Args:
+        intersection_center: Centre of the synthetic intersection (map coordinates)
+        lanes_per_direction: Lanes per travel direction on each arm
+        seed: Optional RNG seed for routing / TM decisions
+    """
+
+    def __init__(self, host='localhost', port=2000, intersection_center=(0.0, 0.0, 0.0),
+                 lanes_per_direction=2, seed=None):
+        self.host = host
+        self.port = port
+        self._center = tuple(intersection_center)
+        self._lanes_per_direction = lanes_per_direction
+        self._seed = seed
+        self._world = None
+
+    def set_timeout(self, seconds):
+        pass
+
+    def get_server_version(self):
+        return 'kinematic'
+
+    def get_client_version(self):
+        return 'kinematic'
+
+    def get_available_maps(self):
+        return ['Kinematic/Intersection']
+
+    def load_world(self, map_name='Town05'):
+        self._world = KinematicWorld(self, map_name, self._center, self._lanes_per_direction, self._seed)
+        return self._world
+
+    def reload_world(self):
+        name = self._world.get_map().name if self._world else 'Town05'
+        return self.load_world(name)
+
+    def get_world(self):
+        if self._world is None:
+            self.load_world()
+        return self._world
+
+    def get_trafficmanager(self, port=8000):
+        return self.get_world()._traffic_manager
+
+
+def install_carla_fallback():
+    """
+    Register this module's API subset as ``carla`` when the real CARLA egg is
+    unavailable, so modules doing ``import carla`` keep working headless.
+    """
+    if 'carla' in sys.modules:
+        return sys.modules['carla']
+    module = types.ModuleType('carla')
+    module.__doc__ = "Kinematic backend stand-in for the CARLA Python API"
+    for name in ('Vector3D', 'Location', 'Rotation', 'Transform', 'Color', 'LaneType',
+                 'LaneChange', 'LaneMarking', 'VehicleControl', 'Timestamp', 'WorldSettings',
+                 'Waypoint', 'Actor', 'Vehicle', 'Sensor', 'ActorBlueprint', 'BlueprintLibrary',
+                 'ActorList', 'ActorSnapshot', 'WorldSnapshot', 'CollisionEvent', 'DebugHelper'):
+        setattr(module, name, globals()[name])
+    module.Client = KinematicClient
+    module.World = KinematicWorld
+    module.Map = KinematicMap
+    module.TrafficManager = KinematicTrafficManager
+    module.KINEMATIC_FALLBACK = True
+    sys.modules['carla'] = module
+    return module
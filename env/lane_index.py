@@ -0,0 +1,180 @@
+"""
+车道waypoint空间索引 (Lane waypoint spatial index)
+
+Driving-lane waypoints inside the intersection box (plus margin) are sampled
+once per map and rasterized into a NumPy grid that stores, for every cell,
+the nearest lane sample. Vehicle → (road_id, lane_id, is_junction) lookups
+then become a single array index instead of a ``map.get_waypoint`` call.
+
+The index is built offline on first use and saved as ``.npz`` under
+``SimulationConfig.MAP_CACHE_DIR``, keyed by map name, intersection center,
+half size and build parameters. Lookups that fall outside the grid or too far
+from any lane sample are reported as misses so the caller can query CARLA.
+"""
+
+import hashlib
+import os
+import re
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+class LaneRecord(NamedTuple):
+    """Lightweight stand-in for the carla.Waypoint fields used by the pipeline"""
+    road_id: int
+    section_id: int
+    lane_id: int
+    is_junction: bool
+
+
+class LaneWaypointIndex:
+    """Rasterized nearest-lane lookup grid for one intersection"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, samples: dict, origin, cell_size: float, nearest: np.ndarray,
+                 max_snap_distance: float):
+        self.road_ids = samples['road_id'].astype(np.int64)
+        self.section_ids = samples['section_id'].astype(np.int64)
+        self.lane_ids = samples['lane_id'].astype(np.int64)
+        self.is_junction = samples['is_junction'].astype(bool)
+        self.xyz = samples['xyz'].astype(np.float64)
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.cell_size = float(cell_size)
+        self.nearest = nearest.astype(np.int32)  # (nx, ny) sample index, -1 = no lane nearby
+        self.max_snap_distance = float(max_snap_distance)
+
+        self._records = [
+            LaneRecord(int(r), int(sec), int(l), bool(j))
+            for r, sec, l, j in zip(self.road_ids, self.section_ids, self.lane_ids, self.is_junction)
+        ]
+        self.hits = 0
+        self.misses = 0
+
+    # ----- 构建 -----
+    @classmethod
+    def build(cls, world_map, center, half_size: float, margin: float = 20.0,
+              resolution: float = 1.0, cell_size: float = 0.5,
+              max_snap_distance: float = 3.0) -> 'LaneWaypointIndex':
+        """Sample driving-lane waypoints in the box and rasterize nearest-lane cells"""
+        extent = half_size + margin
+        x0, y0 = center[0] - extent, center[1] - extent
+
+        rows = []
+        for wp in world_map.generate_waypoints(resolution):
+            loc = wp.transform.location
+            if abs(loc.x - center[0]) > extent or abs(loc.y - center[1]) > extent:
+                continue
+            rows.append((loc.x, loc.y, loc.z, wp.road_id, wp.section_id, wp.lane_id, wp.is_junction))
+
+        if not rows:
+            raise ValueError("No driving-lane waypoints inside the intersection box")
+
+        data = np.array(rows, dtype=np.float64)
+        samples = {
+            'xyz': data[:, 0:3],
+            'road_id': data[:, 3],
+            'section_id': data[:, 4],
+            'lane_id': data[:, 5],
+            'is_junction': data[:, 6],
+        }
+
+        n_cells = int(np.ceil(2.0 * extent / cell_size))
+        centers = (np.arange(n_cells) + 0.5) * cell_size
+        gx, gy = np.meshgrid(x0 + centers, y0 + centers, indexing='ij')
+        cell_xy = np.stack((gx.ravel(), gy.ravel()), axis=1).astype(np.float32)
+        sample_xy = data[:, 0:2].astype(np.float32)
+
+        # 分块暴力最近邻（离线一次性计算）
+        nearest = np.empty(len(cell_xy), dtype=np.int32)
+        nearest_dist = np.empty(len(cell_xy), dtype=np.float32)
+        chunk = max(1, 4_000_000 // max(len(sample_xy), 1))
+        for start in range(0, len(cell_xy), chunk):
+            block = cell_xy[start:start + chunk]
+            d2 = ((block[:, None, :] - sample_xy[None, :, :]) ** 2).sum(axis=2)
+            idx = d2.argmin(axis=1)
+            nearest[start:start + chunk] = idx
+            nearest_dist[start:start + chunk] = np.sqrt(d2[np.arange(len(block)), idx])
+
+        nearest[nearest_dist > max_snap_distance] = -1
+        return cls(samples, (x0, y0), cell_size, nearest.reshape(n_cells, n_cells), max_snap_distance)
+
+    # ----- 磁盘缓存 -----
+    @staticmethod
+    def cache_path(cache_dir: str, map_name: str, center, half_size: float, **params) -> str:
+        """Cache file for (map_name, intersection_center, half_size, build params)"""
+        key = repr((LaneWaypointIndex.FORMAT_VERSION, map_name,
+                    tuple(round(float(c), 2) for c in center), round(float(half_size), 2),
+                    sorted(params.items())))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        safe_name = re.sub(r'[^A-Za-z0-9_]+', '_', map_name).strip('_')
+        return os.path.join(cache_dir, f"lane_index_{safe_name}_{digest}.npz")
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            xyz=self.xyz, road_id=self.road_ids, section_id=self.section_ids,
+            lane_id=self.lane_ids, is_junction=self.is_junction,
+            origin=np.array(self.origin), cell_size=self.cell_size,
+            nearest=self.nearest, max_snap_distance=self.max_snap_distance,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'LaneWaypointIndex':
+        with np.load(path) as data:
+            samples = {key: data[key] for key in ('xyz', 'road_id', 'section_id', 'lane_id', 'is_junction')}
+            return cls(samples, data['origin'], float(data['cell_size']), data['nearest'],
+                       float(data['max_snap_distance']))
+
+    @classmethod
+    def load_or_build(cls, world_map, map_name: str, center, half_size: float,
+                      cache_dir: str, **params) -> 'LaneWaypointIndex':
+        """Load the on-disk index for this intersection or build and save it"""
+        path = cls.cache_path(cache_dir, map_name, center, half_size, **params)
+        if os.path.exists(path):
+            try:
+                index = cls.load(path)
+                print(f"🗺️ Lane index loaded from cache: {path}")
+                return index
+            except Exception as e:
+                print(f"⚠️ Lane index cache unreadable, rebuilding: {e}")
+
+        index = cls.build(world_map, center, half_size, **params)
+        try:
+            index.save(path)
+            print(f"🗺️ Lane index built ({len(index.road_ids)} samples) and saved: {path}")
+        except OSError as e:
+            print(f"⚠️ Lane index could not be saved: {e}")
+        return index
+
+    # ----- 查询 -----
+    def lookup_many(self, xy: np.ndarray) -> np.ndarray:
+        """Sample index for each (x, y) row, -1 on a miss (vectorized)"""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        n_x, n_y = self.nearest.shape
+        ix = np.floor((xy[:, 0] - self.origin[0]) / self.cell_size).astype(np.int64)
+        iy = np.floor((xy[:, 1] - self.origin[1]) / self.cell_size).astype(np.int64)
+        inside = (ix >= 0) & (ix < n_x) & (iy >= 0) & (iy < n_y)
+
+        result = np.full(len(xy), -1, dtype=np.int64)
+        result[inside] = self.nearest[ix[inside], iy[inside]]
+
+        hits = int(np.count_nonzero(result >= 0))
+        self.hits += hits
+        self.misses += len(xy) - hits
+        return result
+
+    def lookup(self, x: float, y: float) -> Optional[LaneRecord]:
+        """Lane record at (x, y), or None on a miss"""
+        idx = self.lookup_many(np.array([[x, y]]))[0]
+        return self._records[idx] if idx >= 0 else None
+
+    def record(self, idx: int) -> LaneRecord:
+        return self._records[idx]
+
+    def __len__(self) -> int:
+        return len(self._records)
@@ -0,0 +1,132 @@
+"""
+前车搜索 (Leading-vehicle search)
+
+Batched replacements for the per-vehicle O(n²) leader loops in StateExtractor:
+
+- ``lane_leader_distances``: vehicles are bucketed by (road_id, lane_id) and
+  sorted by their projection on the bucket's mean heading, so every vehicle's
+  leader is simply its successor in the sorted order (O(n log n)).
+- ``UniformGrid2D``: uniform 2D hash grid for the nearest-neighbour fallback
+  used when a vehicle has no waypoint.
+
+Distances follow the legacy semantics (3D Euclidean for same-lane leaders,
+2D Euclidean for the fallback, -1.0 when nothing is found).
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def forward_vectors(rotations: np.ndarray) -> np.ndarray:
+    """Unit forward vectors from (pitch, yaw, roll) rows in degrees (CARLA convention)"""
+    pitch = np.radians(rotations[:, 0])
+    yaw = np.radians(rotations[:, 1])
+    cos_pitch = np.cos(pitch)
+    return np.stack((cos_pitch * np.cos(yaw), cos_pitch * np.sin(yaw), np.sin(pitch)), axis=1)
+
+
+def lane_leader_distances(positions: np.ndarray, forwards: np.ndarray,
+                          road_ids: np.ndarray, lane_ids: np.ndarray,
+                          has_lane: np.ndarray) -> np.ndarray:
+    """
+    Distance to the closest vehicle ahead in the same (road_id, lane_id).
+
+    Args:
+        positions: (n, 3) vehicle locations
+        forwards: (n, 3) unit forward vectors
+        road_ids, lane_ids: (n,) lane keys (ignored where has_lane is False)
+        has_lane: (n,) bool, vehicles that have a waypoint
+
+    Returns:
+        (n,) distances, -1.0 where no leader exists or has_lane is False
+    """
+    n = len(positions)
+    result = np.full(n, -1.0)
+    members = np.flatnonzero(has_lane)
+    if len(members) < 2:
+        return result
+
+    # 按车道分桶
+    keys = np.stack((road_ids[members], lane_ids[members]), axis=1)
+    _, bucket = np.unique(keys, axis=0, return_inverse=True)
+    bucket = bucket.reshape(-1)
+
+    # 每个桶的纵向轴 = 桶内车辆平均朝向
+    axis = np.zeros((bucket.max() + 1, 3))
+    np.add.at(axis, bucket, forwards[members])
+    norm = np.linalg.norm(axis, axis=1, keepdims=True)
+    axis = np.divide(axis, norm, out=np.zeros_like(axis), where=norm > 1e-9)
+
+    pos = positions[members]
+    s = np.einsum('ij,ij->i', pos, axis[bucket])
+    order = np.lexsort((s, bucket))
+
+    sorted_bucket = bucket[order]
+    sorted_pos = pos[order]
+    same_next = np.zeros(len(order), dtype=bool)
+    same_next[:-1] = sorted_bucket[:-1] == sorted_bucket[1:]
+    gap = np.full(len(order), -1.0)
+    gap[:-1] = np.linalg.norm(sorted_pos[1:] - sorted_pos[:-1], axis=1)
+
+    # 与车道轴同向的车辆：前车是排序后的下一辆
+    ahead = np.where(same_next, gap, -1.0)
+
+    # 逆向车辆（朝向与桶轴相反）：前车是排序后的上一辆
+    facing = np.einsum('ij,ij->i', forwards[members][order], axis[sorted_bucket])
+    reversed_rows = np.flatnonzero(facing < 0)
+    if len(reversed_rows):
+        prev_ok = reversed_rows > 0
+        prev_ok[prev_ok] = sorted_bucket[reversed_rows[prev_ok] - 1] == sorted_bucket[reversed_rows[prev_ok]]
+        ahead[reversed_rows] = -1.0
+        rows = reversed_rows[prev_ok]
+        ahead[rows] = gap[rows - 1]
+
+    result[members[order]] = ahead
+    return result
+
+
+class UniformGrid2D:
+    """Uniform hash grid over (x, y) for nearest-neighbour queries"""
+
+    def __init__(self, positions: np.ndarray, cell_size: float = 10.0):
+        self.cell_size = float(cell_size)
+        self.xy = np.asarray(positions, dtype=np.float64)[:, :2]
+        self._xs = self.xy[:, 0].tolist()
+        self._ys = self.xy[:, 1].tolist()
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+        cell_idx = np.floor(self.xy / self.cell_size).astype(np.int64)
+        for i, (cx, cy) in enumerate(cell_idx.tolist()):
+            self.cells.setdefault((cx, cy), []).append(i)
+
+        if len(cell_idx):
+            span = cell_idx.max(axis=0) - cell_idx.min(axis=0)
+            self._max_ring = int(span.max()) + 1
+        else:
+            self._max_ring = 0
+
+    def nearest_distance(self, i: int) -> float:
+        """2D distance from point i to its nearest other point, -1.0 if alone"""
+        x, y = self._xs[i], self._ys[i]
+        cx = math.floor(x / self.cell_size)
+        cy = math.floor(y / self.cell_size)
+        best = float('inf')
+
+        for ring in range(self._max_ring + 1):
+            # 环上所有点到查询点的最小距离 >= (ring - 1) * cell_size
+            if best <= (ring - 1) * self.cell_size:
+                break
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in range(cy - ring, cy + ring + 1):
+                    if ring and abs(gx - cx) != ring and abs(gy - cy) != ring:
+                        continue
+                    for j in self.cells.get((gx, gy), ()):
+                        if j == i:
+                            continue
+                        d = math.hypot(self._xs[j] - x, self._ys[j] - y)
+                        if d < best:
+                            best = d
+
+        return best if best != float('inf') else -1.0
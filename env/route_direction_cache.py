@@ -0,0 +1,117 @@
+"""
+路线方向缓存 (Route-direction cache)
+
+``StateExtractor.get_route_direction`` turns a (vehicle location, destination)
+pair into 'left' / 'right' / 'straight' with a full ``GlobalRoutePlanner``
+A* search. Every vehicle on the same approach lane heading to the same
+destination lane gets the same answer, so results are memoized on
+
+    ((start road_id, section_id, lane_id), (end road_id, section_id, lane_id))
+
+Two layers:
+
+- ``turn_table``: precomputed at startup for every approach lane of the
+  target junction × every destination lane, never evicted, persisted as
+  JSON under ``SimulationConfig.MAP_CACHE_DIR``
+- an LRU memo for everything else (lanes inside the junction, destinations
+  not in the table), bounded by ``maxsize``
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+LaneKey = Tuple[int, int, int]
+
+
+def lane_key(waypoint) -> LaneKey:
+    """(road_id, section_id, lane_id) of a carla.Waypoint or LaneRecord"""
+    return (int(waypoint.road_id), int(waypoint.section_id), int(waypoint.lane_id))
+
+
+class RouteDirectionCache:
+    """Precomputed turn table plus LRU memo for route directions"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = max(1, int(maxsize))
+        self.turn_table: Dict[Tuple[LaneKey, LaneKey], str] = {}
+        self._lru: 'OrderedDict[Tuple[LaneKey, LaneKey], str]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ----- 查询 -----
+    def get(self, start: LaneKey, end: LaneKey) -> Optional[str]:
+        """Cached direction for (start lane, end lane), or None on a miss"""
+        key = (start, end)
+        direction = self.turn_table.get(key)
+        if direction is None:
+            direction = self._lru.get(key)
+            if direction is not None:
+                self._lru.move_to_end(key)
+        if direction is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return direction
+
+    def put(self, start: LaneKey, end: LaneKey, direction: str):
+        key = (start, end)
+        if key in self.turn_table:
+            return
+        self._lru[key] = direction
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop the LRU memo (the precomputed turn table is kept)"""
+        self._lru.clear()
+
+    def __len__(self) -> int:
+        return len(self.turn_table) + len(self._lru)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'turn_table_size': len(self.turn_table),
+            'lru_size': len(self._lru),
+        }
+
+    # ----- 磁盘缓存 -----
+    @staticmethod
+    def cache_path(cache_dir: str, map_name: str, center, half_size: float, **params) -> str:
+        """Turn table file for (map_name, intersection_center, half_size, planner params)"""
+        key = repr((RouteDirectionCache.FORMAT_VERSION, map_name,
+                    tuple(round(float(c), 2) for c in center), round(float(half_size), 2),
+                    sorted(params.items())))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        safe_name = re.sub(r'[^A-Za-z0-9_]+', '_', map_name).strip('_')
+        return os.path.join(cache_dir, f"turn_table_{safe_name}_{digest}.json")
+
+    def save_turn_table(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        rows = [[list(start), list(end), direction] for (start, end), direction in self.turn_table.items()]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.FORMAT_VERSION, 'entries': rows}, f)
+        os.replace(tmp_path, path)
+
+    def load_turn_table(self, path: str):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != self.FORMAT_VERSION:
+            raise ValueError(f"turn table format {data.get('version')} != {self.FORMAT_VERSION}")
+        self.turn_table = {
+            (tuple(start), tuple(end)): direction for start, end, direction in data['entries']
+        }
@@ -0,0 +1,158 @@
+"""
+流式统计 (Streaming statistics)
+
+O(1)-per-sample aggregates for long-running metrics, so episode statistics
+do not keep every sample:
+
+- ``RunningStats``: count, sum, sum of absolute values and Welford
+  mean/variance. Supports removing or replacing a sample (for values that a
+  filter rewrites after the fact) and merging (Chan et al. parallel update)
+- ``P2Quantile``: Jain & Chlamtac P² estimator of a single quantile using
+  five markers, no sample storage
+"""
+
+import math
+from typing import Iterable, List
+
+
+class RunningStats:
+    """Count / sum / sum|x| / Welford variance over a stream of floats"""
+
+    __slots__ = ('count', 'total', 'total_abs', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_abs = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float):
+        self.count += 1
+        self.total += x
+        self.total_abs += abs(x)
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float):
+        """Remove a sample previously added (inverse Welford update)"""
+        if self.count <= 1:
+            self.__init__()
+            return
+        count = self.count - 1
+        mean = (self.count * self.mean - x) / count
+        self.m2 = max(0.0, self.m2 - (x - mean) * (x - self.mean))
+        self.mean = mean
+        self.count = count
+        self.total -= x
+        self.total_abs -= abs(x)
+
+    def replace(self, old: float, new: float):
+        self.remove(old)
+        self.add(new)
+
+    def merge(self, other: 'RunningStats'):
+        """Fold ``other`` into this aggregate"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.total, self.total_abs = other.count, other.total, other.total_abs
+            self.mean, self.m2 = other.mean, other.m2
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.total_abs += other.total_abs
+
+    @classmethod
+    def combined(cls, parts: Iterable['RunningStats']) -> 'RunningStats':
+        result = cls()
+        for part in parts:
+            result.merge(part)
+        return result
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def average_abs(self) -> float:
+        return self.total_abs / self.count if self.count else 0.0
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """P² single-quantile estimator (five markers, O(1) memory and time per sample)"""
+
+    __slots__ = ('p', 'count', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0:
+            raise ValueError(f"quantile must be in (0, 1), got {p}")
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0.0, 2.0 * p, 4.0 * p, 2.0 + 2.0 * p, 4.0]
+        self.increments = [0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0]
+
+    def add(self, x: float):
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # 定位样本所在区间并更新端点
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # 调整中间三个标记（抛物线插值，越界时退回线性插值）
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1.0 and n[i + 1] - n[i] > 1) or (d <= -1.0 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = q[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = candidate
+                n[i] += step
+
+    @property
+    def value(self) -> float:
+        if self.count == 0:
+            return 0.0
+        if self.count <= 5:
+            # 样本不足5个时直接取排序后的近邻值
+            index = min(len(self.heights) - 1, max(0, int(round(self.p * (len(self.heights) - 1)))))
+            return self.heights[index]
+        return self.heights[2]
@@ -1,18 +1,18 @@
 import math
 import time
-import carla
-from .carla_wrapper import CarlaWrapper
+from .carla_wrapper import CarlaWrapper, carla
 from .traffic_generator import TrafficGenerator
 from .simulation_config import SimulationConfig
 
 class ScenarioManager:
-    def __init__(self, town=None, unified_config=None):
+    def __init__(self, town=None, unified_config=None, backend=None):
         """
         Initialize ScenarioManager with optional unified configuration
         
         Args:
             town: Map name override
             unified_config: UnifiedConfig object for dynamic configuration
+            backend: Optional simulator backend override ('carla' | 'kinematic')
         """
         self.unified_config = unified_config
         
@@ -23,7 +23,7 @@ class ScenarioManager:
             map_name = town or SimulationConfig.MAP_NAME
         
         # Pass unified config to CarlaWrapper
-        self.carla = CarlaWrapper(town=map_name, unified_config=unified_config)
+        self.carla = CarlaWrapper(town=map_name, unified_config=unified_config, backend=backend)
         self.traffic_gen = TrafficGenerator(self.carla)
 
         self.traffic_generator = self.traffic_gen
@@ -1,7 +1,13 @@
+import os
+
+
 class SimulationConfig:
     # ===== 地图设置 =====
     MAP_NAME = 'Town05'
     
+    # ===== 仿真后端 =====
+    BACKEND = 'carla'  # 'carla' 或 'kinematic'（无需CARLA服务器的运动学后端）
+    
     # ===== CARLA连接设置 =====
     CARLA_HOST = 'localhost'
     CARLA_PORT = 2000
@@ -40,6 +46,15 @@ class SimulationConfig:
     # ===== 状态提取设置 =====
     ACTOR_CACHE_INTERVAL = 5  # SPEED UP: Update every 5 steps instead of every step
     
+    # ===== 地图缓存设置 =====
+    # 离线构建的车道waypoint空间索引存放目录（按地图/路口中心/半边长区分）
+    MAP_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache')
+    LANE_INDEX_MARGIN = 20.0      # 检测区域外扩边距（米）
+    LANE_INDEX_RESOLUTION = 1.0   # waypoint采样间距（米）
+    ROUTE_PLANNER_RESOLUTION = 2.0  # GlobalRoutePlanner 拓扑采样间距（米），拓扑图按地图+间距缓存
+    PRECOMPUTE_TURN_TABLE = True  # 启动时预计算目标路口转向表（首次运行后从缓存目录加载）
+    ROUTE_DIRECTION_CACHE_SIZE = 4096  # 转向表之外的路线方向LRU缓存容量
+    
     # ===== 打印设置 =====
     PRINT_INTERVAL = 30
     
@@ -1,7 +1,16 @@
 from .simulation_config import SimulationConfig
 import math
-import carla
+import os
+import random
 import time
+from .carla_wrapper import carla
+from .vehicle_state_table import VehicleStateTable
+from .leader_search import forward_vectors, lane_leader_distances, UniformGrid2D
+from .frame_clock import FrameClock
+from .frame_context import FrameContext
+from .lane_index import LaneWaypointIndex
+from .route_direction_cache import RouteDirectionCache, lane_key
+import numpy as np
 from agents.navigation.global_route_planner_dao import GlobalRoutePlannerDAO
 from agents.navigation.global_route_planner import GlobalRoutePlanner
 
@@ -10,13 +19,23 @@ class StateExtractor:
         self.carla = carla_wrapper
         self.world_map = self.carla.world.get_map()  # 缓存地图对象
         self.training_mode = training_mode  # SPEED UP: Skip expensive ops in training
+        
+        # 仿真帧时钟：缓存以仿真时间而非墙钟时间失效（PlatoonManager/AuctionEngine 共享）
+        self.frame_clock = FrameClock(lambda: self.carla.world.get_snapshot())
 
-        # 初始化GlobalRoutePlannerDAO
-        dao = GlobalRoutePlannerDAO(self.world_map, 2.0)  # 2.0米采样距离
-
-        # 初始化GlobalRoutePlanner
-        self.global_route_planner = GlobalRoutePlanner(dao)
-        self.global_route_planner.setup()  # 设置拓扑结构
+        # GlobalRoutePlanner 延迟构建：首次需要路线规划时从磁盘图缓存加载（或构建后保存）
+        self._global_route_planner = None
+        self.route_planner_startup = None  # {'source': 'cache'|'built', 'seconds': ...}
+        
+        # 车道waypoint空间索引：路口区域内的车道查询走本地NumPy网格，未命中时才查询CARLA
+        self.lane_index = self._load_lane_index()
+        
+        # 路线方向缓存：(起点车道, 终点车道) -> 转向；目标路口的转向表在启动时预计算
+        self.route_direction_cache = RouteDirectionCache(SimulationConfig.ROUTE_DIRECTION_CACHE_SIZE)
+        self._destination_lane_keys = {}
+        self._spawn_points = None
+        if SimulationConfig.PRECOMPUTE_TURN_TABLE:
+            self._load_turn_table()
         
         # 缓存相关属性
         self._cached_actors = []
@@ -25,39 +44,98 @@ class StateExtractor:
         
         # 新增：状态缓存机制
         self._vehicle_states_cache = []
-        self._states_cache_timestamp = 0
-        self._states_cache_duration = 0.5  # SPEED UP: Longer cache duration
+        self._vehicle_table = VehicleStateTable(SimulationConfig.TARGET_INTERSECTION_CENTER).finalize()
+        self._states_cache_frame = None  # 以仿真帧号作为缓存键
+        self._frame_context = None  # 当前帧的决策上下文（随状态缓存一起失效）
+        self._extraction_count = 0  # 实际提取次数（同步模式下应为每帧一次）
+        self._cull_stats = {'actors': 0, 'culled_outside_box': 0, 'culled_leaving': 0, 'processed': 0}
         
         # 新增：waypoint缓存 - OPTIMIZED FOR TRAINING  
         self._waypoint_cache = {}
-        self._waypoint_cache_timestamp = 0
-        self._waypoint_cache_duration = 1.0  # SPEED UP: Much longer cache
+        self._waypoint_cache_timestamp = None
+        self._waypoint_cache_duration = 1.0  # SPEED UP: Much longer cache (sim seconds)
         
         # 新增：车辆目标点缓存 - OPTIMIZED FOR TRAINING
         self._vehicle_destinations = {}
-        self._destination_cache_timestamp = 0
-        self._destination_cache_duration = 10.0  # SPEED UP: Very long cache
+        self._destination_cache_timestamp = None
+        self._destination_cache_duration = 10.0  # SPEED UP: Very long cache (sim seconds)
         
         # 使用正方形检测区域
         self.intersection_half_size = SimulationConfig.INTERSECTION_HALF_SIZE
 
-    def get_vehicle_states(self, force_update=False, include_all_vehicles=False):
-        """获取车辆状态，支持缓存机制"""
-        current_time = time.time()
+    @property
+    def global_route_planner(self):
+        """路线规划器（延迟加载，转向表命中时无需构建）"""
+        if self._global_route_planner is None:
+            self._global_route_planner = self._load_route_planner()
+        return self._global_route_planner
+
+    def _load_route_planner(self):
+        """从磁盘加载拓扑图缓存；缓存不存在或不可用时完整构建并保存"""
+        resolution = SimulationConfig.ROUTE_PLANNER_RESOLUTION
+        planner = GlobalRoutePlanner(GlobalRoutePlannerDAO(self.world_map, resolution))
+        path = GlobalRoutePlanner.graph_cache_path(SimulationConfig.MAP_CACHE_DIR, self.world_map.name, resolution)
+        
+        start = time.perf_counter()
+        if os.path.exists(path):
+            try:
+                planner.load_graph(path)
+                self.route_planner_startup = {'source': 'cache', 'seconds': time.perf_counter() - start}
+                print(f"🧭 Route graph loaded from cache in {self.route_planner_startup['seconds']:.2f}s: {path}")
+                return planner
+            except Exception as e:
+                print(f"⚠️ Route graph cache unreadable, rebuilding: {e}")
+                start = time.perf_counter()
         
-        # 检查是否可以使用缓存的状态
+        planner.setup()  # 设置拓扑结构
+        self.route_planner_startup = {'source': 'built', 'seconds': time.perf_counter() - start}
+        try:
+            planner.save_graph(path)
+            print(f"🧭 Route graph built in {self.route_planner_startup['seconds']:.2f}s and saved: {path}")
+        except Exception as e:
+            print(f"⚠️ Route graph could not be saved: {e}")
+        return planner
+
+    def get_vehicle_states(self, force_update=False, include_all_vehicles=False, snapshot=None):
+        """
+        获取车辆状态，支持缓存机制
+        
+        States are read in bulk from one world snapshot (the one returned by
+        the tick if passed in, else world.get_snapshot()) and cached per frame.
+        """
+        if snapshot is None:
+            snapshot = self.carla.world.get_snapshot()
+        self.frame_clock.sync(snapshot)
+        
+        # 同一仿真帧内直接复用缓存
         if (not force_update and not include_all_vehicles and
-            self._vehicle_states_cache and 
-            current_time - self._states_cache_timestamp < self._states_cache_duration):
+            self._states_cache_frame == snapshot.frame):
             return self._vehicle_states_cache
         
         # 更新状态缓存
-        self._vehicle_states_cache = self._extract_vehicle_states(include_all_vehicles)
-        self._states_cache_timestamp = current_time
+        self._vehicle_table = self._extract_vehicle_states(include_all_vehicles, snapshot)
+        self._vehicle_states_cache = self._vehicle_table.rows()
+        self._extraction_count += 1
+        # include_all_vehicles 结果不作为正常帧缓存
+        self._states_cache_frame = None if include_all_vehicles else snapshot.frame
         
         return self._vehicle_states_cache
 
-    def _extract_vehicle_states(self, include_all_vehicles=False):
+    def get_frame_context(self, snapshot=None):
+        """获取当前帧的决策上下文（同一帧内返回同一对象）"""
+        self.get_vehicle_states(snapshot=snapshot)
+        context = self._frame_context
+        if context is None or context.table is not self._vehicle_table:
+            context = FrameContext(self._vehicle_table, self.frame_clock.frame, self.frame_clock.sim_time)
+            self._frame_context = context
+        return context
+
+    def get_vehicle_table(self, force_update=False):
+        """获取NumPy车辆状态表（与 get_vehicle_states 共享同一缓存）"""
+        self.get_vehicle_states(force_update=force_update)
+        return self._vehicle_table
+
+    def _extract_vehicle_states(self, include_all_vehicles=False, snapshot=None):
         """实际提取车辆状态的方法"""
         # 更频繁地更新 actor 列表以捕获新车辆
         if self._cache_counter % self._cache_interval == 0:
@@ -65,11 +143,12 @@ class StateExtractor:
         self._cache_counter += 1
         
         # For include_all_vehicles mode (used during reset validation), 
-        # return simplified states of all vehicles without complex processing
+        # return simplified states of all vehicles without complex processing.
+        # Queries actors directly: freshly spawned vehicles are not in the last snapshot yet.
         if include_all_vehicles:
             # Force refresh of actors list for accurate count - bypass cache entirely
             all_vehicles = list(self.carla.world.get_actors().filter('vehicle.*'))
-            simple_states = []
+            simple_table = VehicleStateTable(SimulationConfig.TARGET_INTERSECTION_CENTER)
             
             for vehicle in all_vehicles:
                 try:
@@ -79,111 +158,118 @@ class StateExtractor:
                         
                     transform = vehicle.get_transform()
                     location = transform.location
+                    rotation = transform.rotation
                     velocity = vehicle.get_velocity()
                     
                     # Minimal state for reset validation - just count alive vehicles
-                    state = {
-                        'id': vehicle.id,
-                        'location': (location.x, location.y, location.z),
-                        'velocity': (velocity.x, velocity.y, velocity.z),
-                        'type': vehicle.type_id,
-                        'road_id': 0,  # Skip complex waypoint calculation during reset
-                        'lane_id': 0,
-                        'is_junction': False,
-                        'leading_vehicle_dist': -1.0,
-                        'distance_to_center': self._calculate_distance_to_intersection_center(location),
-                    }
-                    simple_states.append(state)
+                    # Skip complex waypoint calculation during reset (road/lane 0, no leader)
+                    simple_table.append(
+                        vehicle.id,
+                        (location.x, location.y, location.z),
+                        (rotation.pitch, rotation.yaw, rotation.roll),
+                        (velocity.x, velocity.y, velocity.z),
+                        vehicle.type_id,
+                    )
                 except Exception as e:
                     # Log vehicle access issues during reset validation
                     print(f"⚠️ Debug: Vehicle {getattr(vehicle, 'id', 'unknown')} access failed: {e}")
                     continue
             
-            return simple_states
+            return simple_table.finalize()
         
         # Normal operation - only intersection vehicles with full processing
-        # 获取或更新waypoint缓存
-        vehicle_waypoints = self._get_cached_waypoints()
+        # 一次性从快照读取所有车辆的位姿和速度（替代逐车RPC）
+        if snapshot is None:
+            snapshot = self.carla.world.get_snapshot()
+        snapshot_entries = self._ingest_snapshot(snapshot)
+        positions, rotations = self._entry_poses(snapshot_entries)
+        
+        # 阶段1：向量化AABB预筛选，只保留交叉口正方形区域内的车辆
+        in_box = self._in_intersection_box(positions)
+        box_rows = np.flatnonzero(in_box)
+        box_entries = [snapshot_entries[i] for i in box_rows]
+        box_positions = positions[box_rows]
+        box_forwards = forward_vectors(rotations[box_rows])
+        
+        # 阶段2：剔除驶离路口的车辆（前进方向背离路口中心）
+        approaching = ~self._leaving_intersection(box_positions, box_forwards)
+        
+        self._cull_stats = {
+            'actors': len(snapshot_entries),
+            'culled_outside_box': len(snapshot_entries) - len(box_entries),
+            'culled_leaving': int(np.count_nonzero(~approaching)),
+            'processed': int(np.count_nonzero(approaching)),
+        }
+        
+        # 以下仅对区域内车辆执行：waypoint（前车搜索需要区域内全部车辆的车道）、目标点、前车距离
+        vehicle_waypoints = self._get_cached_waypoints(box_entries)
+        self._update_vehicle_destinations(
+            [box_entries[i][0] for i in np.flatnonzero(approaching)], snapshot_entries
+        )
         
-        # 更新车辆目标点
-        self._update_vehicle_destinations()
+        box_waypoints = [vehicle_waypoints.get(vehicle.id) for vehicle, _, _ in box_entries]
+        road_ids, lane_ids, has_lane = self._lane_keys(box_waypoints)
         
-        # Include all alive vehicles for processing, filtering happens below
-        valid_vehicles = [vehicle for vehicle in self._cached_actors if vehicle.is_alive]
+        # 批量计算前车距离：同车道按纵向投影排序 O(n log n)，无waypoint时使用空间网格
+        lane_leading = lane_leader_distances(box_positions, box_forwards, road_ids, lane_ids, has_lane)
+        fallback_grid = None
         
-        vehicle_states = []
+        vehicle_table = VehicleStateTable(SimulationConfig.TARGET_INTERSECTION_CENTER)
 
-        for vehicle in valid_vehicles:
+        for i in np.flatnonzero(approaching).tolist():
+            vehicle, transform, velocity = box_entries[i]
+            current_waypoint = box_waypoints[i]
             try:
-                transform = vehicle.get_transform()
                 location = transform.location
-                
-                # Get waypoint if available
-                current_waypoint = vehicle_waypoints.get(vehicle.id)
-                
-                # For normal operation, check intersection area and leaving logic
-                # 检查车辆是否在目标交叉口正方形区域内
-                if not self._is_in_intersection_area(location):
-                    continue
-                
-                # 剔除驶离路口的车辆
-                if self._is_vehicle_leaving_intersection(vehicle, location, transform):
-                    continue
-                
-                velocity = vehicle.get_velocity()
 
                 # 计算到前方车辆的距离（优化版本）
                 # FIXED: Always try to calculate leading distance, even without waypoints
                 if current_waypoint:
-                    leading_vehicle_dist = self._calculate_leading_distance(
-                        vehicle, transform, valid_vehicles, vehicle_waypoints, current_waypoint
-                    )
+                    leading_vehicle_dist = float(lane_leading[i])
                 else:
-                    # Fallback: simple distance calculation without waypoints
-                    leading_vehicle_dist = self._calculate_simple_leading_distance(vehicle, transform, valid_vehicles)
+                    # Fallback: nearest vehicle in any direction (2D grid lookup)
+                    if fallback_grid is None:
+                        fallback_grid = UniformGrid2D(box_positions)
+                    leading_vehicle_dist = fallback_grid.nearest_distance(i)
 
-                state = {
-                    'id': vehicle.id,
-                    'location': (location.x, location.y, location.z),
-                    'rotation': (transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll),
-                    'velocity': (velocity.x, velocity.y, velocity.z),
-                    'type': vehicle.type_id,
-                    'road_id': current_waypoint.road_id if current_waypoint else 0,  # 从waypoint获取道路ID
-                    'lane_id': current_waypoint.lane_id if current_waypoint else 0,  # 从waypoint获取车道ID
-                    'is_junction': current_waypoint.is_junction if current_waypoint else False,
-                    'leading_vehicle_dist': leading_vehicle_dist,
-                    'distance_to_center': self._calculate_distance_to_intersection_center(location),
-                    'destination': self._vehicle_destinations.get(vehicle.id),  # 添加目标点信息
-                }
-                vehicle_states.append(state)
+                # 距离/速度/ETA 在 finalize() 中统一向量化计算
+                vehicle_table.append(
+                    vehicle.id,
+                    (location.x, location.y, location.z),
+                    (transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll),
+                    (velocity.x, velocity.y, velocity.z),
+                    vehicle.type_id,
+                    road_id=current_waypoint.road_id if current_waypoint else 0,  # 从waypoint获取道路ID
+                    lane_id=current_waypoint.lane_id if current_waypoint else 0,  # 从waypoint获取车道ID
+                    is_junction=current_waypoint.is_junction if current_waypoint else False,
+                    leading_vehicle_dist=leading_vehicle_dist,
+                    destination=self._vehicle_destinations.get(vehicle.id),  # 添加目标点信息
+                )
                 
             except Exception as e:
                 print(f"[Warning] 处理车辆 {vehicle.id} 状态失败: {e}")
                 continue
     
-        return vehicle_states
+        return vehicle_table.finalize()
 
-    def _update_vehicle_destinations(self):
-        """更新车辆目标点缓存"""
-        current_time = time.time()
+    def _update_vehicle_destinations(self, vehicles, snapshot_entries):
+        """为区域内车辆分配目标点；定期清理已销毁车辆的目标点"""
+        # 为新进入区域的车辆分配随机目标点
+        for vehicle in vehicles:
+            if vehicle.id not in self._vehicle_destinations:
+                try:
+                    spawn_points = self._get_spawn_points()
+                    if spawn_points:
+                        self._vehicle_destinations[vehicle.id] = random.choice(spawn_points).location
+                except Exception:
+                    continue
         
-        # 检查目标点缓存是否需要更新
-        if (current_time - self._destination_cache_timestamp > self._destination_cache_duration):
-            
-            for vehicle in self._cached_actors:
-                if vehicle.is_alive and vehicle.id not in self._vehicle_destinations:
-                    # 为新车辆分配随机目标点
-                    try:
-                        spawn_points = self.world_map.get_spawn_points()
-                        if spawn_points:
-                            import random
-                            destination = random.choice(spawn_points).location
-                            self._vehicle_destinations[vehicle.id] = destination
-                    except:
-                        continue
-            
+        current_time = self.frame_clock.sim_time
+        
+        # 检查目标点缓存是否需要清理
+        if FrameClock.expired(self._destination_cache_timestamp, self._destination_cache_duration, current_time):
             # 清理已销毁车辆的目标点
-            active_vehicle_ids = {v.id for v in self._cached_actors if v.is_alive}
+            active_vehicle_ids = {vehicle.id for vehicle, _, _ in snapshot_entries}
             self._vehicle_destinations = {
                 vid: dest for vid, dest in self._vehicle_destinations.items() 
                 if vid in active_vehicle_ids
@@ -192,30 +278,119 @@ class StateExtractor:
             self._destination_cache_timestamp = current_time
 
     def get_route_direction(self, vehicle_location, destination):
-        """使用GlobalRoutePlanner分析路线方向"""
+        """使用GlobalRoutePlanner分析路线方向（按起点/终点车道缓存）"""
         try:
-            # 获取起点和终点的waypoint
-            start_waypoint = self.world_map.get_waypoint(vehicle_location)
-            end_waypoint = self.world_map.get_waypoint(destination)
-            
-            if not start_waypoint or not end_waypoint:
-                return 'straight'
+            # 获取起点和终点的车道键
+            start_key = self._lane_key_at(vehicle_location)
+            end_key = self._destination_lane_key(destination)
             
-            # 计算路线
-            route = self.global_route_planner.trace_route(
-                vehicle_location, destination
-            )
-            
-            if len(route) < 3:
+            if start_key is None or end_key is None:
                 return 'straight'
             
-            # 分析路线中的转向
-            return self._analyze_route_direction(route, vehicle_location)
+            direction = self.route_direction_cache.get(start_key, end_key)
+            if direction is None:
+                direction = self._trace_route_direction(vehicle_location, destination)
+                self.route_direction_cache.put(start_key, end_key, direction)
+            return direction
             
         except Exception as e:
             print(f"[Warning] 路线方向分析失败: {e}")
             return 'straight'
 
+    def _trace_route_direction(self, start_location, destination):
+        """完整的A*路线规划 + 转向分析（缓存未命中时调用）"""
+        route = self.global_route_planner.trace_route(start_location, destination)
+        
+        if len(route) < 3:
+            return 'straight'
+        
+        # 分析路线中的转向
+        return self._analyze_route_direction(route, start_location)
+
+    def _lane_key_at(self, location):
+        """位置所在车道的 (road_id, section_id, lane_id)，优先查本地车道索引"""
+        if self.lane_index is not None:
+            record = self.lane_index.lookup(location.x, location.y)
+            if record is not None:
+                return lane_key(record)
+        waypoint = self.world_map.get_waypoint(location)
+        return lane_key(waypoint) if waypoint else None
+
+    def _destination_lane_key(self, destination):
+        """目标点所在车道键（目标点来自有限的生成点集合，按坐标缓存）"""
+        key = (round(destination.x, 1), round(destination.y, 1))
+        if key not in self._destination_lane_keys:
+            waypoint = self.world_map.get_waypoint(destination)
+            self._destination_lane_keys[key] = lane_key(waypoint) if waypoint else None
+        return self._destination_lane_keys[key]
+
+    def _get_spawn_points(self):
+        if self._spawn_points is None:
+            self._spawn_points = self.world_map.get_spawn_points()
+        return self._spawn_points
+
+    def _load_turn_table(self):
+        """加载（或预计算并保存）目标路口的转向表：进口车道 × 目标点车道"""
+        path = RouteDirectionCache.cache_path(
+            SimulationConfig.MAP_CACHE_DIR,
+            self.world_map.name,
+            SimulationConfig.TARGET_INTERSECTION_CENTER,
+            SimulationConfig.INTERSECTION_HALF_SIZE,
+            sampling_resolution=SimulationConfig.ROUTE_PLANNER_RESOLUTION,
+        )
+        if os.path.exists(path):
+            try:
+                self.route_direction_cache.load_turn_table(path)
+                print(f"🧭 Turn table loaded from cache: {path}")
+                return
+            except Exception as e:
+                print(f"⚠️ Turn table cache unreadable, rebuilding: {e}")
+        
+        try:
+            self.route_direction_cache.turn_table = self._build_turn_table()
+        except Exception as e:
+            print(f"⚠️ Turn table precomputation failed, directions computed on demand: {e}")
+            return
+        try:
+            self.route_direction_cache.save_turn_table(path)
+            print(f"🧭 Turn table built ({len(self.route_direction_cache.turn_table)} entries) and saved: {path}")
+        except OSError as e:
+            print(f"⚠️ Turn table could not be saved: {e}")
+
+    def _build_turn_table(self):
+        """对区域内每条驶向路口的车道和每个目标点车道做一次路线规划"""
+        center = SimulationConfig.TARGET_INTERSECTION_CENTER
+        half_size = SimulationConfig.INTERSECTION_HALF_SIZE
+        
+        # 进口车道：区域内、非路口内部、朝向路口中心的车道（每条车道取一个代表点）
+        approach_lanes = {}
+        for waypoint in self.world_map.generate_waypoints(2.0):
+            if waypoint.is_junction:
+                continue
+            location = waypoint.transform.location
+            if abs(location.x - center[0]) > half_size or abs(location.y - center[1]) > half_size:
+                continue
+            yaw = math.radians(waypoint.transform.rotation.yaw)
+            if math.cos(yaw) * (center[0] - location.x) + math.sin(yaw) * (center[1] - location.y) <= 0:
+                continue
+            approach_lanes.setdefault(lane_key(waypoint), location)
+        
+        # 目标车道：车辆目标点均取自生成点
+        destination_lanes = {}
+        for spawn_point in self._get_spawn_points():
+            key = self._destination_lane_key(spawn_point.location)
+            if key is not None:
+                destination_lanes.setdefault(key, spawn_point.location)
+        
+        table = {}
+        for start_key, start_location in approach_lanes.items():
+            for end_key, end_location in destination_lanes.items():
+                try:
+                    table[(start_key, end_key)] = self._trace_route_direction(start_location, end_location)
+                except Exception:
+                    continue
+        return table
+
     def _analyze_route_direction(self, route, current_location):
         """分析路线方向"""
         intersection_center = SimulationConfig.TARGET_INTERSECTION_CENTER
@@ -275,113 +450,119 @@ class StateExtractor:
             angle += 360
         return angle
 
-    def _get_cached_waypoints(self):
-        """获取缓存的waypoint信息"""
-        current_time = time.time()
+    def _get_cached_waypoints(self, snapshot_entries):
+        """获取缓存的waypoint信息（位置来自快照）；只查询本帧新进入区域、尚无缓存的车辆"""
+        current_time = self.frame_clock.sim_time
         
         # 检查waypoint缓存是否过期
-        if (current_time - self._waypoint_cache_timestamp > self._waypoint_cache_duration or
-            not self._waypoint_cache):
-            
+        if FrameClock.expired(self._waypoint_cache_timestamp, self._waypoint_cache_duration, current_time):
             self._waypoint_cache = {}
-            waypoint_success_count = 0
-            waypoint_fail_count = 0
-            
-            for vehicle in self._cached_actors:
-                if vehicle.is_alive:
-                    try:
-                        waypoint = self.world_map.get_waypoint(vehicle.get_location(), project_to_road=True, lane_type=carla.LaneType.Driving)
-                        if waypoint is not None:
-                            self._waypoint_cache[vehicle.id] = waypoint
-                            waypoint_success_count += 1
-                        else:
-                            waypoint_fail_count += 1
-                    except Exception as e:
-                        waypoint_fail_count += 1
-                        # Only log if there are many failures
-                        if waypoint_fail_count % 10 == 0:
-                            print(f"⚠️ Waypoint generation failed for vehicle {vehicle.id}: {e}")
-            
             self._waypoint_cache_timestamp = current_time
-            
-            # Debug info when there are issues
-            total_vehicles = len(self._cached_actors)
-            if waypoint_fail_count > 0 and total_vehicles > 0:
-                success_rate = waypoint_success_count / total_vehicles * 100
-                print(f"🗺️ Waypoint generation: {waypoint_success_count}/{total_vehicles} ({success_rate:.1f}% success)")
         
-        return self._waypoint_cache
-
-    def _calculate_leading_distance(self, vehicle, transform, valid_vehicles, vehicle_waypoints, current_waypoint):
-        """优化的前车距离计算"""
-        min_dist = float('inf')
+        pending = [entry for entry in snapshot_entries if entry[0].id not in self._waypoint_cache]
+        if not pending:
+            return self._waypoint_cache
         
-        for other_vehicle in valid_vehicles:
-            if vehicle.id == other_vehicle.id:
-                continue
-            
-            other_wp = vehicle_waypoints.get(other_vehicle.id)
-            if other_wp is None:
-                continue
-            
-            # 检查是否在同一车道
-            if (other_wp.road_id == current_waypoint.road_id and 
-                other_wp.lane_id == current_waypoint.lane_id):
-                
-                other_location = other_vehicle.get_location()
-                vec_to_other = carla.Vector3D(
-                    other_location.x - transform.location.x,
-                    other_location.y - transform.location.y,
-                    other_location.z - transform.location.z
-                )
-                
-                # 手动计算点积
-                forward_vector = transform.get_forward_vector()
-                dot_product = (forward_vector.x * vec_to_other.x + 
-                             forward_vector.y * vec_to_other.y + 
-                             forward_vector.z * vec_to_other.z)
-                
-                if dot_product > 0:  # 判断是否在前方
-                    dist = math.sqrt(vec_to_other.x**2 + vec_to_other.y**2 + vec_to_other.z**2)
-                    if dist < min_dist:
-                        min_dist = dist
+        waypoint_success_count = 0
+        waypoint_fail_count = 0
         
-        return min_dist if min_dist != float('inf') else -1.0
-
-    def _calculate_simple_leading_distance(self, vehicle, transform, valid_vehicles):
-        """简单的前车距离计算（不需要waypoints）"""
-        min_dist = float('inf')
+        # 先批量查询本地车道索引
+        lane_rows = None
+        if self.lane_index is not None:
+            lane_rows = self.lane_index.lookup_many(
+                [(transform.location.x, transform.location.y) for _, transform, _ in pending]
+            )
         
-        for other_vehicle in valid_vehicles:
-            if vehicle.id == other_vehicle.id:
+        for i, (vehicle, transform, _) in enumerate(pending):
+            if lane_rows is not None and lane_rows[i] >= 0:
+                self._waypoint_cache[vehicle.id] = self.lane_index.record(lane_rows[i])
+                waypoint_success_count += 1
                 continue
             
+            # 索引未命中：回退到CARLA查询
             try:
-                other_transform = other_vehicle.get_transform()
-                other_location = other_transform.location
-                
-                # 简单的欧氏距离计算
-                dist = math.sqrt(
-                    (transform.location.x - other_location.x) ** 2 +
-                    (transform.location.y - other_location.y) ** 2
-                )
-                
-                if dist < min_dist:
-                    min_dist = dist
-            except Exception:
-                continue
+                waypoint = self.world_map.get_waypoint(transform.location, project_to_road=True, lane_type=carla.LaneType.Driving)
+                if waypoint is not None:
+                    self._waypoint_cache[vehicle.id] = waypoint
+                    waypoint_success_count += 1
+                else:
+                    waypoint_fail_count += 1
+            except Exception as e:
+                waypoint_fail_count += 1
+                # Only log if there are many failures
+                if waypoint_fail_count % 10 == 0:
+                    print(f"⚠️ Waypoint generation failed for vehicle {vehicle.id}: {e}")
+        
+        # Debug info when there are issues
+        total_vehicles = len(pending)
+        if waypoint_fail_count > 0:
+            success_rate = waypoint_success_count / total_vehicles * 100
+            print(f"🗺️ Waypoint generation: {waypoint_success_count}/{total_vehicles} ({success_rate:.1f}% success)")
         
-        return min_dist if min_dist != float('inf') else -1.0
+        return self._waypoint_cache
+
+    def _load_lane_index(self):
+        """加载（或离线构建）目标路口的车道waypoint索引，失败时返回None"""
+        try:
+            return LaneWaypointIndex.load_or_build(
+                self.world_map,
+                self.world_map.name,
+                SimulationConfig.TARGET_INTERSECTION_CENTER,
+                SimulationConfig.INTERSECTION_HALF_SIZE,
+                SimulationConfig.MAP_CACHE_DIR,
+                margin=SimulationConfig.LANE_INDEX_MARGIN,
+                resolution=SimulationConfig.LANE_INDEX_RESOLUTION,
+            )
+        except Exception as e:
+            print(f"⚠️ Lane index unavailable, using CARLA waypoint queries: {e}")
+            return None
+
+    def _ingest_snapshot(self, snapshot):
+        """从世界快照批量读取车辆位姿和速度；不在快照中的车辆视为已销毁"""
+        entries = []
+        for vehicle in self._cached_actors:
+            actor_snapshot = snapshot.find(vehicle.id)
+            if actor_snapshot is None:
+                continue
+            entries.append((vehicle, actor_snapshot.get_transform(), actor_snapshot.get_velocity()))
+        return entries
+
+    def _entry_poses(self, snapshot_entries):
+        """快照条目的位置与姿态数组 (n, 3)"""
+        n = len(snapshot_entries)
+        positions = np.zeros((n, 3))
+        rotations = np.zeros((n, 3))
+        for i, (_, transform, _) in enumerate(snapshot_entries):
+            location = transform.location
+            rotation = transform.rotation
+            positions[i] = (location.x, location.y, location.z)
+            rotations[i] = (rotation.pitch, rotation.yaw, rotation.roll)
+        return positions, rotations
+
+    def _lane_keys(self, waypoints):
+        """waypoint列表 -> (road_ids, lane_ids, has_lane) 数组，供批量前车搜索使用"""
+        n = len(waypoints)
+        road_ids = np.zeros(n, dtype=np.int64)
+        lane_ids = np.zeros(n, dtype=np.int64)
+        has_lane = np.zeros(n, dtype=bool)
+        for i, waypoint in enumerate(waypoints):
+            if waypoint:
+                road_ids[i] = waypoint.road_id
+                lane_ids[i] = waypoint.lane_id
+                has_lane[i] = True
+        return road_ids, lane_ids, has_lane
 
     def clear_cache(self):
         """清除所有缓存"""
         self._vehicle_states_cache = []
+        self._vehicle_table = VehicleStateTable(SimulationConfig.TARGET_INTERSECTION_CENTER).finalize()
         self._waypoint_cache = {}
         self._cached_actors = []
         self._vehicle_destinations = {}
-        self._states_cache_timestamp = 0
-        self._waypoint_cache_timestamp = 0
-        self._destination_cache_timestamp = 0
+        self._states_cache_frame = None
+        self._frame_context = None
+        self._waypoint_cache_timestamp = None
+        self._destination_cache_timestamp = None
 
     def get_cache_stats(self):
         """获取缓存统计信息"""
@@ -390,42 +571,34 @@ class StateExtractor:
             'cached_waypoints': len(self._waypoint_cache),
             'cached_actors': len(self._cached_actors),
             'cached_destinations': len(self._vehicle_destinations),
-            'states_cache_age': time.time() - self._states_cache_timestamp,
-            'waypoint_cache_age': time.time() - self._waypoint_cache_timestamp
+            'states_cache_frame': self._states_cache_frame,
+            'extractions': self._extraction_count,
+            # 上一次提取中各阶段剔除的车辆数
+            'actors_in_snapshot': self._cull_stats['actors'],
+            'culled_outside_box': self._cull_stats['culled_outside_box'],
+            'culled_leaving': self._cull_stats['culled_leaving'],
+            'processed_vehicles': self._cull_stats['processed'],
+            'lane_index_hits': self.lane_index.hits if self.lane_index is not None else 0,
+            'lane_index_misses': self.lane_index.misses if self.lane_index is not None else 0,
+            'route_direction_hits': self.route_direction_cache.hits,
+            'route_direction_misses': self.route_direction_cache.misses,
+            'turn_table_size': len(self.route_direction_cache.turn_table),
+            'route_planner_source': self.route_planner_startup['source'] if self.route_planner_startup else None,
+            'route_planner_load_s': self.route_planner_startup['seconds'] if self.route_planner_startup else None,
+            'waypoint_cache_age': (self.frame_clock.sim_time - self._waypoint_cache_timestamp
+                                   if self._waypoint_cache_timestamp is not None else None)
         }
 
-    def _is_vehicle_leaving_intersection(self, vehicle, location, transform):
-        """判断车辆是否正在驶离交叉口（使用正方形区域）"""
+    def _leaving_intersection(self, positions, forwards):
+        """判断车辆是否正在驶离交叉口（前进方向与指向中心方向的点积为负），向量化"""
         target_center = SimulationConfig.TARGET_INTERSECTION_CENTER
-        
-        # 计算车辆到交叉口中心的方向向量
-        to_center_x = target_center[0] - location.x
-        to_center_y = target_center[1] - location.y
-        
-        # 获取车辆前进方向
-        forward_vector = transform.get_forward_vector()
-        
-        # 计算车辆前进方向与朝向交叉口方向的夹角
-        dot_product = forward_vector.x * to_center_x + forward_vector.y * to_center_y
-        
-        # 如果点积为负，说明车辆正在远离交叉口
-        return dot_product < 0
+        to_center_x = target_center[0] - positions[:, 0]
+        to_center_y = target_center[1] - positions[:, 1]
+        return forwards[:, 0] * to_center_x + forwards[:, 1] * to_center_y < 0
 
-    def _is_in_intersection_area(self, location):
-        """检查车辆是否在目标交叉口正方形区域内"""
+    def _in_intersection_box(self, positions):
+        """检查车辆是否在目标交叉口正方形区域内（AABB，向量化）"""
         center = SimulationConfig.TARGET_INTERSECTION_CENTER
         half_size = SimulationConfig.INTERSECTION_HALF_SIZE
-        
-        # 使用正方形检测区域
-        in_x_range = (center[0] - half_size) <= location.x <= (center[0] + half_size)
-        in_y_range = (center[1] - half_size) <= location.y <= (center[1] + half_size)
-        
-        return in_x_range and in_y_range
-
-    def _calculate_distance_to_intersection_center(self, location):
-        """计算到交叉口中心的距离"""
-        center = SimulationConfig.TARGET_INTERSECTION_CENTER
-        dx = location.x - center[0]
-        dy = location.y - center[1]
-        return math.sqrt(dx * dx + dy * dy)
-
+        return ((np.abs(positions[:, 0] - center[0]) <= half_size) &
+                (np.abs(positions[:, 1] - center[1]) <= half_size))
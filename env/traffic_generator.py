@@ -1,5 +1,5 @@
 import random
-import carla
+from .carla_wrapper import carla
 import time
 from .simulation_config import SimulationConfig
 
@@ -0,0 +1,225 @@
+"""
+车辆状态表 (Vehicle State Table)
+
+Struct-of-arrays storage for the per-tick vehicle states produced by
+StateExtractor. Positions, velocities and the per-vehicle scalars live in
+NumPy columns so that speed, distance-to-center and ETA are computed once
+per tick as vector ops, instead of being recomputed from dicts in every
+consumer (controller, platoon manager, Nash solver, DRL observation).
+
+For backward compatibility each row is also exposed as a read-only,
+dict-like ``VehicleStateRow`` with the same keys and tuple values as the
+legacy state dicts.
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class VehicleStateRow(Mapping):
+    """Read-only dict-like view of a single row in a VehicleStateTable"""
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: 'VehicleStateTable', row: int):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        getter = _ROW_GETTERS.get(key)
+        if getter is None:
+            raise KeyError(key)
+        return getter(self._table, self._row)
+
+    # Mapping 的默认 get / in 经由 __getitem__ 和异常处理，逐车热路径上直接查表
+    def get(self, key, default=None):
+        getter = _ROW_GETTERS.get(key)
+        if getter is None:
+            return default
+        return getter(self._table, self._row)
+
+    def __contains__(self, key) -> bool:
+        return key in _ROW_GETTERS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(VehicleStateTable.KEYS)
+
+    def __len__(self) -> int:
+        return len(VehicleStateTable.KEYS)
+
+    def __repr__(self) -> str:
+        return f"VehicleStateRow({dict(self)!r})"
+
+    # ----- 预计算的派生量 (precomputed per-tick quantities) -----
+    @property
+    def table(self) -> 'VehicleStateTable':
+        return self._table
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    @property
+    def center(self) -> Tuple[float, float, float]:
+        return self._table.center
+
+    @property
+    def speed(self) -> float:
+        return self._table.speed_list[self._row]
+
+    @property
+    def planar_speed(self) -> float:
+        return self._table.planar_speed_list[self._row]
+
+    @property
+    def eta(self) -> float:
+        return self._table.eta_list[self._row]
+
+
+_ROW_GETTERS = {
+    'id': lambda t, r: t.id_list[r],
+    'location': lambda t, r: t.location_tuples[r],
+    'rotation': lambda t, r: t.rotation_tuples[r],
+    'velocity': lambda t, r: t.velocity_tuples[r],
+    'type': lambda t, r: t.type_ids[r],
+    'road_id': lambda t, r: t.road_id_list[r],
+    'lane_id': lambda t, r: t.lane_id_list[r],
+    'is_junction': lambda t, r: t.is_junction_list[r],
+    'leading_vehicle_dist': lambda t, r: t.leading_dist_list[r],
+    'distance_to_center': lambda t, r: t.distance_list[r],
+    'destination': lambda t, r: t.destinations[r],
+}
+
+
+class VehicleStateTable:
+    """
+    NumPy-backed vehicle state table for one simulation tick.
+
+    Usage:
+        table = VehicleStateTable(center)
+        table.append(vehicle.id, location, rotation, velocity, ...)
+        table.finalize()          # builds columns + derived quantities
+        table.speed, table.eta    # vectorized columns
+        table.rows()              # legacy list of dict-like rows
+    """
+
+    KEYS = ('id', 'location', 'rotation', 'velocity', 'type', 'road_id', 'lane_id',
+            'is_junction', 'leading_vehicle_dist', 'distance_to_center', 'destination')
+
+    # ETA计算的最小速度，与 ConflictAnalyzer 保持一致
+    MIN_ETA_SPEED = 0.1
+
+    def __init__(self, center: Tuple[float, float, float] = (0.0, 0.0, 0.0)):
+        self.center = tuple(float(c) for c in center)
+
+        # 行缓冲 (Python lists, also used for fast scalar access by row views)
+        self.id_list: List[int] = []
+        self.location_tuples: List[Tuple[float, float, float]] = []
+        self.rotation_tuples: List[Tuple[float, float, float]] = []
+        self.velocity_tuples: List[Tuple[float, float, float]] = []
+        self.type_ids: List[str] = []
+        self.road_id_list: List[int] = []
+        self.lane_id_list: List[int] = []
+        self.is_junction_list: List[bool] = []
+        self.leading_dist_list: List[float] = []
+        self.destinations: List = []
+
+        self._finalized = False
+        self._rows: Optional[List[VehicleStateRow]] = None
+        self._index: Dict[str, int] = {}
+        self._build_columns()
+
+    def append(self, vehicle_id: int, location, rotation, velocity, type_id: str = '',
+               road_id: int = 0, lane_id: int = 0, is_junction: bool = False,
+               leading_vehicle_dist: float = -1.0, destination=None) -> int:
+        """Append one vehicle (location/rotation/velocity as xyz tuples); returns its row"""
+        if self._finalized:
+            raise RuntimeError("VehicleStateTable is read-only after finalize()")
+        self.id_list.append(vehicle_id)
+        self.location_tuples.append(location)
+        self.rotation_tuples.append(rotation)
+        self.velocity_tuples.append(velocity)
+        self.type_ids.append(type_id)
+        self.road_id_list.append(road_id)
+        self.lane_id_list.append(lane_id)
+        self.is_junction_list.append(bool(is_junction))
+        self.leading_dist_list.append(leading_vehicle_dist)
+        self.destinations.append(destination)
+        return len(self.id_list) - 1
+
+    def set_leading_distance(self, row: int, distance: float):
+        """Fill the leading-vehicle distance of a row before finalize()"""
+        if self._finalized:
+            raise RuntimeError("VehicleStateTable is read-only after finalize()")
+        self.leading_dist_list[row] = distance
+
+    def finalize(self) -> 'VehicleStateTable':
+        """Convert the row buffers into columns and compute derived quantities"""
+        self._build_columns()
+        self._finalized = True
+        return self
+
+    def _build_columns(self):
+        n = len(self.id_list)
+        self.ids = np.array(self.id_list, dtype=np.int64)
+        self.locations = np.array(self.location_tuples, dtype=np.float64).reshape(n, 3)
+        self.rotations = np.array(self.rotation_tuples, dtype=np.float64).reshape(n, 3)
+        self.velocities = np.array(self.velocity_tuples, dtype=np.float64).reshape(n, 3)
+        self.yaw = self.rotations[:, 1]
+        self.road_ids = np.array(self.road_id_list, dtype=np.int64)
+        self.lane_ids = np.array(self.lane_id_list, dtype=np.int64)
+        self.is_junction = np.array(self.is_junction_list, dtype=bool)
+        self.leading_dist = np.array(self.leading_dist_list, dtype=np.float64)
+
+        # 派生量：每个tick只计算一次
+        self.speed = np.sqrt(np.einsum('ij,ij->i', self.velocities, self.velocities))
+        self.planar_speed = np.hypot(self.velocities[:, 0], self.velocities[:, 1])
+        self.distance_to_center = np.hypot(self.locations[:, 0] - self.center[0],
+                                           self.locations[:, 1] - self.center[1])
+        self.eta = self.distance_to_center / np.maximum(self.speed, self.MIN_ETA_SPEED)
+
+        for column in (self.ids, self.locations, self.rotations, self.velocities,
+                       self.road_ids, self.lane_ids, self.is_junction, self.leading_dist,
+                       self.speed, self.planar_speed, self.distance_to_center, self.eta):
+            column.flags.writeable = False
+
+        # Python mirrors for cheap scalar reads from row views
+        self.speed_list = self.speed.tolist()
+        self.planar_speed_list = self.planar_speed.tolist()
+        self.distance_list = self.distance_to_center.tolist()
+        self.eta_list = self.eta.tolist()
+
+        self._index = {str(vid): row for row, vid in enumerate(self.id_list)}
+        self._rows = None
+
+    # ----- 查询接口 -----
+    def __len__(self) -> int:
+        return len(self.id_list)
+
+    def __bool__(self) -> bool:
+        return bool(self.id_list)
+
+    def __contains__(self, vehicle_id) -> bool:
+        return str(vehicle_id) in self._index
+
+    def row_of(self, vehicle_id) -> Optional[int]:
+        """Row index of a vehicle id (int or str), or None"""
+        return self._index.get(str(vehicle_id))
+
+    def get(self, vehicle_id, default=None):
+        """Row view for a vehicle id (int or str)"""
+        row = self._index.get(str(vehicle_id))
+        return default if row is None else self.rows()[row]
+
+    def rows(self) -> List[VehicleStateRow]:
+        """Legacy list-of-dicts interface (read-only row views, built once)"""
+        if self._rows is None:
+            self._rows = [VehicleStateRow(self, i) for i in range(len(self.id_list))]
+        return self._rows
+
+    def same_center(self, center, tol: float = 1e-6) -> bool:
+        """Whether the precomputed distance/ETA columns refer to the given center"""
+        return (abs(self.center[0] - center[0]) < tol and
+                abs(self.center[1] - center[1]) < tol)
@@ -10,14 +10,16 @@ if sys.platform.startswith('linux'):
 
 if egg_path:
     sys.path.insert(0, egg_path[0])
-else:
-    raise RuntimeError(
-        "CARLA egg not found.\n"
-    )
 
 # Import unified configuration
 from config.unified_config import UnifiedConfig, get_config, print_config_summary
 
+# The headless kinematic backend does not need the CARLA egg
+if not egg_path and get_config().system.backend != 'kinematic':
+    raise RuntimeError(
+        "CARLA egg not found.\n"
+    )
+
 # ===== Environment related modules =====
 from env.scenario_manager import ScenarioManager
 from env.state_extractor import StateExtractor
@@ -34,13 +36,16 @@ from control import TrafficController
 
 # ===== Nash deadlock solver =====
 from nash.deadlock_nash_solver import DeadlockNashSolver
+from nash.reservation_resolver import ReservationResolver
+from env import event_log
 
 # Initialize unified configuration
 unified_config = get_config()
+event_log.configure_from(unified_config)
 print_config_summary(unified_config)
 
 # Initialize environment modules
-scenario = ScenarioManager()
+scenario = ScenarioManager(backend=unified_config.system.backend)
 state_extractor = StateExtractor(scenario.carla)
 
 # Initialize platoon management - pass state_extractor for navigation
@@ -104,12 +109,19 @@ auction_engine = DecentralizedAuctionEngine(
     max_go_agents=unified_config.mwis.max_go_agents
 )
 
-# Initialize Nash deadlock solver with unified config
-nash_solver = DeadlockNashSolver(
-    unified_config=unified_config,
-    intersection_center=unified_config.system.intersection_center,
-    max_go_agents=unified_config.mwis.max_go_agents
-)
+# Initialize conflict resolver with unified config: Nash deadlock solver (MWIS) or space-time reservations
+if unified_config.system.conflict_resolver == 'reservation':
+    nash_solver = ReservationResolver(
+        unified_config=unified_config,
+        intersection_center=unified_config.system.intersection_center
+    )
+else:
+    nash_solver = DeadlockNashSolver(
+        unified_config=unified_config,
+        intersection_center=unified_config.system.intersection_center,
+        max_go_agents=unified_config.mwis.max_go_agents
+    )
+    nash_solver.set_world_map(state_extractor.world_map)
 
 # Add dynamic configuration updates before main loop starts
 def update_system_configuration():
@@ -225,7 +237,8 @@ try:
     
     while True:
         scenario.carla.world.tick()
-        vehicle_states = state_extractor.get_vehicle_states()
+        frame = state_extractor.get_frame_context()
+        vehicle_states = frame.states
         
         if step % unified_update_interval == 0:
             try:
@@ -234,13 +247,13 @@ try:
                     update_system_configuration()
                 
                 # 1. Update platoon grouping
-                platoon_manager.update()
+                platoon_manager.update(vehicle_states)
                 
                 # 2. Update auction system
-                auction_winners = auction_engine.update(vehicle_states, platoon_manager)
+                auction_winners = auction_engine.update(vehicle_states, platoon_manager, frame=frame)
 
                 # 3. Update traffic control - Pass winners directly
-                traffic_controller.update_control(platoon_manager, auction_engine, auction_winners)
+                traffic_controller.update_control(platoon_manager, auction_engine, auction_winners, frame=frame)
                 
             except Exception as e:
                 if "deadlock" in str(e).lower():
@@ -1,18 +1,42 @@
+import bisect
 import math
 from typing import List, Dict, Tuple, Set, Optional
 
+import numpy as np
+
+from env.event_log import DEBUG, get_logger
+
+from .lane_paths import LanePathCache
+
+log = get_logger('nash.conflict')
+
+_PENDING = object()  # lane trajectory not predicted yet (predicted on first use)
+
 def _euclidean_2d(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
     return math.hypot(a[0]-b[0], a[1]-b[1])
 
+# Conflict counters in ``conflict_analysis`` (other keys are bookkeeping, not conflicts)
+CONFLICT_TYPES = ('spatial_conflicts', 'temporal_conflicts', 'platoon_conflicts',
+                  'path_intersections', 'turn_conflicts')
+
+
+def count_conflicts(conflict_analysis: Dict) -> int:
+    """Total number of conflicting pairs in a conflict_analysis dict"""
+    return sum(conflict_analysis.get(conflict_type, 0) for conflict_type in CONFLICT_TYPES)
+
 class ConflictAnalyzer:
     """
     Part 1: Handles all conflict detection and analysis
     - Enhanced conflict graph construction
     - Turn-based conflict detection
-    - Path intersection analysis
+    - Path intersection analysis (lane-following space-time trajectories when
+      the map is available, 3-point movement paths otherwise)
     - Temporal and spatial conflict detection
     """
     
+    APPROACHES = ('north', 'south', 'east', 'west')
+    TURNS = ('straight', 'left', 'right', 'u_turn')
+    
     def __init__(self, solver_config):
         """Initialize with solver configuration"""
         self.dt_conflict = solver_config['conflict_time_window']
@@ -26,6 +50,56 @@ class ConflictAnalyzer:
         self.platoon_conflict_distance = solver_config.get('platoon_conflict_distance', 15.0)  # Trainable: platoon interaction distance
         
         self.velocity_similarity_threshold = 0.3
+        
+        # Incremental conflict graph: per-agent metadata and pair results persist
+        # across rounds; an agent is refreshed only when its signature
+        # (lane, turn, moving, position bucket, ETA bucket; exact position and
+        # velocity with lane trajectories) changes, and only pairs involving
+        # refreshed agents are re-tested
+        self.incremental = solver_config.get('incremental_conflict_graph', True)
+        self.position_bucket = solver_config.get('conflict_position_bucket', 1.0)
+        self.eta_bucket = self.dt_conflict * 0.25
+        self.eta_horizon = self.dt_conflict * 20.0  # 超过此ETA的车辆视为远处，ETA变化不触发刷新
+        self._agent_cache: Dict[str, Tuple[Tuple, Dict]] = {}   # agent id -> (signature, meta)
+        self._pair_cache: Dict[Tuple[str, str], Optional[str]] = {}  # (id_a, id_b) -> conflict type / None
+        
+        # Movement-pair conflict table: (approach, turn) x (approach, turn) ->
+        # (paths intersect, turn rules conflict), built once per intersection geometry
+        self._movement_table: Optional[Dict[Tuple[Tuple[str, str], Tuple[str, str]], Tuple[bool, bool]]] = None
+        self._movement_table_key = None
+        self._movement_arrays = None  # (path_table, turn_table) 16x16 bool arrays for the batched path
+        
+        # Batched NumPy pair tests for large candidate sets
+        self.vectorized_min_candidates = solver_config.get('vectorized_conflict_min_candidates', 24)
+        
+        # Lane-following space-time trajectories (needs the map, see set_world_map);
+        # agents without one keep the 3-point movement paths
+        self.lane_following_paths = solver_config.get('lane_following_paths', False)
+        self.lane_path_step = solver_config.get('lane_path_step', 1.0)
+        self.trajectory_min_speed = solver_config.get('trajectory_min_speed', 3.0)
+        self.intersection_half_size = solver_config.get('intersection_half_size', 40.0)
+        self.lane_paths: Optional[LanePathCache] = None
+        self.stats = {
+            'graph_builds': 0,
+            'agents_seen': 0,
+            'agents_refreshed': 0,
+            'pairs_total': 0,
+            'pairs_recomputed': 0,
+            'batched_builds': 0,
+            'trajectory_agents': 0,
+        }
+
+    def set_world_map(self, world_map):
+        """Enable lane-following trajectories on this map (None disables them)"""
+        if world_map is None or not self.lane_following_paths:
+            self.lane_paths = None
+        elif self.lane_paths is None or self.lane_paths.world_map is not world_map \
+                or self.lane_paths.step != self.lane_path_step:
+            self.lane_paths = LanePathCache(world_map, self.center, zone_radius=self.intersection_half_size,
+                                            step=self.lane_path_step)
+            self.lane_paths.warm_up(self.ARM_VECTORS)
+            self.lane_paths.warm_up_pairs(self.path_intersection_threshold)
+        self.reset_cache()
 
     def build_enhanced_conflict_graph(self, candidates: List, vehicle_states: Dict[str, Dict], 
                                      platoon_manager=None) -> Tuple[List[Set[int]], Dict]:
@@ -40,50 +114,279 @@ class ConflictAnalyzer:
             'turn_conflicts': 0
         }
         
-        # Enhanced metadata extraction
+        # Enhanced metadata extraction (reused while the agent's signature is unchanged)
         meta = []
+        changed = []
         for i, c in enumerate(candidates):
             agent = self._get_agent(c)
             state = self._lookup_state(agent, vehicle_states, platoon_manager)
-            
-            # Enhanced turn inference with path prediction
-            turn = self._infer_turn_enhanced(agent, state, vehicle_states) if state else 'straight'
-            eta = self._calculate_enhanced_eta(state, agent) if state else float('inf')
-            path = self._predict_vehicle_path(state, agent) if state else []
-            paths = self._predict_vehicle_paths(state, agent) if state else []
-            
-            meta.append({
-                'index': i,
-                'agent': agent,
-                'state': state,
-                'turn': turn,
-                'eta': eta,
-                'predicted_path': path,
-                'predicted_paths': paths,
-                'is_platoon': agent.type == 'platoon' if hasattr(agent, 'type') else False
-            })
+            agent_meta, refreshed = self._agent_meta(agent, state, vehicle_states)
+            agent_meta['index'] = i
+            agent_meta['agent'] = agent
+            meta.append(agent_meta)
+            changed.append(refreshed)
+        
+        ids = [self._agent_key(m['agent']) for m in meta]
+        self._evict_departed(ids, changed)
 
         # Enhanced conflict detection
         conflicts_found = 0
-        for i in range(n):
-            for j in range(i + 1, n):
-                conflict_type = self._detect_enhanced_conflict(meta[i], meta[j])
-                if conflict_type:
-                    adj[i].add(j)
-                    adj[j].add(i)
-                    conflict_analysis[conflict_type] += 1
-                    conflicts_found += 1
-                    
-                    # Debug conflict detection
-                    agent_i = meta[i]['agent']
-                    agent_j = meta[j]['agent']
-                    print(f"   ⚡ Conflict {conflicts_found}: {getattr(agent_i, 'id', 'unknown')} <-> {getattr(agent_j, 'id', 'unknown')} ({conflict_type})")
+        recomputed = 0
+        if n >= self.vectorized_min_candidates:
+            # Large candidate sets: all pairs at once as n x n masks
+            types = self._detect_conflicts_batched(meta)
+            recomputed = n * (n - 1) // 2
+            self.stats['batched_builds'] += 1
+            adj = [set(np.flatnonzero(row).tolist()) for row in types]
+            counts = np.bincount(np.triu(types, 1).ravel(), minlength=len(CONFLICT_TYPES) + 1)
+            for k, conflict_type in enumerate(CONFLICT_TYPES):
+                conflict_analysis[conflict_type] += int(counts[k + 1])
+            conflicts_found = int(counts[1:].sum())
+            if conflicts_found:
+                log.info("   ⚡ {} conflicts among {} candidates (batched)", conflicts_found, n)
+        else:
+            # Small candidate sets: only pairs with a refreshed agent are re-tested
+            for i in range(n):
+                for j in range(i + 1, n):
+                    pair = (ids[i], ids[j]) if ids[i] <= ids[j] else (ids[j], ids[i])
+                    if self.incremental and not (changed[i] or changed[j]) and pair in self._pair_cache:
+                        conflict_type = self._pair_cache[pair]
+                    else:
+                        conflict_type = self._detect_enhanced_conflict(meta[i], meta[j])
+                        self._pair_cache[pair] = conflict_type
+                        recomputed += 1
+                    if conflict_type:
+                        adj[i].add(j)
+                        adj[j].add(i)
+                        conflict_analysis[conflict_type] += 1
+                        conflicts_found += 1
+                        
+                        # Debug conflict detection
+                        if log.enabled(DEBUG):
+                            agent_i = meta[i]['agent']
+                            agent_j = meta[j]['agent']
+                            log.debug("   ⚡ Conflict {}: {} <-> {} ({})", conflicts_found,
+                                      getattr(agent_i, 'id', 'unknown'), getattr(agent_j, 'id', 'unknown'), conflict_type)
+        
+        total_pairs = n * (n - 1) // 2
+        conflict_analysis['recomputed_pairs'] = recomputed
+        conflict_analysis['total_pairs'] = total_pairs
+        conflict_analysis['recomputed_pair_ratio'] = recomputed / total_pairs if total_pairs else 0.0
+        self.stats['graph_builds'] += 1
+        self.stats['agents_seen'] += n
+        self.stats['agents_refreshed'] += sum(changed)
+        self.stats['pairs_total'] += total_pairs
+        self.stats['pairs_recomputed'] += recomputed
         
         if conflicts_found == 0:
-            print("   ✅ No conflicts detected - all agents can proceed")
+            log.info("   ✅ No conflicts detected - all agents can proceed")
         
         return adj, conflict_analysis
 
+    def _agent_key(self, agent) -> str:
+        return f"{getattr(agent, 'type', 'vehicle')}:{getattr(agent, 'id', agent)}"
+
+    def _agent_signature(self, agent, state: Optional[Dict], turn: str, eta: float) -> Tuple:
+        """Quantized inputs of the pair tests; metadata is recomputed only when this changes"""
+        if not state or 'location' not in state:
+            return (None,)
+        loc = state['location']
+        velocity = state.get('velocity', [0, 0, 0])
+        moving = bool(velocity) and (abs(velocity[0]) > 1e-3 or abs(velocity[1]) > 1e-3)  # _is_moving
+        eta_bucket = int(eta // self.eta_bucket) if eta < self.eta_horizon else -1
+        size = len(getattr(agent, 'vehicles', ()) or ())
+        if self.lane_paths is not None:
+            # 车道轨迹的到达时间对位置和车速敏感：按精确状态判断是否刷新（静止车辆仍可复用）
+            velocity = velocity or (0.0, 0.0, 0.0)
+            return (
+                state.get('road_id'), state.get('lane_id'), turn, moving,
+                loc[0], loc[1], velocity[0], velocity[1], eta_bucket, size,
+            )
+        return (
+            state.get('road_id'), state.get('lane_id'), turn, moving,
+            int(loc[0] // self.position_bucket), int(loc[1] // self.position_bucket),
+            eta_bucket, size,
+        )
+
+    def _agent_meta(self, agent, state: Optional[Dict], vehicle_states: Dict) -> Tuple[Dict, bool]:
+        """Metadata for one agent and whether it was (re)computed this round"""
+        turn = self._infer_turn_enhanced(agent, state, vehicle_states) if state else 'straight'
+        eta = self._calculate_enhanced_eta(state, agent) if state else float('inf')
+        signature = self._agent_signature(agent, state, turn, eta)
+        key = self._agent_key(agent)
+        
+        cached = self._agent_cache.get(key)
+        if self.incremental and cached is not None and cached[0] == signature:
+            return cached[1], False
+        
+        agent_meta = {
+            'state': state,
+            'turn': turn,
+            'eta': eta,
+            'movement': self._movement_of(state, turn),
+            'predicted_path': None,   # 3-point paths, computed on first use (_candidate_paths)
+            'predicted_paths': None,
+            # 车道轨迹同样在首次需要时预测（多数车对在空间/右转/时间检查中已判定）
+            'trajectory': _PENDING if self.lane_paths is not None else None,
+            'is_platoon': agent.type == 'platoon' if hasattr(agent, 'type') else False
+        }
+        self._agent_cache[key] = (signature, agent_meta)
+        return agent_meta, True
+
+    def _movement_of(self, state: Optional[Dict], turn: str) -> Optional[Tuple[str, str]]:
+        """(approach, turn) if both are one of the table's known values, else None"""
+        if not state or 'location' not in state:
+            return None
+        approach = self._infer_approach_direction(state['location'])
+        turn = (turn or 'straight').lower()
+        if approach not in self.APPROACHES or turn not in self.TURNS:
+            return None
+        return approach, turn
+
+    def _movement_conflicts(self) -> Dict[Tuple[Tuple[str, str], Tuple[str, str]], Tuple[bool, bool]]:
+        """Movement-pair conflict table for the current intersection geometry (cached)"""
+        exit_distance = max(self.deadlock_core_half_size * 2.0, 30.0)
+        key = (self.center[0], self.center[1], exit_distance, self.path_intersection_threshold)
+        if self._movement_table is not None and self._movement_table_key == key:
+            return self._movement_table
+        
+        outward = self.ARM_VECTORS
+        movements = [(approach, turn) for approach in self.APPROACHES for turn in self.TURNS]
+        polylines = {}
+        for approach, turn in movements:
+            # 代表位置：该进口道上距中心 exit_distance 处
+            ox, oy = outward[approach]
+            arm_point = (self.center[0] + ox * exit_distance, self.center[1] + oy * exit_distance)
+            polylines[(approach, turn)] = self._movement_polyline(arm_point, approach, turn)
+        
+        table = {}
+        for m_i in movements:
+            for m_j in movements:
+                if (m_j, m_i) in table:
+                    table[(m_i, m_j)] = table[(m_j, m_i)]
+                    continue
+                paths_cross = self._polylines_conflict(polylines[m_i], polylines[m_j])
+                turns_conflict = self._turn_conflict_enhanced(m_i[1], m_j[1], m_i[0], m_j[0], None, None)
+                table[(m_i, m_j)] = (paths_cross, turns_conflict)
+        
+        self._movement_table = table
+        self._movement_table_key = key
+        return table
+
+    def _movement_table_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Movement conflict table as 16x16 bool arrays indexed by movement code"""
+        table = self._movement_conflicts()
+        if self._movement_arrays is None or self._movement_arrays[0] is not table:
+            movements = [(approach, turn) for approach in self.APPROACHES for turn in self.TURNS]
+            path_table = np.array([[table[(m_i, m_j)][0] for m_j in movements] for m_i in movements])
+            turn_table = np.array([[table[(m_i, m_j)][1] for m_j in movements] for m_i in movements])
+            self._movement_arrays = (table, path_table, turn_table)
+        return self._movement_arrays[1], self._movement_arrays[2]
+
+    def _detect_conflicts_batched(self, meta: List[Dict]) -> np.ndarray:
+        """
+        Vectorized ``_detect_enhanced_conflict`` over all pairs.
+        Returns an n x n int8 matrix: 0 = no conflict, k = CONFLICT_TYPES[k - 1].
+        The checks keep the per-pair order (spatial, right-turn exemption,
+        temporal, path, turn, platoon); pairs with an unknown movement or two
+        lane trajectories fall back to the per-pair path/turn tests.
+        """
+        n = len(meta)
+        has_state = np.zeros(n, dtype=bool)
+        xy = np.zeros((n, 2))
+        eta = np.full(n, np.inf)
+        moving = np.zeros(n, dtype=bool)
+        right = np.zeros(n, dtype=bool)
+        platoon = np.zeros(n, dtype=bool)
+        code = np.full(n, -1)
+        has_trajectory = np.zeros(n, dtype=bool)
+        for k, m in enumerate(meta):
+            state = m['state']
+            right[k] = (m.get('turn') or 'straight').lower() == 'right'
+            platoon[k] = m['is_platoon']
+            if not state or 'location' not in state:
+                continue
+            has_state[k] = True
+            loc = state['location']
+            xy[k] = (loc[0], loc[1])
+            eta[k] = m.get('eta', float('inf'))
+            moving[k] = self._is_moving(state)
+            has_trajectory[k] = self._trajectory(m) is not None
+            movement = m.get('movement')
+            if movement:
+                code[k] = self.APPROACHES.index(movement[0]) * len(self.TURNS) + self.TURNS.index(movement[1])
+        
+        half = self.deadlock_core_half_size
+        in_box = (np.abs(xy[:, 0] - self.center[0]) <= half) & (np.abs(xy[:, 1] - self.center[1]) <= half)
+        delta = xy[:, None, :] - xy[None, :, :]
+        dist = np.hypot(delta[..., 0], delta[..., 1])
+        
+        spatial = ~(has_state[:, None] & has_state[None, :]) | (in_box[:, None] & in_box[None, :]) \
+            | (dist < self.min_safe_distance)
+        exempt = right[:, None] | right[None, :]
+        finite = np.isfinite(eta)
+        with np.errstate(invalid='ignore'):
+            temporal = finite[:, None] & finite[None, :] & (np.abs(eta[:, None] - eta[None, :]) < self.dt_conflict)
+        
+        path_table, turn_table = self._movement_table_arrays()
+        # 双方都有车道轨迹的车对由时空轨迹判定，不查动作表
+        trajectories = has_trajectory[:, None] & has_trajectory[None, :]
+        known = (code[:, None] >= 0) & (code[None, :] >= 0) & ~trajectories
+        safe_code = np.maximum(code, 0)
+        path = known & path_table[safe_code[:, None], safe_code[None, :]] & moving[:, None] & moving[None, :]
+        turn = known & turn_table[safe_code[:, None], safe_code[None, :]]
+        
+        # 未知动作或有轨迹的车对：逐对回退
+        undecided = ~known & ~spatial & ~exempt & ~temporal
+        for i, j in zip(*np.nonzero(np.triu(undecided, 1))):
+            if self._has_path_intersection(meta[i], meta[j]):
+                path[i, j] = path[j, i] = True
+            elif self._has_turn_conflict(meta[i], meta[j]):
+                turn[i, j] = turn[j, i] = True
+        
+        near_platoon = (platoon[:, None] | platoon[None, :]) & (dist < self.platoon_conflict_distance)
+        
+        code_of = {conflict_type: k + 1 for k, conflict_type in enumerate(CONFLICT_TYPES)}
+        types = np.select(
+            [spatial, exempt, temporal, path, turn, near_platoon],
+            [code_of['spatial_conflicts'], 0, code_of['temporal_conflicts'], code_of['path_intersections'],
+             code_of['turn_conflicts'], code_of['platoon_conflicts']],
+            default=0,
+        ).astype(np.int8)
+        np.fill_diagonal(types, 0)
+        return types
+
+    def _evict_departed(self, ids: List[str], changed: List[bool]):
+        """Drop agents no longer among the candidates and pairs of refreshed agents"""
+        present = set(ids)
+        stale = {key for key in self._agent_cache if key not in present}
+        stale.update(key for key, refreshed in zip(ids, changed) if refreshed)
+        for key in stale:
+            if key not in present:
+                del self._agent_cache[key]
+        if stale:
+            self._pair_cache = {
+                pair: result for pair, result in self._pair_cache.items()
+                if pair[0] not in stale and pair[1] not in stale
+            }
+
+    def get_stats(self) -> Dict:
+        """Incremental conflict graph statistics"""
+        stats = dict(self.stats)
+        stats['recomputed_pair_ratio'] = (
+            self.stats['pairs_recomputed'] / self.stats['pairs_total'] if self.stats['pairs_total'] else 0.0
+        )
+        stats['cached_agents'] = len(self._agent_cache)
+        stats['cached_pairs'] = len(self._pair_cache)
+        if self.lane_paths is not None:
+            stats['lane_paths'] = self.lane_paths.get_stats()
+        return stats
+
+    def reset_cache(self):
+        """Forget all cached agent metadata and pair results"""
+        self._agent_cache.clear()
+        self._pair_cache.clear()
+
     def _detect_enhanced_conflict(self, meta_i: Dict, meta_j: Dict) -> Optional[str]:
         """Enhanced conflict detection with multiple conflict types"""
         try:
@@ -128,7 +431,7 @@ class ConflictAnalyzer:
             return None
             
         except Exception as e:
-            print(f"[Warning] Enhanced conflict detection failed: {e}")
+            log.warning("[Warning] Enhanced conflict detection failed: {}", e)
             return 'spatial_conflicts'  # Conservative fallback
 
     def _has_spatial_conflict(self, meta_i: Dict, meta_j: Dict) -> bool:
@@ -164,46 +467,114 @@ class ConflictAnalyzer:
             return False
 
     def _has_path_intersection(self, meta_i: Dict, meta_j: Dict) -> bool:
-        """Check for path intersections"""
+        """Check for path intersections (space-time trajectories, movement table, geometry for unknown movements)"""
         try:
+            trajectory_i = self._trajectory(meta_i)
+            trajectory_j = self._trajectory(meta_j) if trajectory_i is not None else None
+            if trajectory_i is not None and trajectory_j is not None:
+                return self._trajectories_conflict(trajectory_i, trajectory_j)
+            
+            movement_i = meta_i.get('movement')
+            movement_j = meta_j.get('movement')
+            if movement_i and movement_j:
+                # 静止车辆的预测路径为单点，不与任何路径相交
+                if not (self._is_moving(meta_i['state']) and self._is_moving(meta_j['state'])):
+                    return False
+                return self._movement_conflicts()[(movement_i, movement_j)][0]
+            
             # Support multiple candidate polylines if available
-            paths_i = meta_i.get('predicted_paths')
-            paths_j = meta_j.get('predicted_paths')
-
-            if paths_i is None:
-                pi = meta_i.get('predicted_path', [])
-                paths_i = [pi] if pi else []
-            if paths_j is None:
-                pj = meta_j.get('predicted_path', [])
-                paths_j = [pj] if pj else []
+            paths_i = self._candidate_paths(meta_i)
+            paths_j = self._candidate_paths(meta_j)
 
             if not paths_i or not paths_j:
                 return False
 
             # Check intersection or near-miss for any path pair
-            for path_i in paths_i:
-                for path_j in paths_j:
-                    if len(path_i) < 2 or len(path_j) < 2:
-                        continue
-                    for i in range(len(path_i) - 1):
-                        for j in range(len(path_j) - 1):
-                            p1, p2 = path_i[i], path_i[i+1]
-                            p3, p4 = path_j[j], path_j[j+1]
-                            if self._segments_intersect(p1, p2, p3, p4):
-                                return True
-                            # Near miss
-                            if self._segment_min_distance(p1, p2, p3, p4) < self.path_intersection_threshold:
-                                return True
-
-            return False
+            return any(self._polylines_conflict(path_i, path_j) for path_i in paths_i for path_j in paths_j)
             
         except Exception:
             # If path information is unreliable, don't use it to assert conflict
             return False
 
+    def _trajectory(self, meta: Dict) -> Optional[Tuple]:
+        """Lane trajectory of an agent, predicted on first use (None without a lane path)"""
+        trajectory = meta['trajectory']
+        if trajectory is _PENDING:
+            trajectory = self._predict_trajectory(meta['state'], meta.get('agent'), meta['movement'])
+            if trajectory is not None:
+                self.stats['trajectory_agents'] += 1
+            meta['trajectory'] = trajectory
+        return trajectory
+
+    def _candidate_paths(self, meta: Dict) -> List[List[Tuple[float, float]]]:
+        """3-point candidate polylines of an agent (only needed when a movement is unknown)"""
+        if meta.get('predicted_paths') is None:
+            state = meta['state']
+            paths = self._predict_vehicle_paths(state, meta.get('agent'), meta.get('turn')) if state else []
+            meta['predicted_paths'] = paths
+            meta['predicted_path'] = paths[0] if paths else []
+        return meta['predicted_paths']
+
+    def _polylines_conflict(self, path_i: List[Tuple[float, float]], path_j: List[Tuple[float, float]]) -> bool:
+        """Two polylines intersect or pass within path_intersection_threshold"""
+        if len(path_i) < 2 or len(path_j) < 2:
+            return False
+        for i in range(len(path_i) - 1):
+            for j in range(len(path_j) - 1):
+                p1, p2 = path_i[i], path_i[i+1]
+                p3, p4 = path_j[j], path_j[j+1]
+                if self._segments_intersect(p1, p2, p3, p4):
+                    return True
+                # Near miss
+                if self._segment_min_distance(p1, p2, p3, p4) < self.path_intersection_threshold:
+                    return True
+        return False
+
+    def _trajectories_conflict(self, trajectory_i: Tuple, trajectory_j: Tuple) -> bool:
+        """
+        Lane paths pass within path_intersection_threshold ahead of both agents
+        with occupancy intervals [t, t + occupancy] less than conflict_time_window apart
+        """
+        path_i, start_i, base_i, speed_i, occupancy_i, bounds_i = trajectory_i
+        path_j, start_j, base_j, speed_j, occupancy_j, bounds_j = trajectory_j
+        if bounds_i is None or bounds_j is None:
+            return False
+        threshold = self.path_intersection_threshold
+        # 时空包围盒快速排除 (x_min, y_min, x_max, y_max, t_min, t_max)
+        if not LanePathCache.boxes_overlap(bounds_i, bounds_j, threshold) or \
+                bounds_i[4] - (bounds_j[5] + occupancy_j) >= self.dt_conflict or \
+                bounds_j[4] - (bounds_i[5] + occupancy_i) >= self.dt_conflict:
+            return False
+        # 两条车道链上相距小于阈值的采样点对（按链对缓存、按i上弧长排序），只检查两车前方的点对
+        keys, pairs = self.lane_paths.close_pairs(path_i, path_j, threshold)
+        dt = self.dt_conflict
+        for k in range(bisect.bisect_left(keys, start_i), len(pairs)):
+            arc_i, arc_j = pairs[k]
+            if arc_j < start_j:
+                continue
+            t_i = (arc_i - base_i) / speed_i
+            t_j = (arc_j - base_j) / speed_j
+            if t_i - (t_j + occupancy_j) < dt and t_j - (t_i + occupancy_i) < dt:
+                return True
+        return False
+
+    @staticmethod
+    def _is_moving(state: Dict) -> bool:
+        velocity = state.get('velocity', [0, 0, 0])
+        return bool(velocity) and (abs(velocity[0]) > 1e-3 or abs(velocity[1]) > 1e-3)
+
     def _has_turn_conflict(self, meta_i: Dict, meta_j: Dict) -> bool:
         """Check for turn-based conflicts using enhanced logic"""
         try:
+            # 车道轨迹已给出真实几何，转向规则不再额外判定冲突
+            if self._trajectory(meta_i) is not None and self._trajectory(meta_j) is not None:
+                return False
+            
+            movement_i = meta_i.get('movement')
+            movement_j = meta_j.get('movement')
+            if movement_i and movement_j:
+                return self._movement_conflicts()[(movement_i, movement_j)][1]
+            
             state_i = meta_i['state']
             state_j = meta_j['state']
             
@@ -351,6 +722,11 @@ class ConflictAnalyzer:
         if not state or 'location' not in state:
             return float('inf')
         
+        # Vehicle state table rows already carry the per-tick ETA for this center
+        table = getattr(state, 'table', None)
+        if table is not None and table.same_center(self.center):
+            return state.eta
+        
         location = state['location']
         velocity = state.get('velocity', [0, 0, 0])
         speed = math.sqrt(sum(x**2 for x in velocity)) if velocity else 0.0
@@ -363,12 +739,49 @@ class ConflictAnalyzer:
         
         return distance / effective_speed
 
+    # Leader-to-leader spacing used for how long a platoon occupies each sample (meters)
+    PLATOON_VEHICLE_SPACING = 8.0
+
+    def _predict_trajectory(self, state: Optional[Dict], agent,
+                            movement: Optional[Tuple[str, str]]) -> Optional[Tuple]:
+        """
+        Lane-following trajectory (lane path, arc length of the agent's nearest
+        sample, arc length of the agent, speed, occupancy seconds, space-time
+        bounds or None when the conflict zone is behind) on the cached junction
+        path of the agent's lane and movement, at the current speed (at least
+        trajectory_min_speed so waiting agents are predicted as if released).
+        None when no lane path is available.
+        """
+        if self.lane_paths is None or not state or movement is None:
+            return None
+        location = state.get('location')
+        road_id, lane_id = state.get('road_id'), state.get('lane_id')
+        exit_arm = self._exit_direction(*movement)
+        if location is None or road_id is None or lane_id is None or not exit_arm:
+            return None
+        located = self.lane_paths.locate(location, road_id, lane_id, exit_arm,
+                                         self.ARM_VECTORS[exit_arm])
+        if located is None:
+            return None
+        path, start_arc, base_arc = located
+        velocity = state.get('velocity') or (0.0, 0.0, 0.0)
+        speed = max(math.hypot(velocity[0], velocity[1]), self.trajectory_min_speed)
+        platoon_size = len(getattr(agent, 'vehicles', ()) or ())
+        occupancy = max(platoon_size - 1, 0) * self.PLATOON_VEHICLE_SPACING / speed
+        bounds = None
+        end_arc = path.arcs[-1]
+        if path.zone_bounds is not None and start_arc <= end_arc:
+            # 空间范围取整个冲突区（保守），时间范围取本车前方的冲突区段
+            zone_arc = max(path.arcs[path.zone_start], start_arc)
+            bounds = path.zone_bounds + ((zone_arc - base_arc) / speed, (end_arc - base_arc) / speed)
+        return path, start_arc, base_arc, speed, occupancy, bounds
+
     def _predict_vehicle_path(self, state: Dict, agent) -> List[Tuple[float, float]]:
         """Predict a primary vehicle path through the intersection (turn-aware polyline)"""
         paths = self._predict_vehicle_paths(state, agent)
         return paths[0] if paths else []
 
-    def _predict_vehicle_paths(self, state: Dict, agent) -> List[List[Tuple[float, float]]]:
+    def _predict_vehicle_paths(self, state: Dict, agent, turn: Optional[str] = None) -> List[List[Tuple[float, float]]]:
         """Predict one or more candidate polylines for the vehicle path based on approach and turn"""
         if not state or 'location' not in state:
             return []
@@ -380,44 +793,11 @@ class ConflictAnalyzer:
         velocity = state.get('velocity', [0, 0, 0])
         moving = velocity and (abs(velocity[0]) > 1e-3 or abs(velocity[1]) > 1e-3)
 
-        center_xy = (self.center[0], self.center[1])
         approach = self._infer_approach_direction(state.get('location', (0,0,0)))
-        turn = state.get('turn') if 'turn' in state else self._infer_turn_enhanced(agent, state, {})
-
-        def dir_vector(direction: str) -> Tuple[float, float]:
-            mapping = {
-                'east': (1.0, 0.0),
-                'west': (-1.0, 0.0),
-                'north': (0.0, 1.0),
-                'south': (0.0, -1.0)
-            }
-            return mapping.get(direction, (0.0, 0.0))
-
-        def dest_direction_for_turn(appr: str, t: str) -> str:
-            if t == 'straight':
-                m = {'north': 'south', 'south': 'north', 'east': 'west', 'west': 'east'}
-            elif t == 'left':
-                m = {'north': 'east', 'east': 'south', 'south': 'west', 'west': 'north'}
-            elif t == 'right':
-                m = {'north': 'west', 'west': 'south', 'south': 'east', 'east': 'north'}
-            elif t == 'u_turn':
-                m = {'north': 'north', 'south': 'south', 'east': 'east', 'west': 'west'}
-            else:
-                return ''
-            return m.get(appr, '')
-
-        exit_distance = max(self.deadlock_core_half_size * 2.0, 30.0)
-
-        def build_polyline_for_turn(appr: str, t: str) -> List[Tuple[float, float]]:
-            if not appr:
-                return [pos]
-            dest_dir = dest_direction_for_turn(appr, t)
-            if not dest_dir:
-                return [pos]
-            dv = dir_vector(dest_dir)
-            dest_point = (center_xy[0] + dv[0] * exit_distance, center_xy[1] + dv[1] * exit_distance)
-            # Simple 3-point polyline: current position -> center -> out along dest direction
-            return [pos, center_xy, dest_point]
+        if 'turn' in state:
+            turn = state.get('turn')
+        elif turn is None:
+            turn = self._infer_turn_enhanced(agent, state, {})
 
         candidate_turns = []
         if turn in ('left', 'right', 'straight', 'u_turn'):
@@ -426,7 +806,7 @@ class ConflictAnalyzer:
             # Unknown turn: consider common options conservatively
             candidate_turns = ['straight', 'left', 'right']
 
-        polylines = [build_polyline_for_turn(approach, t) for t in candidate_turns]
+        polylines = [self._movement_polyline(pos, approach, t) for t in candidate_turns]
 
         # If not moving, reduce to a single point path
         if not moving:
@@ -434,6 +814,38 @@ class ConflictAnalyzer:
 
         return polylines
 
+    # Unit vector from the center out along each arm
+    ARM_VECTORS = {
+        'east': (1.0, 0.0),
+        'west': (-1.0, 0.0),
+        'north': (0.0, 1.0),
+        'south': (0.0, -1.0)
+    }
+
+    EXIT_ARMS = {
+        'straight': {'north': 'south', 'south': 'north', 'east': 'west', 'west': 'east'},
+        'left': {'north': 'east', 'east': 'south', 'south': 'west', 'west': 'north'},
+        'right': {'north': 'west', 'west': 'south', 'south': 'east', 'east': 'north'},
+        'u_turn': {'north': 'north', 'south': 'south', 'east': 'east', 'west': 'west'},
+    }
+
+    def _exit_direction(self, appr: str, t: str) -> str:
+        """Arm a movement leaves by ('' if the approach or turn is unknown)"""
+        return self.EXIT_ARMS.get(t, {}).get(appr, '') if appr else ''
+
+    def _movement_polyline(self, pos: Tuple[float, float], appr: str, t: str) -> List[Tuple[float, float]]:
+        """3-point polyline for a movement: position -> center -> out along the exit direction"""
+        dest_dir = self._exit_direction(appr, t)
+        if not dest_dir:
+            return [pos]
+        
+        center_xy = (self.center[0], self.center[1])
+        exit_distance = max(self.deadlock_core_half_size * 2.0, 30.0)
+        dv = self.ARM_VECTORS[dest_dir]
+        dest_point = (center_xy[0] + dv[0] * exit_distance, center_xy[1] + dv[1] * exit_distance)
+        # Simple 3-point polyline: current position -> center -> out along dest direction
+        return [pos, center_xy, dest_point]
+
     def _get_agent(self, candidate) -> object:
         """Extract agent from candidate"""
         if hasattr(candidate, 'participant'):
@@ -469,7 +881,7 @@ class ConflictAnalyzer:
             return None
             
         except Exception as e:
-            print(f"[Warning] Lookup state failed for agent {agent}: {e}")
+            log.warning("[Warning] Lookup state failed for agent {}: {}", agent, e)
             return None
 
     def _infer_turn_enhanced(self, agent, state: Dict, vehicle_states: Dict) -> str:
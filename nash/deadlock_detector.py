@@ -1,17 +1,23 @@
 import math
 import time
-from typing import List, Dict, Tuple
-from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
+from array import array
+from collections import defaultdict, deque
+
+from .wait_for_graph import WaitForGraph
 
 def _euclidean_2d(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
     return math.hypot(a[0]-b[0], a[1]-b[1])
 
 class DeadlockException(Exception):
     """Exception raised when deadlock is detected"""
-    def __init__(self, message: str, deadlock_type: str = "unknown", affected_vehicles: int = 0):
+    def __init__(self, message: str, deadlock_type: str = "unknown", affected_vehicles: int = 0,
+                 vehicles: Optional[Tuple[str, ...]] = None):
         super().__init__(message)
         self.deadlock_type = deadlock_type
         self.affected_vehicles = affected_vehicles
+        # vehicle ids of a wait-for cycle the resolver can break by releasing one of them
+        self.vehicles = vehicles
 
 class IntersectionDeadlockDetector:
     """
@@ -30,7 +36,6 @@ class IntersectionDeadlockDetector:
         self.deadlock_detection_window = solver_config.get('deadlock_detection_window', 35.0)  # seconds to track for deadlock
         self.deadlock_speed_threshold = solver_config.get('deadlock_speed_threshold', 0.5)  # m/s - vehicles below this are considered stopped
         self.deadlock_min_vehicles = solver_config.get('deadlock_min_vehicles', 6)  # minimum vehicles for deadlock detection
-        self.deadlock_history = []  # track intersection state over time
         self.last_deadlock_check = -math.inf
         self.deadlock_check_interval = solver_config.get('deadlock_check_interval', 1.0)  # check every 1 second - synchronized
         
@@ -38,9 +43,28 @@ class IntersectionDeadlockDetector:
         self.deadlock_severity_threshold = solver_config.get('deadlock_severity_threshold', 0.8)  # 80% of vehicles stalled
         self.deadlock_duration_threshold = solver_config.get('deadlock_duration_threshold', 15.0)  # 15 seconds continuous stalling
         
+        # track intersection state over time: ring buffer of compact snapshots
+        # (checks are at least deadlock_check_interval apart, so the window bounds the count)
+        self._persistent_window = max(5, int(self.deadlock_duration_threshold / self.deadlock_check_interval))
+        history_capacity = int(math.ceil(self.deadlock_detection_window / self.deadlock_check_interval)) + 1
+        self.deadlock_history = deque(maxlen=max(history_capacity, self._persistent_window))
+        # running counters so persistent stalling / severity do not rescan the history
+        self._high_stall_flags = deque(maxlen=self._persistent_window)
+        self._high_stall_count = 0
+        self._stalled_since: Dict[str, float] = {}  # vehicle_id -> sim time it became stalled in core
+        
+        # Wait-for graph fed by the Nash solver (None = legacy quadrant heuristic)
+        self.wait_for_graph = WaitForGraph() if solver_config.get('wait_for_graph', True) else None
+        self.wait_for_follow_gap = solver_config.get('wait_for_follow_gap', 12.0)
+        self.circular_wait_min_duration = solver_config.get('circular_wait_min_duration', 10.0)
+        self.max_cycle_releases = solver_config.get('max_cycle_releases', 2)
+        self._cycle_releases: Dict[frozenset, int] = {}  # cycle -> release attempts so far
+        self.pending_cycle: Optional[Tuple[str, ...]] = None  # breakable cycle not yet handed to the resolver
+        
         # Performance tracking
         self.stats = {
-            'deadlocks_detected': 0,
+            'deadlocks_detected': 0,   # hard deadlocks only (penalised / episode-ending)
+            'cycles_reported': 0,      # breakable wait-for cycles handed to the resolver
             'false_positives': 0,
             'detection_time_avg': 0.0,
             'deadlock_types': defaultdict(int),
@@ -65,71 +89,105 @@ class IntersectionDeadlockDetector:
         
         self.last_deadlock_check = current_time
         
-        # Get vehicles in core region
-        core_vehicles = self._get_core_region_vehicles(vehicle_states)
-        
-        # Always record snapshot using consistent speed calculation
-        snapshot = {
-            'timestamp': current_time,
-            'core_vehicles': {v['id']: {
-                'location': v.get('location', (0, 0, 0)),
-                'velocity': v.get('velocity', [0, 0, 0]),
-                'speed': self._speed_2d(v.get('velocity', [0,0,0])),
-                'stalled': self._speed_2d(v.get('velocity', [0,0,0])) < self.deadlock_speed_threshold
-            } for v in core_vehicles},
-            'stalled_count': sum(1 for v in core_vehicles 
-                               if self._speed_2d(v.get('velocity', [0,0,0])) < self.deadlock_speed_threshold)
-        }
+        # Get vehicles in core region (ids, positions, speeds)
+        ids, xy, speeds = self._get_core_region_arrays(vehicle_states)
+        threshold = self.deadlock_speed_threshold
+        stalled = [speed < threshold for speed in speeds]
+        center_x, center_y = self.center[0], self.center[1]
+        distances = array('d', [math.hypot(x - center_x, y - center_y) for x, y in xy])
         
-        # Add to history
-        self.deadlock_history.append(snapshot)
+        # Always record a compact snapshot
+        snapshot = _CoreSnapshot(current_time, ids, distances, stalled)
+        self._record_snapshot(snapshot)
         
-        # Keep only recent history
-        cutoff_time = current_time - self.deadlock_detection_window
-        self.deadlock_history = [s for s in self.deadlock_history if s['timestamp'] >= cutoff_time]
+        # Mode 0: wait-for cycle (any size, reported before the core-region gates)
+        if self.wait_for_graph is not None:
+            cycle = self._detect_wait_for_cycle(current_time)
+            if cycle is not None:
+                vehicles, breakable = cycle
+                self._handle_deadlock_detected("Circular Waiting", len(vehicles),
+                                               vehicles if breakable else None)
         
         # If not enough vehicles now, skip heavy checks early
-        if len(core_vehicles) < self.deadlock_min_vehicles:
+        if len(ids) < self.deadlock_min_vehicles:
             return False
         
         # Need sufficient history for detection
-        min_snapshots_for_persistent = max(5, int(self.deadlock_duration_threshold / self.deadlock_check_interval))
-        if len(self.deadlock_history) < min_snapshots_for_persistent:
+        if len(self.deadlock_history) < self._persistent_window:
             return False
         
         # Mode 1: Persistent core stalling
-        if self._detect_persistent_core_stalling(min_snapshots_for_persistent):
-            self._handle_deadlock_detected("Persistent Core Stalling", len(core_vehicles))
+        if self._detect_persistent_core_stalling(self._persistent_window):
+            self._handle_deadlock_detected("Persistent Core Stalling", len(ids))
             return True
         
-        # Mode 2: Circular waiting pattern
-        if self._detect_circular_waiting():
-            self._handle_deadlock_detected("Circular Waiting", len(core_vehicles))
+        # Mode 2: Circular waiting pattern (quadrant heuristic when the wait-for graph is off)
+        if self.wait_for_graph is None and self._detect_circular_waiting(xy, stalled):
+            self._handle_deadlock_detected("Circular Waiting", len(ids))
             return True
         
         # Mode 3: No progress detection
         if self._detect_no_progress():
-            self._handle_deadlock_detected("No Progress", len(core_vehicles))
+            self._handle_deadlock_detected("No Progress", len(ids))
             return True
         
         return False
 
-    def _handle_deadlock_detected(self, deadlock_type: str, affected_vehicles: int):
+    def _record_snapshot(self, snapshot: '_CoreSnapshot'):
+        """Append to the ring buffer and update the running counters (O(core vehicles))"""
+        history = self.deadlock_history
+        
+        # 持续停滞判定窗口内的高停滞快照计数（滑动窗口）
+        flags = self._high_stall_flags
+        if len(flags) == flags.maxlen:
+            self._high_stall_count -= flags[0]
+        high_stall = (snapshot.stalled_count >= self.deadlock_min_vehicles and
+                      snapshot.stalled_count / max(snapshot.core_count, 1) >= self.deadlock_severity_threshold)
+        flags.append(high_stall)
+        self._high_stall_count += high_stall
+        
+        # 每车连续停滞起始时间（离开核心区或恢复行驶即清除）
+        stalled_since = {}
+        for vehicle_id, is_stalled in zip(snapshot.ids, snapshot.stalled):
+            if is_stalled:
+                stalled_since[vehicle_id] = self._stalled_since.get(vehicle_id, snapshot.timestamp)
+        self._stalled_since = stalled_since
+        
+        history.append(snapshot)
+        # Keep only recent history (deque capacity bounds it as well)
+        cutoff_time = snapshot.timestamp - self.deadlock_detection_window
+        while history[0].timestamp < cutoff_time:
+            history.popleft()
+
+    def _handle_deadlock_detected(self, deadlock_type: str, affected_vehicles: int,
+                                  vehicles: Optional[Tuple[str, ...]] = None):
         """Handle deadlock detection with enhanced tracking"""
-        self.stats['deadlocks_detected'] += 1
-        self.stats['deadlock_types'][deadlock_type] += 1
-        self.stats['total_affected_vehicles'] += affected_vehicles
-        
-        print(f"\n🚨 DEADLOCK DETECTED - {deadlock_type}")
+        if vehicles:
+            # 可打破的等待环不是终止性死锁，单独计数，不计入死锁惩罚
+            self.stats['cycles_reported'] += 1
+            print(f"\n🔁 WAIT-FOR CYCLE DETECTED - {deadlock_type}")
+        else:
+            self.stats['deadlocks_detected'] += 1
+            self.stats['deadlock_types'][deadlock_type] += 1
+            self.stats['total_affected_vehicles'] += affected_vehicles
+            print(f"\n🚨 DEADLOCK DETECTED - {deadlock_type}")
         print(f"   📍 Location: Core intersection region")
         print(f"   🕐 Duration: {self.deadlock_detection_window}s+ of stalling")
         print(f"   🚗 Vehicles: {affected_vehicles} vehicles affected")
+        stall_durations = self.get_stall_durations()
+        if stall_durations:
+            print(f"   ⏱️ Longest continuous stall: {max(stall_durations.values()):.1f}s "
+                  f"({len(stall_durations)} vehicles stalled)")
+        if vehicles:
+            print(f"   🔁 Wait-for cycle: {' -> '.join(vehicles)} (resolver releases one vehicle)")
+            self.pending_cycle = vehicles
         
         # Raise enhanced exception with details
         raise DeadlockException(
             f"Deadlock detected in intersection core region: {deadlock_type}",
             deadlock_type=deadlock_type,
-            affected_vehicles=affected_vehicles
+            affected_vehicles=affected_vehicles,
+            vehicles=vehicles
         )
 
     def handle_deadlock_detection(self):
@@ -137,9 +195,11 @@ class IntersectionDeadlockDetector:
         self.stats['deadlocks_detected'] += 1
         raise DeadlockException("Deadlock detected in intersection core region")
 
-    def _get_core_region_vehicles(self, vehicle_states: Dict[str, Dict]) -> List[Dict]:
-        """Get vehicles specifically in the core blue square region"""
-        core_vehicles = []
+    def _get_core_region_arrays(self, vehicle_states: Dict[str, Dict]) -> Tuple[tuple, List[Tuple[float, float]], List[float]]:
+        """Ids, xy positions and 2D speeds of vehicles in the core blue square region"""
+        center_x, center_y = self.center[0], self.center[1]
+        half_size = self.deadlock_core_half_size
+        ids, xy, speeds = [], [], []
         
         for vehicle_id, vehicle_state in vehicle_states.items():
             if not vehicle_state or 'location' not in vehicle_state:
@@ -148,122 +208,129 @@ class IntersectionDeadlockDetector:
             location = vehicle_state['location']
             
             # Use EXACT SQUARE bounds
-            center_x, center_y = self.center[0], self.center[1]
-            half_size = self.deadlock_core_half_size
-            
-            # Check if vehicle is within the core square bounds
-            in_core_square = (
-                (center_x - half_size) <= location[0] <= (center_x + half_size) and
-                (center_y - half_size) <= location[1] <= (center_y + half_size)
-            )
-            
-            if in_core_square:
-                vehicle_data = dict(vehicle_state)
-                vehicle_data['id'] = vehicle_id
-                core_vehicles.append(vehicle_data)
+            if ((center_x - half_size) <= location[0] <= (center_x + half_size) and
+                    (center_y - half_size) <= location[1] <= (center_y + half_size)):
+                ids.append(vehicle_id)
+                xy.append((location[0], location[1]))
+                speeds.append(self._speed_2d(vehicle_state.get('velocity', [0, 0, 0])))
         
-        return core_vehicles
+        return tuple(ids), xy, speeds
 
     def _detect_persistent_core_stalling(self, required_snapshots: int = 10) -> bool:
-        """Detect if the same set of vehicles have been stalled in core for extended time"""
-        required = required_snapshots or int(self.deadlock_duration_threshold / self.deadlock_check_interval)
+        """Detect if the intersection core has been stalled for extended time"""
+        required = required_snapshots or self._persistent_window
         if len(self.deadlock_history) < required:
             return False
         
-        # Take the most recent block
-        recent_snapshots = self.deadlock_history[-required:]
-        
-        # Count snapshots where stalled vehicle ratio is above threshold
-        high_stall_count = sum(1 for s in recent_snapshots 
-                              if s.get('stalled_count', 0) >= self.deadlock_min_vehicles and 
-                              (s.get('stalled_count', 0) / max(len(s.get('core_vehicles', {})), 1)) >= self.deadlock_severity_threshold)
-        
+        # Running count of high-stall snapshots among the most recent block
         # If most recent snapshots show high stalling, it's likely deadlock
-        return high_stall_count >= int(0.8 * required)  # 80% of recent snapshots
+        return self._high_stall_count >= int(0.8 * required)  # 80% of recent snapshots
 
-    def _detect_circular_waiting(self) -> bool:
+    def _detect_circular_waiting(self, xy: List[Tuple[float, float]], stalled: List[bool]) -> bool:
         """Detect circular waiting patterns where vehicles block each other"""
         if len(self.deadlock_history) < 3:
             return False
         
-        current_snapshot = self.deadlock_history[-1]
-        core_vehicles = current_snapshot['core_vehicles']
-        
         # Simple heuristic: if most vehicles in core are stalled and positioned 
         # in different quadrants, likely circular waiting
-        stalled_vehicles = [v_id for v_id, data in core_vehicles.items() if data.get('stalled')]
-        
-        if len(stalled_vehicles) < 4:  # Need at least 4 vehicles for circular pattern
+        stalled_count = sum(stalled)
+        if stalled_count < 4:  # Need at least 4 vehicles for circular pattern
             return False
         
         # Check if vehicles are distributed across different approaches
-        quadrant_count = self._count_vehicles_by_quadrant(stalled_vehicles, core_vehicles)
+        quadrant_count = self._count_vehicles_by_quadrant([p for p, is_stalled in zip(xy, stalled) if is_stalled])
         
         # If vehicles are in 3+ quadrants and a sufficient number are stalled, likely circular waiting
-        return len(quadrant_count) >= 3 and len(stalled_vehicles) >= self.deadlock_min_vehicles
+        return len(quadrant_count) >= 3 and stalled_count >= self.deadlock_min_vehicles
+
+    def _detect_wait_for_cycle(self, current_time: float) -> Optional[Tuple[Tuple[str, ...], bool]]:
+        """Longest-lived persistent wait-for cycle as (vehicle ids, still breakable), or None"""
+        cycles = self.wait_for_graph.persistent_cycles(current_time, self.circular_wait_min_duration)
+        # 只保留仍存在的环的释放计数
+        live = {cycle for cycle, _ in cycles}
+        self._cycle_releases = {c: n for c, n in self._cycle_releases.items() if c in live}
+        if not cycles:
+            return None
+        
+        cycle = cycles[0][0]
+        attempts = self._cycle_releases.get(cycle, 0)
+        breakable = attempts < self.max_cycle_releases
+        if breakable:
+            self._cycle_releases[cycle] = attempts + 1
+        return self._cycle_order(cycle), breakable
+
+    def _cycle_order(self, cycle: frozenset) -> Tuple[str, ...]:
+        """Cycle members in waiting order, starting from the smallest id"""
+        edges = self.wait_for_graph.edges
+        order = [min(cycle)]
+        seen = {order[0]}
+        while True:
+            successors = sorted(w for w in edges.get(order[-1], ()) if w in cycle and w not in seen)
+            if not successors:
+                break
+            order.append(successors[0])
+            seen.add(successors[0])
+        order.extend(sorted(cycle - seen))
+        return tuple(order)
+
+    def take_pending_cycle(self) -> Optional[Tuple[str, ...]]:
+        """Breakable cycle reported by the last detection (cleared once taken)"""
+        cycle, self.pending_cycle = self.pending_cycle, None
+        return cycle
 
     def _detect_no_progress(self) -> bool:
         """Detect lack of progress toward intersection center"""
         lookback_seconds = 15.0
-        if not self.deadlock_history:
+        history = self.deadlock_history
+        if not history:
             return False
         
-        # Find oldest snapshot within lookback_seconds
-        current_snapshot = self.deadlock_history[-1]
-        current_time = current_snapshot['timestamp']
-        target_time = current_time - lookback_seconds
-        old_snapshot = None
-        for s in reversed(self.deadlock_history):
-            if s['timestamp'] <= target_time:
-                old_snapshot = s
-                break
+        # Newest snapshot at least lookback_seconds old (binary search over the ring buffer)
+        current_snapshot = history[-1]
+        target_time = current_snapshot.timestamp - lookback_seconds
+        lo, hi = 0, len(history)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if history[mid].timestamp <= target_time:
+                lo = mid + 1
+            else:
+                hi = mid
         
-        # Fallback to earliest available if exact not found
-        if old_snapshot is None:
-            if len(self.deadlock_history) < 2:
+        if lo > 0:
+            old_snapshot = history[lo - 1]
+        else:
+            # Fallback to earliest available if exact not found
+            if len(history) < 2:
                 return False
-            old_snapshot = self.deadlock_history[0]
+            old_snapshot = history[0]
         
-        current_vehicles = current_snapshot['core_vehicles']
-        old_vehicles = old_snapshot['core_vehicles']
-        
-        # Track vehicles that were present in both snapshots
-        common_vehicles = set(current_vehicles.keys()) & set(old_vehicles.keys())
-        
-        if len(common_vehicles) < 3:
-            return False
-        
-        # Check if vehicles have made progress toward center
+        # Track vehicles that were present in both snapshots (distances were stored at record time)
+        old_rows = old_snapshot.row_index()
         no_progress_count = 0
-        center = self.center
-        
-        for v_id in common_vehicles:
-            old_pos = old_vehicles[v_id].get('location', (0,0,0))
-            current_pos = current_vehicles[v_id].get('location', (0,0,0))
-            
-            old_dist = _euclidean_2d(old_pos, center)
-            current_dist = _euclidean_2d(current_pos, center)
-            
+        common_count = 0
+        for row, vehicle_id in enumerate(current_snapshot.ids):
+            old_row = old_rows.get(vehicle_id)
+            if old_row is None:
+                continue
+            common_count += 1
             # No significant progress if distance to center hasn't decreased much
-            if current_dist >= old_dist - 1.0:  # Less than 1 meter progress
+            if current_snapshot.distances[row] >= old_snapshot.distances[old_row] - 1.0:  # Less than 1 meter progress
                 no_progress_count += 1
         
+        if common_count < 3:
+            return False
+        
         # If most tracked vehicles made no progress, likely deadlock
-        return no_progress_count >= max(1, int(len(common_vehicles) * 0.8))
+        return no_progress_count >= max(1, int(common_count * 0.8))
 
-    def _count_vehicles_by_quadrant(self, vehicle_ids: List[str], 
-                                   vehicles_data: Dict[str, Dict]) -> Dict[str, int]:
+    def _count_vehicles_by_quadrant(self, xy: List[Tuple[float, float]]) -> Dict[str, int]:
         """Count vehicles in each quadrant relative to intersection center"""
         quadrant_count = defaultdict(int)
         center_x, center_y = self.center[0], self.center[1]
         
-        for v_id in vehicle_ids:
-            if v_id not in vehicles_data:
-                continue
-            
-            location = vehicles_data[v_id]['location']
-            rel_x = location[0] - center_x
-            rel_y = location[1] - center_y
+        for x, y in xy:
+            rel_x = x - center_x
+            rel_y = y - center_y
             
             if rel_x >= 0 and rel_y >= 0:
                 quadrant = 'NE'
@@ -290,32 +357,63 @@ class IntersectionDeadlockDetector:
             stats['avg_affected_vehicles'] = 0.0
             stats['deadlock_rate'] = 0.0
         
+        if self.wait_for_graph is not None:
+            stats['wait_for_graph'] = self.wait_for_graph.get_stats()
+        
         return stats
 
     def reset_history(self):
         """Reset deadlock detection history"""
-        self.deadlock_history = []
+        self.deadlock_history.clear()
+        self._high_stall_flags.clear()
+        self._high_stall_count = 0
+        self._stalled_since = {}
+        if self.wait_for_graph is not None:
+            self.wait_for_graph.reset()
+        self._cycle_releases = {}
+        self.pending_cycle = None
         print("🔄 Deadlock detector: History reset")
 
+    def get_stall_durations(self) -> Dict[str, float]:
+        """Seconds each core vehicle has been continuously stalled, as of the latest snapshot"""
+        if not self.deadlock_history:
+            return {}
+        now = self.deadlock_history[-1].timestamp
+        return {vehicle_id: now - since for vehicle_id, since in self._stalled_since.items()}
+
     def get_deadlock_severity(self) -> float:
         """Calculate current deadlock severity (0-1)"""
-        if not self.deadlock_history:
-            return 0.0
-        
-        recent_snapshots = self.deadlock_history[-5:]  # Last 5 snapshots
-        if not recent_snapshots:
+        history = self.deadlock_history
+        if not history:
             return 0.0
         
-        # Calculate average stall ratio
-        stall_ratios = []
-        for snapshot in recent_snapshots:
-            core_vehicles_count = len(snapshot.get('core_vehicles', {}))
-            stalled_count = snapshot.get('stalled_count', 0)
-            if core_vehicles_count > 0:
-                stall_ratios.append(stalled_count / core_vehicles_count)
+        # Average stall ratio over the last 5 snapshots that had core vehicles
+        stall_ratios = [history[i].stall_ratio for i in range(max(0, len(history) - 5), len(history))
+                        if history[i].core_count > 0]
         
         if not stall_ratios:
             return 0.0
         
         avg_stall_ratio = sum(stall_ratios) / len(stall_ratios)
         return min(1.0, avg_stall_ratio)
+
+
+class _CoreSnapshot:
+    """Compact core-region snapshot: ids plus distance-to-center / stalled arrays"""
+
+    __slots__ = ('timestamp', 'ids', 'distances', 'stalled', 'core_count', 'stalled_count', 'stall_ratio', '_rows')
+
+    def __init__(self, timestamp: float, ids: tuple, distances: array, stalled: List[bool]):
+        self.timestamp = timestamp
+        self.ids = ids
+        self.distances = distances
+        self.stalled = bytes(stalled)
+        self.core_count = len(ids)
+        self.stalled_count = sum(stalled)
+        self.stall_ratio = self.stalled_count / self.core_count if self.core_count else 0.0
+        self._rows = None
+
+    def row_index(self) -> Dict[str, int]:
+        if self._rows is None:
+            self._rows = {vehicle_id: row for row, vehicle_id in enumerate(self.ids)}
+        return self._rows
@@ -8,10 +8,14 @@ from dataclasses import dataclass
 # Add project root to path for config import
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.unified_config import UnifiedConfig, get_config
+from env.event_log import INFO, get_logger
 
-from .conflict_analyzer import ConflictAnalyzer
+from .conflict_analyzer import ConflictAnalyzer, count_conflicts
 from .mwis_solver import MWISSolver  
 from .deadlock_detector import IntersectionDeadlockDetector, DeadlockException
+from .wait_for_graph import lane_follow_edges
+
+log = get_logger('nash.solver')
 
 @dataclass
 class SimpleAgent:
@@ -64,95 +68,138 @@ class DeadlockNashSolver:
         self.conflict_analyzer = ConflictAnalyzer(self.solver_config)
         self.mwis_solver = MWISSolver(self.solver_config, training_mode=self.training_mode)
         self.deadlock_detector = IntersectionDeadlockDetector(self.solver_config)
+        self.world_map = None  # lane geometry for conflict trajectories (set_world_map)
+        
+        # Resolution cache: the last result is reused while the resolution key
+        # (candidate ids, bids, quantized states, entry-block flag) is unchanged
+        self._cached_resolution = None  # (key, created time, [(candidate index, action, rank)], num_conflicts)
+        self._last_adj: List = []  # conflict graph of the last fresh resolution (reused on cache hits)
         
         # Performance tracking
         self.stats = {
             'resolutions_completed': 0,
             'conflicts_resolved': 0,
             'deadlocks_prevented': 0,
+            'cycles_broken': 0,
             'total_processing_time': 0.0,
             'avg_processing_time': 0.0
         }
+        self.cache_stats = {'hits': 0, 'misses': 0, 'stale': 0}
 
     def update_max_go_agents(self, max_go_agents: int = None):
         """Update the maximum go agents limit"""
         self.max_go_agents = max_go_agents
         self.unified_config.mwis.max_go_agents = max_go_agents
         self.solver_config['max_go_agents'] = max_go_agents
+        self._cached_resolution = None
         limit_text = "unlimited" if max_go_agents is None else str(max_go_agents)
-        print(f"🔄 Nash solver: Updated MAX_GO_AGENTS to {limit_text}")
+        log.info("🔄 Nash solver: Updated MAX_GO_AGENTS to {}", limit_text)
+    
+    def set_world_map(self, world_map):
+        """Use the map's lane geometry for conflict path prediction"""
+        self.world_map = world_map
+        self.conflict_analyzer.set_world_map(world_map)
+        self._cached_resolution = None
     
     def update_config_params(self, **kwargs):
         """Update configuration parameters dynamically"""
         self.unified_config.update_from_drl_params(**kwargs)
         self.solver_config = self.unified_config.to_solver_config()
         
-        # Update component configs
+        # Update component configs (release the old MWIS worker pool first)
+        self.mwis_solver.close()
         self.conflict_analyzer = ConflictAnalyzer(self.solver_config)
         self.mwis_solver = MWISSolver(self.solver_config, training_mode=self.training_mode)
         self.deadlock_detector = IntersectionDeadlockDetector(self.solver_config)
+        self.conflict_analyzer.set_world_map(self.world_map)
+        self._cached_resolution = None
         
-        print(f"🔄 Nash solver: Configuration updated with {len(kwargs)} parameters")
+        log.info("🔄 Nash solver: Configuration updated with {} parameters", len(kwargs))
 
     def resolve(self, auction_winners: List, vehicle_states: Dict[str, Dict], 
-                platoon_manager=None) -> List:
+                platoon_manager=None, current_time: float = None) -> List:
         """
         Main resolution method with enhanced deadlock handling
+        
+        Args:
+            current_time: simulation time used for deadlock/flow-control timing
+                (defaults to wall clock for callers without a frame clock)
         """
         start_time = time.time()
-        current_time = start_time
+        if current_time is None:
+            current_time = start_time
         
-        # SPEED UP: Skip verbose logging in training mode
-        if not self.training_mode:
-            print(f"\n🧠 Nash Conflict Resolution Starting:")
-            print(f"   📊 Input: {len(auction_winners)} auction winners")
-            print(f"   🚗 Vehicle states: {len(vehicle_states)} vehicles")
+        log.info("🧠 Nash Conflict Resolution Starting:")
+        log.info("   📊 Input: {} auction winners", len(auction_winners))
+        log.info("   🚗 Vehicle states: {} vehicles", len(vehicle_states))
         
         try:
-            # 1. Check for deadlock first with enhanced detection
-            self._check_deadlock_enhanced(vehicle_states, current_time)
+            # 1. Check for deadlock first with enhanced detection (a wait-for cycle is broken below)
+            cycle = self._check_deadlock_enhanced(vehicle_states, current_time)
             
             # 2. Convert auction winners to candidates
             candidates = self._convert_winners_to_candidates(auction_winners)
             if not candidates:
-                if not self.training_mode:
-                    print("❌ No valid candidates for Nash resolution")
+                log.info("❌ No valid candidates for Nash resolution")
+                self._update_wait_for_graph([], [], [], vehicle_states, current_time)
                 return auction_winners
             
-            if not self.training_mode:
-                print(f"   🎯 Converted to {len(candidates)} Nash candidates")
+            log.info("   🎯 Converted to {} Nash candidates", len(candidates))
             
-            # 3. Build conflict graph
+            # 3. Extract weights (bid values) and update traffic flow control
+            weights = [self._extract_weight(c) for c in candidates]
+            self.mwis_solver.update_traffic_flow_control(vehicle_states, current_time)
+            
+            # 4. Reuse the previous resolution when nothing it depends on changed
+            key = None
+            if cycle is None and self.solver_config.get('resolution_cache', True):
+                key = self._resolution_key(candidates, weights, vehicle_states, platoon_manager)
+                resolved_winners = self._lookup_resolution(key, candidates, current_time)
+                if resolved_winners is not None:
+                    processing_time = time.time() - start_time
+                    self._update_stats(len(candidates), self._cached_resolution[3], processing_time)
+                    log.info("♻️ Nash resolution reused ({} winners unchanged)", len(resolved_winners))
+                    self._update_wait_for_graph(candidates, resolved_winners, self._last_adj,
+                                                vehicle_states, current_time)
+                    return resolved_winners
+            
+            # 5. Build conflict graph
             adj, conflict_analysis = self.conflict_analyzer.build_enhanced_conflict_graph(
                 candidates, vehicle_states, platoon_manager
             )
             
-            # 4. Extract weights (bid values)
-            weights = [self._extract_weight(c) for c in candidates]
-            
-            # 5. Apply MWIS with traffic flow control
-            self.mwis_solver.update_traffic_flow_control(vehicle_states, current_time)
+            # 6. Apply MWIS with traffic flow control
             selected_idx = self.mwis_solver.solve_mwis_adaptive(weights, adj, conflict_analysis)
             
-            # 6. Assemble winners with strict conflict resolution
+            # 7. Assemble winners with strict conflict resolution
             resolved_winners = self.mwis_solver.assemble_winners_with_traffic_control(
                 candidates, selected_idx, weights, conflict_analysis, vehicle_states
             )
+            if cycle is not None:
+                resolved_winners = self._release_from_cycle(
+                    candidates, resolved_winners, weights, adj, cycle, vehicle_states
+                )
+            self._last_adj = adj
+            self._update_wait_for_graph(candidates, resolved_winners, adj, vehicle_states, current_time)
             
-            # 7. Update statistics
+            # 8. Update statistics
             processing_time = time.time() - start_time
-            self._update_stats(len(candidates), sum(conflict_analysis.values()), processing_time)
+            num_conflicts = count_conflicts(conflict_analysis)
+            self._update_stats(len(candidates), num_conflicts, processing_time)
+            if key is not None:
+                self._store_resolution(key, candidates, resolved_winners, num_conflicts, current_time)
             
-            print(f"✅ Nash resolution completed in {processing_time:.3f}s")
-            print(f"   🟢 GO: {sum(1 for w in resolved_winners if w.conflict_action == 'go')}")
-            print(f"   🔴 WAIT: {sum(1 for w in resolved_winners if w.conflict_action == 'wait')}")
+            if log.enabled(INFO):
+                log.info("✅ Nash resolution completed in {:.3f}s", processing_time)
+                log.info("   🟢 GO: {}", sum(1 for w in resolved_winners if w.conflict_action == 'go'))
+                log.info("   🔴 WAIT: {}", sum(1 for w in resolved_winners if w.conflict_action == 'wait'))
             
             return resolved_winners
             
         except DeadlockException as e:
-            print(f"🚨 DEADLOCK DETECTED: {e}")
-            print(f"   Type: {getattr(e, 'deadlock_type', 'unknown')}")
-            print(f"   Affected vehicles: {getattr(e, 'affected_vehicles', 0)}")
+            log.warning("🚨 DEADLOCK DETECTED: {}", e)
+            log.warning("   Type: {}", getattr(e, 'deadlock_type', 'unknown'))
+            log.warning("   Affected vehicles: {}", getattr(e, 'affected_vehicles', 0))
             
             self.stats['deadlocks_prevented'] += 1
             
@@ -160,19 +207,117 @@ class DeadlockNashSolver:
             return self._create_enhanced_deadlock_resolution(auction_winners, e)
             
         except Exception as e:
-            print(f"❌ Nash resolution failed: {e}")
+            log.error("❌ Nash resolution failed: {}", e)
             return self._create_conservative_fallback(auction_winners)
 
-    def _check_deadlock_enhanced(self, vehicle_states: Dict[str, Dict], current_time: float):
-        """Enhanced deadlock checking with detailed exception info"""
+    def _check_deadlock_enhanced(self, vehicle_states: Dict[str, Dict], current_time: float) -> Optional[Tuple[str, ...]]:
+        """
+        Enhanced deadlock checking with detailed exception info
+        
+        Returns:
+            vehicle ids of a wait-for cycle to break this round (also when the
+            detection was triggered by another caller of the shared detector), or None
+        """
         try:
             if self.deadlock_detector.detect_deadlock(vehicle_states, current_time):
                 self.deadlock_detector.handle_deadlock_detection()
-        except DeadlockException:
-            # Re-raise with additional context
-            raise
+        except DeadlockException as e:
+            # Breakable wait-for cycles are resolved by releasing one vehicle; others re-raise
+            if not getattr(e, 'vehicles', None):
+                raise
         except Exception as e:
-            print(f"⚠️ Deadlock detection error: {e}")
+            log.warning("⚠️ Deadlock detection error: {}", e)
+        
+        cycle = self.deadlock_detector.take_pending_cycle()
+        if cycle is not None:
+            log.warning("🔁 Circular wait among {} vehicles: {}", len(cycle), ' -> '.join(cycle))
+        return cycle
+
+    def _agent_vehicle_ids(self, agent) -> List[str]:
+        """Vehicle ids of an agent, front vehicle first"""
+        vehicles = getattr(agent, 'vehicles', None)
+        if vehicles:
+            return [str(v.get('id')) for v in vehicles]
+        return [str(getattr(agent, 'id', agent))]
+
+    def _update_wait_for_graph(self, candidates: List, resolved_winners: List, adj: List,
+                               vehicle_states: Dict[str, Dict], current_time: float):
+        """Rebuild the detector's wait-for edges from this round's decisions and lane leaders"""
+        graph = self.deadlock_detector.wait_for_graph
+        if graph is None:
+            return
+        
+        speed_threshold = self.deadlock_detector.deadlock_speed_threshold
+        speed_2d = self.deadlock_detector._speed_2d
+        stalled = {vehicle_id for vehicle_id, state in vehicle_states.items()
+                   if state and speed_2d(state.get('velocity')) < speed_threshold}
+        
+        index_of = {id(candidate.participant): i for i, candidate in enumerate(candidates)}
+        actions = [None] * len(candidates)
+        for winner in resolved_winners:
+            i = index_of.get(id(winner.participant))
+            if i is not None:
+                actions[i] = winner.conflict_action
+        members = [self._agent_vehicle_ids(candidate.participant) for candidate in candidates]
+        in_junction = []
+        for vehicle_ids in members:
+            state = vehicle_states.get(vehicle_ids[0])
+            in_junction.append(bool(state and state.get('is_junction', False)))
+        
+        edges: Dict[str, set] = {}
+        # 决策边：停滞的WAIT智能体等待与其冲突的GO/路口内智能体；路口内停滞智能体等待路口内冲突者
+        if len(adj) == len(candidates):
+            for i, vehicle_ids in enumerate(members):
+                front = vehicle_ids[0]
+                if front not in stalled:
+                    continue
+                if actions[i] == 'wait':
+                    blockers = [j for j in adj[i] if actions[j] == 'go' or in_junction[j]]
+                elif in_junction[i]:
+                    blockers = [j for j in adj[i] if in_junction[j]]
+                else:
+                    continue
+                for j in blockers:
+                    edges.setdefault(front, set()).update(members[j])
+        
+        # 跟驰边：停滞车辆等待同车道前车
+        for follower, leader in lane_follow_edges(vehicle_states, stalled,
+                                                  self.deadlock_detector.wait_for_follow_gap).items():
+            edges.setdefault(follower, set()).add(leader)
+        
+        graph.update(edges, current_time)
+
+    def _release_from_cycle(self, candidates: List, resolved_winners: List, weights: List[float],
+                            adj: List, cycle: Tuple[str, ...], vehicle_states: Dict[str, Dict]) -> List:
+        """Break a wait-for cycle: the highest-bid candidate in it goes, its conflicting entrants wait"""
+        cycle_set = set(cycle)
+        in_cycle = [i for i, candidate in enumerate(candidates)
+                    if self._agent_vehicle_ids(candidate.participant)[0] in cycle_set]
+        if not in_cycle:
+            log.warning("⚠️ Wait-for cycle has no candidate this round - nothing to release")
+            return resolved_winners
+        
+        released = max(in_cycle, key=lambda i: (weights[i], -i))
+        overrides = {released: 'go'}
+        for j in adj[released]:
+            state = vehicle_states.get(self._agent_vehicle_ids(candidates[j].participant)[0])
+            # 已在路口内的车辆无法停下，保持原动作
+            if not (state and state.get('is_junction', False)):
+                overrides[j] = 'wait'
+        
+        index_of = {id(candidate.participant): i for i, candidate in enumerate(candidates)}
+        result = []
+        for winner in resolved_winners:
+            action = overrides.get(index_of.get(id(winner.participant)))
+            if action is not None and action != winner.conflict_action:
+                winner = self._copy_winner_with_action(winner, action)
+            result.append(winner)
+        
+        self.stats['cycles_broken'] += 1
+        agent = candidates[released].participant
+        log.warning("🔓 Released {} {} from wait-for cycle ({} conflicting agents held)",
+                    getattr(agent, 'type', 'vehicle'), getattr(agent, 'id', agent), len(overrides) - 1)
+        return result
 
     def _convert_winners_to_candidates(self, auction_winners: List) -> List:
         """Convert auction winners to Nash solver candidates"""
@@ -190,6 +335,58 @@ class DeadlockNashSolver:
         
         return candidates
 
+    def _resolution_key(self, candidates: List, weights: List[float], vehicle_states: Dict[str, Dict],
+                        platoon_manager=None) -> Tuple:
+        """Candidate ids, bid values, quantized leader states and entry-block flag"""
+        bucket = self.solver_config.get('resolution_cache_position_bucket', 1.0)
+        entries = []
+        for candidate, weight in zip(candidates, weights):
+            agent = candidate.participant
+            members = tuple(str(v.get('id')) for v in (getattr(agent, 'vehicles', None) or ()))
+            state = self.conflict_analyzer._lookup_state(agent, vehicle_states, platoon_manager)
+            if state and 'location' in state:
+                loc = state['location']
+                velocity = state.get('velocity') or (0.0, 0.0, 0.0)
+                moving = abs(velocity[0]) > 1e-3 or abs(velocity[1]) > 1e-3
+                quantized = (state.get('road_id'), state.get('lane_id'),
+                             int(loc[0] // bucket), int(loc[1] // bucket), moving)
+            else:
+                quantized = None
+            entries.append((getattr(agent, 'type', 'vehicle'), str(getattr(agent, 'id', agent)),
+                            members, weight, quantized))
+        return tuple(entries), self.mwis_solver.region_entry_blocked
+
+    def _lookup_resolution(self, key: Tuple, candidates: List, current_time: float) -> Optional[List]:
+        """Winners of the cached resolution for ``key``, or None (miss or older than the staleness bound)"""
+        cached = self._cached_resolution
+        if cached is None or cached[0] != key:
+            self.cache_stats['misses'] += 1
+            return None
+        if current_time - cached[1] > self.solver_config.get('resolution_cache_max_age', 2.0):
+            self.cache_stats['stale'] += 1
+            return None
+        self.cache_stats['hits'] += 1
+        return [self.mwis_solver._to_winner(candidates[i], action, rank) for i, action, rank in cached[2]]
+
+    def _store_resolution(self, key: Tuple, candidates: List, resolved_winners: List,
+                          num_conflicts: int, current_time: float):
+        index_of = {id(candidate.participant): i for i, candidate in enumerate(candidates)}
+        entries = []
+        for winner in resolved_winners:
+            i = index_of.get(id(winner.participant))
+            if i is None:
+                self._cached_resolution = None
+                return
+            entries.append((i, winner.conflict_action, winner.rank))
+        self._cached_resolution = (key, current_time, entries, num_conflicts)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Resolution cache hits / misses / stale entries and hit rate"""
+        lookups = sum(self.cache_stats.values())
+        stats = dict(self.cache_stats)
+        stats['hit_rate'] = self.cache_stats['hits'] / lookups if lookups else 0.0
+        return stats
+
     def _extract_weight(self, candidate) -> float:
         """Extract weight (bid value) from candidate"""
         if hasattr(candidate, 'bid') and candidate.bid:
@@ -208,9 +405,13 @@ class DeadlockNashSolver:
             resolved_winner = self._copy_winner_with_action(winner, 'wait')
             resolved_winners.append(resolved_winner)
         
-        print(f"🚨 Deadlock resolution: All {len(resolved_winners)} agents set to WAIT")
+        log.warning("🚨 Deadlock resolution: All {} agents set to WAIT", len(resolved_winners))
         return resolved_winners
 
+    def _create_enhanced_deadlock_resolution(self, auction_winners: List, deadlock: DeadlockException) -> List:
+        """Resolution for a deadlock that cannot be broken by releasing one vehicle"""
+        return self._create_deadlock_resolution(auction_winners)
+
     def _create_conservative_fallback(self, auction_winners: List) -> List:
         """Create conservative fallback when Nash resolution fails"""
         resolved_winners = []
@@ -231,7 +432,7 @@ class DeadlockNashSolver:
         go_count = sum(1 for w in resolved_winners if w.conflict_action == 'go')
         wait_count = len(resolved_winners) - go_count
         limit_text = "unlimited" if self.max_go_agents is None else str(self.max_go_agents)
-        print(f"⚠️ Conservative fallback: {go_count} agents GO, {wait_count} WAIT (limit: {limit_text})")
+        log.warning("⚠️ Conservative fallback: {} agents GO, {} WAIT (limit: {})", go_count, wait_count, limit_text)
         return resolved_winners
 
     def _copy_winner_with_action(self, original_winner, action: str):
@@ -263,6 +464,10 @@ class DeadlockNashSolver:
             self.stats['total_processing_time'] / self.stats['resolutions_completed']
         )
 
+    def close(self):
+        """Release solver resources (MWIS worker pool)"""
+        self.mwis_solver.close()
+
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get comprehensive performance statistics"""
         combined_stats = dict(self.stats)
@@ -270,7 +475,11 @@ class DeadlockNashSolver:
         # Add component-specific stats
         combined_stats.update({
             'mwis_stats': self.mwis_solver.stats,
+            'mwis_component_histogram': dict(sorted(self.mwis_solver.component_sizes.items())),
+            'mwis_anytime': self.mwis_solver.get_anytime_stats(),
+            'conflict_graph_stats': self.conflict_analyzer.get_stats(),
             'deadlock_stats': self.deadlock_detector.get_stats(),
+            'resolution_cache': self.get_cache_stats(),
             'solver_config': self.solver_config.copy()
         })
         
@@ -282,21 +491,28 @@ class DeadlockNashSolver:
             'resolutions_completed': 0,
             'conflicts_resolved': 0,
             'deadlocks_prevented': 0,
+            'cycles_broken': 0,
             'total_processing_time': 0.0,
             'avg_processing_time': 0.0
         }
+        self.cache_stats = {'hits': 0, 'misses': 0, 'stale': 0}
         
         # Reset component stats
         if hasattr(self.mwis_solver, 'stats'):
             for key in self.mwis_solver.stats:
                 self.mwis_solver.stats[key] = 0
+            self.mwis_solver.component_sizes.clear()
+            self.mwis_solver.last_call = {}
+        
+        for key in self.conflict_analyzer.stats:
+            self.conflict_analyzer.stats[key] = 0
         
         if hasattr(self.deadlock_detector, 'stats'):
             for key in self.deadlock_detector.stats:
                 self.deadlock_detector.stats[key] = 0
         
         self.deadlock_detector.reset_history()
-        print("🔄 Nash solver: All statistics reset")
+        log.info("🔄 Nash solver: All statistics reset")
 
     # Integration methods for external systems
     def handle_deadlock(self, agents: List[SimpleAgent], current_time: float) -> Dict[str, str]:
@@ -323,7 +539,7 @@ class DeadlockNashSolver:
             return {agent.id: 'go' for agent in agents}
             
         except Exception as e:
-            print(f"[Warning] Legacy deadlock handling failed: {e}")
+            log.warning("[Warning] Legacy deadlock handling failed: {}", e)
             return {agent.id: 'wait' for agent in agents}
 
 @dataclass  
@@ -0,0 +1,362 @@
+"""
+车道几何路径缓存 (Lane-following junction paths)
+
+Paths through the junction are taken from the map's lane geometry instead
+of the 3-point ``position -> center -> exit`` approximation:
+
+- one chain per (road_id, lane_id, exit arm), shared by all arms when the
+  lane has no branch ahead (connectors, exit lanes): from up to
+  ``approach_length`` behind the first vehicle seen on the lane,
+  ``waypoint.next(step)`` is followed through the junction connector whose
+  heading leaves by the requested arm, up to ``exit_length`` past the
+  junction; the junction is the first one within ``zone_radius`` of the
+  intersection center, and a chain already leaving the center (exit lanes)
+  stops at once
+- the chain is stored as an (N, 2) array sampled every ``step`` metres with
+  its cumulative arc length and the index from which samples can conflict
+  with other movements (junction connector and exit tail)
+- ``warm_up`` builds the chains of all lanes entering the junction and of
+  its connectors from the map topology; other lanes are built on first
+  lookup
+- ``locate`` projects a vehicle onto its chain: the nearest sample is
+  searched among the samples of the surrounding grid cells (cell size
+  ``step``), with one argmin over the cached array only when the vehicle
+  is farther than a cell from the chain; ``close_samples`` gives the
+  conflict-zone sample pairs of two chains within the path threshold,
+  computed once per chain pair, and ``close_pairs`` the same pairs sorted by
+  arc length on the first chain, so the per-round space-time test only
+  compares arrival times on the pairs ahead of the vehicle
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from env.event_log import get_logger
+
+log = get_logger('nash.lane_paths')
+
+_MISSING = object()
+
+
+class LanePath:
+    """One sampled chain: points, arc length, first conflict-zone index and zone bounding box"""
+
+    __slots__ = ('chain_id', 'points', 'arc', 'arcs', 'zone_start', 'zone_bounds', 'xy', 'cell', 'neighbors')
+
+    def __init__(self, chain_id: int, points: np.ndarray, zone_start: int, step: float, cell: float):
+        self.chain_id = chain_id
+        self.points = points
+        self.arc = np.arange(len(points), dtype=float) * step
+        self.arcs = self.arc.tolist()  # 同一弧长的Python浮点列表（逐车查询时避免NumPy标量开销）
+        self.zone_start = zone_start
+        self.zone_bounds = None  # (x_min, y_min, x_max, y_max) of the conflict zone
+        if zone_start < len(points):
+            (x_min, y_min), (x_max, y_max) = points[zone_start:].min(axis=0), points[zone_start:].max(axis=0)
+            self.zone_bounds = (float(x_min), float(y_min), float(x_max), float(y_max))
+        # 网格索引：格 -> 本格及相邻8格内的采样点下标（升序），用于最近点查找
+        self.xy = [(float(x), float(y)) for x, y in points]
+        self.cell = cell
+        neighbors: Dict[Tuple[int, int], List[int]] = {}
+        for index, (x, y) in enumerate(self.xy):
+            cx, cy = math.floor(x / cell), math.floor(y / cell)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    neighbors.setdefault((cx + dx, cy + dy), []).append(index)
+        self.neighbors = {key: tuple(indices) for key, indices in neighbors.items()}
+
+    def nearest(self, x: float, y: float) -> Tuple[int, float]:
+        """Index of the nearest sample (lowest index on ties) and its squared distance"""
+        best, best_d2 = -1, math.inf
+        xy = self.xy
+        for index in self.neighbors.get((math.floor(x / self.cell), math.floor(y / self.cell)), ()):
+            px, py = xy[index]
+            dx, dy = px - x, py - y
+            d2 = dx * dx + dy * dy
+            if d2 < best_d2:
+                best, best_d2 = index, d2
+        if best_d2 <= self.cell * self.cell:
+            # 相邻格覆盖了一个格宽内的全部采样点，因此这就是全局最近点
+            return best, best_d2
+        delta = self.points - (x, y)
+        d2 = np.einsum('ij,ij->i', delta, delta)
+        best = int(d2.argmin())
+        return best, float(d2[best])
+
+
+class LanePathCache:
+    """Sampled lane-following paths through the junction, cached per entry lane and exit arm"""
+
+    MATCH_DISTANCE = 3.0  # 车辆到路径采样点的最大距离（米），超出视为不在该车道链上
+
+    def __init__(self, world_map, center: Tuple[float, float, float], zone_radius: float = 40.0,
+                 step: float = 1.0, approach_length: float = 40.0, exit_length: float = 10.0,
+                 max_length: float = 400.0):
+        self.world_map = world_map
+        self.center = center
+        self.zone_radius = zone_radius
+        self.step = step
+        self.approach_length = approach_length
+        self.exit_length = exit_length
+        self.max_length = max_length
+        self._paths: Dict[Tuple, Optional[LanePath]] = {}  # (road_id, lane_id, exit arm or None) -> chain
+        self._chains: List[LanePath] = []
+        # (chain_a, chain_b) -> arc lengths of the zone sample pairs within the threshold
+        self._close: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+        # (chain_a, chain_b) -> the same pairs sorted by arc length on chain_a (bisect keys, pairs)
+        self._pairs: Dict[Tuple[int, int], Tuple[List[float], List[Tuple[float, float]]]] = {}
+        self._close_threshold = None
+        self.stats = {
+            'lookups': 0,
+            'builds': 0,
+            'unmatched': 0,
+            'chain_pairs': 0,
+        }
+
+    def locate(self, location: Tuple[float, float, float], road_id, lane_id, exit_arm: str,
+               exit_vector: Tuple[float, float]) -> Optional[Tuple[LanePath, float, float]]:
+        """
+        Chain of a vehicle and its position on it: (chain, arc length of the
+        nearest sample, arc length of the vehicle itself). The vehicle's is
+        smaller when it is upstream of the cached chain start.
+
+        Returns None when no lane path is available (no waypoint, or the
+        vehicle is not on the cached chain).
+        """
+        self.stats['lookups'] += 1
+        path = self._paths.get((road_id, lane_id, None), _MISSING)
+        if path is _MISSING:
+            path = self._paths.get((road_id, lane_id, exit_arm), _MISSING)
+        if path is _MISSING:
+            path = self._build_and_store(self._waypoint_at(location), road_id, lane_id, exit_arm, exit_vector)
+        if path is None:
+            return None
+
+        idx, d2 = path.nearest(location[0], location[1])
+        offset = 0.0
+        if d2 > self.MATCH_DISTANCE ** 2:
+            # 车辆位于缓存链起点上游：沿首段方向补齐距离，否则不在该车道链上
+            along, lateral = self._upstream_offset(path.points, location)
+            if idx != 0 or along is None or lateral > self.MATCH_DISTANCE:
+                self.stats['unmatched'] += 1
+                return None
+            offset = along
+        start = path.arcs[idx]
+        return path, start, start - offset
+
+    def close_samples(self, path_a: LanePath, path_b: LanePath,
+                      threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Arc lengths (on a, on b) of conflict-zone sample pairs closer than ``threshold``"""
+        if threshold != self._close_threshold:
+            self._close.clear()
+            self._pairs.clear()
+            self._close_threshold = threshold
+        if path_a.chain_id > path_b.chain_id:
+            arc_b, arc_a = self.close_samples(path_b, path_a, threshold)
+            return arc_a, arc_b
+        key = (path_a.chain_id, path_b.chain_id)
+        cached = self._close.get(key)
+        if cached is None:
+            zone_a = path_a.points[path_a.zone_start:]
+            zone_b = path_b.points[path_b.zone_start:]
+            delta = zone_a[:, None, :] - zone_b[None, :, :]
+            ia, ib = np.nonzero(np.einsum('ijk,ijk->ij', delta, delta) < threshold * threshold)
+            cached = (path_a.arc[path_a.zone_start + ia], path_b.arc[path_b.zone_start + ib])
+            self._close[key] = cached
+            self.stats['chain_pairs'] += 1
+        return cached
+
+    def close_pairs(self, path_a: LanePath, path_b: LanePath,
+                    threshold: float) -> Tuple[List[float], List[Tuple[float, float]]]:
+        """
+        ``close_samples`` as (arc on a, arc on b) pairs sorted by the arc on
+        a, with the sorted arcs on a as bisect keys: the pairs ahead of a
+        vehicle at arc ``s`` on a are ``pairs[bisect_left(keys, s):]``.
+        """
+        key = (path_a.chain_id, path_b.chain_id)
+        cached = self._pairs.get(key) if threshold == self._close_threshold else None
+        if cached is None:
+            arc_a, arc_b = self.close_samples(path_a, path_b, threshold)
+            pairs = sorted(zip(arc_a.tolist(), arc_b.tolist()))
+            cached = ([arc for arc, _ in pairs], pairs)
+            self._pairs[key] = cached
+        return cached
+
+    def warm_up(self, exit_vectors: Dict[str, Tuple[float, float]]) -> int:
+        """
+        Build the chains of every lane entering the junction (for each exit
+        arm) and of its connectors up front from the map topology, so
+        auction rounds only do lookups. Returns the number of chains built.
+        """
+        try:
+            topology = self.world_map.get_topology()
+        except Exception as e:
+            log.warning("[Warning] Lane path warm-up skipped: {}", e)
+            return 0
+        built = self.stats['builds']
+        for lane_start, lane_end in topology:
+            if lane_start.is_junction:
+                # 路口内连接段：无分支，与出口方向无关
+                if self._in_zone(lane_start) or self._in_zone(lane_end):
+                    self._warm_lane(lane_start, exit_vectors)
+            elif any(self._in_zone(wp) for wp in lane_end.next(self.step)):
+                self._warm_lane(lane_end, exit_vectors)
+        return self.stats['builds'] - built
+
+    def warm_up_pairs(self, threshold: float):
+        """Precompute ``close_pairs`` (both orders) for every pair of built chains whose zones can meet"""
+        chains = [path for path in self._chains if path.zone_bounds is not None]
+        for a, path_a in enumerate(chains):
+            for path_b in chains[a:]:
+                if self.boxes_overlap(path_a.zone_bounds, path_b.zone_bounds, threshold):
+                    self.close_pairs(path_a, path_b, threshold)
+                    self.close_pairs(path_b, path_a, threshold)
+
+    def clear(self):
+        self._paths.clear()
+        self._chains.clear()
+        self._close.clear()
+        self._pairs.clear()
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['cached_paths'] = len(self._chains)
+        return stats
+
+    @staticmethod
+    def boxes_overlap(box_a: Tuple, box_b: Tuple, margin: float) -> bool:
+        """(x_min, y_min, x_max, y_max) boxes come within ``margin`` of each other"""
+        return not (box_a[0] - margin > box_b[2] or box_b[0] - margin > box_a[2] or
+                    box_a[1] - margin > box_b[3] or box_b[1] - margin > box_a[3])
+
+    # ----- 路径构建 -----
+    def _warm_lane(self, waypoint, exit_vectors: Dict[str, Tuple[float, float]]):
+        for exit_arm, exit_vector in exit_vectors.items():
+            if (waypoint.road_id, waypoint.lane_id, None) in self._paths:
+                return
+            if (waypoint.road_id, waypoint.lane_id, exit_arm) not in self._paths:
+                self._build_and_store(waypoint, waypoint.road_id, waypoint.lane_id, exit_arm, exit_vector)
+
+    def _in_zone(self, waypoint) -> bool:
+        """Waypoint lies in the junction around the intersection center"""
+        loc = waypoint.transform.location
+        return waypoint.is_junction and \
+            math.hypot(loc.x - self.center[0], loc.y - self.center[1]) <= self.zone_radius
+
+    def _waypoint_at(self, location: Tuple[float, float, float]):
+        try:
+            import carla
+            return self.world_map.get_waypoint(carla.Location(x=location[0], y=location[1], z=location[2]))
+        except Exception as e:
+            log.warning("[Warning] Lane path waypoint lookup failed: {}", e)
+            return None
+
+    def _build_and_store(self, waypoint, road_id, lane_id, exit_arm: str,
+                         exit_vector: Tuple[float, float]) -> Optional[LanePath]:
+        """Build one chain; chains without a branch choice are shared by all exit arms"""
+        path, branched = None, True
+        if waypoint is not None:
+            points, zone_start, branched = self._build(waypoint, exit_vector)
+            path = LanePath(len(self._chains), points, zone_start, self.step, self.step)
+            self._chains.append(path)
+        self._paths[(road_id, lane_id, exit_arm if branched else None)] = path
+        self.stats['builds'] += 1
+        return path
+
+    def _build(self, waypoint, exit_vector: Tuple[float, float]) -> Tuple[np.ndarray, int, bool]:
+        """
+        Sample the lane chain from ``waypoint`` through the junction that
+        leaves along ``exit_vector``. Returns the points, the first
+        conflict-zone index and whether a branch had to be chosen.
+        """
+        # 回溯到进口道上游（不跨入上一个路口，航向偏离超过45°即停止）
+        behind = []
+        heading = math.radians(waypoint.transform.rotation.yaw)
+        wp = waypoint
+        while len(behind) * self.step < self.approach_length:
+            previous = wp.previous(self.step)
+            if len(previous) != 1 or (previous[0].is_junction and not wp.is_junction):
+                break
+            yaw = math.radians(previous[0].transform.rotation.yaw)
+            if math.cos(yaw - heading) < math.cos(math.radians(45.0)):
+                break
+            wp = previous[0]
+            behind.append(wp)
+
+        points, junction = [], []
+        for wp in reversed(behind):
+            loc = wp.transform.location
+            points.append((loc.x, loc.y))
+            junction.append(self._in_zone(wp))
+        passed_junction = any(junction)
+        branched = False
+
+        # 沿车道向前：经过路口，直到出口段末端
+        wp = waypoint
+        length = tail = 0.0
+        last_distance = math.inf
+        while True:
+            loc = wp.transform.location
+            distance = math.hypot(loc.x - self.center[0], loc.y - self.center[1])
+            in_zone = wp.is_junction and distance <= self.zone_radius
+            points.append((loc.x, loc.y))
+            junction.append(in_zone)
+            if in_zone:
+                passed_junction = True
+            elif not passed_junction and distance > self.zone_radius and distance > last_distance:
+                break  # 远离路口中心：不会再经过本路口
+            elif passed_junction:
+                tail += self.step
+                if tail > self.exit_length:
+                    break
+            if length >= self.max_length:
+                break
+            following = wp.next(self.step)
+            if not following:
+                break
+            if len(following) > 1:
+                wp = self._choose_branch(following, exit_vector)
+                branched = True
+            else:
+                wp = following[0]
+            length += self.step
+            last_distance = distance
+
+        # 冲突区：路口内连接段及其后的出口段（汇入同一出口车道的冲突）
+        in_junction = np.flatnonzero(junction)
+        zone_start = int(in_junction[0]) if len(in_junction) else len(points)
+        return np.array(points, dtype=float), zone_start, branched
+
+    def _choose_branch(self, branches, exit_vector: Tuple[float, float]):
+        """Branch whose heading at the junction exit is closest to ``exit_vector``"""
+        best, best_score = branches[0], -math.inf
+        for branch in branches:
+            end = branch
+            travelled = 0.0
+            while end.is_junction and travelled < self.max_length:
+                following = end.next(self.step)
+                if not following:
+                    break
+                end = following[0]
+                travelled += self.step
+            yaw = math.radians(end.transform.rotation.yaw)
+            score = math.cos(yaw) * exit_vector[0] + math.sin(yaw) * exit_vector[1]
+            if score > best_score:
+                best, best_score = branch, score
+        return best
+
+    @staticmethod
+    def _upstream_offset(points: np.ndarray, location) -> Tuple[Optional[float], float]:
+        """Distance behind the chain start along its first segment, and lateral offset"""
+        if len(points) < 2:
+            return None, math.inf
+        direction = points[1] - points[0]
+        norm = math.hypot(direction[0], direction[1])
+        if norm < 1e-6:
+            return None, math.inf
+        ux, uy = direction / norm
+        rx, ry = location[0] - points[0, 0], location[1] - points[0, 1]
+        along = rx * ux + ry * uy
+        lateral = abs(rx * uy - ry * ux)
+        return (-along if along < 0 else None), lateral
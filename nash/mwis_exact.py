@@ -0,0 +1,311 @@
+"""
+精确MWIS求解器 (Exact maximum-weight independent set)
+
+Branch-and-bound over integer bitmask adjacency, replacing the 2^n subset
+enumeration of the original exact solver:
+
+- vertices are bits, ``nbr[i]`` is the neighbour mask of vertex i
+- the graph is split into connected components, each solved on its own;
+  component solutions are memoized on (weights, relabelled adjacency) so
+  repeated conflict clusters across auction rounds are free
+- inside a component: isolated vertices are taken immediately, the branch
+  vertex is the one with the most neighbours still in play, and a greedy
+  weighted clique cover (each clique contributes its heaviest vertex) is the
+  upper bound used to prune
+
+Anytime use: ``solve`` accepts a ``deadline`` (``time.perf_counter()``
+value) and an initial selection. The incumbent (best of the initial and the
+greedy weight/degree solution) is first improved by 1-swap/2-swap local
+search, then branch-and-bound runs until it completes or the deadline
+passes; the best independent set found so far is returned. ``last_bound``
+and ``last_complete`` describe the optimality of the last call.
+
+Only vertices with positive weight can improve a solution; ties keep the
+first solution found.
+"""
+
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Set, Tuple
+
+_EPS = 1e-9
+
+
+class _DeadlineReached(Exception):
+    pass
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def _bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def to_bitsets(adj: Sequence[Set[int]]) -> List[int]:
+    """Symmetric neighbour bitmasks from adjacency sets (self-loops ignored)"""
+    nbr = [0] * len(adj)
+    for i, neighbors in enumerate(adj):
+        for j in neighbors:
+            if j != i:
+                nbr[i] |= 1 << j
+                nbr[j] |= 1 << i
+    return nbr
+
+
+def connected_components(mask: int, nbr: Sequence[int]) -> List[int]:
+    """Connected components of the subgraph induced by ``mask``, as bitmasks"""
+    components = []
+    while mask:
+        component = frontier = mask & -mask
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            new = nbr[low.bit_length() - 1] & mask & ~component
+            component |= new
+            frontier |= new
+        components.append(component)
+        mask &= ~component
+    return components
+
+
+def clique_cover_bound(weights: Sequence[float], nbr: Sequence[int], cand: int,
+                       by_weight: Optional[Sequence[int]] = None) -> float:
+    """
+    MWIS upper bound on the vertices in ``cand``: greedy weighted clique cover
+    (an independent set holds at most one vertex per clique)
+    """
+    if by_weight is None:
+        by_weight = sorted(_bits(cand), key=lambda v: weights[v], reverse=True)
+    cliques = []
+    bound = 0.0
+    for v in by_weight:
+        if not (cand >> v) & 1:
+            continue
+        for k, clique in enumerate(cliques):
+            if clique & ~nbr[v] == 0:
+                cliques[k] = clique | (1 << v)
+                break
+        else:
+            cliques.append(1 << v)
+            bound += weights[v]
+    return bound
+
+
+def _mask_weight(weights: Sequence[float], mask: int) -> float:
+    return sum(weights[v] for v in _bits(mask))
+
+
+def local_search(weights: Sequence[float], nbr: Sequence[int], cand: int, chosen: int,
+                 deadline: Optional[float] = None) -> int:
+    """
+    Improve an independent set ``chosen`` within ``cand`` by (1, k)-swaps
+    (add one vertex, drop its chosen neighbours) and, when those are
+    exhausted, (2, k)-swaps on non-adjacent pairs, until no swap gains or
+    the deadline passes.
+    """
+    order = sorted(_bits(cand), key=lambda v: weights[v], reverse=True)
+
+    improved = True
+    while improved and (deadline is None or time.perf_counter() <= deadline):
+        improved = False
+        for v in order:
+            if not (chosen >> v) & 1 and weights[v] - _mask_weight(weights, nbr[v] & chosen) > _EPS:
+                chosen = (chosen & ~nbr[v]) | (1 << v)
+                improved = True
+            if deadline is not None and time.perf_counter() > deadline:
+                return chosen
+        if improved:
+            continue
+
+        free = [v for v in order if not (chosen >> v) & 1]
+        for a, u in enumerate(free):
+            if deadline is not None and time.perf_counter() > deadline:
+                return chosen
+            for v in free[a + 1:]:
+                if (nbr[u] >> v) & 1:
+                    continue
+                dropped = (nbr[u] | nbr[v]) & chosen
+                if weights[u] + weights[v] - _mask_weight(weights, dropped) > _EPS:
+                    chosen = (chosen & ~dropped) | (1 << u) | (1 << v)
+                    improved = True
+                    break
+            if improved:
+                break
+    return chosen
+
+
+class ExactMWISSolver:
+    """Bitset branch-and-bound MWIS with per-component memoization and optional deadline"""
+
+    def __init__(self, memo_size: int = 256):
+        self.memo_size = memo_size
+        self._memo: 'OrderedDict[Tuple, Tuple[int, ...]]' = OrderedDict()
+        self.last_bound = 0.0      # 上一次调用的最优值上界（完成时等于解的权重）
+        self.last_complete = True  # 上一次调用是否在截止时间前证明最优
+        self.stats = {
+            'calls': 0,
+            'components_solved': 0,
+            'memo_hits': 0,
+            'bnb_nodes': 0,
+            'timeouts': 0,
+        }
+
+    def solve(self, weights: Sequence[float], adj: Sequence[Set[int]],
+              deadline: Optional[float] = None, initial: Optional[Sequence[int]] = None) -> List[int]:
+        """
+        Indices of a maximum-weight independent set, ascending.
+
+        Args:
+            deadline: ``time.perf_counter()`` value after which the best set
+                found so far is returned (None = solve to optimality)
+            initial: independent set used to seed the incumbent
+        """
+        self.stats['calls'] += 1
+        nbr = to_bitsets(adj)
+        active = 0
+        for i, weight in enumerate(weights):
+            if weight > 0:
+                active |= 1 << i
+        initial_mask = 0
+        for i in initial or ():
+            initial_mask |= 1 << i
+
+        selected = []
+        self.last_bound = 0.0
+        self.last_complete = True
+        for component in connected_components(active, nbr):
+            vertices = list(_bits(component))
+            if len(vertices) == 1:
+                selected.extend(vertices)
+                self.last_bound += weights[vertices[0]]
+                continue
+            positions, bound, complete = self._solve_component(vertices, weights, nbr, deadline, initial_mask)
+            selected.extend(vertices[k] for k in positions)
+            self.last_bound += bound
+            self.last_complete = self.last_complete and complete
+        if not self.last_complete:
+            self.stats['timeouts'] += 1
+        return sorted(selected)
+
+    # ----- 单连通分量 -----
+    def _solve_component(self, vertices: List[int], weights: Sequence[float], nbr: Sequence[int],
+                         deadline: Optional[float], initial_mask: int) -> Tuple[Tuple[int, ...], float, bool]:
+        """Local positions (into ``vertices``) of the component's MWIS, its upper bound and completeness"""
+        position = {v: k for k, v in enumerate(vertices)}
+        local_nbr = tuple(
+            sum(1 << position[u] for u in _bits(nbr[v]) if u in position) for v in vertices
+        )
+        local_weights = tuple(float(weights[v]) for v in vertices)
+
+        key = (local_weights, local_nbr)
+        cached = self._memo.get(key)
+        if cached is not None:
+            self._memo.move_to_end(key)
+            self.stats['memo_hits'] += 1
+            return cached, sum(local_weights[k] for k in cached), True
+
+        local_initial = sum(1 << position[v] for v in _bits(initial_mask) if v in position)
+        self.stats['components_solved'] += 1
+        result, bound, complete = self._branch_and_bound(local_weights, local_nbr, deadline, local_initial)
+        if complete:
+            self._memo[key] = result
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return result, bound, complete
+
+    def _branch_and_bound(self, weights: Tuple[float, ...], nbr: Tuple[int, ...],
+                          deadline: Optional[float] = None,
+                          initial: int = 0) -> Tuple[Tuple[int, ...], float, bool]:
+        n = len(weights)
+        full = (1 << n) - 1
+        by_weight = sorted(range(n), key=lambda v: weights[v], reverse=True)
+
+        # 初始解：贪心解与传入解中较优者，再做局部搜索
+        best_weight, best_mask = self._greedy(weights, nbr, full)
+        if initial and self._independent(initial, nbr):
+            initial_weight = _mask_weight(weights, initial)
+            if initial_weight > best_weight:
+                best_weight, best_mask = initial_weight, initial
+        if deadline is not None:
+            best_mask = local_search(weights, nbr, full, best_mask, deadline)
+            best_weight = _mask_weight(weights, best_mask)
+
+        root_bound = clique_cover_bound(weights, nbr, full, by_weight)
+        nodes = 0
+
+        def expand(cand: int, weight: float, chosen: int):
+            nonlocal best_weight, best_mask, nodes
+            nodes += 1
+            if deadline is not None and time.perf_counter() > deadline:
+                raise _DeadlineReached()
+
+            # 候选集中无冲突的顶点直接选入
+            isolated = 0
+            for v in _bits(cand):
+                if nbr[v] & cand == 0:
+                    isolated |= 1 << v
+                    weight += weights[v]
+            cand &= ~isolated
+            chosen |= isolated
+
+            if not cand:
+                if weight > best_weight:
+                    best_weight, best_mask = weight, chosen
+                return
+            if weight + clique_cover_bound(weights, nbr, cand, by_weight) <= best_weight:
+                return
+
+            branch = max(_bits(cand), key=lambda v: (_popcount(nbr[v] & cand), weights[v]))
+            bit = 1 << branch
+            expand(cand & ~nbr[branch] & ~bit, weight + weights[branch], chosen | bit)
+            expand(cand & ~bit, weight, chosen)
+
+        complete = True
+        if best_weight < root_bound - _EPS:
+            try:
+                expand(full, 0.0, 0)
+            except _DeadlineReached:
+                complete = False
+        self.stats['bnb_nodes'] += nodes
+        bound = best_weight if complete else max(root_bound, best_weight)
+        return tuple(_bits(best_mask)), bound, complete
+
+    @staticmethod
+    def _independent(mask: int, nbr: Tuple[int, ...]) -> bool:
+        return all(nbr[v] & mask == 0 for v in _bits(mask))
+
+    @staticmethod
+    def _greedy(weights: Tuple[float, ...], nbr: Tuple[int, ...], cand: int) -> Tuple[float, int]:
+        """Weight/degree greedy solution used as the initial incumbent"""
+        order = sorted(_bits(cand), key=lambda v: weights[v] / max(_popcount(nbr[v]), 1), reverse=True)
+        chosen = excluded = 0
+        weight = 0.0
+        for v in order:
+            if not (excluded >> v) & 1:
+                chosen |= 1 << v
+                excluded |= nbr[v] | (1 << v)
+                weight += weights[v]
+        return weight, chosen
+
+
+def solve_mwis_exact(weights: Sequence[float], adj: Sequence[Set[int]],
+                     time_budget: Optional[float] = None,
+                     wall_deadline: Optional[float] = None) -> Tuple[List[int], float, bool]:
+    """
+    Stateless solve (picklable entry point for worker processes).
+    Returns (selection, upper bound, proven optimal). perf_counter deadlines
+    do not cross processes, so the limit is either a budget in seconds or an
+    absolute ``time.time()`` deadline; the latter also charges worker
+    startup and queueing against the caller's deadline.
+    """
+    solver = ExactMWISSolver(memo_size=0)
+    if wall_deadline is not None:
+        time_budget = max(wall_deadline - time.time(), 0.0)
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    selected = solver.solve(weights, adj, deadline=deadline)
+    return selected, solver.last_bound, solver.last_complete
@@ -1,6 +1,19 @@
 import math
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import List, Dict, Tuple, Set, Optional
 
+from env.event_log import INFO, get_logger
+
+from .conflict_analyzer import count_conflicts
+from .mwis_exact import (ExactMWISSolver, clique_cover_bound, connected_components,
+                         solve_mwis_exact, to_bitsets)
+
+log = get_logger('nash.mwis')
+
 def _euclidean_2d(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
     return math.hypot(a[0]-b[0], a[1]-b[1])
 
@@ -30,9 +43,23 @@ class MWISSolver:
     def __init__(self, solver_config, training_mode=False):
         """Initialize with solver configuration"""
         self.max_exact = solver_config['max_exact']
+        self.parallel_component_size = solver_config.get('parallel_component_size', 30)
+        self.parallel_components = solver_config.get('parallel_components', False)
         self.max_go_agents = solver_config['max_go_agents']
         self.center = solver_config['intersection_center']
         self.deadlock_core_half_size = solver_config.get('deadlock_core_half_size', 10.0)
+        
+        # Anytime mode: every call gets a deadline; large components are
+        # improved from the greedy seed instead of being left greedy
+        self.anytime = solver_config.get('anytime', True)
+        self.timeout_seconds = solver_config.get('timeout_seconds', 5.0)
+        logic_interval = solver_config.get('logic_update_interval_seconds', 1.0)
+        if self.anytime:
+            self.time_budget = min(self.timeout_seconds,
+                                   logic_interval * solver_config.get('logic_budget_fraction', 0.2))
+        else:
+            self.time_budget = self.timeout_seconds
+        self.last_call = {}  # 上一次求解的耗时、权重、上界和最优性差距
         self.region_entry_blocked = False
         self.last_entry_block_check = 0
         self.entry_block_check_interval = 1.0
@@ -42,10 +69,30 @@ class MWISSolver:
         # SPEED UP: Store training mode to disable verbose logging
         self.training_mode = training_mode
         
+        # Bitset branch-and-bound exact solver (component solutions memoized across rounds)
+        self.exact_solver = ExactMWISSolver()
+        self._component_pool = None  # 大分量并行求解的进程池（按需创建，close() 释放）
+        
+        # 连通分量大小直方图 {size: count}
+        self.component_sizes = Counter()
+        
         # Performance tracking
         self.stats = {
             'mwis_exact_calls': 0,
             'mwis_greedy_calls': 0,
+            'mwis_bnb_nodes': 0,
+            'mwis_memo_hits': 0,
+            'mwis_components': 0,
+            'mwis_singletons': 0,
+            'mwis_parallel_batches': 0,
+            'mwis_parallel_timeouts': 0,
+            'mwis_calls': 0,
+            'mwis_anytime_calls': 0,
+            'mwis_timeouts': 0,
+            'mwis_time_used_total': 0.0,
+            'mwis_time_used_max': 0.0,
+            'mwis_gap_total': 0.0,
+            'mwis_gap_max': 0.0,
             'entry_blocks_activated': 0,
             'entry_blocks_released': 0
         }
@@ -58,45 +105,65 @@ class MWISSolver:
             return []
         
         # Check if there are any conflicts
-        total_conflicts = sum(conflict_analysis.values())
+        total_conflicts = count_conflicts(conflict_analysis)
         if total_conflicts == 0:
-            if not self.training_mode:
-                print("🚀 No conflicts detected - all candidates can proceed")
+            log.info("🚀 No conflicts detected - all candidates can proceed")
             # No conflicts, return all candidates sorted by weight
             indexed_weights = [(i, weights[i]) for i in range(n)]
             indexed_weights.sort(key=lambda x: x[1], reverse=True)
             
             selected = [i for i, _ in indexed_weights]
-            if not self.training_mode:
-                print(f"✅ No conflicts: selected all {len(selected)} candidates")
+            log.info("✅ No conflicts: selected all {} candidates", len(selected))
             return selected
         
-        if not self.training_mode:
-            print(f"⚡ Conflicts detected ({total_conflicts}) - applying STRICT MWIS resolution")
+        log.info("⚡ Conflicts detected ({}) - applying STRICT MWIS resolution", total_conflicts)
         
-        # Use exact solver for small problems, greedy for large ones
-        if n <= self.max_exact:
-            self.stats['mwis_exact_calls'] += 1
-            selected = self._solve_mwis_exact(weights, adj)
-            if not self.training_mode:
-                print(f"🎯 Exact MWIS: selected {len(selected)}/{n} candidates")
-        else:
-            self.stats['mwis_greedy_calls'] += 1
-            selected = self._solve_mwis_greedy(weights, adj)
-            if not self.training_mode:
-                print(f"🎯 Greedy MWIS: selected {len(selected)}/{n} candidates")
+        # Split into connected components: singletons go immediately,
+        # small components are solved exactly, large ones greedily (anytime:
+        # greedy seed improved until the deadline)
+        call_start = time.perf_counter()
+        deadline = call_start + self.time_budget
+        bound = 0.0
+        complete = True
+        selected = []
+        exact_jobs = []
+        for component in self._connected_components(adj):
+            self.component_sizes[len(component)] += 1
+            self.stats['mwis_components'] += 1
+            
+            if len(component) == 1:
+                self.stats['mwis_singletons'] += 1
+                selected.extend(component)
+                bound += max(weights[component[0]], 0.0)
+                continue
+            
+            sub_weights, sub_adj = self._subgraph(component, weights, adj)
+            if len(component) <= self.max_exact:
+                exact_jobs.append((component, sub_weights, sub_adj))
+            else:
+                sub_selected, sub_bound, sub_complete = self._solve_large_component(sub_weights, sub_adj, deadline)
+                selected.extend(component[k] for k in sub_selected)
+                bound += sub_bound
+                complete = complete and sub_complete
+        
+        for component, sub_selected, sub_bound, sub_complete in self._solve_exact_components(exact_jobs, deadline):
+            selected.extend(component[k] for k in sub_selected)
+            bound += sub_bound
+            complete = complete and sub_complete
+        selected.sort()
+        self._record_call(time.perf_counter() - call_start, sum(weights[i] for i in selected), bound, complete)
+        
+        log.info("🎯 MWIS over {} exact component(s): selected {}/{} candidates", len(exact_jobs), len(selected), n)
         
         # Verify the solution is actually independent
         if not self._is_independent_set(selected, adj):
-            if not self.training_mode:
-                print("❌ WARNING: MWIS solution is not independent! Falling back to single highest bidder")
+            log.warning("❌ WARNING: MWIS solution is not independent! Falling back to single highest bidder")
             # Emergency fallback: select only the highest bidder
             if weights:
                 max_idx = max(range(len(weights)), key=lambda i: weights[i])
                 selected = [max_idx]
         
-        if not self.training_mode:
-            print(f"🔒 STRICT enforcement: {len(selected)} conflict-free candidates selected")
+        log.info("🔒 STRICT enforcement: {} conflict-free candidates selected", len(selected))
         return selected
 
     def assemble_winners_with_traffic_control(self, candidates: List, selected_idx: List[int], 
@@ -104,7 +171,7 @@ class MWISSolver:
                                              vehicle_states: Dict[str, Dict]) -> List:
         """Assemble winners with STRICT conflict resolution - only MWIS winners can GO"""
         if not selected_idx:
-            print("❌ No candidates selected by MWIS")
+            log.info("❌ No candidates selected by MWIS")
             return []
         
         # Sort ALL candidates by weight (bid value) in descending order for ranking
@@ -117,10 +184,10 @@ class MWISSolver:
         winners = []
         go_count = 0
         
-        print(f"🏆 Assembling winners with STRICT conflict resolution:")
-        print(f"   📊 Total candidates: {len(all_candidates_with_weights)}")
-        print(f"   🎯 MWIS selected: {len(selected_idx)} candidates")
-        print(f"   🚦 NO GO LIMIT - All MWIS winners can proceed")
+        log.info("🏆 Assembling winners with STRICT conflict resolution:")
+        log.info("   📊 Total candidates: {}", len(all_candidates_with_weights))
+        log.info("   🎯 MWIS selected: {} candidates", len(selected_idx))
+        log.info("   🚦 NO GO LIMIT - All MWIS winners can proceed")
         
         for rank, (candidate, weight, idx) in enumerate(all_candidates_with_weights, 1):
             agent = self._get_agent(candidate)
@@ -133,29 +200,34 @@ class MWISSolver:
                 if self.region_entry_blocked and self._should_block_entry(agent, vehicle_states):
                     action = 'wait'
                     reason = "traffic flow control"
-                    print(f"   🚧 #{rank}: {getattr(agent, 'type', 'unknown')} {getattr(agent, 'id', 'unknown')}: WAIT ({reason})")
+                    log.info("   🚧 #{}: {} {}: WAIT ({})",
+                             rank, getattr(agent, 'type', 'unknown'), getattr(agent, 'id', 'unknown'), reason)
                 else:
                     action = 'go'
                     go_count += 1
                     reason = f"MWIS winner #{go_count} (no limit)"
-                    print(f"   🟢 #{rank}: {getattr(agent, 'type', 'unknown')} {getattr(agent, 'id', 'unknown')}: GO ({reason})")
+                    log.info("   🟢 #{}: {} {}: GO ({})",
+                             rank, getattr(agent, 'type', 'unknown'), getattr(agent, 'id', 'unknown'), reason)
             else:
                 # This candidate was NOT selected by MWIS (has conflicts)
                 action = 'wait'
                 reason = "conflict detected"
-                print(f"   🔴 #{rank}: {getattr(agent, 'type', 'unknown')} {getattr(agent, 'id', 'unknown')}: WAIT ({reason})")
+                log.info("   🔴 #{}: {} {}: WAIT ({})",
+                         rank, getattr(agent, 'type', 'unknown'), getattr(agent, 'id', 'unknown'), reason)
             
             winner = self._to_winner(candidate, action, rank)
             winners.append(winner)
         
         # Statistics
-        go_winners = [w for w in winners if w.conflict_action == 'go']
-        wait_winners = [w for w in winners if w.conflict_action == 'wait']
-        
-        print(f"✅ STRICT conflict resolution completed:")
-        print(f"   🟢 GO: {len(go_winners)} agents (no limit)")
-        print(f"   🔴 WAIT: {len(wait_winners)} agents")
-        print(f"   📈 Conflict resolution rate: {len(selected_idx)}/{len(candidates)} = {len(selected_idx)/len(candidates)*100:.1f}%")
+        if log.enabled(INFO):
+            go_winners = [w for w in winners if w.conflict_action == 'go']
+            wait_winners = [w for w in winners if w.conflict_action == 'wait']
+            
+            log.info("✅ STRICT conflict resolution completed:")
+            log.info("   🟢 GO: {} agents (no limit)", len(go_winners))
+            log.info("   🔴 WAIT: {} agents", len(wait_winners))
+            log.info("   📈 Conflict resolution rate: {}/{} = {:.1f}%",
+                     len(selected_idx), len(candidates), len(selected_idx) / len(candidates) * 100)
         
         return winners
 
@@ -177,22 +249,157 @@ class MWISSolver:
             if not self.region_entry_blocked:
                 self.region_entry_blocked = True
                 self.stats['entry_blocks_activated'] += 1
-                print(f"\n🚫 TRAFFIC FLOW CONTROL ACTIVATED")
-                print(f"   🔴 {stalled_count} stalled vehicles in core region (threshold: {self.stalled_vehicles_threshold})")
-                print(f"   🚧 Blocking new entries until region clears")
+                log.info("🚫 TRAFFIC FLOW CONTROL ACTIVATED")
+                log.info("   🔴 {} stalled vehicles in core region (threshold: {})",
+                         stalled_count, self.stalled_vehicles_threshold)
+                log.info("   🚧 Blocking new entries until region clears")
         else:
             if self.region_entry_blocked:
                 # Check if all previously stalled vehicles are now moving
                 if self._all_stalled_vehicles_recovered(core_vehicles):
                     self.region_entry_blocked = False
                     self.stats['entry_blocks_released'] += 1
-                    print(f"\n✅ TRAFFIC FLOW CONTROL RELEASED")
-                    print(f"   🟢 Stalled vehicles recovered ({stalled_count} remaining)")
-                    print(f"   🚦 Allowing new entries to core region")
+                    log.info("✅ TRAFFIC FLOW CONTROL RELEASED")
+                    log.info("   🟢 Stalled vehicles recovered ({} remaining)", stalled_count)
+                    log.info("   🚦 Allowing new entries to core region")
 
-    def _solve_mwis_exact(self, weights: List[float], adj: List[Set[int]]) -> List[int]:
-        """Exact MWIS solver using brute force for small problems"""
-        return self._solve_mwis_brute_force(weights, adj)
+    def _connected_components(self, adj: List[Set[int]]) -> List[List[int]]:
+        """Connected components of the conflict graph as ascending vertex lists"""
+        nbr = to_bitsets(adj)
+        components = connected_components((1 << len(adj)) - 1, nbr)
+        result = []
+        for component in components:
+            vertices = []
+            while component:
+                low = component & -component
+                vertices.append(low.bit_length() - 1)
+                component ^= low
+            result.append(vertices)
+        return result
+
+    def _subgraph(self, component: List[int], weights: List[float],
+                  adj: List[Set[int]]) -> Tuple[List[float], List[Set[int]]]:
+        """Weights and adjacency of a component, relabelled to 0..k-1"""
+        position = {v: k for k, v in enumerate(component)}
+        sub_weights = [weights[v] for v in component]
+        sub_adj = [{position[u] for u in adj[v] if u in position} for v in component]
+        return sub_weights, sub_adj
+
+    def _solve_exact_components(self, jobs: List[Tuple[List[int], List[float], List[Set[int]]]],
+                                deadline: float):
+        """
+        Solve components exactly (up to the deadline). With
+        ``parallel_components`` several large ones go to worker processes;
+        components whose worker misses the deadline are finished serially
+        (best-so-far).
+        Yields (component, local selection, upper bound, proven optimal).
+        """
+        large = [k for k, job in enumerate(jobs) if len(job[0]) >= self.parallel_component_size]
+        parallel_results = {}
+        if self.parallel_components and len(large) >= 2:
+            try:
+                if self._component_pool is None:
+                    # spawn 会在子进程中重新导入 __main__：入口脚本必须有 __name__ == '__main__' 保护
+                    self._component_pool = ProcessPoolExecutor(
+                        max_workers=min(len(large), os.cpu_count() or 1, 4),
+                        mp_context=multiprocessing.get_context('spawn'))
+                # perf_counter 截止时间无法跨进程传递：换算为绝对墙钟时间，子进程启动和排队时间也计入
+                wall_deadline = time.time() + (deadline - time.perf_counter())
+                futures = [(k, self._component_pool.submit(solve_mwis_exact, jobs[k][1], jobs[k][2],
+                                                           None, wall_deadline))
+                           for k in large]
+                for k, future in futures:
+                    try:
+                        parallel_results[k] = future.result(timeout=max(deadline - time.perf_counter(), 0.0))
+                    except FutureTimeoutError:
+                        future.cancel()
+                        self.stats['mwis_parallel_timeouts'] += 1
+                self.stats['mwis_parallel_batches'] += 1
+                self.stats['mwis_exact_calls'] += len(parallel_results)
+            except Exception as e:
+                log.warning("[Warning] Parallel MWIS failed, solving serially: {}", e)
+                parallel_results = {}
+                self.close()
+        
+        for k, (component, sub_weights, sub_adj) in enumerate(jobs):
+            if k in parallel_results:
+                yield (component,) + tuple(parallel_results[k])
+            else:
+                self.stats['mwis_exact_calls'] += 1
+                sub_selected = self._solve_mwis_exact(sub_weights, sub_adj, deadline)
+                yield component, sub_selected, self.exact_solver.last_bound, self.exact_solver.last_complete
+
+    def _solve_large_component(self, weights: List[float], adj: List[Set[int]],
+                               deadline: float) -> Tuple[List[int], float, bool]:
+        """Component above max_exact: greedy, then (anytime) improved from the greedy seed until the deadline"""
+        self.stats['mwis_greedy_calls'] += 1
+        greedy = self._solve_mwis_greedy(weights, adj)
+        if self.anytime:
+            self.stats['mwis_anytime_calls'] += 1
+            selected = self._solve_mwis_exact(weights, adj, deadline, initial=greedy)
+            return selected, self.exact_solver.last_bound, self.exact_solver.last_complete
+        
+        positive = 0
+        for i, weight in enumerate(weights):
+            if weight > 0:
+                positive |= 1 << i
+        return greedy, clique_cover_bound(weights, to_bitsets(adj), positive), False
+
+    def _record_call(self, seconds: float, weight: float, bound: float, complete: bool):
+        """Time used and optimality gap ((bound - weight) / bound) of one solve_mwis_adaptive call"""
+        bound = max(bound, weight)
+        gap = 0.0 if complete or bound <= 0 else (bound - weight) / bound
+        self.stats['mwis_calls'] += 1
+        self.stats['mwis_timeouts'] += 0 if complete else 1
+        self.stats['mwis_time_used_total'] += seconds
+        self.stats['mwis_time_used_max'] = max(self.stats['mwis_time_used_max'], seconds)
+        self.stats['mwis_gap_total'] += gap
+        self.stats['mwis_gap_max'] = max(self.stats['mwis_gap_max'], gap)
+        self.last_call = {
+            'time_used_s': seconds,
+            'weight': weight,
+            'upper_bound': bound,
+            'gap': gap,
+            'optimal': complete,
+        }
+
+    def get_anytime_stats(self) -> Dict:
+        """Per-call time used and solution quality gap (vs. clique-cover upper bound)"""
+        calls = self.stats['mwis_calls']
+        return {
+            'anytime': self.anytime,
+            'time_budget_s': self.time_budget,
+            'calls': calls,
+            'timeouts': self.stats['mwis_timeouts'],
+            'mean_time_used_s': self.stats['mwis_time_used_total'] / calls if calls else 0.0,
+            'max_time_used_s': self.stats['mwis_time_used_max'],
+            'mean_gap': self.stats['mwis_gap_total'] / calls if calls else 0.0,
+            'max_gap': self.stats['mwis_gap_max'],
+            'last_call': dict(self.last_call),
+        }
+
+    def close(self):
+        """Release the component worker pool (call when this solver is replaced or discarded)"""
+        if self._component_pool is not None:
+            self._component_pool.shutdown(wait=False)
+            self._component_pool = None
+
+    def _solve_mwis_exact(self, weights: List[float], adj: List[Set[int]],
+                          deadline: Optional[float] = None, initial: Optional[List[int]] = None) -> List[int]:
+        """Exact MWIS solver: bitset branch-and-bound per connected component, best-so-far at the deadline"""
+        nodes_before = self.exact_solver.stats['bnb_nodes']
+        hits_before = self.exact_solver.stats['memo_hits']
+        
+        selected = self.exact_solver.solve(weights, adj, deadline=deadline, initial=initial)
+        
+        self.stats['mwis_bnb_nodes'] += self.exact_solver.stats['bnb_nodes'] - nodes_before
+        self.stats['mwis_memo_hits'] += self.exact_solver.stats['memo_hits'] - hits_before
+        if log.enabled(INFO):
+            total_weight = sum(weights[i] for i in selected)
+            log.info("🔍 Branch-and-bound MWIS: {} candidates, total weight: {:.1f} ({} nodes{})",
+                     len(selected), total_weight, self.exact_solver.stats['bnb_nodes'] - nodes_before,
+                     '' if self.exact_solver.last_complete else ', deadline reached')
+        return selected
 
     def _solve_mwis_greedy(self, weights: List[float], adj: List[Set[int]]) -> List[int]:
         """Improved greedy MWIS solver with conflict verification"""
@@ -210,8 +417,7 @@ class MWISSolver:
         selected = []
         excluded = set()
         
-        if not self.training_mode:
-            print(f"🧮 Greedy MWIS processing {len(vertices)} candidates:")
+        log.info("🧮 Greedy MWIS processing {} candidates:", len(vertices))
         
         for v in vertices:
             if v not in excluded:
@@ -221,44 +427,19 @@ class MWISSolver:
                 excluded.update(neighbors_to_exclude)
                 excluded.add(v)  # Mark as processed
                 
-                if not self.training_mode:
-                    print(f"   ✅ Selected candidate {v} (weight: {weights[v]:.1f}, excluded {len(neighbors_to_exclude)} neighbors)")
+                log.debug("   ✅ Selected candidate {} (weight: {:.1f}, excluded {} neighbors)",
+                          v, weights[v], len(neighbors_to_exclude))
             else:
-                if not self.training_mode:
-                    print(f"   ❌ Skipped candidate {v} (weight: {weights[v]:.1f}, conflicts with selected)")
+                log.debug("   ❌ Skipped candidate {} (weight: {:.1f}, conflicts with selected)", v, weights[v])
         
         # Verify independence
         if not self._is_independent_set(selected, adj):
-            if not self.training_mode:
-                print("❌ ERROR: Greedy solution is not independent!")
+            log.error("❌ ERROR: Greedy solution is not independent!")
             return []
         
-        if not self.training_mode:
-            print(f"✅ Greedy MWIS completed: {len(selected)} independent candidates")
+        log.info("✅ Greedy MWIS completed: {} independent candidates", len(selected))
         return selected
 
-    def _solve_mwis_brute_force(self, weights: List[float], adj: List[Set[int]]) -> List[int]:
-        """Brute force MWIS solver with strict independence verification"""
-        n = len(weights)
-        best_weight = -1
-        best_set = []
-        
-        print(f"🔍 Brute force MWIS: checking {2**n} possible combinations")
-        
-        # Try all possible subsets
-        for mask in range(1 << n):
-            subset = [i for i in range(n) if mask & (1 << i)]
-            
-            # Check if subset is independent (no conflicts)
-            if self._is_independent_set(subset, adj):
-                weight = sum(weights[i] for i in subset)
-                if weight > best_weight:
-                    best_weight = weight
-                    best_set = subset
-        
-        print(f"🎯 Brute force result: {len(best_set)} candidates, total weight: {best_weight:.1f}")
-        return best_set
-
     def _is_independent_set(self, subset: List[int], adj: List[Set[int]]) -> bool:
         """Strictly verify that a subset is an independent set (no conflicts)"""
         if not subset:
@@ -403,5 +584,5 @@ class MWISSolver:
             return False
             
         except Exception as e:
-            print(f"[Warning] Transit check failed for agent {agent}: {e}")
+            log.warning("[Warning] Transit check failed for agent {}: {}", agent, e)
             return False
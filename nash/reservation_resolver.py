@@ -0,0 +1,332 @@
+"""
+时空预约求解器 (Space-time reservation resolver)
+
+Alternative to ``DeadlockNashSolver.resolve``: instead of a binary GO/WAIT
+from MWIS over a conflict graph with a scalar ETA window, the junction core
+(``deadlock_core_half_size`` square) is discretized into cells × time slots
+and each winner books the cells it is predicted to occupy:
+
+- a winner's path follows its movement (approach and turn from
+  ConflictAnalyzer) in its own lane: position -> core edge on the approach
+  arm -> core edge on the exit arm -> out, keeping the vehicle's lateral
+  offset from the arm axis, so opposite straight movements do not share
+  cells; it is sampled every half cell and timed with
+  ``max(speed, reservation_min_speed)``
+- each sample occupies the cells within ``reservation_vehicle_radius`` from
+  the time the front reaches it until the tail (vehicle or whole platoon)
+  has passed, widened by ``reservation_safety_margin``
+- committed agents (inside the core, or holding a reservation and unable
+  to stop before the core at ``reservation_decel``) keep GO and re-book
+  first; all other reservations are released and re-requested in auction
+  rank order, granted only if every (cell, slot) entry is free
+
+Two vehicles that cross the same cell at different times both get GO,
+which the conflict graph cannot express. Same call signature and return
+value as ``DeadlockNashSolver.resolve``, so the auction engine can use
+either (``SystemConfig.conflict_resolver``).
+"""
+
+import math
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from config.unified_config import UnifiedConfig, get_config
+from env.event_log import INFO, get_logger
+
+from .conflict_analyzer import ConflictAnalyzer
+
+try:
+    try:
+        from ..auction.auction_engine import AuctionWinner  # type: ignore
+    except Exception:
+        from auction.auction_engine import AuctionWinner
+except Exception:
+    AuctionWinner = None
+
+log = get_logger('nash.reservation')
+
+Booking = Tuple[int, int, int]  # (cell ix, cell iy, time slot)
+
+
+class ReservationTable:
+    """Occupancy of core cells per time slot: (ix, iy, slot) -> agent key"""
+
+    def __init__(self, center, half_size: float, cell_size: float, slot_seconds: float):
+        self.x0 = center[0] - half_size
+        self.y0 = center[1] - half_size
+        self.cell_size = cell_size
+        self.slot_seconds = slot_seconds
+        self.cells_per_side = max(1, int(math.ceil(2 * half_size / cell_size)))
+        self._owner: Dict[Booking, str] = {}
+        self._bookings: Dict[str, Set[Booking]] = {}
+
+    def footprint(self, samples: List[Tuple[float, float, float, float]], radius: float) -> Set[Booking]:
+        """(cell, slot) entries covered by samples (x, y, t_enter, t_exit) of a vehicle of the given radius"""
+        entries = set()
+        last = self.cells_per_side - 1
+        for x, y, t_enter, t_exit in samples:
+            ix0 = int((x - radius - self.x0) // self.cell_size)
+            ix1 = int((x + radius - self.x0) // self.cell_size)
+            iy0 = int((y - radius - self.y0) // self.cell_size)
+            iy1 = int((y + radius - self.y0) // self.cell_size)
+            if ix1 < 0 or iy1 < 0 or ix0 > last or iy0 > last:
+                continue
+            slots = range(int(t_enter // self.slot_seconds), int(t_exit // self.slot_seconds) + 1)
+            for ix in range(max(ix0, 0), min(ix1, last) + 1):
+                for iy in range(max(iy0, 0), min(iy1, last) + 1):
+                    for slot in slots:
+                        entries.add((ix, iy, slot))
+        return entries
+
+    def is_free(self, entries: Set[Booking], agent_key: str) -> bool:
+        owner = self._owner
+        return all(owner.get(entry, agent_key) == agent_key for entry in entries)
+
+    def book(self, entries: Set[Booking], agent_key: str) -> int:
+        """Book entries for an agent (replacing its previous booking); returns entries held by others"""
+        self.release(agent_key)
+        overlaps = 0
+        for entry in entries:
+            if entry in self._owner:
+                overlaps += 1  # 强制预约（已在核心区内的车辆）与他人重叠，保留原持有者
+                continue
+            self._owner[entry] = agent_key
+        self._bookings[agent_key] = {entry for entry in entries if self._owner.get(entry) == agent_key}
+        return overlaps
+
+    def release(self, agent_key: str):
+        for entry in self._bookings.pop(agent_key, ()):
+            if self._owner.get(entry) == agent_key:
+                del self._owner[entry]
+
+    def expire(self, current_time: float):
+        """Drop entries in slots that have already passed"""
+        current_slot = int(current_time // self.slot_seconds)
+        for agent_key in list(self._bookings):
+            entries = {entry for entry in self._bookings[agent_key] if entry[2] >= current_slot}
+            for entry in self._bookings[agent_key] - entries:
+                if self._owner.get(entry) == agent_key:
+                    del self._owner[entry]
+            if entries:
+                self._bookings[agent_key] = entries
+            else:
+                del self._bookings[agent_key]
+
+    def holds(self, agent_key: str) -> bool:
+        return agent_key in self._bookings
+
+    def __len__(self) -> int:
+        return len(self._owner)
+
+    def active_agents(self) -> int:
+        return len(self._bookings)
+
+
+class ReservationResolver:
+    """
+    Space-time reservation resolver for auction winners.
+    Drop-in alternative to DeadlockNashSolver.resolve.
+    """
+
+    def __init__(self, intersection_center=None, unified_config: UnifiedConfig = None, **kwargs):
+        if unified_config is None:
+            unified_config = get_config()
+        if intersection_center is not None:
+            unified_config.system.intersection_center = intersection_center
+        unified_config.update_from_drl_params(**kwargs)
+
+        self.unified_config = unified_config
+        self.training_mode = unified_config.system.training_mode
+        self.solver_config = unified_config.to_solver_config()
+        self._configure()
+
+        self.stats = {
+            'resolutions_completed': 0,
+            'requests': 0,
+            'granted': 0,
+            'denied': 0,
+            'forced': 0,
+            'forced_overlaps': 0,
+            'total_processing_time': 0.0,
+            'avg_processing_time': 0.0
+        }
+
+    def _configure(self):
+        config = self.solver_config
+        self.center = config['intersection_center']
+        self.core_half_size = config['deadlock_core_half_size']
+        self.min_speed = config['reservation_min_speed']
+        self.vehicle_length = config['reservation_vehicle_length']
+        self.vehicle_radius = config['reservation_vehicle_radius']
+        self.platoon_gap = config['reservation_platoon_gap']
+        self.safety_margin = config['reservation_safety_margin']
+        self.decel = config['reservation_decel']
+        self.commit_buffer = config['reservation_commit_buffer']
+        # 转向/ETA推断与冲突分析器共用
+        self.conflict_analyzer = ConflictAnalyzer(config)
+        # 网格不变时保留已有预约
+        table_key = (tuple(self.center), self.core_half_size,
+                     config['reservation_cell_size'], config['reservation_slot_seconds'])
+        if getattr(self, '_table_key', None) != table_key:
+            self.table = ReservationTable(self.center, self.core_half_size,
+                                          config['reservation_cell_size'], config['reservation_slot_seconds'])
+            self._table_key = table_key
+
+    def update_config_params(self, **kwargs):
+        """Update configuration parameters dynamically (reservations kept unless the grid changes)"""
+        self.unified_config.update_from_drl_params(**kwargs)
+        self.solver_config = self.unified_config.to_solver_config()
+        self._configure()
+        log.info("🔄 Reservation resolver: Configuration updated with {} parameters", len(kwargs))
+
+    def resolve(self, auction_winners: List, vehicle_states: Dict[str, Dict],
+                platoon_manager=None, current_time: float = None) -> List:
+        """
+        Grant GO to winners whose predicted core occupancy is free
+
+        Args:
+            current_time: simulation time; slots are absolute in this clock
+                (defaults to wall clock for callers without a frame clock)
+        """
+        start_time = time.time()
+        if current_time is None:
+            current_time = start_time
+        self.table.expire(current_time)
+
+        requests = []
+        for winner in auction_winners:
+            agent = winner.participant
+            state = self.conflict_analyzer._lookup_state(agent, vehicle_states, platoon_manager)
+            key = self.conflict_analyzer._agent_key(agent)
+            entries = self._predict_occupancy(agent, state, current_time) if state else set()
+            # 已在核心区内、或持有预约且无法在核心区前停下的车辆：优先续约
+            committed = bool(state) and (self._in_core(state['location']) or
+                                         (self.table.holds(key) and not self._can_stop(state)))
+            if not committed:
+                self.table.release(key)
+            requests.append((winner, key, entries, committed))
+
+        actions = {}
+        for winner, key, entries, committed in sorted(requests, key=lambda r: (not r[3], r[0].rank)):
+            self.stats['requests'] += 1
+            if committed:
+                self.stats['forced'] += 1
+                self.stats['forced_overlaps'] += self.table.book(entries, key)
+                actions[id(winner)] = 'go'
+            elif entries and self.table.is_free(entries, key):
+                self.table.book(entries, key)
+                self.stats['granted'] += 1
+                actions[id(winner)] = 'go'
+            else:
+                self.stats['denied'] += 1
+                actions[id(winner)] = 'wait'
+
+        resolved = [self._copy_winner_with_action(w, actions[id(w)]) for w in auction_winners]
+
+        processing_time = time.time() - start_time
+        self.stats['resolutions_completed'] += 1
+        self.stats['total_processing_time'] += processing_time
+        self.stats['avg_processing_time'] = (
+            self.stats['total_processing_time'] / self.stats['resolutions_completed']
+        )
+        if log.enabled(INFO):
+            go_count = sum(1 for w in resolved if w.conflict_action == 'go')
+            log.info("🗓️ Reservation resolution: {} GO, {} WAIT ({} cell-slots booked by {} agents)",
+                     go_count, len(resolved) - go_count, len(self.table), self.table.active_agents())
+        return resolved
+
+    def _in_core(self, location) -> bool:
+        return (abs(location[0] - self.center[0]) <= self.core_half_size and
+                abs(location[1] - self.center[1]) <= self.core_half_size)
+
+    def _can_stop(self, state: Dict) -> bool:
+        """Whether the vehicle can still stop before the core boundary"""
+        location = state['location']
+        velocity = state.get('velocity', (0.0, 0.0, 0.0))
+        gap = max(abs(location[0] - self.center[0]), abs(location[1] - self.center[1])) - self.core_half_size
+        stopping_distance = (velocity[0] ** 2 + velocity[1] ** 2) / (2.0 * self.decel)
+        return gap > stopping_distance + self.commit_buffer
+
+    def _predict_occupancy(self, agent, state: Dict, current_time: float) -> Set[Booking]:
+        """(cell, slot) entries the agent occupies while driving its movement through the core"""
+        analyzer = self.conflict_analyzer
+        location = state['location']
+        velocity = state.get('velocity', (0.0, 0.0, 0.0))
+        speed = max(math.hypot(velocity[0], velocity[1]), self.min_speed)
+
+        turn = analyzer._infer_turn_enhanced(agent, state, {})
+        approach = analyzer._infer_approach_direction(location)
+        turns = [turn] if turn in analyzer.TURNS else ['straight', 'left', 'right']  # 未知转向：保守合并
+
+        vehicles = getattr(agent, 'vehicles', None) or [None]
+        occupant_length = len(vehicles) * self.vehicle_length + (len(vehicles) - 1) * self.platoon_gap
+        dwell = occupant_length / speed
+
+        step = self.table.cell_size * 0.5
+        entries = set()
+        for t in turns:
+            polyline = self._lane_polyline(location, approach, t)
+            samples = []
+            travelled = 0.0
+            for p, q in zip(polyline, polyline[1:]):
+                length = math.hypot(q[0] - p[0], q[1] - p[1])
+                count = max(1, int(math.ceil(length / step)))
+                for k in range(count + 1):
+                    x = p[0] + (q[0] - p[0]) * k / count
+                    y = p[1] + (q[1] - p[1]) * k / count
+                    t_front = current_time + (travelled + length * k / count) / speed
+                    samples.append((x, y, t_front - self.safety_margin, t_front + dwell + self.safety_margin))
+                travelled += length
+            entries |= self.table.footprint(samples, self.vehicle_radius)
+        return entries
+
+    def _lane_polyline(self, location, approach: str, turn: str) -> List[Tuple[float, float]]:
+        """Movement path through the core keeping the vehicle's lateral offset from the arm axis"""
+        analyzer = self.conflict_analyzer
+        pos = (location[0], location[1])
+        exit_arm = analyzer._exit_direction(approach, turn)
+        if not exit_arm:
+            return [pos]
+        cx, cy = self.center[0], self.center[1]
+        ox, oy = analyzer.ARM_VECTORS[approach]
+        ex, ey = analyzer.ARM_VECTORS[exit_arm]
+        # 横向偏移：相对行驶方向的左法向量 (驶入方向为 -arm，驶出方向为 +arm)
+        lateral = (pos[0] - cx) * oy - (pos[1] - cy) * ox
+        half = self.core_half_size
+        exit_distance = max(half * 2.0, 30.0)
+
+        def on_exit_arm(distance):
+            return (cx + ex * distance - ey * lateral, cy + ey * distance + ex * lateral)
+
+        polyline = [pos]
+        if not self._in_core(location):
+            polyline.append((cx + ox * half + oy * lateral, cy + oy * half - ox * lateral))
+        polyline.extend([on_exit_arm(half), on_exit_arm(exit_distance)])
+        return polyline
+
+    def _copy_winner_with_action(self, original_winner, action: str):
+        """Create a copy of winner with specified action"""
+        if AuctionWinner is not None:
+            try:
+                return AuctionWinner(
+                    participant=original_winner.participant,
+                    bid=original_winner.bid,
+                    rank=original_winner.rank,
+                    conflict_action=action
+                )
+            except Exception:
+                pass
+        original_winner.conflict_action = action
+        return original_winner
+
+    def get_performance_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['grant_rate'] = self.stats['granted'] / max(self.stats['granted'] + self.stats['denied'], 1)
+        stats['booked_cell_slots'] = len(self.table)
+        stats['active_reservations'] = self.table.active_agents()
+        return stats
+
+    def reset_stats(self):
+        for key in self.stats:
+            self.stats[key] = 0
+        log.info("🔄 Reservation resolver: All statistics reset")
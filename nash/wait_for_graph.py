@@ -0,0 +1,197 @@
+"""
+等待图死锁检测 (Wait-for graph with incremental cycle search)
+
+Explicit "who waits for whom" graph between vehicles, rebuilt from the
+controller decisions after every Nash resolution:
+
+- a stalled WAIT agent waits for every vehicle of the conflicting agents
+  that were given GO or are already in the junction
+- a stalled agent inside the junction waits for the conflicting agents
+  that are also inside the junction
+- a stalled vehicle waits for its leading vehicle in the same lane
+  (``lane_follow_edges``), which also chains platoon members
+
+Only stalled vehicles have outgoing edges, so a cycle is a set of stopped
+vehicles that each wait on the next one. Cycles are the strongly connected
+components (size >= 2, or a self-loop) found with an iterative Tarjan
+search. ``WaitForGraph.update`` diffs the new edge map against the previous
+one and only re-runs Tarjan from vertices whose out-edges changed (plus the
+members of cached cycles they touch); cycles that no search reaches are
+still valid, because a cycle can only appear or disappear through a changed
+out-edge. ``persistent_cycles`` reports cycles that have existed for a
+minimum time, with their member vehicle ids, so the resolver can release
+one of them.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+class WaitForGraph:
+    """Vehicle wait-for graph with incremental Tarjan SCC cycle detection"""
+
+    def __init__(self):
+        self._edges: Dict[str, FrozenSet[str]] = {}    # waiter -> blockers
+        self.cycles: List[FrozenSet[str]] = []         # current SCCs that contain a cycle
+        self._cycle_since: Dict[FrozenSet[str], float] = {}
+        self.stats = {
+            'updates': 0,
+            'unchanged_updates': 0,
+            'changed_vertices': 0,
+            'vertices_visited': 0,   # Tarjan work actually done
+            'vertices_total': 0,     # work a full recomputation would have done
+            'cycles_found': 0,
+        }
+
+    @property
+    def edges(self) -> Dict[str, FrozenSet[str]]:
+        return self._edges
+
+    def update(self, edges: Dict[str, Iterable[str]], timestamp: float) -> List[FrozenSet[str]]:
+        """Replace the edge map (waiter -> blockers) and return the current cycles"""
+        new_edges = {}
+        for waiter, blockers in edges.items():
+            blockers = frozenset(blockers)
+            if blockers:
+                new_edges[waiter] = blockers
+
+        old_edges = self._edges
+        changed = {v for v, blockers in new_edges.items() if old_edges.get(v) != blockers}
+        changed.update(v for v in old_edges if v not in new_edges)
+        self._edges = new_edges
+        self.stats['updates'] += 1
+        self.stats['vertices_total'] += len(new_edges)
+
+        if not changed:
+            self.stats['unchanged_updates'] += 1
+        else:
+            self.stats['changed_vertices'] += len(changed)
+            # 变化顶点 + 与其相交的旧环成员作为搜索起点
+            roots = set(changed)
+            for cycle in self.cycles:
+                if not cycle.isdisjoint(changed):
+                    roots.update(cycle)
+            found, visited = self._tarjan(roots)
+            self.stats['vertices_visited'] += len(visited)
+            kept = [cycle for cycle in self.cycles if cycle.isdisjoint(visited)]
+            self.stats['cycles_found'] += sum(1 for cycle in found if cycle not in self._cycle_since)
+            self.cycles = kept + found
+
+        # 记录每个环首次出现的时间（环消失即清除）
+        self._cycle_since = {cycle: self._cycle_since.get(cycle, timestamp) for cycle in self.cycles}
+        return self.cycles
+
+    def persistent_cycles(self, now: float, min_duration: float) -> List[Tuple[FrozenSet[str], float]]:
+        """Cycles that have existed for at least ``min_duration`` seconds, longest-lived first"""
+        result = [(cycle, now - since) for cycle, since in self._cycle_since.items()
+                  if now - since >= min_duration]
+        result.sort(key=lambda item: (-item[1], sorted(item[0])))
+        return result
+
+    def full_cycles(self) -> List[FrozenSet[str]]:
+        """Cycles recomputed from scratch (reference for the incremental search)"""
+        found, _ = self._tarjan(self._edges.keys())
+        return found
+
+    def reset(self):
+        self._edges = {}
+        self.cycles = []
+        self._cycle_since = {}
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['vertices'] = len(self._edges)
+        stats['edges'] = sum(len(blockers) for blockers in self._edges.values())
+        stats['active_cycles'] = len(self.cycles)
+        total = stats['vertices_total']
+        stats['visited_ratio'] = stats['vertices_visited'] / total if total else 0.0
+        return stats
+
+    def _tarjan(self, roots: Iterable[str]) -> Tuple[List[FrozenSet[str]], Set[str]]:
+        """Iterative Tarjan SCC over the vertices reachable from ``roots``"""
+        edges = self._edges
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        cycles: List[FrozenSet[str]] = []
+
+        for root in sorted(roots):
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(edges.get(root, ())))]
+            while work:
+                v, successors = work[-1]
+                for w in successors:
+                    if w not in index:
+                        index[w] = low[w] = len(index)
+                        stack.append(w)
+                        on_stack.add(w)
+                        work.append((w, iter(edges.get(w, ()))))
+                        break
+                    if w in on_stack and index[w] < low[v]:
+                        low[v] = index[w]
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if low[v] < low[parent]:
+                            low[parent] = low[v]
+                    if low[v] == index[v]:
+                        component = []
+                        while True:
+                            w = stack.pop()
+                            on_stack.discard(w)
+                            component.append(w)
+                            if w == v:
+                                break
+                        if len(component) > 1 or v in edges.get(v, ()):
+                            cycles.append(frozenset(component))
+
+        return cycles, set(index)
+
+
+def lane_follow_edges(vehicle_states: Dict[str, Dict], waiters: Iterable[str],
+                      max_gap: float) -> Dict[str, str]:
+    """
+    Same-lane leader of each waiting vehicle (``{follower id: leader id}``).
+
+    The leader is the closest vehicle in the same (road_id, lane_id) that is
+    ahead along the follower's heading and within ``max_gap`` meters.
+    """
+    lanes = defaultdict(list)
+    for vehicle_id, state in vehicle_states.items():
+        if state and 'location' in state:
+            lanes[(state.get('road_id'), state.get('lane_id'))].append(vehicle_id)
+
+    leaders = {}
+    for vehicle_id in waiters:
+        state = vehicle_states.get(vehicle_id)
+        if not state or 'location' not in state:
+            continue
+        rotation = state.get('rotation')
+        if not rotation:
+            continue
+        yaw = math.radians(rotation[1])
+        fx, fy = math.cos(yaw), math.sin(yaw)
+        x, y = state['location'][0], state['location'][1]
+
+        best: Optional[str] = None
+        best_gap = max_gap
+        for other_id in lanes.get((state.get('road_id'), state.get('lane_id')), ()):
+            if other_id == vehicle_id:
+                continue
+            location = vehicle_states[other_id]['location']
+            dx, dy = location[0] - x, location[1] - y
+            if dx * fx + dy * fy <= 0.0:
+                continue
+            gap = math.hypot(dx, dy)
+            if gap <= best_gap:
+                best, best_gap = other_id, gap
+        if best is not None:
+            leaders[vehicle_id] = best
+    return leaders
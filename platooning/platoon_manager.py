@@ -1,9 +1,12 @@
 import math
-import time
 from typing import Dict, List, Set, Optional, Tuple, Callable
 from collections import defaultdict
 
 from .platoon_policy import Platoon
+from env.frame_clock import clock_from
+from env.event_log import DEBUG, get_logger
+
+log = get_logger('platooning')
 
 class PlatoonConfiguration:
     """Configuration container for platoon parameters"""
@@ -37,13 +40,14 @@ class PlatoonManager:
         
         # External interfaces (optional)
         self._state_extractor = state_extractor
+        self._now = clock_from(state_extractor)  # simulation time when a state extractor is attached
         self._vehicle_filter_callback: Optional[Callable] = None
         self._direction_estimator_callback: Optional[Callable] = None
         
         # Core state
         self.platoons: List[Platoon] = []
         self.platoon_history: Dict[str, Platoon] = {}
-        self.last_update_time = 0
+        self.last_update_time = float('-inf')
         
         # Statistics
         self.formation_stats = {
@@ -52,7 +56,7 @@ class PlatoonManager:
             'successful_crossings': 0
         }
         
-        print("🚗 Modular Platoon Manager initialized")
+        log.debug("🚗 Modular Platoon Manager initialized")
     
     def set_vehicle_filter(self, filter_callback: Callable[[List[Dict]], List[Dict]]):
         """Set callback for filtering vehicles eligible for platooning"""
@@ -69,10 +73,10 @@ class PlatoonManager:
         Args:
             vehicle_states: Optional vehicle states. If None, will query state_extractor
         """
-        current_time = time.time()
+        current_time = self._now()
         
-        # Rate limiting
-        if current_time - self.last_update_time < self.config.update_interval:
+        # Rate limiting (simulation seconds; a world reset moves time backwards)
+        if 0.0 <= current_time - self.last_update_time < self.config.update_interval:
             return
         
         # Get vehicle states
@@ -132,6 +136,10 @@ class PlatoonManager:
     
     def _vehicle_speed(self, vehicle: Dict) -> float:
         """Helper to calculate vehicle speed"""
+        # Rows from the vehicle state table carry the precomputed planar speed
+        planar_speed = getattr(vehicle, 'planar_speed', None)
+        if planar_speed is not None:
+            return planar_speed
         velocity = vehicle.get('velocity', [0, 0, 0])
         return math.sqrt(velocity[0]**2 + velocity[1]**2)
     
@@ -236,7 +244,7 @@ class PlatoonManager:
                 if direction:
                     return direction
             except Exception as e:
-                print(f"[Direction] Failed to get route direction for vehicle {vehicle['id']}: {e}")
+                log.warning("[Direction] Failed to get route direction for vehicle {}: {}", vehicle['id'], e)
 
         # Fallback: Only use velocity if it's significant, and try to infer direction
         velocity = vehicle.get('velocity', [0, 0, 0])
@@ -244,7 +252,7 @@ class PlatoonManager:
             # You may implement a more sophisticated heading-to-direction mapping here
             return None  # Do not guess, skip if not sure
 
-        print(f"[Direction] No clear direction for vehicle {vehicle['id']}")
+        log.debug("[Direction] No clear direction for vehicle {}", vehicle['id'])
         return None
     
     def _find_adjacent_compatible_groups(self, sorted_vehicles_with_direction: List[Tuple]) -> List[List[Dict]]:
@@ -258,7 +266,7 @@ class PlatoonManager:
 
         for i, (vehicle, direction) in enumerate(sorted_vehicles_with_direction):
             if direction is None:
-                print(f"   Skipping vehicle {vehicle['id']} due to missing direction")
+                log.debug("   Skipping vehicle {} due to missing direction", vehicle['id'])
                 continue  # Skip vehicles with no direction
 
             if current_direction is None:
@@ -270,7 +278,8 @@ class PlatoonManager:
 
             if direction != current_direction:
                 if len(current_group) >= self.config.min_platoon_size:
-                    print(f"🔍 Found compatible group: {len(current_group)} vehicles, direction={current_direction}")
+                    log.debug("🔍 Found compatible group: {} vehicles, direction={}",
+                              len(current_group), current_direction)
                     groups.append(current_group)
                 current_group = [vehicle]
                 current_direction = direction
@@ -281,16 +290,18 @@ class PlatoonManager:
                 distance = self._vehicle_distance(prev_vehicle, vehicle)
                 if distance <= self.config.max_following_distance:
                     current_group.append(vehicle)
-                    print(f"   Added vehicle {vehicle['id']} to group (distance: {distance:.1f}m)")
+                    log.debug("   Added vehicle {} to group (distance: {:.1f}m)", vehicle['id'], distance)
                 else:
                     if len(current_group) >= self.config.min_platoon_size:
-                        print(f"🔍 Found compatible group: {len(current_group)} vehicles, direction={current_direction}")
+                        log.debug("🔍 Found compatible group: {} vehicles, direction={}",
+                                  len(current_group), current_direction)
                         groups.append(current_group)
                     current_group = [vehicle]
 
         # Add final group if valid
         if len(current_group) >= self.config.min_platoon_size and current_direction is not None:
-            print(f"🔍 Found final compatible group: {len(current_group)} vehicles, direction={current_direction}")
+            log.debug("🔍 Found final compatible group: {} vehicles, direction={}",
+                      len(current_group), current_direction)
             groups.append(current_group)
 
         return groups
@@ -298,7 +309,7 @@ class PlatoonManager:
     def _create_platoons_from_group(self, vehicle_group: List[Dict]) -> List[Platoon]:
         """Create platoons from a vehicle group - Enhanced with stricter validation"""
         if len(vehicle_group) < self.config.min_platoon_size:
-            print(f"❌ Group too small: {len(vehicle_group)} vehicles (need {self.config.min_platoon_size})")
+            log.debug("❌ Group too small: {} vehicles (need {})", len(vehicle_group), self.config.min_platoon_size)
             return []
         
         platoons = []
@@ -346,21 +357,21 @@ class PlatoonManager:
                         self.formation_stats['total_formed'] += 1
                         
                         # DEBUG: Enhanced logging
-                        leader_id = platoon.get_leader_id()
-                        follower_ids = platoon.get_follower_ids()
-                        print(f"✅ Formed valid platoon: {platoon.platoon_id}")
-                        print(f"   Size: {platoon.get_size()} vehicles")
-                        print(f"   Direction: {common_direction}")
-                        print(f"   Leader: {leader_id}")
-                        print(f"   Followers: {follower_ids}")
+                        if log.enabled(DEBUG):
+                            log.debug("✅ Formed valid platoon: {}", platoon.platoon_id)
+                            log.debug("   Size: {} vehicles", platoon.get_size())
+                            log.debug("   Direction: {}", common_direction)
+                            log.debug("   Leader: {}", platoon.get_leader_id())
+                            log.debug("   Followers: {}", platoon.get_follower_ids())
                     else:
-                        print(f"❌ Failed validation: size={platoon.get_size()}, valid={platoon.is_valid()}")
+                        log.debug("❌ Failed validation: size={}, valid={}", platoon.get_size(), platoon.is_valid())
                 else:
-                    print(f"❌ Formation validation failed for group")
+                    log.debug("❌ Formation validation failed for group")
             else:
-                print(f"❌ Direction mismatch: {len(directions)}/{len(platoon_vehicles)} have directions, unique={unique_directions}")
+                log.debug("❌ Direction mismatch: {}/{} have directions, unique={}",
+                          len(directions), len(platoon_vehicles), unique_directions)
                 if missing_direction_ids:
-                    print(f"   Vehicles missing direction: {missing_direction_ids}")
+                    log.debug("   Vehicles missing direction: {}", missing_direction_ids)
                 break  # Stop trying to form platoons from this group
         
         return platoons
@@ -374,10 +385,10 @@ class PlatoonManager:
         for i in range(len(vehicles) - 1):
             distance = self._vehicle_distance(vehicles[i], vehicles[i + 1])
             if distance > self.config.max_following_distance:
-                print(f"❌ Vehicles too far apart: {distance:.1f}m > {self.config.max_following_distance}m")
+                log.debug("❌ Vehicles too far apart: {:.1f}m > {}m", distance, self.config.max_following_distance)
                 return False
             if distance < 2.0:  # Too close
-                print(f"❌ Vehicles too close: {distance:.1f}m < 2.0m")
+                log.debug("❌ Vehicles too close: {:.1f}m < 2.0m", distance)
                 return False
         
         return True
@@ -388,7 +399,7 @@ class PlatoonManager:
             self.platoons.remove(platoon)
             self.platoon_history[platoon.platoon_id] = platoon
             self.formation_stats['total_dissolved'] += 1
-            print(f"❌ Dissolved platoon {platoon.platoon_id}: {reason}")
+            log.debug("❌ Dissolved platoon {}: {}", platoon.platoon_id, reason)
     
     def _cleanup_invalid_platoons(self):
         """Remove invalid or expired platoons"""
@@ -497,29 +508,31 @@ class PlatoonManager:
         }
 
     def print_platoon_info(self):
-        """Display platoon information (for debugging/monitoring)"""
+        """Display platoon information (for debugging/monitoring; 'platooning' logger at debug level)"""
+        if not log.enabled(DEBUG):
+            return
         stats = self.get_platoon_stats()
         
-        print(f"\n🚗 Platoon Management System Status")
-        print(f"📊 Overview:")
-        print(f"   Active platoons: {stats['num_platoons']}")
-        print(f"   Vehicles in platoons: {stats['vehicles_in_platoons']}")
-        print(f"   Average platoon size: {stats['avg_platoon_size']:.1f}")
-        print(f"   Ready for intersection: {stats['performance_summary']['ready_platoons']}")
+        log.debug("🚗 Platoon Management System Status")
+        log.debug("📊 Overview:")
+        log.debug("   Active platoons: {}", stats['num_platoons'])
+        log.debug("   Vehicles in platoons: {}", stats['vehicles_in_platoons'])
+        log.debug("   Average platoon size: {:.1f}", stats['avg_platoon_size'])
+        log.debug("   Ready for intersection: {}", stats['performance_summary']['ready_platoons'])
         
         if stats['direction_distribution']:
-            print(f"   Direction distribution: {stats['direction_distribution']}")
+            log.debug("   Direction distribution: {}", stats['direction_distribution'])
         
         if stats['formation_stats']['total_formed'] > 0:
-            print(f"   Formation history: {stats['formation_stats']['total_formed']} formed, "
-                  f"{stats['formation_stats']['total_dissolved']} dissolved")
+            log.debug("   Formation history: {} formed, {} dissolved",
+                      stats['formation_stats']['total_formed'], stats['formation_stats']['total_dissolved'])
         
         # Show individual platoon details (limited)
         if self.platoons:
-            print(f"\n🔍 Active Platoons:")
+            log.debug("🔍 Active Platoons:")
             for i, platoon in enumerate(self.platoons[:4]):  # Show top 4
                 perf = platoon.get_performance_summary()
-                print(f"   {i+1}. {platoon.platoon_id} "
-                      f"({platoon.get_size()} vehicles, {platoon.get_goal_direction()}) "
-                      f"Ready: {platoon.is_ready_for_intersection()}")
+                log.debug("   {}. {} ({} vehicles, {}) Ready: {}",
+                          i + 1, platoon.platoon_id, platoon.get_size(), platoon.get_goal_direction(),
+                          platoon.is_ready_for_intersection())
 
@@ -3,6 +3,8 @@ import time
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+from env.frame_clock import clock_from
+
 @dataclass
 class PlatoonMetrics:
     """Platoon performance metrics for monitoring and optimization"""
@@ -38,15 +40,18 @@ class Platoon:
         self.leader = self.vehicles[0] if self.vehicles else None
         self.intersection_center = intersection_center
         
+        # Simulation-time clock (falls back to wall clock without a state extractor)
+        self._now = clock_from(state_extractor)
+        
         # Platoon identity
         self.platoon_id = f"platoon_{self.leader['id']}" if self.leader else f"platoon_empty_{int(time.time())}"
-        self.formation_time = time.time()
-        self.last_update = time.time()
+        self.formation_time = self._now()
+        self.last_update = self.formation_time
         
         # Navigation system interface (optional)
         self._state_extractor = state_extractor
         self._cached_direction = None
-        self._direction_cache_time = 0
+        self._direction_cache_time = float('-inf')
         self._direction_cache_duration = 5.0  # Cache for 5 seconds
         
         # Platoon configuration
@@ -59,7 +64,7 @@ class Platoon:
         
         # Performance tracking
         self.metrics_history: List[PlatoonMetrics] = []
-        self._last_metrics_update = 0
+        self._last_metrics_update = float('-inf')
         self._metrics_update_interval = 1.0  # synchronized with other system intervals
     
     def _determine_initial_direction(self, provided_direction: Optional[str]) -> str:
@@ -97,7 +102,7 @@ class Platoon:
         # Apply updates
         self.vehicles = updated_vehicles
         self.leader = self.vehicles[0] if self.vehicles else None
-        self.last_update = time.time()
+        self.last_update = self._now()
         
         # Update navigation direction if needed
         self._refresh_navigation_cache()
@@ -109,7 +114,7 @@ class Platoon:
     
     def _refresh_navigation_cache(self):
         """Refresh navigation direction cache if needed"""
-        current_time = time.time()
+        current_time = self._now()
         if current_time - self._direction_cache_time > self._direction_cache_duration:
             new_direction = self._query_navigation_direction()
             if new_direction:
@@ -144,7 +149,7 @@ class Platoon:
     
     def _update_metrics_if_needed(self):
         """Update performance metrics if enough time has passed"""
-        current_time = time.time()
+        current_time = self._now()
         if current_time - self._last_metrics_update > self._metrics_update_interval:
             self._compute_and_store_metrics()
             self._last_metrics_update = current_time
@@ -269,7 +274,7 @@ class Platoon:
         """Check if platoon is valid and operational"""
         return (len(self.vehicles) >= 2 and 
                 self.leader is not None and 
-                time.time() - self.last_update < 10.0)
+                self._now() - self.last_update < 10.0)
     
     def get_size(self) -> int:
         """Get number of vehicles in platoon"""